@@ -32,10 +32,14 @@
 opposed to collapsing the whole dimension."""
 
 import iris
+from iris.exceptions import CoordinateNotFoundError
+import numpy as np
 
 from improver.blending.weights import ChooseDefaultWeightsTriangular
+from improver.utilities.cube_checker import find_percentile_coordinate
 from improver.utilities.cube_manipulation import concatenate_cubes
-from improver.blending.weighted_blend import WeightedBlendAcrossWholeDimension
+from improver.blending.weighted_blend import (
+    MaxProbabilityAggregator, WeightedBlendAcrossWholeDimension)
 
 
 class TriangularWeightedBlendAcrossAdjacentPoints(object):
@@ -120,6 +124,73 @@ class TriangularWeightedBlendAcrossAdjacentPoints(object):
             if old_coord.bounds is not None:
                 new_coord.bounds = old_coord.bounds
 
+    def blend_adjacent_points(self, cube, weights):
+        """
+        Blend each point in the coordinate with the adjacent points, using
+        the weights for each point in turn. Only the points with non-zero
+        weights, i.e. those within the width of the triangular weighting
+        function, are used to calculate each blended point, so the cost
+        does not grow with the square of the number of points along the
+        coordinate. The result is the same as collapsing the whole cube
+        with WeightedBlendAcrossWholeDimension for each point. For the
+        weighted_maximum mode, each unmasked point outside the band of
+        non-zero weights contributes a weighted value of zero to the
+        maximum, as when collapsing the whole cube.
+
+        Args:
+            cube : iris.cube.Cube
+                Cube to blend, for which the coordinate is associated with
+                a dimension.
+            weights : numpy.ndarray
+                Array of weights with a row for each point in the coordinate,
+                containing the weights of each point in the coordinate used
+                to calculate the blended value at that point.
+
+        Returns:
+            cube : iris.cube.Cube
+                Cube with the same coordinates as the input cube, containing
+                the blended data and a cell method for the blending.
+        """
+        dim, = cube.coord_dims(self.coord)
+        data = np.moveaxis(cube.data, dim, 0)
+        masked = isinstance(data, np.ma.MaskedArray)
+        average = np.ma.average if masked else np.average
+        result = np.empty(data.shape, dtype=np.result_type(data, weights))
+        if masked:
+            result = np.ma.masked_array(result, mask=np.ma.nomask)
+            present = ~np.ma.getmaskarray(data)
+            num_present = present.sum(axis=0)
+        for index, point_weights in enumerate(weights):
+            # The triangular weights are non-zero over a contiguous band of
+            # points around the point being blended.
+            nonzero, = np.nonzero(point_weights)
+            band = slice(nonzero[0], nonzero[-1] + 1)
+            band_weights = point_weights[band]
+            if self.mode == "weighted_mean":
+                result[index] = average(
+                    data[band], axis=0, weights=band_weights)
+            else:
+                band_weights = band_weights.reshape(
+                    (-1,) + (1,) * (data.ndim - 1))
+                weighted_max = np.max(data[band] * band_weights, axis=0)
+                if band.stop - band.start < len(point_weights):
+                    # The points outside the band have zero weights, so
+                    # each unmasked point contributes a weighted value of
+                    # zero to the maximum.
+                    zeros = np.zeros(weighted_max.shape)
+                    if masked:
+                        outside_present = (
+                            num_present - present[band].sum(axis=0) > 0)
+                        zeros = np.ma.masked_array(
+                            zeros, mask=~outside_present)
+                    weighted_max = MaxProbabilityAggregator.accumulate(
+                        weighted_max, zeros)
+                result[index] = weighted_max
+        blended_cube = cube.copy(data=np.moveaxis(result, 0, dim))
+        blended_cube.add_cell_method(
+            iris.coords.CellMethod(self.mode, coords=self.coord))
+        return blended_cube
+
     def process(self, cube):
         """
         Apply the weighted blend for each point in the given coordinate.
@@ -150,6 +221,18 @@ class TriangularWeightedBlendAcrossAdjacentPoints(object):
         # Set up a plugin to calculate the triangular weights.
         WeightsPlugin = ChooseDefaultWeightsTriangular(
             self.width, units=self.parameter_units)
+        # Blend all the points along the coordinate at once, using only the
+        # adjacent points with non-zero weights. Percentile data is blended
+        # using all points along the coordinate, as in the
+        # PercentileBlendingAggregator points with zero weights still
+        # contribute to the blended percentiles.
+        if cube.coord_dims(self.coord):
+            try:
+                find_percentile_coordinate(cube)
+            except CoordinateNotFoundError:
+                weights = WeightsPlugin.process(
+                    cube, self.coord, cube.coord(self.coord).points)
+                return self.blend_adjacent_points(cube, weights)
         # Set up the blending function, based on whether weighted blending or
         # maximum probabilities are needed.
         BlendingPlugin = WeightedBlendAcrossWholeDimension(self.coord,
@@ -41,6 +41,11 @@ from improver.utilities.cube_manipulation import add_renamed_cell_method
 from improver.utilities.cube_checker import find_percentile_coordinate
 
 
+# Maximum number of grid points blended at once by the
+# PercentileBlendingAggregator, to bound the memory required.
+PERCENTILE_BLEND_CHUNK_SIZE = 2**16
+
+
 class PercentileBlendingAggregator(object):
     """Class for the percentile blending aggregator
 
@@ -126,13 +131,14 @@ class PercentileBlendingAggregator(object):
         # Create the resulting data array, which is the shape of the original
         # data without dimension we are collapsing over
         result = np.zeros(input_shape[1:])
-        # Loop over the flattened data, i.e. across all the data points in
-        # each slice of the coordinate we are collapsing over, finding the
-        # blended percentile values at each point.
-        for i in range(data.shape[-1]):
-            result[:, i] = (
-                PercentileBlendingAggregator.blend_percentiles(
-                    data[:, :, i], arr_percent, arr_weights))
+        # Find the blended percentile values at all the data points in each
+        # slice of the coordinate we are collapsing over at once, in chunks
+        # of points to bound the memory required.
+        for start in range(0, data.shape[-1], PERCENTILE_BLEND_CHUNK_SIZE):
+            end = start + PERCENTILE_BLEND_CHUNK_SIZE
+            result[:, start:end] = (
+                PercentileBlendingAggregator.blend_percentiles_for_points(
+                    data[:, :, start:end], arr_percent, arr_weights))
         # Reshape the data and put the percentile dimension
         # back in the right place
         shape = arr_percent.shape + shape
@@ -153,10 +159,118 @@ class PercentileBlendingAggregator(object):
             result = np.moveaxis(result, 0, perc_dim)
         return result
 
+    @staticmethod
+    def _interpolate_for_points(x_values, xp_values, fp_values):
+        """ Linear interpolation, equivalent to np.interp, carried out
+            independently for each point along the final axis.
+
+        Args:
+            x_values : np.array
+                    Array of the values at which to interpolate, with
+                    shape: (num of values, num of points)
+            xp_values : np.array
+                    Array of the increasing values of the data to
+                    interpolate from, with shape:
+                    (num of data values, num of points)
+            fp_values : np.array
+                    Array of the data values corresponding to xp_values, with
+                    the same shape as xp_values.
+
+        Returns:
+            result : np.array
+                    containing the interpolated values, with the same shape
+                    as x_values.
+        """
+        num, num_points = xp_values.shape
+        # Find the index of the last value in xp_values that is less than or
+        # equal to each value in x_values, or -1 if there is no such value.
+        # Compare one row of x_values at a time to bound the memory required.
+        index = np.empty(x_values.shape, dtype=int)
+        for row, x_row in enumerate(x_values):
+            index[row] = np.sum(xp_values <= x_row, axis=0) - 1
+        # Indices within the flattened arrays of the values either side of
+        # each value in x_values.
+        lower = (np.clip(index, 0, num - 2) * num_points +
+                 np.arange(num_points))
+        upper = lower + num_points
+        x_lower = xp_values.take(lower)
+        f_lower = fp_values.take(lower)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            slope = ((fp_values.take(upper) - f_lower) /
+                     (xp_values.take(upper) - x_lower))
+            result = slope*(x_values - x_lower) + f_lower
+        # Values outside the range of xp_values take the end values of
+        # fp_values, as do values equal to the final value of xp_values.
+        result = np.where(index < 0, fp_values[0], result)
+        result = np.where(index >= num - 1, fp_values[-1], result)
+        return result
+
+    @staticmethod
+    def blend_percentiles_for_points(perc_values, percentiles, weights):
+        """ Blend percentiles function, to calculate the weighted blend across
+            a given axis of percentile data for many grid points at once.
+            This gives the same result as applying blend_percentiles to each
+            grid point in turn.
+
+        Args:
+            perc_values : np.array
+                    Array containing the percentile values to blend, with
+                    shape: (length of coord to blend, num of percentiles,
+                    num of grid points)
+            percentiles: np.array
+                    Array of percentile values e.g
+                    [0, 20.0, 50.0, 70.0, 100.0],
+                    same size as the percentile dimension of data.
+            weights: np.array
+                    Array of weights, same size as the axis dimension of data,
+                    that we will blend over.
+
+        Returns:
+            result : np.array
+                    containing the weighted percentile blend data
+                    across the chosen coord, with shape:
+                    (num of percentiles, num of grid points)
+        """
+        num, num_percentiles, num_points = perc_values.shape
+        percentiles = np.asarray(percentiles, dtype=float)
+        point_percentiles = np.repeat(
+            percentiles[:, np.newaxis], num_points, axis=1)
+        # Find the probability at each threshold in the pdf of each of the
+        # other points in the axis we are blending over, and add the
+        # probabilities multiplied by the correct weight to the running
+        # total for the combined pdf, as in blend_percentiles.
+        combined_pdf = np.zeros(perc_values.shape)
+        for i in range(num):
+            for j in range(num):
+                if i == j:
+                    recalc_values_in_pdf = point_percentiles
+                else:
+                    recalc_values_in_pdf = (
+                        PercentileBlendingAggregator._interpolate_for_points(
+                            perc_values[i], perc_values[j],
+                            point_percentiles))
+                combined_pdf[i] += recalc_values_in_pdf*weights[j]
+
+        # Combine and sort the threshold values and the blended probability
+        # values for all the points we are blending, at each grid point.
+        combined_shape = (num*num_percentiles, num_points)
+        combined_perc_thres_data = np.sort(
+            perc_values.reshape(combined_shape), axis=0)
+        combined_perc_values = np.sort(
+            combined_pdf.reshape(combined_shape), axis=0)
+
+        # Find the percentile values from this combined data by interpolating
+        # back from probability values to the original percentiles.
+        return PercentileBlendingAggregator._interpolate_for_points(
+            point_percentiles, combined_perc_values, combined_perc_thres_data)
+
     @staticmethod
     def blend_percentiles(perc_values, percentiles, weights):
         """ Blend percentiles function, to calculate the weighted blend across
             a given axis of percentile data for a single grid point.
+            This is the reference implementation for a single grid point;
+            blend_percentiles_for_points is used to blend many grid points
+            at once.
 
         Args:
             perc_values : np.array
@@ -258,17 +372,62 @@ class MaxProbabilityAggregator(object):
             axis += data.ndim
 
         arr_weights = np.array(arr_weights)
-        # Reshape the weights to match the shape of the data.
-        shape = [len(arr_weights) if i == axis else 1
-                 for i in range(data.ndim)]
-        arr_weights = arr_weights.reshape(tuple(shape))
-        # Calculate the weighted probabilities
-        weighted_probs = data*arr_weights
-        # Find the maximum along the axis of interest
-        result = np.max(weighted_probs, axis=axis)
+        # Accumulate the maximum weighted probability one point along the
+        # axis at a time, so that only a single slice of weighted
+        # probabilities is held in memory at once, rather than the full
+        # weighted stack.
+        slices = [slice(None)]*data.ndim
+        result = None
+        for index, weight in enumerate(arr_weights):
+            slices[axis] = index
+            weighted_probs = data[tuple(slices)]*weight
+            result = MaxProbabilityAggregator.accumulate(
+                result, weighted_probs)
 
         return result
 
+    @staticmethod
+    def accumulate(running_max, weighted_probs):
+        """Update a running maximum of weighted probabilities with a further
+           array of weighted probabilities. Masked points are ignored, so
+           that a point is only masked within the running maximum if it is
+           masked in every array accumulated.
+
+        Args:
+            running_max : np.array or None
+                   The maximum of the weighted probabilities accumulated so
+                   far, or None if nothing has been accumulated yet. Unmasked
+                   arrays are updated in place.
+            weighted_probs : np.array
+                   Array of weighted probabilities, with the same shape as
+                   running_max.
+
+        Returns:
+            running_max : np.array
+                   The maximum of the weighted probabilities including those
+                   from weighted_probs.
+        """
+        if running_max is None:
+            if isinstance(weighted_probs, np.ma.MaskedArray):
+                return weighted_probs.copy()
+            return np.array(weighted_probs)
+        if not (isinstance(running_max, np.ma.MaskedArray) or
+                isinstance(weighted_probs, np.ma.MaskedArray)):
+            dtype = np.result_type(running_max, weighted_probs)
+            if dtype != running_max.dtype:
+                running_max = running_max.astype(dtype)
+            return np.maximum(running_max, weighted_probs, out=running_max)
+        # Fill masked points with the smallest possible value, so that they
+        # never contribute to the maximum.
+        fill_value = np.ma.maximum_fill_value(
+            np.ma.array([], dtype=np.result_type(running_max,
+                                                 weighted_probs)))
+        mask = (np.ma.getmaskarray(running_max) &
+                np.ma.getmaskarray(weighted_probs))
+        values = np.maximum(np.ma.filled(running_max, fill_value),
+                            np.ma.filled(weighted_probs, fill_value))
+        return np.ma.masked_array(values, mask=mask)
+
 
 class WeightedBlendAcrossWholeDimension(object):
     """Apply a Weighted blend to a cube, collapsing across the whole
@@ -311,12 +470,149 @@ class WeightedBlendAcrossWholeDimension(object):
                        ' coord_adjust = {2:s}>')
         return description.format(self.coord, self.mode, self.coord_adjust)
 
+    def weighted_mean(self, cube, weights=None):
+        """Calculate the weighted mean across the chosen coord, reducing all
+           the other dimensions of the cube, e.g. all thresholds of a
+           probability cube, at once.
+
+        Args:
+            cube : iris.cube.Cube
+                   Cube to blend across the coord, which must be a dimension
+                   of the cube.
+            weights: Optional list or np.array of weights
+                     or None (equivalent to equal weights).
+
+        Returns:
+            result : iris.cube.Cube
+                     containing the weighted mean across the chosen coord,
+                     with a 'weighted_mean' cell method.
+        """
+        # Equal weights are used as default.
+        weights_array = None
+        # Else broadcast the weights to be used by the aggregator.
+        if weights is not None:
+            weights_array = (
+                iris.util.broadcast_to_shape(np.array(weights),
+                                             cube.shape,
+                                             cube.coord_dims(self.coord)))
+        orig_cell_methods = cube.cell_methods
+        # Calculate the weighted average.
+        result = cube.collapsed(self.coord, iris.analysis.MEAN,
+                                weights=weights_array)
+        # Update the name of the cell_method created by Iris to
+        # 'weighted_mean' to be consistent.
+        new_cell_methods = result.cell_methods
+        extra_cm = (set(new_cell_methods) - set(orig_cell_methods)).pop()
+        add_renamed_cell_method(result, extra_cm, 'weighted_mean')
+        return result
+
+    def accumulator(self, weights_distrib_method='evenly'):
+        """Create a plugin to calculate the same blend as this plugin, but
+           accumulating the inputs one at a time, so that an updated blend
+           can be created as each input arrives. Percentile data cannot be
+           blended in this way.
+
+        Args:
+            weights_distrib_method : string
+                The method to use when redistributing the weights of missing
+                inputs for the weighted mean. Options: "evenly",
+                "proportional".
+
+        Returns:
+            accumulator : WeightedBlendAccumulator
+                Either a WeightedMeanAccumulator or a
+                WeightedMaximumAccumulator, depending on the weighting mode.
+        """
+        if self.mode == 'weighted_maximum':
+            return WeightedMaximumAccumulator(
+                self.coord, coord_adjust=self.coord_adjust)
+        return WeightedMeanAccumulator(
+            self.coord, coord_adjust=self.coord_adjust,
+            weights_distrib_method=weights_distrib_method)
+
+    def _collapse(self, cube, weights, perc_coord):
+        """Collapse the cube across the chosen coord, using the aggregator
+           for the weighting mode and for the type of data.
+
+        Args:
+            cube : iris.cube.Cube
+                   Cube to blend across the coord, which must be a dimension
+                   of the cube.
+            weights: list or np.array of weights
+                     or None (equivalent to equal weights).
+            perc_coord : iris.coords.Coord or None
+                   The percentile coordinate of the cube, or None if the cube
+                   does not contain percentile data.
+
+        Returns:
+            result : iris.cube.Cube
+                     containing the weighted blend across the chosen coord.
+        """
+        if perc_coord is None and self.mode == "weighted_mean":
+            # The weighted mean at each threshold is independent of the
+            # other thresholds, so all the thresholds are blended at once.
+            return self.weighted_mean(cube, weights)
+
+        try:
+            cube.coord('threshold')
+        except iris.exceptions.CoordinateNotFoundError:
+            slices_over_threshold = [cube]
+        else:
+            if self.coord != 'threshold':
+                slices_over_threshold = cube.slices_over('threshold')
+            else:
+                slices_over_threshold = [cube]
+
+        cubelist = iris.cube.CubeList([])
+        for cube_thres in slices_over_threshold:
+            # Blend the cube across the coordinate
+            # Use percentile Aggregator if required
+            if perc_coord and self.mode == "weighted_mean":
+                percentiles = np.array(perc_coord.points, dtype=float)
+                perc_dim, = cube_thres.coord_dims(perc_coord.name())
+                # Set equal weights if none are provided
+                if weights is None:
+                    num = len(cube_thres.coord(self.coord).points)
+                    weights = np.ones(num) / float(num)
+                # Set up aggregator
+                PERCENTILE_BLEND = (Aggregator(
+                    'weighted_mean',
+                    PercentileBlendingAggregator.aggregate))
+
+                cube_new = cube_thres.collapsed(self.coord,
+                                                PERCENTILE_BLEND,
+                                                arr_percent=percentiles,
+                                                arr_weights=weights,
+                                                perc_dim=perc_dim)
+
+            # Else use the maximum probability aggregator.
+            elif self.mode == "weighted_maximum":
+                # Set equal weights if none are provided
+                if weights is None:
+                    num = len(cube_thres.coord(self.coord).points)
+                    weights = np.ones(num) / float(num)
+                # Set up aggregator
+                MAX_PROBABILITY = (Aggregator(
+                    'weighted_maximum',
+                    MaxProbabilityAggregator.aggregate))
+
+                cube_new = cube_thres.collapsed(self.coord,
+                                                MAX_PROBABILITY,
+                                                arr_weights=weights)
+            cubelist.append(cube_new)
+        result = cubelist.merge_cube()
+        if isinstance(cubelist[0].data, np.ma.core.MaskedArray):
+            result.data = np.ma.array(result.data)
+        return result
+
     def process(self, cube, weights=None):
         """Calculate weighted blend across the chosen coord, for either
            probabilistic or percentile data. If there is a percentile
            coordinate on the cube, it will blend using the
            PercentileBlendingAggregator but the percentile coordinate must
-           have at least two points.
+           have at least two points. Probabilistic data which is lazy is
+           blended one slice along the coord at a time, leaving the data of
+           the input cube lazy.
 
         Args:
             cube : iris.cube.Cube
@@ -397,82 +693,39 @@ class WeightedBlendAcrossWholeDimension(object):
                    ' value. Returning original cube')
             warnings.warn(msg)
             result = cube
+        elif perc_coord is None and cube.has_lazy_data():
+            # Collapsing a cube with weights realises all of its data, so
+            # instead blend one slice along the coordinate at a time, so that
+            # only a single slice of the input is realised at once. The
+            # weights are renormalised, as for the weighted mean from Iris.
+            # The weighted mean of realised data has the dtype of the data
+            # and any weights given, so the blended data is cast to match.
+            dtype = None
+            if self.mode == 'weighted_mean':
+                if weights is not None:
+                    dtype = np.result_type(cube.dtype,
+                                           np.array(weights).dtype)
+                elif np.issubdtype(cube.dtype, np.floating):
+                    dtype = cube.dtype
+            if weights is None:
+                num = len(cube.coord(self.coord).points)
+                weights = np.ones(num) / float(num)
+            accumulator = self.accumulator(
+                weights_distrib_method='proportional')
+            blended = accumulator.process(cube.slices_over(self.coord),
+                                          weights)
+            blended_data = blended.data
+            if dtype is not None:
+                blended_data = blended_data.astype(dtype, copy=False)
+            # The metadata are created by collapsing a copy of the cube
+            # without its data, in the same way as for realised data.
+            template = cube.copy(
+                data=np.broadcast_to(np.zeros((), dtype=blended_data.dtype),
+                                     cube.shape))
+            result = self._collapse(template, None, perc_coord)
+            result.data = blended_data
         else:
-            try:
-                cube.coord('threshold')
-            except iris.exceptions.CoordinateNotFoundError:
-                slices_over_threshold = [cube]
-            else:
-                if self.coord != 'threshold':
-                    slices_over_threshold = cube.slices_over('threshold')
-                else:
-                    slices_over_threshold = [cube]
-
-            cubelist = iris.cube.CubeList([])
-            for cube_thres in slices_over_threshold:
-                # Blend the cube across the coordinate
-                # Use percentile Aggregator if required
-                if perc_coord and self.mode == "weighted_mean":
-                    percentiles = np.array(perc_coord.points, dtype=float)
-                    perc_dim, = cube_thres.coord_dims(perc_coord.name())
-                    # Set equal weights if none are provided
-                    if weights is None:
-                        num = len(cube_thres.coord(self.coord).points)
-                        weights = np.ones(num) / float(num)
-                    # Set up aggregator
-                    PERCENTILE_BLEND = (Aggregator(
-                        'weighted_mean',
-                        PercentileBlendingAggregator.aggregate))
-
-                    cube_new = cube_thres.collapsed(self.coord,
-                                                    PERCENTILE_BLEND,
-                                                    arr_percent=percentiles,
-                                                    arr_weights=weights,
-                                                    perc_dim=perc_dim)
-
-                # Else do a simple weighted average
-                elif self.mode == "weighted_mean":
-                    # Equal weights are used as default.
-                    weights_array = None
-                    # Else broadcast the weights to be used by the aggregator.
-                    coord_dim_thres = cube_thres.coord_dims(self.coord)
-                    if weights is not None:
-                        weights_array = (
-                            iris.util.broadcast_to_shape(np.array(weights),
-                                                         cube_thres.shape,
-                                                         coord_dim_thres))
-                    orig_cell_methods = cube_thres.cell_methods
-                    # Calculate the weighted average.
-                    cube_new = cube_thres.collapsed(self.coord,
-                                                    iris.analysis.MEAN,
-                                                    weights=weights_array)
-                    # Update the name of the cell_method created by Iris to
-                    # 'weighted_mean' to be consistent.
-                    new_cell_methods = cube_new.cell_methods
-                    extra_cm = (set(new_cell_methods) -
-                                set(orig_cell_methods)).pop()
-                    add_renamed_cell_method(cube_new,
-                                            extra_cm,
-                                            'weighted_mean')
-
-                # Else use the maximum probability aggregator.
-                elif self.mode == "weighted_maximum":
-                    # Set equal weights if none are provided
-                    if weights is None:
-                        num = len(cube_thres.coord(self.coord).points)
-                        weights = np.ones(num) / float(num)
-                    # Set up aggregator
-                    MAX_PROBABILITY = (Aggregator(
-                        'weighted_maximum',
-                        MaxProbabilityAggregator.aggregate))
-
-                    cube_new = cube_thres.collapsed(self.coord,
-                                                    MAX_PROBABILITY,
-                                                    arr_weights=weights)
-                cubelist.append(cube_new)
-            result = cubelist.merge_cube()
-            if isinstance(cubelist[0].data, np.ma.core.MaskedArray):
-                result.data = np.ma.array(result.data)
+            result = self._collapse(cube, weights, perc_coord)
         # If set adjust values of collapsed coordinates.
         if self.coord_adjust is not None:
             for crd in result.coords():
@@ -482,3 +735,391 @@ class WeightedBlendAcrossWholeDimension(object):
                                           dtype=crd.points.dtype)
 
         return result
+
+
+class WeightedBlendAccumulator(object):
+    """Base class for blending across a coordinate by accumulating the inputs
+       one at a time, e.g. one model or cycle at a time as the files become
+       available, so that an updated blend can be created as soon as each
+       new input arrives, without reprocessing the earlier inputs. Only
+       running totals are kept, so the inputs never all need to be held in
+       memory at once, unlike when collapsing a merged cube with
+       WeightedBlendAcrossWholeDimension.
+
+       The blended cube matches that from WeightedBlendAcrossWholeDimension:
+       coordinates along the blend coordinate, and scalar coordinates that
+       differ between the inputs, are collapsed to a single point with
+       bounds spanning all the inputs, and a cell method named after the
+       weighting mode is added.
+
+       Subclasses define the weighting mode, and how the data are
+       accumulated and blended.
+    """
+
+    # Name of the weighting mode, used as the name of the cell method.
+    mode = None
+
+    def __init__(self, coord, coord_adjust=None):
+        """Set up for accumulating a blend.
+
+        Args:
+            coord : string
+                The name of the coordinate to blend over. This may be either
+                a scalar coordinate or a dimension of each input cube.
+            coord_adjust : function
+                Function to apply to the collapsed coordinates to correct the
+                values, as for WeightedBlendAcrossWholeDimension.
+        """
+        self.coord = coord
+        self.coord_adjust = coord_adjust
+        self.reset()
+
+    def __repr__(self):
+        """Represent the configured plugin instance as a string."""
+        description = ('<{0}:'
+                       ' coord = {1}, coord_adjust = {2},'
+                       ' inputs = {3}>')
+        return description.format(type(self).__name__, self.coord,
+                                  self.coord_adjust, self.num_inputs)
+
+    def reset(self):
+        """Discard everything accumulated so far."""
+        self.num_inputs = 0
+        self._template = None
+        self._coord_values = {}
+        self._collapse_coords = set()
+
+    def _accumulate(self, data, axis, weights):
+        """Accumulate the data from a further input.
+
+        Args:
+            data : np.array
+                   The data from the input cube.
+            axis : integer or None
+                   The axis of the data corresponding to the coordinate to
+                   blend over, or None if the coordinate is scalar.
+            weights : np.array
+                   Weight for each point of the coordinate to blend over,
+                   as a one dimensional array if axis is not None, or else a
+                   scalar array.
+
+        Returns:
+            data_dtype : np.dtype
+                   The data type of the blended data.
+        """
+        raise NotImplementedError
+
+    def _blended_data(self):
+        """Return the blended data from the inputs accumulated so far."""
+        raise NotImplementedError
+
+    def add(self, cube, weights):
+        """Accumulate a further input.
+
+        Args:
+            cube : iris.cube.Cube
+                   Cube containing the coordinate to blend over. If the
+                   coordinate is a dimension of the cube, all the points
+                   along it are accumulated.
+            weights : float or list or np.array
+                   Weight for each point of the coordinate to blend over
+                   within the cube.
+
+        Raises:
+            TypeError : If the first argument is not a cube.
+            ValueError : If the coordinate to blend over is not on the cube.
+            ValueError : If the cube contains percentile data.
+            ValueError : If the weights do not match the shape of the
+                         coordinate we are blending over.
+            ValueError : If the cube does not match the cubes accumulated so
+                         far.
+        """
+        if not isinstance(cube, iris.cube.Cube):
+            msg = ('The first argument must be an instance of '
+                   'iris.cube.Cube but is'
+                   ' {0}.'.format(type(cube)))
+            raise TypeError(msg)
+        if not cube.coords(self.coord):
+            msg = ('The coord for this plugin must be '
+                   'an existing coordinate in the input cube.')
+            raise ValueError(msg)
+        try:
+            find_percentile_coordinate(cube)
+        except CoordinateNotFoundError:
+            pass
+        else:
+            msg = ('Percentile data cannot be blended one input at a time; '
+                   'use WeightedBlendAcrossWholeDimension instead.')
+            raise ValueError(msg)
+        coord_dim = cube.coord_dims(self.coord)
+        weights = np.array(weights, dtype=float)
+        points_shape = cube.coord(self.coord).points.shape
+        if weights.size != np.prod(points_shape):
+            msg = ('The weights array must match the shape '
+                   'of the coordinate in the input cube; '
+                   'weight shape is '
+                   '{0}'.format(weights.shape) +
+                   ', cube shape is '
+                   '{0}'.format(points_shape))
+            raise ValueError(msg)
+
+        if coord_dim:
+            template = next(cube.slices_over(self.coord))
+        else:
+            template = cube
+        if (self._template is not None and
+                (template.shape != self._template.shape or
+                 template.name() != self._template.name() or
+                 template.units != self._template.units)):
+            msg = ('The cube does not match the cubes accumulated so far; '
+                   'expected {0} with shape {1} but got {2} with '
+                   'shape {3}').format(
+                       self._template.name(), self._template.shape,
+                       template.name(), template.shape)
+            raise ValueError(msg)
+
+        if coord_dim:
+            data_dtype = self._accumulate(cube.data, coord_dim[0],
+                                          weights.reshape(-1))
+            self._collapse_coords.update(
+                crd.name() for crd in cube.coords(dimensions=coord_dim))
+        else:
+            data_dtype = self._accumulate(cube.data, None,
+                                          weights.reshape(()))
+
+        if self._template is None:
+            # Keep only the metadata of the first input, rather than its data.
+            self._template = template.copy(
+                data=np.broadcast_to(np.zeros((), dtype=data_dtype),
+                                     template.shape))
+
+        # Record the values of the coordinates that may need to be collapsed.
+        self._collapse_coords.add(self.coord)
+        for crd in template.coords(dimensions=()):
+            values = self._coord_values.setdefault(crd.name(), [])
+            cube_crd = cube.coord(crd.name())
+            values.append((cube_crd.points.reshape(-1),
+                           None if cube_crd.bounds is None else
+                           cube_crd.bounds.reshape(-1, cube_crd.nbounds)))
+        self.num_inputs += 1
+
+    def result(self):
+        """Create the blended cube from the inputs accumulated so far.
+
+        Returns:
+            result : iris.cube.Cube
+                     containing the blend across the chosen coord.
+
+        Raises:
+            ValueError : If no inputs have been accumulated.
+        """
+        if self._template is None:
+            msg = ('No cubes have been accumulated, so there is nothing '
+                   'to blend.')
+            raise ValueError(msg)
+        result = self._template.copy(data=self._blended_data())
+        for name, values in self._coord_values.items():
+            points = np.concatenate([pnts for pnts, _ in values])
+            if (name not in self._collapse_coords and
+                    np.all(points == points[0])):
+                continue
+            bounds = None
+            if all(bnds is not None for _, bnds in values):
+                bounds = np.concatenate([bnds for _, bnds in values])
+            crd = result.coord(name)
+            combined = iris.coords.AuxCoord.from_coord(crd).copy(
+                points=points, bounds=bounds)
+            collapsed = type(crd).from_coord(combined.collapsed())
+            if self.coord_adjust is not None:
+                collapsed.points = np.array(self.coord_adjust(points),
+                                            dtype=collapsed.points.dtype)
+            result.replace_coord(collapsed)
+        result.add_cell_method(
+            iris.coords.CellMethod(self.mode, coords=self.coord))
+        return result
+
+    def process(self, cubes, weights):
+        """Calculate the blend across the chosen coord, accumulating the
+           cubes one at a time.
+
+        Args:
+            cubes : iterable of iris.cube.Cube
+                    The cubes to blend, e.g. a generator loading each cube
+                    from file in turn.
+            weights : iterable
+                    The weights for each cube, as for the add method.
+
+        Returns:
+            result : iris.cube.Cube
+                     containing the blend across the chosen coord.
+        """
+        self.reset()
+        for cube, cube_weights in zip(cubes, weights):
+            self.add(cube, cube_weights)
+        return self.result()
+
+
+class WeightedMaximumAccumulator(WeightedBlendAccumulator):
+    """Calculate the maximum of the weighted probabilities across a
+       coordinate by accumulating the inputs one at a time. Only a running
+       maximum of the weighted probabilities is kept.
+    """
+
+    mode = 'weighted_maximum'
+
+    def reset(self):
+        """Discard everything accumulated so far."""
+        super(WeightedMaximumAccumulator, self).reset()
+        self._running_max = None
+
+    def _accumulate(self, data, axis, weights):
+        """Update the running maximum of the weighted probabilities.
+
+        Args:
+            data : np.array
+                   The data from the input cube.
+            axis : integer or None
+                   The axis of the data corresponding to the coordinate to
+                   blend over, or None if the coordinate is scalar.
+            weights : np.array
+                   Weight for each point of the coordinate to blend over.
+
+        Returns:
+            data_dtype : np.dtype
+                   The data type of the blended data.
+        """
+        if axis is None:
+            weighted_max = data*weights
+        else:
+            weighted_max = MaxProbabilityAggregator.aggregate(
+                data, axis, weights)
+        self._running_max = MaxProbabilityAggregator.accumulate(
+            self._running_max, weighted_max)
+        return self._running_max.dtype
+
+    def _blended_data(self):
+        """Return the maximum of the weighted probabilities."""
+        return self._running_max.copy()
+
+
+class WeightedMeanAccumulator(WeightedBlendAccumulator):
+    """Calculate the weighted mean across a coordinate by accumulating the
+       inputs one at a time. Running weighted sums and weight totals are
+       kept, so that the weighted mean of the inputs accumulated so far can
+       be created at any time.
+
+       The weights given for each input should be those for the full set of
+       inputs expected, e.g. from ChooseDefaultWeightsLinear. Until all the
+       expected inputs have arrived, or where an input is masked, the
+       weights are redistributed across the inputs that are present, in the
+       same way as by WeightsUtilities.redistribute_weights.
+    """
+
+    mode = 'weighted_mean'
+
+    def __init__(self, coord, coord_adjust=None,
+                 weights_distrib_method='evenly'):
+        """Set up for accumulating a weighted mean.
+
+        Args:
+            coord : string
+                The name of the coordinate to blend over. This may be either
+                a scalar coordinate or a dimension of each input cube.
+            coord_adjust : function
+                Function to apply to the collapsed coordinates to correct the
+                values, as for WeightedBlendAcrossWholeDimension.
+            weights_distrib_method : string
+                The method to use when redistributing weights in cases
+                where there are some inputs missing. Options:
+                "evenly" - adding the weights from the missing inputs evenly
+                           across the inputs present.
+                "proportional" - re-weight according to the proportion of
+                                 the weights of the inputs present.
+        Raises:
+            ValueError : If an unknown weights_distrib_method is given.
+        """
+        if weights_distrib_method not in ['evenly', 'proportional']:
+            msg = ('Unknown weights redistribution method'
+                   ': {}'.format(weights_distrib_method))
+            raise ValueError(msg)
+        self.weights_distrib_method = weights_distrib_method
+        super(WeightedMeanAccumulator, self).__init__(
+            coord, coord_adjust=coord_adjust)
+
+    def reset(self):
+        """Discard everything accumulated so far."""
+        super(WeightedMeanAccumulator, self).reset()
+        self._weighted_sum = None
+        self._sum = None
+        self._weights_total = None
+        self._count = None
+        self._masked = False
+
+    def _accumulate(self, data, axis, weights):
+        """Update the running weighted sums and weight totals. Masked points
+           do not contribute to either.
+
+        Args:
+            data : np.array
+                   The data from the input cube.
+            axis : integer or None
+                   The axis of the data corresponding to the coordinate to
+                   blend over, or None if the coordinate is scalar.
+            weights : np.array
+                   Weight for each point of the coordinate to blend over.
+
+        Returns:
+            data_dtype : np.dtype
+                   The data type of the blended data.
+        """
+        if axis is None:
+            data = data[np.newaxis]
+            axis = 0
+            weights = weights.reshape(1)
+        data = np.moveaxis(data, axis, 0)
+        if isinstance(data, np.ma.MaskedArray):
+            self._masked = True
+            present = ~np.ma.getmaskarray(data)
+            values = np.ma.filled(data, 0)
+            weights_total = np.tensordot(weights, present, axes=1)
+            count = present.sum(axis=0)
+        else:
+            values = data
+            weights_total = weights.sum()
+            count = len(weights)
+        weighted_sum = np.tensordot(weights, values, axes=1)
+        data_sum = values.sum(axis=0, dtype=weighted_sum.dtype)
+        if self._weighted_sum is None:
+            self._weighted_sum = weighted_sum
+            self._sum = data_sum
+            self._weights_total = weights_total
+            self._count = count
+        else:
+            self._weighted_sum += weighted_sum
+            self._sum += data_sum
+            self._weights_total = self._weights_total + weights_total
+            self._count = self._count + count
+        return self._weighted_sum.dtype
+
+    def _blended_data(self):
+        """Return the weighted mean, redistributing the weights of any
+           missing inputs across the inputs present. Points for which no
+           input is present are masked. When the weights are redistributed
+           proportionally, points at which the weights of the inputs
+           present sum to zero are also masked, as for the weighted mean
+           from Iris."""
+        count = np.asarray(self._count)
+        missing = count == 0
+        if self.weights_distrib_method == 'evenly':
+            count = np.where(missing, 1, count)
+            missing_avg_weight = (1.0 - self._weights_total) / count
+            blended = self._weighted_sum + missing_avg_weight*self._sum
+        else:
+            missing = missing | (np.asarray(self._weights_total) == 0)
+            weights_total = np.where(missing, 1.0, self._weights_total)
+            blended = self._weighted_sum / weights_total
+        blended = np.asarray(blended, dtype=self._weighted_sum.dtype)
+        missing = missing | np.zeros(blended.shape, dtype=bool)
+        if self._masked or missing.any():
+            blended = np.ma.masked_array(blended, mask=missing)
+        return blended
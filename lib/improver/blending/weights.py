@@ -34,6 +34,105 @@ import numpy as np
 import iris
 import cf_units
 
+from improver.utilities.cache import LRUCache
+
+# Default maximum number of sets of weights held within the weights cache.
+WEIGHTS_CACHE_SIZE = 128
+
+
+class WeightsCache(LRUCache):
+    """
+    Bounded, least recently used cache of blending weights. Weights are
+    keyed on the name of the plugin that created them, the parameters of
+    that plugin, and the points and units of the coordinate being blended,
+    so that repeated blends over the same coordinate, such as successive
+    blends over the same cycle structure, reuse the weights already
+    calculated.
+    """
+
+    def __init__(self, max_size=WEIGHTS_CACHE_SIZE):
+        """
+        Initialise the cache.
+
+        Keyword Args:
+            max_size (integer):
+                Maximum number of entries held within the cache. The least
+                recently used entries are discarded once this is exceeded.
+        """
+        super(WeightsCache, self).__init__(max_size)
+
+    def lookup(self, key, create):
+        """
+        Return a copy of the cached weights for a key, creating and caching
+        the weights if they are not already cached.
+
+        Args:
+            key (tuple):
+                Hashable key identifying the weights.
+            create (callable):
+                Function, taking no arguments, that creates the weights.
+                Any exception raised is propagated, and nothing is cached.
+
+        Returns:
+            weights (numpy.ndarray):
+                Copy of the cached weights, which may be modified freely by
+                the caller.
+        """
+        def _create():
+            """Create the weights, and make the cached array read-only."""
+            weights = np.array(create())
+            weights.flags.writeable = False
+            return weights
+        return super(WeightsCache, self).lookup(key, _create).copy()
+
+    @staticmethod
+    def values_key(coord_vals):
+        """
+        Return the part of a key identifying the values expected on the
+        coordinate being blended.
+
+        Args:
+            coord_vals (string, list, numpy array or None):
+                Values expected on the coordinate, either as a string list
+                or as a sequence of values.
+
+        Returns:
+            key (tuple or None):
+                Hashable tuple of the values, or None if no values are
+                expected.
+        """
+        if coord_vals is None:
+            return None
+        return tuple(np.asarray(coord_vals).ravel().tolist())
+
+    @staticmethod
+    def coord_key(cube, coord_name):
+        """
+        Return the part of a key identifying the coordinate being blended.
+
+        Args:
+            cube (iris.cube.Cube):
+                Cube to blend across the coord.
+            coord_name (string):
+                Name of coordinate in the cube to be blended.
+
+        Returns:
+            key (tuple):
+                Hashable key made up of the name, points, dtype and units of
+                the coordinate. The points are None if the coordinate is not
+                present on the cube.
+        """
+        coords = cube.coords(coord_name)
+        if not coords:
+            return (coord_name, None)
+        points = coords[0].points
+        return (coord_name, points.tobytes(), points.shape, str(points.dtype),
+                str(coords[0].units))
+
+
+# Weights cache shared by all the default weights plugins.
+WEIGHTS_CACHE = WeightsCache()
+
 
 class WeightsUtilities(object):
     """ Utilities for Weight processing. """
@@ -296,19 +395,17 @@ class ChooseDefaultWeightsLinear(object):
             msg = ('y0val must be a float >= 0.0, '
                    'y0val = {0:s}'.format(str(self.y0val)))
             raise ValueError(msg)
+        slope = self.slope
         if self.ynval is not None:
-            if self.slope == 0.0:
-                self.slope = (self.ynval - self.y0val)/(num_of_weights - 1.0)
+            if slope == 0.0:
+                slope = (self.ynval - self.y0val)/(num_of_weights - 1.0)
             else:
                 msg = ('Relative end point weight or slope must be set'
                        ' but not both.')
                 raise ValueError(msg)
 
-        weights_list = []
-        for tval in range(0, num_of_weights):
-            weights_list.append(self.slope*tval + self.y0val)
-
-        weights = WeightsUtilities.normalise_weights(np.array(weights_list))
+        weights = WeightsUtilities.normalise_weights(
+            slope*np.arange(num_of_weights) + self.y0val)
 
         return weights
 
@@ -343,14 +440,22 @@ class ChooseDefaultWeightsLinear(object):
                    ' {0:s}'.format(type(cube)))
             raise TypeError(msg)
 
-        (num_of_weights,
-         exp_coord_found) = WeightsUtilities.process_coord(
-            cube, coord_name, coord_vals, coord_unit)
+        def _create():
+            """Calculate the weights for the coordinate."""
+            (num_of_weights,
+             exp_coord_found) = WeightsUtilities.process_coord(
+                cube, coord_name, coord_vals, coord_unit)
+
+            weights_in = self.linear_weights(num_of_weights)
 
-        weights_in = self.linear_weights(num_of_weights)
+            return WeightsUtilities.redistribute_weights(
+                weights_in, exp_coord_found, weights_distrib_method)
 
-        weights = WeightsUtilities.redistribute_weights(
-            weights_in, exp_coord_found, weights_distrib_method)
+        key = ("linear", self.y0val, self.slope, self.ynval,
+               WEIGHTS_CACHE.coord_key(cube, coord_name),
+               WEIGHTS_CACHE.values_key(coord_vals),
+               str(coord_unit), weights_distrib_method)
+        weights = WEIGHTS_CACHE.lookup(key, _create)
 
         return weights
 
@@ -396,11 +501,8 @@ class ChooseDefaultWeightsNonLinear(object):
                    'cval = {0:s}'.format(str(self.cval)))
             raise ValueError(msg)
 
-        weights_list = []
-        for tval_minus1 in range(0, num_of_weights):
-            weights_list.append(self.cval**(tval_minus1))
-
-        weights = WeightsUtilities.normalise_weights(np.array(weights_list))
+        weights = WeightsUtilities.normalise_weights(
+            self.cval**np.arange(num_of_weights, dtype=float))
 
         return weights
 
@@ -435,14 +537,22 @@ class ChooseDefaultWeightsNonLinear(object):
                    ' {0:s}'.format(type(cube)))
             raise TypeError(msg)
 
-        (num_of_weights,
-         exp_coord_found) = WeightsUtilities.process_coord(
-            cube, coord_name, coord_vals, coord_unit)
+        def _create():
+            """Calculate the weights for the coordinate."""
+            (num_of_weights,
+             exp_coord_found) = WeightsUtilities.process_coord(
+                cube, coord_name, coord_vals, coord_unit)
+
+            weights_in = self.nonlinear_weights(num_of_weights)
 
-        weights_in = self.nonlinear_weights(num_of_weights)
+            return WeightsUtilities.redistribute_weights(
+                weights_in, exp_coord_found, weights_distrib_method)
 
-        weights = WeightsUtilities.redistribute_weights(
-            weights_in, exp_coord_found, weights_distrib_method)
+        key = ("nonlinear", self.cval,
+               WEIGHTS_CACHE.coord_key(cube, coord_name),
+               WEIGHTS_CACHE.values_key(coord_vals),
+               str(coord_unit), weights_distrib_method)
+        weights = WEIGHTS_CACHE.lookup(key, _create)
 
         return weights
 
@@ -469,65 +579,73 @@ class ChooseDefaultWeightsTriangular(object):
             units = cf_units.Unit(units)
         self.parameters_units = units
 
-    def triangular_weights(self, coord_vals, midpoint):
+    def triangular_weights(self, coord_vals, midpoint, width=None):
         """Create triangular weights.
 
             Args:
                 coord_vals : numpy array
                     An array of coordinate values that we want to calculate
                     weights for.
+                midpoint : float or numpy array
+                    The centre point of the triangular function. If an array
+                    of centre points is given, a set of weights is created
+                    for each centre point.
+                width : float or None
+                    The width of the triangular function from the centre
+                    point, in the units of the coordinate. Default is the
+                    width of the plugin.
 
             Returns:
                 weights : array of weights
-                    Sum of all weights should equal 1.0.
-        """
+                    Sum of all weights should equal 1.0. If an array of
+                    centre points is given, this has an extra leading
+                    dimension with one set of weights per centre point, each
+                    of which sums to 1.0.
 
-        def calculate_weight(point, slope):
-            """
-            A helper function to calculate the weights for each point using a
-            piecewise function to build up the triangular function.
-            Args:
-                point : float
-                    The point in the coordinate from the cube for
-                    which we want to calculate a weight for.
-                slope : float
-                    The gradient of the triangle, calculated from
-                    1/(width of triangle).
-            """
-            if point == midpoint:
-                weight = 1
-            else:
-                weight = 1-abs(point-midpoint)*slope
-            return weight
-
-        slope = 1.0/self.width
-        weights = np.zeros(coord_vals.shape)
-        # Find the indices of the points where there will be non-zero weights.
-        condition = ((coord_vals >= (midpoint-self.width)) &
-                     (coord_vals <= (midpoint+self.width)))
-        points_with_weights = np.where(condition)[0]
-        # Calculate for weights for points where we want a non-zero weight.
-        for index in points_with_weights:
-            weights[index] = calculate_weight(coord_vals[index], slope)
-        # Normalise the weights.
-        weights = WeightsUtilities.normalise_weights(weights)
+            Raises:
+                ValueError : the weights for any centre point sum to 0.
+        """
+        if width is None:
+            width = self.width
+        slope = 1.0/width
+        midpoints = np.asarray(midpoint)
+        # Weights decrease linearly away from each centre point, and are zero
+        # beyond the width of the triangle.
+        distances = np.abs(
+            np.asarray(coord_vals)[np.newaxis, :] -
+            midpoints.reshape(-1, 1))
+        weights = np.maximum(1 - distances*slope, 0.0)
+        # Normalise the weights for each centre point.
+        sumvals = weights.sum(axis=1, keepdims=True)
+        if np.any(sumvals == 0):
+            msg = 'Sum of weights must be > 0.0'
+            raise ValueError(msg)
+        weights = weights / sumvals
 
-        return weights
+        return weights.reshape(midpoints.shape + weights.shape[1:])
 
     def process(self, cube, coord_name, midpoint):
         """Calculate triangular weights for a given cube and coord.
 
+            Weights are cached, keyed on the coordinate, the width and the
+            centre points, so that repeated blends over the same coordinate
+            reuse the weights already calculated.
+
             Args:
                 cube : iris.cube.Cube
                     Cube to blend across the coord.
                 coord_name : string
                     Name of coordinate in the cube to be blended.
-                midpoint : float
-                    The centre point of the triangular function.
+                midpoint : float or numpy array
+                    The centre point of the triangular function. If an array
+                    of centre points is given, a set of weights is calculated
+                    for each centre point.
 
             Returns:
                 weights : array of weights
-                    Sum of all weights = 1.0
+                    Sum of all weights = 1.0. If an array of centre points is
+                    given, this has an extra leading dimension with one set
+                    of weights per centre point.
 
             Raises:
                 TypeError : input is not a cube
@@ -542,11 +660,19 @@ class ChooseDefaultWeightsTriangular(object):
         coord_vals = cube_coord.points
         coord_units = cube_coord.units
 
-        # Rescale width and midpoint if in different units to the coordinate
-        if coord_units != self.parameters_units:
-            self.width = self.parameters_units.convert(self.width, coord_units)
-
-        weights = self.triangular_weights(coord_vals, midpoint)
+        def _create():
+            """Calculate the weights for the coordinate."""
+            # Rescale width if in different units to the coordinate
+            width = self.width
+            if coord_units != self.parameters_units:
+                width = self.parameters_units.convert(width, coord_units)
+            return self.triangular_weights(coord_vals, midpoint, width=width)
+
+        midpoints = np.asarray(midpoint, dtype=float)
+        key = ("triangular", self.width, str(self.parameters_units),
+               WEIGHTS_CACHE.coord_key(cube, coord_name),
+               midpoints.tobytes(), midpoints.shape)
+        weights = WEIGHTS_CACHE.lookup(key, _create)
 
         return weights
 
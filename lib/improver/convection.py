@@ -33,6 +33,7 @@
 import iris
 import numpy as np
 
+from improver.utilities.cube_checker import check_for_nan
 from improver.utilities.spatial import DifferenceBetweenAdjacentGridSquares
 from improver.threshold import BasicThreshold
 from improver.nbhood.nbhood import NeighbourhoodProcessing
@@ -121,7 +122,8 @@ class DiagnoseConvectivePrecipitation(object):
             self.below_thresh_ok, self.lead_times, self.weighted_mode,
             self.ens_factor, self.use_adjacent_grid_square_differences)
 
-    def _calculate_convective_ratio(self, cubelist, threshold_list):
+    def _calculate_convective_ratio(self, cubelist, threshold_list,
+                                    checked_for_nan=False):
         """
         Calculate the convective ratio by:
         1. Apply neighbourhood processing to cubes that have been thresholded
@@ -146,6 +148,9 @@ class DiagnoseConvectivePrecipitation(object):
                 so that values within cube.data are between 0.0 and 1.0.
             threshold_list : List
                 The list of thresholds.
+            checked_for_nan : boolean
+                If True, the cubes are known not to contain NaNs and are not
+                scanned again by the neighbourhood processing.
 
         Returns:
             convective_ratio : Iris.cube.Cube
@@ -162,7 +167,8 @@ class DiagnoseConvectivePrecipitation(object):
                 self.neighbourhood_method, self.radii,
                 lead_times=self.lead_times,
                 weighted_mode=self.weighted_mode,
-                ens_factor=self.ens_factor).process(cube)
+                ens_factor=self.ens_factor).process(
+                    cube, checked_for_nan=checked_for_nan)
             neighbourhooded_cube_dict[threshold] = neighbourhooded_cube
 
         # Ignore runtime warnings from divide by 0 errors.
@@ -220,7 +226,8 @@ class DiagnoseConvectivePrecipitation(object):
         cubelist = iris.cube.CubeList([diff_along_x_cube, diff_along_y_cube])
         return cubelist
 
-    def iterate_over_threshold(self, cubelist, threshold):
+    def iterate_over_threshold(self, cubelist, threshold,
+                               checked_for_nan=False):
         """
         Iterate over the application of thresholding to multiple cubes.
 
@@ -229,6 +236,9 @@ class DiagnoseConvectivePrecipitation(object):
                 Cubelist containing cubes to be thresholded.
             threshold : float
                 The threshold that will be applied.
+            checked_for_nan : boolean
+                If True, the cubes are known not to contain NaNs and are not
+                scanned again by the thresholding.
 
         Returns:
             cubes : Iris.cube.CubeList
@@ -240,7 +250,7 @@ class DiagnoseConvectivePrecipitation(object):
                 BasicThreshold(
                     threshold, fuzzy_factor=self.fuzzy_factor,
                     below_thresh_ok=self.below_thresh_ok
-                    ).process(cube.copy()))
+                    ).process(cube.copy(), checked_for_nan=checked_for_nan))
             # Will only ever contain one slice on threshold
             for cube_slice in threshold_cube.slices_over('threshold'):
                 threshold_cube = cube_slice
@@ -302,7 +312,13 @@ class DiagnoseConvectivePrecipitation(object):
                 Cube containing the convective ratio defined as the ratio
                 between a cube with a high threshold applied and a cube with a
                 low threshold applied.
+
+        Raises:
+            ValueError: if a np.nan value is detected within the input cube.
         """
+        # The input is checked for NaNs once, so that the thresholding and
+        # neighbourhood processing do not need to scan the data again.
+        check_for_nan(cube)
         cubelist = iris.cube.CubeList([])
         threshold_list = [self.lower_threshold, self.higher_threshold]
         if self.use_adjacent_grid_square_differences:
@@ -311,15 +327,17 @@ class DiagnoseConvectivePrecipitation(object):
                     self.absolute_differences_between_adjacent_grid_squares(
                         cube, threshold))
                 thresholded_cubes = self.iterate_over_threshold(
-                    diff_cubelist, threshold)
+                    diff_cubelist, threshold, checked_for_nan=True)
                 cubelist.append(
                     self.sum_differences_between_adjacent_grid_squares(
                         cube, thresholded_cubes))
         else:
             cube = [cube]
             for threshold in threshold_list:
-                cubelist.extend(self.iterate_over_threshold(cube, threshold))
+                cubelist.extend(self.iterate_over_threshold(
+                    cube, threshold, checked_for_nan=True))
 
-        convective_ratios = (
-            self._calculate_convective_ratio(cubelist, threshold_list))
+        # Thresholding data without NaNs cannot create NaNs.
+        convective_ratios = self._calculate_convective_ratio(
+            cubelist, threshold_list, checked_for_nan=True)
         return convective_ratios
@@ -30,14 +30,14 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """This module contains methods for circular neighbourhood processing."""
 
+
 import numpy as np
 import scipy.ndimage.filters
 
-import iris
-
 from improver.constants import DEFAULT_PERCENTILES
-from improver.utilities.cube_checker import (
-    check_cube_coordinates, find_dimension_coordinate_mismatch)
+from improver.nbhood.percentiles import (
+    BaseNeighbourhoodPercentiles, MAX_HISTOGRAM_BINS)
+from improver.utilities.cache import LRUCache
 from improver.utilities.spatial import (
     check_if_grid_is_equal_area, convert_distance_into_number_of_grid_cells)
 
@@ -45,6 +45,19 @@ from improver.utilities.spatial import (
 # Maximum radius of the neighbourhood width in grid cells.
 MAX_RADIUS_IN_GRID_CELLS = 500
 
+# Cost of a fast Fourier transform per point and per doubling of the
+# transform size, relative to the cost of applying one point of a kernel
+# directly. Used to choose between direct and FFT-based convolution.
+FFT_COST_FACTOR = 3.0
+
+# Cost of summing one span of a kernel using cumulative sums, per point,
+# relative to the cost of applying one point of a kernel directly.
+SPAN_COST_FACTOR = 5.0
+
+# Default maximum number of entries (kernels, and the spans and transforms
+# derived from them) held within the kernel cache.
+KERNEL_CACHE_SIZE = 64
+
 
 def circular_kernel(fullranges, ranges, weighted_mode):
     """
@@ -89,6 +102,362 @@ def circular_kernel(fullranges, ranges, weighted_mode):
     return kernel
 
 
+class KernelCache(LRUCache):
+    """
+    Bounded, least recently used cache of circular kernels, and of the
+    quantities derived from them that are needed to apply them, i.e. the
+    sum of the kernel, its decomposition into spans and its Fourier
+    transforms. Kernels are keyed on the ranges in all dimensions, which
+    determine both the number of dimensions and the position of the x and y
+    dimensions, the ranges in the x and y directions and the weighting.
+    """
+
+    def __init__(self, max_size=KERNEL_CACHE_SIZE):
+        """
+        Initialise the cache.
+
+        Keyword Args:
+            max_size (integer):
+                Maximum number of entries held within the cache. The least
+                recently used entries are discarded once this is exceeded.
+        """
+        super(KernelCache, self).__init__(max_size)
+
+    def kernel(self, fullranges, ranges, weighted_mode):
+        """
+        Return a circular kernel and its sum.
+
+        Args:
+            fullranges (Numpy.array):
+                Number of grid cells in all dimensions used to create the
+                kernel, as for circular_kernel.
+            ranges (Tuple):
+                Number of grid cells in the x and y direction used to create
+                the kernel.
+            weighted_mode (boolean):
+                If True, use a circle for neighbourhood kernel with
+                weighting decreasing with radius.
+                If False, use a circle with constant weighting.
+
+        Returns:
+            (tuple): tuple containing:
+                **kernel** (Numpy.array):
+                    Read-only array containing the circular kernel.
+                **total** (float):
+                    Sum of the kernel.
+        """
+        def _create():
+            """Create the kernel and its sum."""
+            kernel = circular_kernel(fullranges, ranges, weighted_mode)
+            kernel.flags.writeable = False
+            return kernel, float(np.sum(kernel))
+        key = ("kernel", self.kernel_key(fullranges, ranges, weighted_mode))
+        return self.lookup(key, _create)
+
+    @staticmethod
+    def kernel_key(fullranges, ranges, weighted_mode):
+        """
+        Return the key identifying a circular kernel.
+
+        Args:
+            fullranges (Numpy.array):
+                Number of grid cells in all dimensions used to create the
+                kernel.
+            ranges (Tuple):
+                Number of grid cells in the x and y direction used to create
+                the kernel.
+            weighted_mode (boolean):
+                Whether the kernel is weighted.
+
+        Returns:
+            key (tuple):
+                Hashable key for the kernel.
+        """
+        return (tuple(int(x) for x in fullranges),
+                tuple(int(x) for x in ranges), bool(weighted_mode))
+
+
+# Kernel cache shared by all the circular neighbourhood plugins.
+KERNEL_CACHE = KernelCache()
+
+
+def _next_fast_length(size):
+    """
+    Find the smallest size, not less than the input size, that has no prime
+    factors other than 2, 3 and 5, for which fast Fourier transforms are
+    efficient.
+
+    Args:
+        size (integer):
+            Minimum size required.
+
+    Returns:
+        fast_size (integer):
+            Efficient size for a fast Fourier transform.
+    """
+    fast_size = size
+    while True:
+        remainder = fast_size
+        for factor in [2, 3, 5]:
+            while remainder % factor == 0:
+                remainder //= factor
+        if remainder == 1:
+            return fast_size
+        fast_size += 1
+
+
+def kernel_spans(kernel):
+    """
+    Decompose a two dimensional kernel into spans, which are runs of equal,
+    non-zero weights along each row of the kernel. For example, an
+    unweighted circular kernel has one span on each row.
+
+    Args:
+        kernel (Numpy.array):
+            Two dimensional kernel.
+
+    Returns:
+        spans (list):
+            List of tuples of (row index, first column index, last column
+            index, weight) for each span within the kernel.
+    """
+    spans = []
+    for row_index, row in enumerate(kernel):
+        start = None
+        for column_index, weight in enumerate(row):
+            if start is not None and weight != row[start]:
+                spans.append((row_index, start, column_index - 1, row[start]))
+                start = None
+            if start is None and weight != 0:
+                start = column_index
+        if start is not None:
+            spans.append((row_index, start, len(row) - 1, row[start]))
+    return spans
+
+
+def correlate_using_spans(data, kernel, spans=None):
+    """
+    Correlate the data with a kernel by decomposing the kernel into spans of
+    equal weights along each row, and calculating the sum over each span
+    from a cumulative sum along the x axis. The result is equivalent to
+    scipy.ndimage.filters.correlate(data, kernel, mode='nearest'). For an
+    unweighted circular kernel, which has one span per row, the cost is
+    proportional to the radius rather than the area of the kernel.
+
+    The data are padded by repeating the edge values, as for the 'nearest'
+    mode. All leading dimensions are processed together.
+
+    Args:
+        data (Numpy.array):
+            Data to be correlated with the kernel.
+        kernel (Numpy.array):
+            Kernel with the same number of dimensions as the data. The
+            kernel is expected to have more than one point along two
+            dimensions, which are treated as the y and x dimensions, and an
+            odd number of points along these dimensions.
+
+    Keyword Args:
+        spans (list or None):
+            Spans of the kernel, as returned by kernel_spans, if these have
+            already been calculated.
+
+    Returns:
+        result (Numpy.array):
+            Data correlated with the kernel.
+    """
+    data = np.asarray(data)
+    y_axis, x_axis = [
+        axis for axis, size in enumerate(kernel.shape) if size > 1]
+    kernel_2d = kernel.reshape(kernel.shape[y_axis], kernel.shape[x_axis])
+    half_width_y = (kernel_2d.shape[0] - 1) // 2
+    half_width_x = (kernel_2d.shape[1] - 1) // 2
+
+    # Move the y and x dimensions to the end, and pad the x dimension with
+    # an additional leading column that is set to zero, so that the
+    # cumulative sum gives the sum of all points prior to each column.
+    data_yx = np.moveaxis(data, [y_axis, x_axis], [-2, -1])
+    pad_width = [(0, 0)] * (data.ndim - 2)
+    pad_width.extend([(half_width_y, half_width_y),
+                      (half_width_x + 1, half_width_x)])
+    accumulation_type = np.result_type(data.dtype, np.float64)
+    cumulative = np.pad(data_yx, pad_width, mode='edge').astype(
+        accumulation_type)
+    cumulative[..., 0] = 0.
+    np.cumsum(cumulative, axis=-1, out=cumulative)
+
+    n_rows, n_columns = data_yx.shape[-2:]
+    result = np.zeros(data_yx.shape, dtype=accumulation_type)
+    if spans is None:
+        spans = kernel_spans(kernel_2d)
+    for row_index, first, last, weight in spans:
+        rows = slice(row_index, row_index + n_rows)
+        span_sum = (cumulative[..., rows, last + 1:last + 1 + n_columns] -
+                    cumulative[..., rows, first:first + n_columns])
+        if weight != 1:
+            span_sum *= weight
+        result += span_sum
+    result = np.moveaxis(result, [-2, -1], [y_axis, x_axis])
+    if np.issubdtype(data.dtype, np.floating):
+        result = result.astype(data.dtype)
+    return result
+
+
+def choose_convolution_method(data_shape, kernel, spans=None):
+    """
+    Choose whether it is cheapest to apply a kernel directly, as a sum of
+    spans along each row, or using a fast Fourier transform, based upon the
+    number of non-zero points within the kernel, the number of spans within
+    the kernel and the size of the transforms required.
+
+    Args:
+        data_shape (tuple):
+            Shape of the data to which the kernel will be applied.
+        kernel (Numpy.array):
+            Kernel with the same number of dimensions as the data.
+
+    Keyword Args:
+        spans (list or None):
+            Spans of the kernel, as returned by kernel_spans, if these have
+            already been calculated.
+
+    Returns:
+        method (string):
+            Either "direct", "spans" or "fft".
+    """
+    n_points = np.prod(data_shape, dtype=float)
+    direct_cost = n_points * np.count_nonzero(kernel)
+    costs = {"direct": direct_cost}
+    if len([size for size in kernel.shape if size > 1]) == 2:
+        if spans is None:
+            spans = kernel_spans(kernel.reshape(
+                [size for size in kernel.shape if size > 1]))
+        costs["spans"] = SPAN_COST_FACTOR * n_points * len(spans)
+    transform_size = 1.
+    fft_size = 1.
+    for data_size, kernel_size in zip(data_shape, kernel.shape):
+        if kernel_size > 1:
+            transform_size *= data_size + kernel_size - 1
+            fft_size *= data_size + kernel_size - 1
+        else:
+            fft_size *= data_size
+    costs["fft"] = (
+        FFT_COST_FACTOR * fft_size * np.log2(max(transform_size, 2.)))
+    # Prefer the direct method, then spans, when costs are equal.
+    return min(["direct", "spans", "fft"],
+               key=lambda method: costs.get(method, np.inf))
+
+
+def _fft_padding(data_shape, kernel_shape):
+    """
+    Calculate the padding and the shape of the transforms required to
+    correlate data with a kernel using fast Fourier transforms.
+
+    Args:
+        data_shape (tuple):
+            Shape of the data.
+        kernel_shape (tuple):
+            Shape of the kernel.
+
+    Returns:
+        (tuple): tuple containing:
+            **pad_width** (list):
+                Padding for each dimension of the data.
+            **fft_shape** (tuple):
+                Shape of the transforms.
+            **axes** (tuple):
+                Dimensions along which the transforms are calculated.
+    """
+    axes = tuple(axis for axis, size in enumerate(kernel_shape) if size > 1)
+    pad_width = [(0, 0)] * len(data_shape)
+    fft_shape = []
+    for axis in axes:
+        half_width = (kernel_shape[axis] - 1) // 2
+        fast_size = _next_fast_length(data_shape[axis] + 2*half_width)
+        pad_width[axis] = (half_width, fast_size - data_shape[axis] -
+                           half_width)
+        fft_shape.append(fast_size)
+    return pad_width, tuple(fft_shape), axes
+
+
+def kernel_transform(kernel, fft_shape, axes):
+    """
+    Calculate the complex conjugate of the Fourier transform of a kernel,
+    which is multiplied by the transform of the data to correlate the data
+    with the kernel.
+
+    Args:
+        kernel (Numpy.array):
+            Kernel to be transformed.
+        fft_shape (tuple):
+            Shape of the transform.
+        axes (tuple):
+            Dimensions along which the transform is calculated.
+
+    Returns:
+        transform (Numpy.array):
+            Complex conjugate of the transform of the kernel.
+    """
+    return np.conj(np.fft.rfftn(kernel, s=fft_shape, axes=axes))
+
+
+def correlate_using_fft(data, kernel, transform=None):
+    """
+    Correlate the data with a kernel using fast Fourier transforms. The
+    result is equivalent to
+    scipy.ndimage.filters.correlate(data, kernel, mode='nearest') but the
+    cost is independent of the size of the kernel.
+
+    The data are padded by repeating the edge values, as for the 'nearest'
+    mode, by the half-width of the kernel along each dimension for which the
+    kernel has more than one point, so that the circular convolution
+    implied by the transforms does not wrap around the edges of the domain.
+    Transforms are only calculated along these dimensions, so leading
+    dimensions are processed together.
+
+    The result is rounded to remove the rounding error introduced by the
+    transforms, so that e.g. neighbourhoods with no occurrences give exactly
+    zero.
+
+    Args:
+        data (Numpy.array):
+            Data to be correlated with the kernel.
+        kernel (Numpy.array):
+            Kernel with the same number of dimensions as the data. The size
+            of the kernel along each dimension is expected to be odd.
+
+    Keyword Args:
+        transform (Numpy.array or None):
+            Transform of the kernel, as returned by kernel_transform for the
+            shape of the data, if this has already been calculated.
+
+    Returns:
+        result (Numpy.array):
+            Data correlated with the kernel.
+    """
+    data = np.asarray(data)
+    pad_width, fft_shape, axes = _fft_padding(data.shape, kernel.shape)
+    padded = np.pad(data, pad_width, mode='edge')
+
+    # Correlation is calculated by multiplying the transform of the data
+    # with the complex conjugate of the transform of the kernel.
+    if transform is None:
+        transform = kernel_transform(kernel, fft_shape, axes)
+    transformed = np.fft.rfftn(padded, s=fft_shape, axes=axes)
+    transformed *= transform
+    result = np.fft.irfftn(transformed, s=fft_shape, axes=axes)
+    result = result[tuple(slice(0, size) for size in data.shape)]
+
+    tolerance = (
+        np.finfo(result.dtype).eps * np.abs(padded).max() *
+        np.abs(kernel).sum() * np.log2(max(np.prod(fft_shape), 2)) * 10.)
+    if tolerance > 0:
+        decimals = int(-np.floor(np.log10(tolerance)))
+        result = np.round(result, decimals)
+    if np.issubdtype(data.dtype, np.floating):
+        result = result.astype(data.dtype)
+    return result
+
+
 class CircularNeighbourhood(object):
 
     """
@@ -99,7 +468,8 @@ class CircularNeighbourhood(object):
     """
 
     def __init__(self, weighted_mode=True, sum_or_fraction="fraction",
-                 re_mask=False):
+                 re_mask=False, convolution_method="auto", dtype=None,
+                 radius_table=None):
         """
         Initialise class.
 
@@ -121,6 +491,24 @@ class CircularNeighbourhood(object):
                 mask is not applied. Therefore, the neighbourhood processing
                 may result in values being present in areas that were
                 originally masked.
+            convolution_method (string):
+                Method used to apply the kernel. "direct" applies the kernel
+                at each point, "spans" sums runs of equal weights along each
+                row of the kernel using cumulative sums, "fft" uses fast
+                Fourier transforms and "auto" chooses the cheapest of these
+                based upon the size and shape of the kernel and the size of
+                the grid.
+                Valid options are "auto", "direct", "spans" or "fft".
+            dtype (numpy dtype or None):
+                Working precision used for the data and the result, e.g.
+                np.float32 to halve the memory required for float32 input.
+                If None, the data type of the input data is used.
+            radius_table (RadiusTable or None):
+                Table used to look up the number of grid cells equivalent to
+                each radius, so that the conversion is calculated once for
+                each grid and radius, e.g. the table shared by the
+                NeighbourhoodProcessing plugins using the same radii.
+                If None, the number of grid cells is calculated on each call.
         """
         self.weighted_mode = weighted_mode
         if sum_or_fraction not in ["sum", "fraction"]:
@@ -132,6 +520,15 @@ class CircularNeighbourhood(object):
             raise ValueError(msg)
         self.sum_or_fraction = sum_or_fraction
         self.re_mask = re_mask
+        if convolution_method not in ["auto", "direct", "spans", "fft"]:
+            msg = ("The convolution method {} is invalid. "
+                   "Valid options are 'auto', 'direct', 'spans' or "
+                   "'fft'.".format(
+                       convolution_method))
+            raise ValueError(msg)
+        self.convolution_method = convolution_method
+        self.dtype = dtype
+        self.radius_table = radius_table
 
     def __repr__(self):
         """Represent the configured plugin instance as a string."""
@@ -139,11 +536,87 @@ class CircularNeighbourhood(object):
                   'sum_or_fraction: {}>')
         return result.format(self.weighted_mode, self.sum_or_fraction)
 
+    def _grid_cells(self, cube, radius):
+        """
+        Find the number of grid cells in the x and y directions equivalent
+        to a radius on the grid of a cube, using the radius table if one has
+        been supplied.
+
+        Args:
+            cube (Iris.cube.Cube):
+                Cube containing the x and y coordinates of the grid.
+            radius (float):
+                Radius in metres.
+
+        Returns:
+            grid_cells (tuple):
+                The number of grid cells in the x and y directions.
+        """
+        if self.radius_table is None:
+            return convert_distance_into_number_of_grid_cells(
+                cube, radius, MAX_RADIUS_IN_GRID_CELLS)
+        return self.radius_table.grid_cells(
+            cube, radius, max_radius_in_grid_cells=MAX_RADIUS_IN_GRID_CELLS)
+
+    def correlate(self, data, kernel, kernel_key=None):
+        """
+        Correlate the data with the kernel, with values beyond the edges of
+        the domain taken from the nearest point within the domain, using
+        the convolution_method.
+
+        Args:
+            data (Numpy.array):
+                Data to be correlated with the kernel.
+            kernel (Numpy.array):
+                Kernel with the same number of dimensions as the data.
+
+        Keyword Args:
+            kernel_key (tuple or None):
+                Key identifying the kernel within the kernel cache, as
+                returned by KernelCache.kernel_key. If provided, the spans
+                and transforms of the kernel are cached.
+
+        Returns:
+            result (Numpy.array):
+                Data correlated with the kernel.
+        """
+        spans = None
+        n_axes = len([size for size in np.shape(kernel) if size > 1])
+        if kernel_key is not None and n_axes == 2:
+            spans = KERNEL_CACHE.lookup(
+                ("spans", kernel_key), lambda: kernel_spans(
+                    kernel.reshape(
+                        [size for size in kernel.shape if size > 1])))
+        convolution_method = self.convolution_method
+        if convolution_method == "auto":
+            convolution_method = choose_convolution_method(
+                np.shape(data), kernel, spans=spans)
+        if convolution_method == "fft":
+            transform = None
+            if kernel_key is not None:
+                _, fft_shape, axes = _fft_padding(
+                    np.shape(data), kernel.shape)
+
+                def _create_transform():
+                    """Transform the kernel, as a read-only array."""
+                    transform = kernel_transform(kernel, fft_shape, axes)
+                    transform.flags.writeable = False
+                    return transform
+                transform = KERNEL_CACHE.lookup(
+                    ("transform", kernel_key, fft_shape), _create_transform)
+            return correlate_using_fft(data, kernel, transform=transform)
+        if convolution_method == "spans":
+            return correlate_using_spans(data, kernel, spans=spans)
+        return scipy.ndimage.filters.correlate(data, kernel, mode='nearest')
+
     def apply_circular_kernel(self, cube, ranges):
         """
 
         Method to apply a circular kernel to the data within the input cube in
-        order to smooth the resulting field.
+        order to smooth the resulting field. The kernel is applied either
+        directly or using fast Fourier transforms, depending upon the
+        convolution_method.
+
         Args:
             cube (Iris.cube.Cube):
                 Cube containing to array to apply CircularNeighbourhood
@@ -159,6 +632,8 @@ class CircularNeighbourhood(object):
 
         """
         data = cube.data
+        if self.dtype is not None:
+            data = data.astype(self.dtype, copy=False)
         fullranges = np.zeros([np.ndim(data)])
         axes = []
         for axis in ["x", "y"]:
@@ -167,22 +642,71 @@ class CircularNeighbourhood(object):
 
         for axis_index, axis in enumerate(axes):
             fullranges[axis] = ranges[axis_index]
-        kernel = circular_kernel(fullranges, ranges, self.weighted_mode)
+        kernel, kernel_sum = KERNEL_CACHE.kernel(
+            fullranges, ranges, self.weighted_mode)
+        kernel_key = KERNEL_CACHE.kernel_key(
+            fullranges, ranges, self.weighted_mode)
         # Smooth the data by applying the kernel.
         if self.sum_or_fraction is "fraction":
-            total_area = np.sum(kernel)
+            total_area = kernel_sum
         elif self.sum_or_fraction is "sum":
             total_area = 1.0
 
-        cube.data = scipy.ndimage.filters.correlate(
-            data, kernel, mode='nearest') / total_area
+        cube.data = (
+            self.correlate(data, kernel, kernel_key=kernel_key) /
+            float(total_area))
         return cube
 
+    def apply_circular_kernel_with_mask(self, cube, mask_cube, ranges):
+        """
+        Method to apply a circular kernel to the data within the input cube,
+        only including the points within each neighbourhood that are not
+        masked out. The kernel is applied both to the data multiplied by
+        the mask and to the mask itself, and the two results are divided,
+        so that the result is normalised by the unmasked area of each
+        neighbourhood. Neighbourhoods that are entirely masked out are set
+        to zero.
+
+        Args:
+            cube (Iris.cube.Cube):
+                Cube containing to array to apply CircularNeighbourhood
+                processing to.
+            mask_cube (Iris.cube.Cube):
+                Cube containing the array to be used as a mask, where points
+                with a value of one are used and points with a value of zero
+                are masked out.
+            ranges (Tuple):
+                Number of grid cells in the x and y direction used to create
+                the kernel.
+
+        Returns:
+            cube (Iris.cube.Cube):
+                Cube containing the smoothed field after the kernel has been
+                applied.
+        """
+        mask_dtype = np.float64 if self.dtype is None else self.dtype
+        mask = np.broadcast_to(
+            mask_cube.data.squeeze(), cube.shape).astype(mask_dtype)
+        # Work on copies, so that the input cube is not modified.
+        masked_cube = cube.copy(data=np.asarray(cube.data) * mask)
+        masked_cube = self.apply_circular_kernel(masked_cube, ranges)
+        mask_to_process = self.apply_circular_kernel(
+            cube.copy(data=mask), ranges)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            normalised_data = np.true_divide(
+                masked_cube.data, mask_to_process.data)
+        normalised_data[~np.isfinite(normalised_data)] = 0
+        if self.re_mask:
+            normalised_data = normalised_data * mask
+        masked_cube.data = normalised_data
+        return masked_cube
+
     def run(self, cube, radius, mask_cube=None):
         """
 
         Call the methods required to calculate and apply a circular
-        neighbourhood.
+        neighbourhood. If a mask cube is provided, only the unmasked points
+        within each neighbourhood contribute to the result.
 
         Args:
             cube (Iris.cube.Cube):
@@ -202,27 +726,129 @@ class CircularNeighbourhood(object):
                 applied.
 
         """
-        if mask_cube is not None:
-            msg = ("The use of a mask cube with a circular kernel is not "
-                   "yet implemented.")
-            raise NotImplementedError(msg)
-
         # Check that the cube has an equal area grid.
         check_if_grid_is_equal_area(cube)
-        ranges = convert_distance_into_number_of_grid_cells(
-            cube, radius, MAX_RADIUS_IN_GRID_CELLS)
-        cube = self.apply_circular_kernel(cube, ranges)
+        ranges = self._grid_cells(cube, radius)
+        if mask_cube is None:
+            cube = self.apply_circular_kernel(cube, ranges)
+        else:
+            cube = self.apply_circular_kernel_with_mask(
+                cube, mask_cube, ranges)
         return cube
 
+    def run_multiple_radii(self, cube, radii, mask_cube=None):
+        """
+        Apply a circular neighbourhood to a cube with a time dimension,
+        using a different radius at each time. The field is padded once,
+        with a halo large enough for the largest radius, and the kernel for
+        each time is applied to the padded field, so that the cube does not
+        need to be sliced over time and the results concatenated. The result
+        is the same as applying the run method to each time separately.
+
+        Args:
+            cube (Iris.cube.Cube):
+                Cube containing to array to apply CircularNeighbourhood
+                processing to.
+            radii (list or Numpy array):
+                Radii in metres, one for each point along the time
+                coordinate of the cube.
+
+        Keyword Args:
+            mask_cube (Iris.cube.Cube or None):
+                Cube containing the array to be used as a mask.
+
+        Returns:
+            cube (Iris.cube.Cube):
+                Cube containing the smoothed field after the kernel has been
+                applied.
+
+        Raises:
+            ValueError: If the number of radii does not match the number of
+                points along the time coordinate.
+        """
+        if len(radii) != len(cube.coord("time").points):
+            msg = ("The number of radii ({}) does not match the number of "
+                   "times ({}) within the cube.".format(
+                       len(radii), len(cube.coord("time").points)))
+            raise ValueError(msg)
+        if not cube.coord_dims("time"):
+            return self.run(cube, radii[0], mask_cube=mask_cube)
+
+        # Check that the cube has an equal area grid.
+        check_if_grid_is_equal_area(cube)
+        all_ranges = [
+            tuple(self._grid_cells(cube, radius)) for radius in radii]
+
+        # Move the time dimension to the front, and find the x and y
+        # dimensions of the remaining array.
+        time_dim, = cube.coord_dims("time")
+        axes = []
+        for axis in ["x", "y"]:
+            dim, = cube.coord_dims(cube.coord(axis=axis).name())
+            axes.append(dim - 1 if dim > time_dim else dim)
+        halo = np.zeros([cube.ndim - 1], dtype=int)
+        for axis_index, axis in enumerate(axes):
+            halo[axis] = max([ranges[axis_index] for ranges in all_ranges])
+        pad_width = [(0, 0)] + [(width, width) for width in halo]
+        unpad = tuple(
+            slice(width, width + size) for width, size in
+            zip(halo, np.delete(cube.shape, time_dim)))
+
+        data = cube.data
+        if self.dtype is not None:
+            data = data.astype(self.dtype, copy=False)
+        if mask_cube is not None:
+            mask_dtype = np.float64 if self.dtype is None else self.dtype
+            mask = np.broadcast_to(
+                mask_cube.data.squeeze(), cube.shape).astype(mask_dtype)
+            arrays = [np.asarray(data) * mask, mask]
+        else:
+            arrays = [data]
+
+        results = []
+        for array in arrays:
+            # Pad with the nearest values within the domain, as used when
+            # correlating, so that no further padding is needed for the
+            # largest kernel.
+            padded = np.pad(
+                np.moveaxis(array, time_dim, 0), pad_width, mode="edge")
+            smoothed = []
+            for padded_slice, ranges in zip(padded, all_ranges):
+                fullranges = np.zeros([cube.ndim - 1])
+                for axis_index, axis in enumerate(axes):
+                    fullranges[axis] = ranges[axis_index]
+                kernel, total_area = KERNEL_CACHE.kernel(
+                    fullranges, ranges, self.weighted_mode)
+                kernel_key = KERNEL_CACHE.kernel_key(
+                    fullranges, ranges, self.weighted_mode)
+                if self.sum_or_fraction != "fraction":
+                    total_area = 1.0
+                smoothed.append(
+                    self.correlate(
+                        padded_slice, kernel, kernel_key=kernel_key)[unpad] /
+                    float(total_area))
+            results.append(np.stack(smoothed, axis=time_dim))
+
+        result = results[0]
+        if mask_cube is not None:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result = np.true_divide(result, results[1])
+            result[~np.isfinite(result)] = 0
+            if self.re_mask:
+                result = result * mask
+        return cube.copy(data=result)
 
-class GeneratePercentilesFromACircularNeighbourhood(object):
+
+class GeneratePercentilesFromACircularNeighbourhood(
+        BaseNeighbourhoodPercentiles):
     """
     Methods for use in calculating percentiles from a 2D circular
     neighbourhood.
     A maximum kernel radius of 500 grid cells is imposed in order to
     avoid computational ineffiency and possible memory errors.
     """
-    def __init__(self, percentiles=DEFAULT_PERCENTILES):
+    def __init__(self, percentiles=DEFAULT_PERCENTILES, sliding_window=False,
+                 max_histogram_bins=MAX_HISTOGRAM_BINS):
         """
         Initialise class.
 
@@ -230,9 +856,23 @@ class GeneratePercentilesFromACircularNeighbourhood(object):
             percentiles (list):
                 Percentile values at which to calculate; if not provided uses
                 DEFAULT_PERCENTILES.
+            sliding_window (boolean):
+                If True, calculate the percentiles using a histogram of the
+                neighbourhood that is updated incrementally as the kernel
+                slides along the x axis, so that the memory required does not
+                depend upon the size of the kernel. If False, calculate the
+                percentiles from a copy of the field for each point within
+                the kernel.
+            max_histogram_bins (integer):
+                Maximum number of histogram bins to use when sliding_window
+                is True. If the field has more unique values than this, the
+                values are grouped into equally spaced bins and the
+                percentiles are approximate.
 
         """
-        self.percentiles = tuple(percentiles)
+        super(GeneratePercentilesFromACircularNeighbourhood, self).__init__(
+            percentiles=percentiles, max_histogram_bins=max_histogram_bins)
+        self.sliding_window = sliding_window
 
     def __repr__(self):
         """Represent the configured class instance as a string."""
@@ -335,10 +975,30 @@ class GeneratePercentilesFromACircularNeighbourhood(object):
                      [ 0.5,  0.5,  0.5],
                      [ 0.5,  0.5,  0.5]]]
         """
+        return self.make_percentile_cube(
+            slice_2d, data=self._pad_and_unpad_data(slice_2d.data, kernel))
+
+    def _pad_and_unpad_data(self, data, kernel):
+        """
+        Calculate percentiles over the neighbourhood of each point within a
+        two dimensional array, as described for pad_and_unpad_cube.
+
+        Args:
+            data (Numpy array):
+                2d array to be padded with a halo.
+            kernel (Numpy array):
+                Kernel used to specify the neighbourhood to consider when
+                calculating the percentiles within a neighbourhood.
+
+        Returns:
+            perc_data (Numpy array):
+                Array of percentiles, with the percentiles as the leading
+                dimension followed by the dimensions of the input array.
+        """
         ranges_xy = np.empty(2, dtype=int)
         ranges_xy[0] = int(np.floor(kernel.shape[0] / 2.0))
         ranges_xy[1] = int(np.floor(kernel.shape[1] / 2.0))
-        padded = np.pad(slice_2d.data, ranges_xy, mode='mean',
+        padded = np.pad(data, ranges_xy, mode='mean',
                         stat_length=np.max(ranges_xy))
         padshape = np.shape(padded)  # Store size to make unflatten easier
         padded = padded.flatten()
@@ -357,12 +1017,140 @@ class GeneratePercentilesFromACircularNeighbourhood(object):
         # Return to 3D
         perc_data = perc_data.reshape(
             len(self.percentiles), padshape[0], padshape[1])
-        # Create a cube for these data:
-        pctcube = self.make_percentile_cube(slice_2d)
-        # And put in data, removing the padding
-        pctcube.data = perc_data[:, ranges_xy[0]:-ranges_xy[0],
-                                 ranges_xy[1]:-ranges_xy[1]]
-        return pctcube
+        # Remove the padding
+        return perc_data[:, ranges_xy[0]:-ranges_xy[0],
+                         ranges_xy[1]:-ranges_xy[1]]
+
+    def sliding_window_percentiles(self, slice_2d, kernel):
+        """
+        Method to calculate percentiles over a neighbourhood by sliding the
+        kernel along the x axis and updating a histogram of the values within
+        the kernel, rather than creating a copy of the field for each point
+        within the kernel. The memory required is therefore independent of
+        the size of the kernel.
+
+        The histograms for all rows are held at once. When moving the kernel
+        by one column, only the points that enter and leave the kernel are
+        added to and removed from the histograms. The values at the ranks
+        needed for the requested percentiles are then found from the
+        cumulative histograms and interpolated linearly, in the same way as
+        numpy.percentile.
+
+        The padding and the points included within the kernel are the same
+        as within the pad_and_unpad_cube method.
+
+        Args:
+            slice_2d (Iris.cube.Cube):
+                2d cube to be padded with a halo.
+            kernel (Numpy array):
+                Kernel used to specify the neighbourhood to consider when
+                calculating the percentiles within a neighbourhood.
+
+        Returns:
+            pctcube (Iris.cube.Cube):
+                Cube containing the percentiles calculated over the
+                neighbourhood, with an added percentile dimension.
+        """
+        return self.make_percentile_cube(
+            slice_2d,
+            data=self._sliding_window_data(slice_2d.data, kernel))
+
+    def _sliding_window_data(self, data, kernel):
+        """
+        Calculate percentiles over the neighbourhood of each point within a
+        two dimensional array, as described for sliding_window_percentiles.
+
+        Args:
+            data (Numpy array):
+                2d array to be padded with a halo.
+            kernel (Numpy array):
+                Kernel used to specify the neighbourhood to consider when
+                calculating the percentiles within a neighbourhood.
+
+        Returns:
+            perc_data (Numpy array):
+                Array of percentiles, with the percentiles as the leading
+                dimension followed by the dimensions of the input array.
+        """
+        ranges_xy = np.empty(2, dtype=int)
+        ranges_xy[0] = int(np.floor(kernel.shape[0] / 2.0))
+        ranges_xy[1] = int(np.floor(kernel.shape[1] / 2.0))
+        padded = np.pad(data, ranges_xy, mode='mean',
+                        stat_length=np.max(ranges_xy))
+        padded = np.asarray(padded)
+        n_rows = padded.shape[0] - 2*ranges_xy[0]
+        n_columns = padded.shape[1] - 2*ranges_xy[1]
+        bin_indices, bin_values = (
+            self._bin_data(padded, self.max_histogram_bins))
+        n_bins = len(bin_values)
+
+        # Offsets from each point of the points within the neighbourhood,
+        # grouped by the row offset.
+        offsets_by_row = {}
+        for i in range(-ranges_xy[1], ranges_xy[1]+1):
+            for j in range(-ranges_xy[0], ranges_xy[0]+1):
+                if kernel[..., i+ranges_xy[1], j+ranges_xy[0]] > 0.:
+                    offsets_by_row.setdefault(-j, set()).add(-i)
+        n_points = sum(len(x) for x in offsets_by_row.values())
+
+        # Offsets of the points entering and leaving the kernel when the
+        # kernel moves by one column, relative to the new kernel centre.
+        entering = []
+        leaving = []
+        for y_offset, x_offsets in offsets_by_row.items():
+            for x_offset in x_offsets:
+                if x_offset + 1 not in x_offsets:
+                    entering.append((y_offset, x_offset))
+                if x_offset - 1 not in x_offsets:
+                    leaving.append((y_offset, x_offset - 1))
+
+        rows = np.arange(n_rows) + ranges_xy[0]
+        histogram_index = (np.arange(n_rows) * n_bins)[:, np.newaxis]
+
+        def _count(offsets, column):
+            """Histogram of the points at the offsets from the column."""
+            y_offsets, x_offsets = np.array(offsets).T
+            indices = bin_indices[rows + y_offsets[:, np.newaxis],
+                                  column + x_offsets[:, np.newaxis]]
+            return np.bincount(
+                (indices.T + histogram_index).ravel(),
+                minlength=n_rows*n_bins).reshape(n_rows, n_bins)
+
+        # Ranks of the values required to interpolate to each percentile.
+        positions = np.array(self.percentiles) / 100. * (n_points - 1)
+        lower_ranks = np.floor(positions).astype(int)
+        upper_ranks = np.minimum(lower_ranks + 1, n_points - 1)
+        fractions = positions - lower_ranks
+        ranks = np.concatenate((lower_ranks, upper_ranks))
+        # Offset the cumulative counts for each row, so that the cumulative
+        # counts for all rows form a single monotonic array that can be
+        # searched at once.
+        row_offsets = (np.arange(n_rows) * (n_points + 1))[:, np.newaxis]
+        search_values = (row_offsets + ranks).ravel()
+
+        perc_data = np.empty(
+            (len(self.percentiles), n_rows, n_columns),
+            dtype=np.result_type(bin_values.dtype, float))
+        histogram = np.zeros((n_rows, n_bins), dtype=int)
+        for y_offset, x_offsets in offsets_by_row.items():
+            histogram += _count(
+                [(y_offset, x_offset) for x_offset in x_offsets],
+                ranges_xy[1])
+        for column in range(n_columns):
+            padded_column = column + ranges_xy[1]
+            if column > 0:
+                histogram += _count(entering, padded_column)
+                histogram -= _count(leaving, padded_column)
+            cumulative = np.cumsum(histogram, axis=1) + row_offsets
+            index = np.searchsorted(
+                cumulative.ravel(), search_values, side='right')
+            values = bin_values[
+                (index.reshape(n_rows, -1) - histogram_index)].T
+            lower = values[:len(self.percentiles)]
+            upper = values[len(self.percentiles):]
+            perc_data[:, :, column] = (
+                lower + (upper - lower) * fractions[:, np.newaxis])
+        return perc_data
 
     def run(self, cube, radius, mask_cube=None):
         """
@@ -397,58 +1185,11 @@ class GeneratePercentilesFromACircularNeighbourhood(object):
         ranges_tuple = convert_distance_into_number_of_grid_cells(
             cube, radius, MAX_RADIUS_IN_GRID_CELLS)
         ranges_xy = np.array(ranges_tuple)
-        kernel = circular_kernel(ranges_xy, ranges_tuple, weighted_mode=False)
-        # Loop over each 2D slice to reduce memory demand and derive
-        # percentiles on the kernel. Will return an extra dimension.
-        pctcubelist = iris.cube.CubeList()
-        for slice_2d in cube.slices(['projection_y_coordinate',
-                                     'projection_x_coordinate']):
-            pctcubelist.append(
-                self.pad_and_unpad_cube(slice_2d, kernel))
-        result = pctcubelist.merge_cube()
-        exception_coordinates = (
-            find_dimension_coordinate_mismatch(
-                cube, result, two_way_mismatch=False))
-        result = (
-            check_cube_coordinates(
-                cube, result, exception_coordinates=exception_coordinates))
-
-        # Arrange cube, so that the coordinate order is:
-        # realization, percentile, other coordinates.
-        required_order = []
-        if result.coords("realization"):
-            if result.coords("realization", dimensions=[]):
-                result = iris.util.new_axis(result, "realization")
-            required_order.append(result.coord_dims("realization")[0])
-        if result.coords("percentiles_over_neighbourhood"):
-            required_order.append(
-                result.coord_dims("percentiles_over_neighbourhood")[0])
-        other_coords = []
-        for coord in result.dim_coords:
-            if coord.name() not in ["realization",
-                                    "percentiles_over_neighbourhood"]:
-                other_coords.append(result.coord_dims(coord.name())[0])
-        required_order.extend(other_coords)
-        result.transpose(required_order)
-
-        return result
-
-    def make_percentile_cube(self, cube):
-        """Returns a cube with the same metadata as the sample cube
-        but with an added percentile dimension.
-
-        Args:
-            cube (Iris.cube.Cube):
-                Cube to copy meta data from.
-        Returns:
-            cube (Iris.cube.Cube):
-                Cube like input but with added percentiles coordinate.
-                Each slice along this coordinate is identical.
-        """
-        pctcubelist = iris.cube.CubeList()
-        for pct in self.percentiles:
-            pctcube = cube.copy()
-            pctcube.add_aux_coord(iris.coords.DimCoord(
-                pct, long_name="percentiles_over_neighbourhood", units='%'))
-            pctcubelist.append(pctcube)
-        return pctcubelist.merge_cube()
+        kernel, _ = KERNEL_CACHE.kernel(
+            ranges_xy, ranges_tuple, weighted_mode=False)
+        if self.sliding_window:
+            percentiles_function = self._sliding_window_data
+        else:
+            percentiles_function = self._pad_and_unpad_data
+        return self._percentiles_for_each_slice(
+            cube, lambda data: percentiles_function(data, kernel))
@@ -30,21 +30,304 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """Module containing neighbourhood processing utilities."""
 
-import math
+from multiprocessing.pool import ThreadPool
 
 import iris
 import numpy as np
 
 from improver.nbhood.circular_kernel import (
     CircularNeighbourhood, GeneratePercentilesFromACircularNeighbourhood)
-from improver.nbhood.square_kernel import SquareNeighbourhood
+from improver.nbhood.percentiles import MAX_HISTOGRAM_BINS
+from improver.nbhood.square_kernel import (
+    GeneratePercentilesFromASquareNeighbourhood, MAX_RADIUS_IN_GRID_CELLS,
+    SquareNeighbourhood)
 
 from improver.constants import DEFAULT_PERCENTILES
+from improver.utilities.cache import LRUCache
 from improver.utilities.cube_checker import (
-    check_cube_coordinates, find_dimension_coordinate_mismatch)
+    check_cube_coordinates, check_for_nan,
+    find_dimension_coordinate_mismatch)
 from improver.utilities.cube_manipulation import concatenate_cubes
+from improver.utilities.spatial import (
+    convert_distance_into_number_of_grid_cells)
 from improver.utilities.temporal import find_required_lead_times
 
+# Maximum number of entries, for different numbers of ensemble members,
+# sets of lead times, or grids and radii, held within each radius table.
+RADIUS_TABLE_SIZE = 256
+
+# Maximum number of radius tables, for different configurations of radii,
+# lead times and ensemble factor, shared between plugins.
+RADIUS_TABLES_CACHE_SIZE = 32
+
+
+def _tile_ranges(size, tile_size, halo):
+    """
+    Divide an axis into tiles, each extended by a halo that is truncated at
+    the edges of the axis. The interior of every tile contains at least
+    halo + 1 points, with any thinner tile at the end of the axis merged
+    into the previous tile, so that each tile, including its halo, spans at
+    least the radius of the neighbourhood that determined the halo.
+
+    Args:
+        size (integer):
+            Number of points along the axis.
+        tile_size (integer):
+            Maximum number of points in the interior of each tile, unless
+            this is smaller than halo + 1 or a thin tile at the end of the
+            axis has been merged into the previous tile.
+        halo (integer):
+            Number of points added to each side of the interior of a tile.
+
+    Returns:
+        tile_ranges (list):
+            List of tuples of the slice of the axis covered by each tile,
+            including its halo, and the slice of the tile covered by its
+            interior.
+    """
+    tile_size = max(tile_size, halo + 1)
+    starts = list(range(0, size, tile_size))
+    if len(starts) > 1 and size - starts[-1] < halo + 1:
+        starts.pop()
+    tile_ranges = []
+    for index, start in enumerate(starts):
+        stop = starts[index + 1] if index + 1 < len(starts) else size
+        outer_start = max(start - halo, 0)
+        outer_stop = min(stop + halo, size)
+        tile_ranges.append(
+            (slice(outer_start, outer_stop),
+             slice(start - outer_start, stop - outer_start)))
+    return tile_ranges
+
+
+def _yx_index(cube, y_slice, x_slice):
+    """
+    Create an index for a cube, which selects the given slices of the
+    y and x dimensions and the whole of any other dimensions.
+
+    Args:
+        cube (Iris.cube.Cube):
+            Cube with y and x dimension coordinates.
+        y_slice, x_slice (slice):
+            Slices of the y and x dimensions.
+
+    Returns:
+        index (tuple):
+            Index for the cube.
+    """
+    index = [slice(None)] * cube.ndim
+    for axis, axis_slice in [("y", y_slice), ("x", x_slice)]:
+        for dim in cube.coord_dims(cube.coord(axis=axis).name()):
+            index[dim] = axis_slice
+    return tuple(index)
+
+
+class RadiusTable(object):
+    """
+    Table of the neighbourhood radii required for each number of ensemble
+    members and set of lead times, and of the equivalent numbers of grid
+    cells on each grid, for one configuration of radii, lead times and
+    ensemble factor. Entries are calculated when first requested and then
+    reused, so that the table can be shared across realizations, thresholds
+    and successive runs using the same configuration. The number of entries
+    held is bounded, with the least recently used entries discarded first,
+    so that a long-running process that sees many grids does not grow
+    without bound.
+
+    Tables should be obtained using get_radius_table, so that all plugins
+    using the same configuration, such as NeighbourhoodProcessing,
+    ProbabilityOfOccurrence and DiagnoseConvectivePrecipitation, share a
+    single table.
+    """
+
+    def __init__(self, radii, lead_times=None, ens_factor=1.0):
+        """
+        Initialise the table.
+
+        Args:
+            radii (float or List if defining lead times):
+                The radii in metres of the neighbourhood to apply.
+
+        Keyword Args:
+            lead_times (None or List):
+                List of lead times or forecast periods, at which the radii
+                within 'radii' are defined. The lead times are expected
+                in hours.
+            ens_factor (float):
+                The factor with which to adjust the neighbourhood size
+                for more than one ensemble member.
+        """
+        self.radii = radii
+        self.lead_times = lead_times
+        self.ens_factor = float(ens_factor)
+        self._radii = LRUCache(RADIUS_TABLE_SIZE)
+        self._grid_cells = LRUCache(RADIUS_TABLE_SIZE)
+
+    def __repr__(self):
+        """Represent the configured table as a string."""
+        result = ('<RadiusTable: radii: {}; lead_times: {}; '
+                  'ens_factor: {}>')
+        return result.format(self.radii, self.lead_times, self.ens_factor)
+
+    def adjust_for_ensemble(self, num_ens, radii):
+        """
+        Adjust neighbourhood sizes according to ensemble size.
+
+        Args:
+            num_ens (float):
+                Number of realizations or ensemble members.
+            radii (float or Numpy array):
+                Radii or widths appropriate for a single forecast in m.
+
+        Returns:
+            new_radii (float or Numpy array):
+                New neighbourhood radii (m).
+        """
+        if num_ens <= 1.0:
+            return radii
+        return self.ens_factor * np.sqrt(np.square(radii) / num_ens)
+
+    def find_radii(self, num_ens, cube_lead_times=None):
+        """
+        Find the radius or radii for the number of ensemble members and,
+        if provided, interpolate to find the radius at each lead time.
+        The result is calculated once for each number of ensemble members
+        and set of lead times.
+
+        Args:
+            num_ens (float):
+                Number of ensemble members or realizations.
+
+        Keyword Args:
+            cube_lead_times (np.array):
+                Array of forecast times found in cube.
+
+        Returns:
+            radii : float or np.array of float
+                Required neighbourhood sizes.
+        """
+        if cube_lead_times is None:
+            key = (float(num_ens), None)
+        else:
+            key = (float(num_ens),
+                   tuple(np.asarray(cube_lead_times).ravel().tolist()))
+
+        def _create():
+            """Find the radii for the key."""
+            if cube_lead_times is None:
+                radii = self.radii
+            else:
+                # Interpolate to find the radius at each required lead
+                # time.
+                radii = np.interp(
+                    cube_lead_times, self.lead_times, self.radii)
+            return self.adjust_for_ensemble(num_ens, radii)
+
+        radii = self._radii.lookup(key, _create)
+        if isinstance(radii, np.ndarray):
+            radii = radii.copy()
+        return radii
+
+    @staticmethod
+    def _grid_key(cube):
+        """
+        Create a key describing the properties of the x and y coordinates
+        of a cube that are used to convert a distance into a number of
+        grid cells.
+
+        Args:
+            cube (Iris.cube.Cube):
+                Cube with projection x and y coordinates.
+
+        Returns:
+            key (tuple or None):
+                Key for the grid, or None if the cube does not have suitable
+                coordinates.
+        """
+        key = []
+        for coord_name in ["projection_x_coordinate",
+                           "projection_y_coordinate"]:
+            try:
+                points = cube.coord(coord_name).points
+                key.append((str(cube.coord(coord_name).units),
+                            points.min(), points.max(),
+                            points[1] - points[0]))
+            except (iris.exceptions.CoordinateNotFoundError, IndexError):
+                return None
+        return tuple(key)
+
+    def grid_cells(self, cube, radius,
+                   max_radius_in_grid_cells=MAX_RADIUS_IN_GRID_CELLS):
+        """
+        Find the number of grid cells in the x and y directions equivalent
+        to a radius on the grid of a cube. The result is calculated once for
+        each grid and radius.
+
+        Args:
+            cube (Iris.cube.Cube):
+                Cube containing the x and y coordinates of the grid.
+            radius (float):
+                Radius in metres.
+
+        Keyword Args:
+            max_radius_in_grid_cells (integer):
+                Maximum radius in grid cells.
+
+        Returns:
+            grid_cells (tuple):
+                The number of grid cells in the x and y directions.
+        """
+        grid_key = self._grid_key(cube)
+        if grid_key is None:
+            return convert_distance_into_number_of_grid_cells(
+                cube, radius, max_radius_in_grid_cells)
+        key = (grid_key, float(radius), max_radius_in_grid_cells)
+        return self._grid_cells.lookup(
+            key, lambda: convert_distance_into_number_of_grid_cells(
+                cube, radius, max_radius_in_grid_cells))
+
+
+# Radius tables shared by all the neighbourhood processing plugins.
+_RADIUS_TABLES = LRUCache(RADIUS_TABLES_CACHE_SIZE)
+
+
+def get_radius_table(radii, lead_times=None, ens_factor=1.0):
+    """
+    Return the shared radius table for a configuration of radii, lead times
+    and ensemble factor, creating it if it does not already exist. A bounded
+    number of tables is held, with the least recently used discarded first.
+
+    Args:
+        radii (float or List if defining lead times):
+            The radii in metres of the neighbourhood to apply.
+
+    Keyword Args:
+        lead_times (None or List):
+            List of lead times or forecast periods, at which the radii
+            within 'radii' are defined. The lead times are expected
+            in hours.
+        ens_factor (float):
+            The factor with which to adjust the neighbourhood size
+            for more than one ensemble member.
+
+    Returns:
+        table (RadiusTable):
+            The radius table for the configuration.
+    """
+    if isinstance(radii, list):
+        radii = [float(radius) for radius in radii]
+        radii_key = tuple(radii)
+    else:
+        radii = float(radii)
+        radii_key = radii
+    lead_times_key = None
+    if lead_times is not None:
+        lead_times_key = tuple(float(lead_time) for lead_time in lead_times)
+    key = (radii_key, lead_times_key, float(ens_factor))
+    return _RADIUS_TABLES.lookup(
+        key, lambda: RadiusTable(
+            radii, lead_times=lead_times, ens_factor=ens_factor))
+
 
 class BaseNeighbourhoodProcessing(object):
     """
@@ -62,7 +345,7 @@ class BaseNeighbourhoodProcessing(object):
     """
 
     def __init__(self, neighbourhood_method, radii, lead_times=None,
-                 ens_factor=1.0):
+                 ens_factor=1.0, workers=1, tile_size=None):
         """
         Create a neighbourhood processing plugin that applies a smoothing
         to points in a cube.
@@ -89,6 +372,19 @@ class BaseNeighbourhoodProcessing(object):
                 members if every grid square is considered to be the
                 equivalent of an ensemble member.
                 Optional, defaults to 1.0
+            workers (integer):
+                The number of worker threads used to process the realization
+                and time slices of the input cube concurrently. If 1, the
+                slices are processed in turn.
+                Optional, defaults to 1.
+            tile_size (integer or None):
+                If set, the y-x domain of each slice is split into tiles of
+                at most this number of grid points along each axis, which are
+                extended by a halo of the neighbourhood radius and processed
+                independently, so that the memory required by the
+                neighbourhood processing method is bounded by the size of a
+                tile. If None, the whole domain is processed at once.
+                Optional, defaults to None.
         """
         self.neighbourhood_method = neighbourhood_method
 
@@ -104,6 +400,19 @@ class BaseNeighbourhoodProcessing(object):
                        "Unable to continue due to mismatch.")
                 raise ValueError(msg)
         self.ens_factor = float(ens_factor)
+        self.radius_table = get_radius_table(
+            self.radii, lead_times=self.lead_times,
+            ens_factor=self.ens_factor)
+        if int(workers) < 1:
+            msg = ("The number of workers must be at least 1, "
+                   "not {}.".format(workers))
+            raise ValueError(msg)
+        self.workers = int(workers)
+        if tile_size is not None and int(tile_size) < 1:
+            msg = ("The tile size must be at least 1, "
+                   "not {}.".format(tile_size))
+            raise ValueError(msg)
+        self.tile_size = None if tile_size is None else int(tile_size)
 
     def adjust_nsize_for_ens(self, num_ens, width):
         """
@@ -120,12 +429,7 @@ class BaseNeighbourhoodProcessing(object):
                 new neighbourhood radius (m).
 
         """
-        if num_ens <= 1.0:
-            new_width = width
-        else:
-            new_width = (self.ens_factor *
-                         math.sqrt((width**2.0)/num_ens))
-        return new_width
+        return self.radius_table.adjust_for_ensemble(num_ens, width)
 
     def _find_radii(self, num_ens, cube_lead_times=None):
         """Revise radius or radii for found lead times and ensemble members
@@ -134,6 +438,9 @@ class BaseNeighbourhoodProcessing(object):
         members if necessary.
         Otherwise interpolate to find radius at each cube
         lead time and adjust for ensemble members if necessary.
+        The radii are looked up in the radius table, so they are only
+        calculated once for each number of ensemble members and set of
+        lead times.
 
         Args:
             num_ens (float):
@@ -147,16 +454,118 @@ class BaseNeighbourhoodProcessing(object):
             radii : float or np.array of float
                 Required neighbourhood sizes.
         """
-        if cube_lead_times is None:
-            radii = self.adjust_nsize_for_ens(num_ens, self.radii)
-        else:
-            # Interpolate to find the radius at each required lead time.
-            radii = (
-                np.interp(
-                    cube_lead_times, self.lead_times, self.radii))
-            for i, val in enumerate(radii):
-                radii[i] = self.adjust_nsize_for_ens(num_ens, val)
-        return radii
+        return self.radius_table.find_radii(
+            num_ens, cube_lead_times=cube_lead_times)
+
+    def _map_over_slices(self, function, slices):
+        """
+        Apply a function to each of a list of slices, using a pool of worker
+        threads if more than one worker has been requested. The neighbourhood
+        processing methods spend most of their time in numpy and scipy
+        routines that release the global interpreter lock, so the slices can
+        be processed concurrently by threads.
+
+        Args:
+            function (callable):
+                Function to be applied to each slice.
+            slices (list):
+                List of the slices, or of the arguments for each slice.
+
+        Returns:
+            results (list):
+                List of the results, in the same order as the slices.
+        """
+        if self.workers == 1 or len(slices) < 2:
+            return [function(slice_to_process) for slice_to_process in slices]
+        pool = ThreadPool(min(self.workers, len(slices)))
+        try:
+            results = pool.map(function, slices)
+        finally:
+            pool.close()
+            pool.join()
+        return results
+
+    def _split_into_tiles(self, cube, radius, mask_cube=None):
+        """
+        Split the y-x domain of a cube into tiles of at most tile_size grid
+        points along each axis. Each tile is extended by a halo, which is
+        wide enough to contain the neighbourhood of every point within the
+        interior of the tile, so that the tiles can be processed
+        independently and the interiors of the processed tiles stitched
+        together to give the same result as processing the whole domain.
+        The interior of each tile is at least one grid point wider than the
+        halo, so that no tile is narrower than the neighbourhood radius.
+
+        Args:
+            cube (Iris.cube.Cube):
+                Cube to be split into tiles.
+            radius (float or Numpy array):
+                The radius, or radii, in metres of the neighbourhood that will
+                be applied to the cube.
+
+        Keyword Args:
+            mask_cube (Iris.cube.Cube):
+                Cube containing the array to be used as a mask, which is
+                split into the same tiles as the cube.
+
+        Returns:
+            tile_rows (list):
+                List of rows of tiles, where each row is a list of tuples of
+                the tile of the cube, the tile of the mask cube and the
+                interior of the tile as a tuple of the y and x slices
+                relative to the tile. If tiling is not required, a single tile
+                containing the input cube and mask cube is returned, with an
+                interior of None.
+        """
+        n_rows = len(cube.coord(axis="y").points)
+        n_columns = len(cube.coord(axis="x").points)
+        if (self.tile_size is None or
+                (n_rows <= self.tile_size and n_columns <= self.tile_size)):
+            return [[(cube, mask_cube, None)]]
+
+        halo_x, halo_y = self.radius_table.grid_cells(cube, np.max(radius))
+        tile_rows = []
+        for y_outer, y_interior in _tile_ranges(
+                n_rows, self.tile_size, halo_y):
+            row = []
+            for x_outer, x_interior in _tile_ranges(
+                    n_columns, self.tile_size, halo_x):
+                cube_tile = cube[_yx_index(cube, y_outer, x_outer)]
+                mask_tile = None
+                if mask_cube is not None:
+                    mask_tile = mask_cube[
+                        _yx_index(mask_cube, y_outer, x_outer)]
+                row.append((cube_tile, mask_tile, (y_interior, x_interior)))
+            tile_rows.append(row)
+        return tile_rows
+
+    @staticmethod
+    def _stitch_tiles(processed_rows):
+        """
+        Stitch together the interiors of processed tiles.
+
+        Args:
+            processed_rows (list):
+                List of rows of tiles, where each row is a list of tuples of
+                the processed tile and the interior of the tile, as returned
+                by _split_into_tiles.
+
+        Returns:
+            cube (Iris.cube.Cube):
+                Cube containing the interiors of all the tiles, covering the
+                whole y-x domain.
+        """
+        if len(processed_rows) == 1 and len(processed_rows[0]) == 1:
+            cube_tile, interior = processed_rows[0][0]
+            if interior is None:
+                return cube_tile
+        rows = iris.cube.CubeList([])
+        for processed_row in processed_rows:
+            interiors = iris.cube.CubeList(
+                [cube_tile[_yx_index(cube_tile, *interior)]
+                 for cube_tile, interior in processed_row])
+            rows.append(interiors.concatenate_cube())
+        return rows.concatenate_cube()
 
     def __repr__(self):
         """Represent the configured plugin instance as a string."""
@@ -170,7 +579,7 @@ class BaseNeighbourhoodProcessing(object):
             neighbourhood_method, self.radii, self.lead_times,
             self.ens_factor)
 
-    def process(self, cube, mask_cube=None):
+    def process(self, cube, mask_cube=None, checked_for_nan=False):
         """
         Supply neighbourhood processing method, in order to smooth the
         input cube.
@@ -183,6 +592,10 @@ class BaseNeighbourhoodProcessing(object):
         Keyword Args:
             mask_cube (Iris.cube.Cube):
                 Cube containing the array to be used as a mask.
+            checked_for_nan (boolean):
+                If True, the cube is known not to contain NaNs, e.g. because
+                it has been thresholded from data already checked by the
+                caller, and is not scanned again.
 
         Returns:
             cube (Iris.cube.Cube):
@@ -218,36 +631,84 @@ class BaseNeighbourhoodProcessing(object):
                        "should not both be set in input cube")
                 raise ValueError(msg)
 
-        if np.isnan(cube.data).any():
-            raise ValueError("Error: NaN detected in input cube data")
+        check_for_nan(cube, checked=checked_for_nan)
 
-        cubelist = iris.cube.CubeList([])
+        # Split the cube into the slices to which the neighbourhood
+        # processing method will be applied. Each realization is processed
+        # either as a whole or, if the radius varies with lead time and the
+        # neighbourhood processing method cannot apply multiple radii at
+        # once, one time at a time.
+        run_multiple_radii = getattr(
+            self.neighbourhood_method, "run_multiple_radii", None)
+        slices_to_process = []
         for cube_realization in slices_over_realization:
             if self.lead_times is None:
                 radius = self._find_radii(num_ens)
-                cube_new = self.neighbourhood_method.run(
-                    cube_realization, radius, mask_cube=mask_cube)
+                slices_to_process.append(
+                    (False, [(self.neighbourhood_method.run,
+                              cube_realization, radius)]))
+                continue
+            cube_lead_times = (
+                find_required_lead_times(cube_realization))
+            # Interpolate to find the radius at each required lead time.
+            required_radii = (
+                self._find_radii(num_ens,
+                                 cube_lead_times=cube_lead_times))
+            if (callable(run_multiple_radii) and
+                    cube_realization.coord_dims("time")):
+                # Apply the neighbourhood processing method for all
+                # times at once, using the required radius at each time.
+                slices_to_process.append(
+                    (False, [(run_multiple_radii, cube_realization,
+                              required_radii)]))
             else:
-                cube_lead_times = (
-                    find_required_lead_times(cube_realization))
-                # Interpolate to find the radius at each required lead time.
-                required_radii = (
-                    self._find_radii(num_ens,
-                                     cube_lead_times=cube_lead_times))
-
-                cubes = iris.cube.CubeList([])
                 # Find the number of grid cells required for creating the
                 # neighbourhood, and then apply the neighbourhood
                 # processing method to smooth the field.
-                for cube_slice, radius in (
-                        zip(cube_realization.slices_over("time"),
-                            required_radii)):
-                    cube_slice = self.neighbourhood_method.run(
-                        cube_slice, radius, mask_cube=mask_cube)
-                    cube_slice = iris.util.new_axis(cube_slice, "time")
-                    cubes.append(cube_slice)
-                cube_new = concatenate_cubes(cubes,
-                                             coords_to_slice_over=["time"])
+                slices_to_process.append(
+                    (True, [(self.neighbourhood_method.run, cube_slice,
+                             radius) for cube_slice, radius in
+                            zip(cube_realization.slices_over("time"),
+                                required_radii)]))
+
+        def _apply_method(task):
+            """Apply the neighbourhood processing method to one tile."""
+            method, cube_tile, radius, mask_tile = task
+            return method(cube_tile, radius, mask_cube=mask_tile)
+
+        # Split each slice into tiles, if requested, and process all the
+        # tiles of all the slices together.
+        tiled_slices = []
+        tasks = []
+        for _, slice_tasks in slices_to_process:
+            for method, cube_slice, radius in slice_tasks:
+                tile_rows = self._split_into_tiles(
+                    cube_slice, radius, mask_cube=mask_cube)
+                tiled_slices.append(tile_rows)
+                tasks.extend(
+                    [(method, cube_tile, radius, mask_tile)
+                     for row in tile_rows
+                     for cube_tile, mask_tile, _ in row])
+        processed_tiles = iter(self._map_over_slices(_apply_method, tasks))
+        processed_slices = []
+        for tile_rows in tiled_slices:
+            processed_rows = [
+                [(next(processed_tiles), interior) for _, _, interior in row]
+                for row in tile_rows]
+            processed_slices.append(self._stitch_tiles(processed_rows))
+
+        cubelist = iris.cube.CubeList([])
+        for concatenate_over_time, slice_tasks in slices_to_process:
+            processed = processed_slices[:len(slice_tasks)]
+            processed_slices = processed_slices[len(slice_tasks):]
+            if concatenate_over_time:
+                cubes = iris.cube.CubeList(
+                    [iris.util.new_axis(cube_slice, "time")
+                     for cube_slice in processed])
+                cube_new = concatenate_cubes(
+                    cubes, coords_to_slice_over=["time"])
+            else:
+                cube_new, = processed
             if cube_new.coords("realization", dim_coords=False):
                 cube_new = iris.util.new_axis(cube_new, "realization")
             cubelist.append(cube_new)
@@ -267,14 +728,17 @@ class GeneratePercentilesFromANeighbourhood(BaseNeighbourhoodProcessing):
 
     def __init__(
             self, neighbourhood_method, radii, lead_times=None,
-            ens_factor=1.0, percentiles=DEFAULT_PERCENTILES):
+            ens_factor=1.0, percentiles=DEFAULT_PERCENTILES,
+            sliding_window=False, max_histogram_bins=MAX_HISTOGRAM_BINS,
+            workers=1, tile_size=None):
         """
         Create a neighbourhood processing subclass that generates percentiles
         from a neighbourhood of points.
 
         Args:
             neighbourhood_method (str):
-                Name of the neighbourhood method to use. Options: 'circular'.
+                Name of the neighbourhood method to use. Options: 'circular',
+                'square'.
             radii (float or List if defining lead times):
                 The radii in metres of the neighbourhood to apply.
                 Rounded up to convert into integer number of grid
@@ -296,16 +760,43 @@ class GeneratePercentilesFromANeighbourhood(BaseNeighbourhoodProcessing):
             percentiles (list):
                 Percentile values at which to calculate; if not provided uses
                 DEFAULT_PERCENTILES.
+            sliding_window (boolean):
+                If True, calculate the percentiles using a histogram of the
+                neighbourhood that is updated as the kernel slides across the
+                field, so that the memory required does not depend upon the
+                size of the neighbourhood. Only used by the 'circular'
+                neighbourhood method; the 'square' neighbourhood method
+                always uses histograms.
+            max_histogram_bins (integer):
+                Maximum number of histogram bins used when calculating the
+                percentiles from histograms. If the field has more unique
+                values than this, the percentiles are approximate.
+            workers (integer):
+                The number of worker threads used to process the realization
+                and time slices of the input cube concurrently.
+            tile_size (integer or None):
+                If set, the y-x domain is split into tiles of at most this
+                number of grid points along each axis, which are processed
+                independently.
         """
         super(GeneratePercentilesFromANeighbourhood, self).__init__(
             neighbourhood_method, radii, lead_times=lead_times,
-            ens_factor=ens_factor)
+            ens_factor=ens_factor, workers=workers,
+            tile_size=tile_size)
 
         methods = {
-            "circular": GeneratePercentilesFromACircularNeighbourhood}
+            "circular": GeneratePercentilesFromACircularNeighbourhood,
+            "square": GeneratePercentilesFromASquareNeighbourhood}
         try:
             method = methods[neighbourhood_method]
-            self.neighbourhood_method = method(percentiles=percentiles)
+            if neighbourhood_method == "circular":
+                self.neighbourhood_method = method(
+                    percentiles=percentiles, sliding_window=sliding_window,
+                    max_histogram_bins=max_histogram_bins)
+            else:
+                self.neighbourhood_method = method(
+                    percentiles=percentiles,
+                    max_histogram_bins=max_histogram_bins)
         except KeyError:
             msg = ("The neighbourhood_method requested: {} is not a "
                    "supported method. Please choose from: {}".format(
@@ -321,7 +812,7 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
     def __init__(
             self, neighbourhood_method, radii, lead_times=None,
             ens_factor=1.0, weighted_mode=True, sum_or_fraction="fraction",
-            re_mask=False):
+            re_mask=False, workers=1, tile_size=None):
         """
         Create a neighbourhood processing subclass that applies a smoothing
         to points in a cube.
@@ -366,11 +857,19 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
                 mask is not applied. Therefore, the neighbourhood processing
                 may result in values being present in areas that were
                 originally masked.
+            workers (integer):
+                The number of worker threads used to process the realization
+                and time slices of the input cube concurrently.
+            tile_size (integer or None):
+                If set, the y-x domain is split into tiles of at most this
+                number of grid points along each axis, which are processed
+                independently.
 
         """
         super(NeighbourhoodProcessing, self).__init__(
             neighbourhood_method, radii, lead_times=lead_times,
-            ens_factor=ens_factor)
+            ens_factor=ens_factor, workers=workers,
+            tile_size=tile_size)
 
         methods = {
             "circular": CircularNeighbourhood,
@@ -378,7 +877,8 @@ class NeighbourhoodProcessing(BaseNeighbourhoodProcessing):
         try:
             method = methods[neighbourhood_method]
             self.neighbourhood_method = method(
-                weighted_mode, sum_or_fraction, re_mask)
+                weighted_mode, sum_or_fraction, re_mask,
+                radius_table=self.radius_table)
         except KeyError:
             msg = ("The neighbourhood_method requested: {} is not a "
                    "supported method. Please choose from: {}".format(
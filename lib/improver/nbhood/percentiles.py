@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""This module contains methods shared by the plugins that calculate
+percentiles over a neighbourhood."""
+
+
+import numpy as np
+
+import iris
+
+from improver.constants import DEFAULT_PERCENTILES
+from improver.utilities.cube_manipulation import cube_with_added_dimension
+
+
+# Default maximum number of histogram bins used when calculating percentiles
+# from binned values. Fields with no more unique values than this have
+# their percentiles calculated exactly.
+MAX_HISTOGRAM_BINS = 256
+
+
+class BaseNeighbourhoodPercentiles(object):
+    """
+    Methods shared by the plugins that calculate percentiles over a
+    neighbourhood, for binning the values of a field and creating the
+    percentile cube.
+    """
+    def __init__(self, percentiles=DEFAULT_PERCENTILES,
+                 max_histogram_bins=MAX_HISTOGRAM_BINS):
+        """
+        Initialise class.
+
+        Keyword Args:
+            percentiles (list):
+                Percentile values at which to calculate; if not provided uses
+                DEFAULT_PERCENTILES.
+            max_histogram_bins (integer):
+                Maximum number of histogram bins. If the field has more
+                unique values than this, the values are grouped into equally
+                spaced bins and the percentiles are approximate.
+        """
+        self.percentiles = tuple(percentiles)
+        self.max_histogram_bins = max_histogram_bins
+
+    @staticmethod
+    def _bin_data(data, max_bins):
+        """
+        Assign each value within the data to a histogram bin.
+
+        If there are no more unique values than the maximum number of bins,
+        each unique value has its own bin, so that percentiles calculated
+        from the histogram are exact. Otherwise, equally spaced bins are
+        used between the minimum and maximum values, and each bin is
+        represented by the mean of the values within it.
+
+        Args:
+            data (Numpy array):
+                Data to be binned.
+            max_bins (integer):
+                Maximum number of bins.
+
+        Returns:
+            (tuple) : tuple containing:
+                **bin_indices** (Numpy array):
+                    Array of the same shape as data containing the index of
+                    the bin for each point.
+                **bin_values** (Numpy array):
+                    Value representing each bin.
+        """
+        unique_values = np.unique(data)
+        if len(unique_values) <= max_bins:
+            bin_indices = np.searchsorted(unique_values, data)
+            return bin_indices, unique_values
+        data_min = unique_values[0]
+        data_range = unique_values[-1] - data_min
+        bin_indices = (
+            (data - data_min) * (float(max_bins) / data_range)).astype(int)
+        bin_indices = np.clip(bin_indices, 0, max_bins - 1)
+        counts = np.bincount(bin_indices.ravel(), minlength=max_bins)
+        sums = np.bincount(
+            bin_indices.ravel(), weights=data.ravel(), minlength=max_bins)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            bin_values = sums / counts
+        return bin_indices, bin_values
+
+    def _percentiles_for_each_slice(self, cube, percentiles_function):
+        """
+        Calculate the percentiles over the neighbourhood for each 2D slice
+        of a cube, writing them into a single output array, and create the
+        percentile cube with the coordinate order:
+        realization, percentile, other coordinates.
+
+        Args:
+            cube (Iris.cube.Cube):
+                Cube containing array to apply processing to.
+            percentiles_function (function):
+                Function that takes a 2D array with the y and x dimensions
+                in that order, and returns an array of the percentiles over
+                the neighbourhood of each point, with the percentiles as the
+                leading dimension.
+
+        Returns:
+            result (Iris.cube.Cube):
+                Cube containing the percentile fields.
+                Has percentile as an added dimension.
+        """
+        if cube.coords("realization", dimensions=[]):
+            cube = iris.util.new_axis(cube, "realization")
+
+        # Arrange the output, so that the coordinate order is:
+        # realization, percentile, other coordinates.
+        leading_dims = []
+        if cube.coords("realization"):
+            leading_dims = list(cube.coord_dims("realization"))
+        input_order = leading_dims + [
+            dim for dim in range(cube.ndim) if dim not in leading_dims]
+        percentile_dim = len(leading_dims)
+        output_dims = [None] * cube.ndim
+        for position, dim in enumerate(input_order):
+            output_dims[dim] = (
+                position if position < percentile_dim else position + 1)
+        output_shape = [cube.shape[dim] for dim in input_order]
+        output_shape.insert(percentile_dim, len(self.percentiles))
+
+        # Loop over each 2D slice to reduce memory demand and derive
+        # percentiles on the kernel, writing them into a single output array.
+        y_dim, = cube.coord_dims('projection_y_coordinate')
+        x_dim, = cube.coord_dims('projection_x_coordinate')
+        loop_dims = [
+            dim for dim in range(cube.ndim) if dim not in [y_dim, x_dim]]
+        result_data = None
+        for index in np.ndindex(*[cube.shape[dim] for dim in loop_dims]):
+            data_index = [slice(None)] * cube.ndim
+            for dim, point in zip(loop_dims, index):
+                data_index[dim] = point
+            data_index = tuple(data_index)
+            slice_data = cube.data[data_index]
+            if x_dim < y_dim:
+                slice_data = slice_data.T
+            perc_data = percentiles_function(slice_data)
+            if x_dim < y_dim:
+                perc_data = perc_data.transpose(0, 2, 1)
+            if result_data is None:
+                result_data = np.empty(output_shape, dtype=perc_data.dtype)
+                # View of the output with the percentiles first, followed
+                # by the dimensions in the order of the input cube.
+                result_view = result_data.transpose(
+                    [percentile_dim] + output_dims)
+            result_view[(slice(None),) + data_index] = perc_data
+
+        return cube_with_added_dimension(
+            cube, result_data, self._percentile_coord(), dims=output_dims)
+
+    def _percentile_coord(self):
+        """Create the coordinate describing the percentiles.
+
+        Returns:
+            coord (Iris.coords.DimCoord):
+                The percentiles over the neighbourhood coordinate.
+        """
+        return iris.coords.DimCoord(
+            self.percentiles, long_name="percentiles_over_neighbourhood",
+            units='%')
+
+    def make_percentile_cube(self, cube, data=None):
+        """Returns a cube with the same metadata as the sample cube
+        but with an added percentile dimension.
+
+        Args:
+            cube (Iris.cube.Cube):
+                Cube to copy meta data from.
+
+        Keyword Args:
+            data (Numpy array or None):
+                Data for the percentile cube, with the percentiles as the
+                leading dimension followed by the dimensions of the sample
+                cube. The array is used without being copied. If None, the
+                data of the sample cube is repeated for each percentile.
+        Returns:
+            cube (Iris.cube.Cube):
+                Cube like input but with added percentiles coordinate.
+                If no data is provided, each slice along this coordinate is
+                identical.
+        """
+        if data is None:
+            data = np.empty(
+                (len(self.percentiles),) + cube.shape, dtype=cube.dtype)
+            data[...] = cube.data
+        return cube_with_added_dimension(cube, data, self._percentile_coord())
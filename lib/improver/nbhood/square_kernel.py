@@ -30,12 +30,16 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """This module contains methods for square neighbourhood processing."""
 
-import copy
-import iris
+import threading
+
 import numpy as np
 
+from improver.constants import DEFAULT_PERCENTILES
+from improver.nbhood.percentiles import (
+    BaseNeighbourhoodPercentiles, MAX_HISTOGRAM_BINS)
+from improver.threshold import BasicThreshold
 from improver.utilities.cube_checker import (
-    check_for_x_and_y_axes, check_cube_coordinates)
+    check_for_nan, check_for_x_and_y_axes, check_cube_coordinates)
 from improver.utilities.spatial import (
     convert_distance_into_number_of_grid_cells)
 
@@ -43,6 +47,153 @@ from improver.utilities.spatial import (
 # Maximum radius of the neighbourhood width in grid cells.
 MAX_RADIUS_IN_GRID_CELLS = 500
 
+# Maximum number of padded grid points, summed over all thresholds, that are
+# thresholded and neighbourhood processed at once when generating
+# neighbourhood probabilities, to bound the memory required.
+THRESHOLD_CHUNK_POINTS = 2**22
+
+
+def _accumulate_displaced(total, flattened, displacement, sign):
+    """
+    Add or subtract the flattened array, displaced along the final axis, to
+    the total. This is equivalent to adding
+    sign * numpy.roll(flattened, -displacement, axis=-1), but uses two
+    slicing views rather than creating a rolled copy of the array.
+
+    Args:
+        total (Numpy array):
+            Array that will be updated in place.
+        flattened (Numpy array):
+            Array with the same shape as total, with each 2d slice flattened
+            along the final axis.
+        displacement (integer):
+            Number of points by which the flattened array is displaced.
+        sign (integer):
+            1 to add the displaced array to the total, -1 to subtract it.
+    """
+    size = flattened.shape[-1]
+    shift = displacement % size
+    if sign > 0:
+        total[..., :size-shift] += flattened[..., shift:]
+        total[..., size-shift:] += flattened[..., :shift]
+    else:
+        total[..., :size-shift] -= flattened[..., shift:]
+        total[..., size-shift:] -= flattened[..., :shift]
+
+
+def _edge_mean(edge, axis, dtype):
+    """
+    Calculate the mean of the edge of an array along an axis, for use as
+    the padding value, cast to the dtype of the array being padded in the
+    same way as numpy.pad.
+
+    Args:
+        edge (Numpy array):
+            The edge of the array over which to calculate the mean.
+        axis (integer):
+            Axis along which to calculate the mean.
+        dtype (numpy dtype):
+            Dtype of the array being padded.
+
+    Returns:
+        mean (Numpy array):
+            Array with a length of one along the requested axis.
+    """
+    mean = np.mean(edge, axis=axis, keepdims=True)
+    if np.issubdtype(dtype, np.integer):
+        mean = np.around(mean)
+    return mean.astype(dtype)
+
+
+def _pad_with_halo(array, padded, width_x, width_y, cells_x, cells_y):
+    """
+    Pad a halo around the trailing y and x dimensions of an array, by
+    filling a preallocated buffer in place. The halo is twice as wide as the
+    requested width and is filled with the mean over the neighbourhood
+    width at the edge of the data, padding along y and then along x. The
+    result is the same as numpy.pad with the "mean" mode, without
+    allocating a new array.
+
+    Args:
+        array (Numpy array):
+            Array with the y and x dimensions last.
+        padded (Numpy array):
+            Buffer which will be filled with the padded array. The shape
+            must be the shape of the array extended by 4*width_y and
+            4*width_x along the y and x dimensions.
+        width_x, width_y (integer):
+            The width in x and y directions of the halo in grid cells.
+        cells_x, cells_y (integer):
+            The radius of the neighbourhood in grid points, in the x and y
+            directions, over which the mean used for padding is calculated.
+    """
+    n_rows, n_columns = array.shape[-2:]
+    top = 2*width_y
+    left = 2*width_x
+    bottom = top + n_rows
+    right = left + n_columns
+    padded[..., top:bottom, left:right] = array
+    padded[..., :top, left:right] = _edge_mean(
+        array[..., :cells_y, :], -2, array.dtype)
+    padded[..., bottom:, left:right] = _edge_mean(
+        array[..., max(n_rows - cells_y, 0):, :], -2, array.dtype)
+    padded[..., :left] = _edge_mean(
+        padded[..., left:min(left + cells_x, right)], -1, array.dtype)
+    padded[..., right:] = _edge_mean(
+        padded[..., max(right - cells_x, left):right], -1, array.dtype)
+
+
+def _four_point_displacements(cells_x, cells_y, n_columns):
+    """
+    Calculate the displacements, within a flattened 2d array of cumulative
+    sums, between each point and the four points used to calculate the sum
+    over the square neighbourhood centred on that point.
+
+    Displacements are calculated as follows for the following input array,
+    where the accumulation has occurred from left to right and top to
+    bottom.
+
+    | 2 | 4 | 6 | 7 |
+    | 2 | 4 | 5 | 6 |
+    | 1 | 3 | 4 | 4 |
+    | 1 | 2 | 2 | 2 |
+
+    For a 3x3 neighbourhood centred around the point with a value of 5:
+
+    | 2 (A) | 4 | 6                 | 7 (B) |
+    | 2     | 4 | 5 (Central point) | 6     |
+    | 1     | 3 | 4                 | 4     |
+    | 1 (C) | 2 | 2                 | 2 (D) |
+
+    To calculate the value for the neighbourhood sum at the "Central point"
+    with a value of 5, calculate:
+    Neighbourhood sum = B - A - D + C
+    At the central point, this will yield:
+    Neighbourhood sum = 7 - 2 - 2 +1 => 4
+
+    Args:
+        cells_x, cells_y (integer):
+            The radius of the neighbourhood in grid points, in the x and y
+            directions (excluding the central grid point).
+        n_columns (integer):
+            Number of columns (points along the x axis) in the 2d array.
+
+    Returns:
+        displacements (list):
+            List of tuples of the displacement and the sign with which the
+            displaced value contributes to the neighbourhood sum.
+    """
+    # Equivalent to point B in the docstring example.
+    ymax_xmax_disp = (cells_y*n_columns) + cells_x
+    # Equivalent to point A in the docstring example.
+    ymax_xmin_disp = (cells_y*n_columns) - cells_x - 1
+    # Equivalent to point D in the docstring example.
+    ymin_xmax_disp = (-1*(cells_y+1)*n_columns) + cells_x
+    # Equivalent to point C in the docstring example.
+    ymin_xmin_disp = (-1*(cells_y+1)*n_columns) - cells_x - 1
+    return [(ymax_xmax_disp, 1), (ymin_xmax_disp, -1),
+            (ymin_xmin_disp, 1), (ymax_xmin_disp, -1)]
+
 
 class SquareNeighbourhood(object):
 
@@ -51,7 +202,7 @@ class SquareNeighbourhood(object):
     """
 
     def __init__(self, weighted_mode=True, sum_or_fraction="fraction",
-                 re_mask=True):
+                 re_mask=True, dtype=np.float64, radius_table=None):
         """
         Initialise class.
 
@@ -72,6 +223,18 @@ class SquareNeighbourhood(object):
                 mask is not applied. Therefore, the neighbourhood processing
                 may result in values being present in areas that were
                 originally masked.
+            dtype (numpy dtype):
+                Working precision used for the neighbourhood processed
+                result, e.g. np.float32 to halve the memory required.
+                The cumulative sums are always calculated using float64 for
+                floating point data, to preserve the precision of the
+                neighbourhood sums.
+            radius_table (RadiusTable or None):
+                Table used to look up the number of grid cells equivalent to
+                each radius, so that the conversion is calculated once for
+                each grid and radius, e.g. the table shared by the
+                NeighbourhoodProcessing plugins using the same radii.
+                If None, the number of grid cells is calculated on each call.
         """
         self.weighted_mode = weighted_mode
         if sum_or_fraction not in ["sum", "fraction"]:
@@ -83,6 +246,11 @@ class SquareNeighbourhood(object):
             raise ValueError(msg)
         self.sum_or_fraction = sum_or_fraction
         self.re_mask = re_mask
+        self.dtype = dtype
+        self.radius_table = radius_table
+        # Buffers for padded arrays, which are reused by successive calls
+        # within the same thread.
+        self._buffers = threading.local()
 
     def __repr__(self):
         """Represent the configured plugin instance as a string."""
@@ -91,486 +259,695 @@ class SquareNeighbourhood(object):
         return result.format(self.weighted_mode, self.sum_or_fraction,
                              self.re_mask)
 
-    @staticmethod
-    def cumulate_array(cube):
+    def _grid_cells(self, cube, radius):
         """
-        Method to calculate the cumulative sum of an m x n array, by first
-        cumulating along the y direction so that the largest values
-        are in the nth row, and then cumulating along the x direction,
-        so that the largest values are in the mth column. Each grid point
-        will contain the cumulative sum from the origin to that grid point.
+        Find the number of grid cells in the x and y directions equivalent
+        to a radius on the grid of a cube, using the radius table if one has
+        been supplied.
 
         Args:
             cube (Iris.cube.Cube):
-                Cube to which the cumulative summing along the y and x
-                direction will be applied.
+                Cube containing the x and y coordinates of the grid.
+            radius (float):
+                Radius in metres.
 
         Returns:
-            cube (Iris.cube.Cube):
-                Cube to which the cumulative summing along the y and x
-                direction has been applied.
-            nan_masks (list):
-                List of numpy arrays to be used to set the values within the
-                data of the output cube to be NaN.
-        """
-        yname = cube.coord(axis="y").name()
-        xname = cube.coord(axis="x").name()
-        cubelist = iris.cube.CubeList([])
-        nan_masks = []
-        for slice_2d in cube.slices([yname, xname]):
-            data = slice_2d.data
-            nan_mask = np.isnan(data)
-            data[nan_mask] = 0
-            data_summed_along_y = np.cumsum(data, axis=0)
-            data_summed_along_x = (
-                np.cumsum(data_summed_along_y, axis=1))
-            slice_2d.data = data_summed_along_x
-            cubelist.append(slice_2d)
-            nan_masks.append(nan_mask)
-        return cubelist.merge_cube(), nan_masks
+            grid_cells (tuple):
+                The number of grid cells in the x and y directions.
+        """
+        if self.radius_table is None:
+            return convert_distance_into_number_of_grid_cells(
+                cube, radius, MAX_RADIUS_IN_GRID_CELLS)
+        return self.radius_table.grid_cells(
+            cube, radius, max_radius_in_grid_cells=MAX_RADIUS_IN_GRID_CELLS)
 
-    @staticmethod
-    def pad_coord(coord, width, method):
+    def _padded_buffer(self, shape, dtype):
         """
-        Construct a new coordinate by extending the current coordinate by the
-        padding width.
+        Return a buffer for a padded array. The buffer is allocated once and
+        reused by successive calls from the same thread that request the
+        same shape and dtype, e.g. when processing each slice of a cube in
+        turn, so that a new padded array is not allocated for every slice.
+        The contents of the buffer are undefined.
 
         Args:
-            coord (iris.coord):
-                Original coordinate which will be used as the basis of the
-                new extended coordinate.
-            width (integer):
-                The width of padding in grid cells (the extent of the
-                neighbourhood radius in grid cells in a given direction).
-            method (string):
-                A string determining whether the coordinate is being expanded
-                or contracted. Options: 'remove' to remove points from coord;
-                'add' to add points to coord.
+            shape (tuple):
+                Shape of the buffer.
+            dtype (numpy dtype):
+                Dtype of the buffer.
 
         Returns:
-            iris.coord:
-                Coordinate with expanded or contracted length, to be added to
-                the padded or unpadded iris cube.
-
-        Raises:
-            ValueError: Raise an error if non-uniform increments exist between
-                        grid points.
+            buffer (Numpy array):
+                Array of the requested shape and dtype.
         """
-        orig_points = coord.points
-        increment = orig_points[1:] - orig_points[:-1]
-        if np.isclose(np.sum(np.diff(increment)), 0):
-            increment = increment[0]
-        else:
-            msg = ("Non-uniform increments between grid points: "
-                   "{}.".format(increment))
-            raise ValueError(msg)
-
-        if method == 'add':
-            num_of_new_points = len(orig_points) + 2*width + 2*width
-            new_points = (
-                np.linspace(
-                    orig_points[0] - 2*width*increment,
-                    orig_points[-1] + 2*width*increment,
-                    num_of_new_points))
-        elif method == 'remove':
-            end_width = -2*width if width != 0 else None
-            new_points = np.float32(orig_points[2*width:end_width])
-
-        new_points_bounds = np.array([new_points - 0.5*increment,
-                                      new_points + 0.5*increment]).T
-        return coord.copy(points=new_points, bounds=new_points_bounds)
+        buffer = getattr(self._buffers, "padded", None)
+        if (buffer is None or buffer.shape != shape or
+                buffer.dtype != np.dtype(dtype)):
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers.padded = buffer
+        return buffer
 
     @staticmethod
-    def _create_cube_with_new_data(cube, data, coord_x, coord_y):
+    def _transpose_to_trailing_yx(cube):
         """
-        Create a cube with newly created data where the metadata is copied from
-        the input cube and the supplied x and y coordinates are added to the
-        cube.
+        Ensure that the y and x dimensions of a cube are the trailing
+        dimensions, so that all leading dimensions (e.g. realization, time
+        and threshold) can be processed together in a single array operation.
+        The order of the leading dimensions is preserved.
 
         Args:
             cube (Iris.cube.Cube):
-                Template cube used for copying metadata and non x and y axes
-                coordinates.
-            data (Numpy array):
-                Data to be put into the new cube.
-            coord_x (Iris.coords.DimCoord):
-                Coordinate to be added to the new cube to represent the x axis.
-            coord_y (Iris.coords.DimCoord):
-                Coordinate to be added to the new cube to represent the y axis.
+                Cube with y and x dimension coordinates.
 
         Returns:
-            new_cube (Iris.cube.Cube):
-                Cube built from the template cube using the requested data and
-                the supplied x and y axis coordinates.
+            cube (Iris.cube.Cube):
+                Cube with the y and x dimensions as the final two dimensions.
+                If the input cube is already in this order, the input cube is
+                returned, otherwise a transposed copy is returned.
         """
         check_for_x_and_y_axes(cube)
+        ydim, = cube.coord_dims(cube.coord(axis="y").name())
+        xdim, = cube.coord_dims(cube.coord(axis="x").name())
+        order = [dim for dim in range(cube.ndim) if dim not in [ydim, xdim]]
+        order.extend([ydim, xdim])
+        if order != list(range(cube.ndim)):
+            cube = cube.copy()
+            cube.transpose(order)
+        return cube
 
-        yname = cube.coord(axis='y').name()
-        xname = cube.coord(axis='x').name()
-        ycoord_dim = cube.coord_dims(yname)
-        xcoord_dim = cube.coord_dims(xname)
-        metadata_dict = copy.deepcopy(cube.metadata._asdict())
-        new_cube = iris.cube.Cube(data, **metadata_dict)
-        for coord in cube.coords():
-            if coord.name() not in [yname, xname]:
-                if cube.coords(coord, dim_coords=True):
-                    coord_dim = cube.coord_dims(coord)
-                    new_cube.add_dim_coord(coord, coord_dim)
-                else:
-                    new_cube.add_aux_coord(coord)
-        if len(xcoord_dim) > 0:
-            new_cube.add_dim_coord(coord_x, xcoord_dim)
-        else:
-            new_cube.add_aux_coord(coord_x)
-        if len(ycoord_dim) > 0:
-            new_cube.add_dim_coord(coord_y, ycoord_dim)
+    @staticmethod
+    def _separate_data_and_mask(cube, mask_cube=None):
+        """
+        Separate the data of a cube from the mask to be used during
+        neighbourhood processing. If the data is masked and no mask cube is
+        supplied, the mask is the logical inverse of the mask of the data.
+
+        Args:
+            cube (Iris.cube.Cube):
+                Cube with the y and x dimensions as the final dimensions.
+
+        Keyword Args:
+            mask_cube (Iris.cube.Cube):
+                Cube containing the array to be used as a mask.
+
+        Returns:
+            (tuple) : tuple containing:
+                **data** (Numpy array):
+                    The data of the cube, without any mask.
+                **mask** (Numpy array or None):
+                    Array of the same shape as the data, which is zero where
+                    the data is masked, or None if the data is not masked
+                    and no mask cube has been supplied.
+        """
+        data = cube.data
+        if not isinstance(data, np.ma.MaskedArray) and mask_cube is None:
+            return data, None
+        if mask_cube is None:
+            mask = np.logical_not(np.ma.getmaskarray(data))
         else:
-            new_cube.add_aux_coord(coord_y)
-        return new_cube
+            mask = np.broadcast_to(mask_cube.data.squeeze(), cube.shape)
+        return np.ma.getdata(data), mask
 
-    def pad_cube_with_halo(self, cube, width_x, width_y):
+    def run(self, cube, radius, mask_cube=None):
         """
-        Method to pad a halo around the data in an iris cube. The padding
-        calculates the mean within the neighbourhood radius in grid cells
-        i.e. the neighbourhood width at the edge of the data and uses this
-        mean value as the padding value.
+        Call the methods required to apply a square neighbourhood
+        method to a cube.
+
+        The steps undertaken are:
+        1. Separate the data and the mask, if the arrays are masked.
+        2. Pad the input array with a halo and then calculate the neighbourhood
+           of the haloed array.
+        3. Remove the halo from the neighbourhooded array and deal with a mask,
+           if required.
+
+        The padding is carried out on the data array within a buffer that is
+        reused by successive calls, so no padded cubes or coordinates are
+        created. If the arrays are masked, the data * mask and mask arrays
+        are processed together within a single stacked array and the
+        normalised result is calculated directly, see
+        _masked_neighbourhood_for_each_radius.
 
         Args:
-            cube (iris.cube.Cube):
-                The original cube prior to applying padding.
-            width_x, width_y (integer):
-                The width in x and y directions of the neighbourhood radius in
-                grid cells. This will be the width of padding to be added to
-                the numpy array.
+            cube (Iris.cube.Cube):
+                Cube containing the array to which the square neighbourhood
+                will be applied.
+            radius (Float):
+                Radius in metres for use in specifying the number of
+                grid cells used to create a square neighbourhood.
+
+        Keyword Args:
+            mask_cube (Iris.cube.Cube):
+                Cube containing the array to be used as a mask.
 
         Returns:
-            iris.cube.Cube:
-                Cube containing the new padded cube, with appropriate
-                changes to the cube's dimension coordinates.
+            neighbourhood_averaged_cube (Iris.cube.Cube):
+                Cube containing the smoothed field after the square
+                neighbourhood method has been applied.
         """
-        check_for_x_and_y_axes(cube)
+        grid_cells_x, grid_cells_y = self._grid_cells(cube, radius)
+        # If the data is masked, the mask will be processed as well as the
+        # original_data * mask array, within a single stacked array.
+        working_cube = self._transpose_to_trailing_yx(cube)
+        data, mask = self._separate_data_and_mask(working_cube, mask_cube)
+        if mask is None:
+            neighbourhood_total = self._neighbourhood_total_for_each_radius(
+                data[np.newaxis], [(grid_cells_x, grid_cells_y)],
+                grid_cells_x, grid_cells_y)
+        else:
+            neighbourhood_total = self._masked_neighbourhood_for_each_radius(
+                data[np.newaxis], mask[np.newaxis],
+                [(grid_cells_x, grid_cells_y)], grid_cells_x, grid_cells_y)
+        neighbourhood_averaged_cube = working_cube.copy(
+            data=neighbourhood_total[0].astype(self.dtype, copy=False))
+        return check_cube_coordinates(cube, neighbourhood_averaged_cube)
+
+    def _neighbourhood_total_for_each_radius(
+            self, data, grid_cells, width_x, width_y):
+        """
+        Calculate the neighbourhood sum or fraction for each index along the
+        leading dimension of an array, using a different neighbourhood size
+        for each index. The array is padded with a halo large enough for the
+        largest neighbourhood, and the cumulative sum of the whole padded
+        array is calculated once. The 4-point sum for each index is then
+        evaluated from this cumulative sum using its own neighbourhood size.
 
-        yname = cube.coord(axis='y').name()
-        xname = cube.coord(axis='x').name()
-        cubelist = iris.cube.CubeList([])
-        for slice_2d in cube.slices([yname, xname]):
-            # Pad a halo around the original data with the extent of the halo
-            # given by width_y and width_x. Assumption to pad using the mean
-            # value within the neighbourhood width.
-            padded_data = np.pad(
-                slice_2d.data,
-                ((2*width_y, 2*width_y), (2*width_x, 2*width_x)),
-                "mean", stat_length=((width_y, width_y), (width_x, width_x)))
-            coord_x = cube.coord(axis='x')
-            padded_x_coord = (
-                SquareNeighbourhood.pad_coord(coord_x, width_x, 'add'))
-            coord_y = cube.coord(axis='y')
-            padded_y_coord = (
-                SquareNeighbourhood.pad_coord(coord_y, width_y, 'add'))
-            cubelist.append(
-                self._create_cube_with_new_data(
-                    slice_2d, padded_data, padded_x_coord, padded_y_coord))
-        return cubelist.merge_cube()
-
-    def remove_halo_from_cube(self, cube, width_x, width_y):
-        """
-        Method to remove rows/columns from the edge of an iris cube.
-        Used to 'unpad' cubes which have been previously padded by
-        pad_cube_with_halo.
+        The halo values for each index are calculated using the mean over
+        its own neighbourhood width, so the result is the same as padding
+        and cumulating each index separately.
 
         Args:
-            cube (iris.cube.Cube):
-                The original cube to be trimmed of edge data.
+            data (Numpy array):
+                Array with the dimension along which the neighbourhood size
+                varies first, and the y and x dimensions last.
+            grid_cells (list):
+                List of tuples of the number of grid cells in the x and y
+                directions for each index along the leading dimension.
             width_x, width_y (integer):
-                The width in x and y directions of the neighbourhood radius in
-                grid cells. This will be the width removed from the numpy
-                array.
+                The largest number of grid cells in the x and y directions,
+                which determines the width of the halo.
 
         Returns:
-            iris.cube.Cube:
-                Cube containing the new trimmed cube, with appropriate
-                changes to the cube's dimension coordinates.
+            neighbourhood_total (Numpy array):
+                Array of the same shape as the input data, containing the
+                neighbourhood sum or fraction.
         """
-        check_for_x_and_y_axes(cube)
-
-        yname = cube.coord(axis='y')
-        xname = cube.coord(axis='x')
-        cubelist = iris.cube.CubeList([])
-        for slice_2d in cube.slices([yname, xname]):
-            end_y = -2*width_y if width_y != 0 else None
-            end_x = -2*width_x if width_x != 0 else None
-            trimmed_data = slice_2d.data[2*width_y:end_y,
-                                         2*width_x:end_x]
-            coord_x = slice_2d.coord(axis='x')
-            trimmed_x_coord = (
-                SquareNeighbourhood.pad_coord(coord_x, width_x, 'remove'))
-            coord_y = slice_2d.coord(axis='y')
-            trimmed_y_coord = (
-                SquareNeighbourhood.pad_coord(coord_y, width_y, 'remove'))
-            cubelist.append(
-                self._create_cube_with_new_data(
-                    slice_2d, trimmed_data, trimmed_x_coord, trimmed_y_coord))
-        return cubelist.merge_cube()
-
-    def mean_over_neighbourhood(self, cube, cells_x, cells_y, nan_masks):
-        """
-        Method to calculate the average value in a square neighbourhood using
-        the 4-point algorithm to find the total sum over the neighbourhood.
-
-        The output from the cumulate_array method can be used to
-        calculate the sum over a neighbourhood of size
-        (2*cells_x+1)*(2*cells_y+1). This sum is then divided by the area of
-        the neighbourhood to calculate the mean value in the neighbourhood.
-
-        For all points, a fast vectorised approach is taken:
-        1. The displacements between the four points used to calculate the
-           neighbourhood total sum and the central grid point are calculated.
-        2. Four copies of the cumulate array output are flattened and rolled
-           by these displacements to align the four terms used in the
-           neighbourhood total sum calculation.
-        3. The neighbourhood total at all points can then be calculated
-           simultaneously in a single vector sum.
-
-        Displacements are calculated as follows for the following input array,
-        where the accumulation has occurred from left to right and top to
-        bottom.
-
-        | 2 | 4 | 6 | 7 |
-        | 2 | 4 | 5 | 6 |
-        | 1 | 3 | 4 | 4 |
-        | 1 | 2 | 2 | 2 |
-
-        For a 3x3 neighbourhood centred around the point with a value of 5:
-
-        | 2 (A) | 4 | 6                 | 7 (B) |
-        | 2     | 4 | 5 (Central point) | 6     |
-        | 1     | 3 | 4                 | 4     |
-        | 1 (C) | 2 | 2                 | 2 (D) |
-
-        To calculate the value for the neighbourhood sum at the "Central point"
-        with a value of 5, calculate:
-        Neighbourhood sum = B - A - D + C
-        At the central point, this will yield:
-        Neighbourhood sum = 7 - 2 - 2 +1 => 4
-        Neighbourhood mean = Neighbourhood sum
-                             -----------------
-                             (2 * nb_width +1)
-        where nb_width is the neighbourhood width, which is equal to 1 for a
-        3x3 neighbourhood.
-
-        Neighbourhood mean = 4. / 9.
+        n_rows = data.shape[-2] + 4*width_y
+        n_columns = data.shape[-1] + 4*width_x
+        padded = self._padded_buffer(
+            data.shape[:-2] + (n_rows, n_columns), data.dtype)
+        for index, (cells_x, cells_y) in enumerate(grid_cells):
+            _pad_with_halo(
+                data[index], padded[index], width_x, width_y,
+                cells_x, cells_y)
+        return self._neighbourhood_total_from_padded(
+            padded, grid_cells, width_x, width_y)
+
+    def _masked_neighbourhood_for_each_radius(
+            self, data, mask, grid_cells, width_x, width_y):
+        """
+        Calculate the neighbourhood processed data * mask normalised by the
+        neighbourhood processed mask, for each index along the leading
+        dimension of an array using a different neighbourhood size for each
+        index. The data * mask and mask arrays are padded into a single
+        stacked array, so that the cumulative sums and 4-point sums of both
+        are calculated together in one pass.
+
+        Normalising by the neighbourhood processed mask corrects
+        neighbourhood averages for masked data, which would otherwise be
+        calculated using larger neighbourhood areas than are present in
+        reality.
 
         Args:
-            cube (iris.cube.Cube):
-                Cube to which neighbourhood processing is being applied. Must
-                be passed through cumulate_array method first.
-            cells_x, cells_y (integer):
-                The radius of the neighbourhood in grid points, in the x and y
-                directions (excluding the central grid point).
-            nan_masks (list):
-                List of numpy arrays to be used to set the values within the
-                data of the output cube to be NaN.
+            data (Numpy array):
+                Array with the dimension along which the neighbourhood size
+                varies first, and the y and x dimensions last.
+            mask (Numpy array):
+                Array of the same shape as data, which is zero where the data
+                is masked.
+            grid_cells (list):
+                List of tuples of the number of grid cells in the x and y
+                directions for each index along the leading dimension.
+            width_x, width_y (integer):
+                The largest number of grid cells in the x and y directions,
+                which determines the width of the halo.
 
         Returns:
-            cube (iris.cube.Cube):
-                Cube to which square neighbourhood has been applied.
+            neighbourhood_total (Numpy array):
+                Array of the same shape as the input data, containing the
+                normalised neighbourhood processed data. If re_mask is True,
+                the result is multiplied by the original mask.
         """
-        check_for_x_and_y_axes(cube)
+        n_rows = data.shape[-2] + 4*width_y
+        n_columns = data.shape[-1] + 4*width_x
+        masked_data = (data * mask).astype(data.dtype)
+        # The data * mask and mask arrays are padded separately, using their
+        # own dtypes, and stacked along the second dimension.
+        padded = self._padded_buffer(
+            (data.shape[0], 2) + data.shape[1:-2] + (n_rows, n_columns),
+            np.result_type(data.dtype, mask.dtype))
+        for index, (cells_x, cells_y) in enumerate(grid_cells):
+            _pad_with_halo(
+                masked_data[index], padded[index, 0], width_x, width_y,
+                cells_x, cells_y)
+            _pad_with_halo(
+                mask[index], padded[index, 1], width_x, width_y,
+                cells_x, cells_y)
+        totals = self._neighbourhood_total_from_padded(
+            padded, grid_cells, width_x, width_y)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            neighbourhood_total = np.true_divide(
+                totals[:, 0], totals[:, 1])
+        neighbourhood_total[~np.isfinite(neighbourhood_total)] = 0
+        if self.re_mask:
+            neighbourhood_total = neighbourhood_total * mask
+        return neighbourhood_total
+
+    def _neighbourhood_total_from_padded(
+            self, padded, grid_cells, width_x, width_y):
+        """
+        Calculate the neighbourhood sum or fraction for each index along the
+        leading dimension of a padded array, using a different neighbourhood
+        size for each index, and remove the halo. The cumulative sum of the
+        whole padded array is calculated once and the 4-point sum for each
+        index is evaluated from it using its own neighbourhood size.
 
-        yname = cube.coord(axis="y").name()
-        xname = cube.coord(axis="x").name()
-
-        # Calculate displacement factors to find 4-points after flattening the
-        # array.
-        n_rows = len(cube.coord(axis="y").points)
-        n_columns = len(cube.coord(axis="x").points)
-
-        # Displacements from the point at the centre of the neighbourhood.
-        # Equivalent to point B in the docstring example.
-        ymax_xmax_disp = (cells_y*n_columns) + cells_x
-        # Equivalent to point A in the docstring example.
-        ymax_xmin_disp = (cells_y*n_columns) - cells_x - 1
-
-        # Equivalent to point D in the docstring example.
-        ymin_xmax_disp = (-1*(cells_y+1)*n_columns) + cells_x
-        # Equivalent to point C in the docstring example.
-        ymin_xmin_disp = (-1*(cells_y+1)*n_columns) - cells_x - 1
-
-        cubelist = iris.cube.CubeList([])
-        for slice_2d, nan_mask in zip(cube.slices([yname, xname]), nan_masks):
-            # Flatten the 2d slice and create 4 copies of the flattened
-            # array which are rolled to align the 4-points which are needed
-            # for the calculation.
-            flattened = slice_2d.data.flatten()
-            ymax_xmax_array = np.roll(flattened, -ymax_xmax_disp)
-            ymin_xmax_array = np.roll(flattened, -ymin_xmax_disp)
-            ymin_xmin_array = np.roll(flattened, -ymin_xmin_disp)
-            ymax_xmin_array = np.roll(flattened, -ymax_xmin_disp)
-            neighbourhood_total = (ymax_xmax_array - ymin_xmax_array +
-                                   ymin_xmin_array - ymax_xmin_array)
-            neighbourhood_total.resize(n_rows, n_columns)
+        Args:
+            padded (Numpy array):
+                Array padded with a halo, with the dimension along which the
+                neighbourhood size varies first, and the y and x dimensions
+                last. The contents are overwritten, as NaNs are set to zero
+                and float64 arrays are cumulated in place.
+            grid_cells (list):
+                List of tuples of the number of grid cells in the x and y
+                directions for each index along the leading dimension.
+            width_x, width_y (integer):
+                The width of the halo in grid cells in the x and y
+                directions, as used for padding.
 
+        Returns:
+            neighbourhood_total (Numpy array):
+                Array with the halo removed, containing the neighbourhood sum
+                or fraction.
+        """
+        n_rows, n_columns = padded.shape[-2:]
+        nan_mask = np.isnan(padded)
+        padded[nan_mask] = 0
+        accumulation_type = None
+        if np.issubdtype(padded.dtype, np.floating):
+            accumulation_type = np.float64
+        if padded.dtype == accumulation_type:
+            # The padded array is not needed after cumulating, so the
+            # cumulative sums can be calculated within it.
+            summed = np.cumsum(padded, axis=-2, out=padded)
+        else:
+            summed = np.cumsum(padded, axis=-2, dtype=accumulation_type)
+        np.cumsum(summed, axis=-1, out=summed)
+
+        flattened = summed.reshape(len(grid_cells), -1, n_rows*n_columns)
+        neighbourhood_total = np.zeros(flattened.shape, dtype=float)
+        for index, (cells_x, cells_y) in enumerate(grid_cells):
+            for displacement, sign in _four_point_displacements(
+                    cells_x, cells_y, n_columns):
+                _accumulate_displaced(
+                    neighbourhood_total[index], flattened[index],
+                    displacement, sign)
             if self.sum_or_fraction == "fraction":
-                # Initialise and calculate the neighbourhood area.
-                neighbourhood_area = np.zeros(neighbourhood_total.shape)
-                neighbourhood_area.fill((2*cells_x+1) * (2*cells_y+1))
-                with np.errstate(invalid='ignore', divide='ignore'):
-                    slice_2d.data = (neighbourhood_total.astype(float) /
-                                     neighbourhood_area.astype(float))
-            elif self.sum_or_fraction == "sum":
-                slice_2d.data = neighbourhood_total.astype(float)
+                neighbourhood_total[index] /= float(
+                    (2*cells_x+1) * (2*cells_y+1))
+        neighbourhood_total = neighbourhood_total.reshape(padded.shape)
+        neighbourhood_total[nan_mask] = np.NaN
 
-            slice_2d.data[nan_mask.astype(bool)] = np.NaN
-            cubelist.append(slice_2d)
-        return cubelist.merge_cube()
+        end_y = -2*width_y if width_y != 0 else None
+        end_x = -2*width_x if width_x != 0 else None
+        return neighbourhood_total[..., 2*width_y:end_y, 2*width_x:end_x]
 
-    @staticmethod
-    def _set_up_cubes_to_be_neighbourhooded(cube, mask_cube=None):
+    def run_multiple_radii(self, cube, radii, mask_cube=None):
         """
-        Set up a cubelist containing either the input cube, or the input cube
-        and a mask cube.
+        Apply a square neighbourhood to a cube with a time dimension, using
+        a different radius at each time. The padded array and its cumulative
+        sum are calculated once for the whole cube and the neighbourhood for
+        each time is evaluated from them, so that the cube does not need to
+        be sliced over time and the results concatenated. The result is the
+        same as applying the run method to each time separately.
 
         Args:
             cube (Iris.cube.Cube):
-                Cube that will be checked for whether the data is masked.
+                Cube containing the array to which the square neighbourhood
+                will be applied.
+            radii (list or Numpy array):
+                Radii in metres, one for each point along the time
+                coordinate of the cube.
 
         Keyword Args:
             mask_cube (Iris.cube.Cube):
                 Cube containing the array to be used as a mask.
 
         Returns:
-            cubes_to_sum (Iris.cube.CubeList):
-                CubeList containing either the input cube, or the input cube
-                and a mask cube.
-        """
-        # If there is a mask, fill the data array of the mask_cube with a
-        # logical array, logically inverted compared to the integer version of
-        # the mask within the original data array.
-        if isinstance(cube.data, np.ma.MaskedArray) or mask_cube:
-            if not mask_cube:
-                mask_cube = cube.copy()
-                mask_cube.data = np.logical_not(cube.data.mask.astype(int))
-            mask_cube.rename('mask_data')
-            if np.ma.is_masked(cube.data):
-                cube.data = cube.data.data
-            cube = iris.util.squeeze(cube)
-            cube.data = (cube.data * mask_cube.data.squeeze()).astype(
-                cube.data.dtype)
-            cubes_to_sum = iris.cube.CubeList([cube, mask_cube])
+            neighbourhood_averaged_cube (Iris.cube.Cube):
+                Cube containing the smoothed field after the square
+                neighbourhood method has been applied.
+
+        Raises:
+            ValueError: If the number of radii does not match the number of
+                points along the time coordinate.
+        """
+        if len(radii) != len(cube.coord("time").points):
+            msg = ("The number of radii ({}) does not match the number of "
+                   "times ({}) within the cube.".format(
+                       len(radii), len(cube.coord("time").points)))
+            raise ValueError(msg)
+        if not cube.coord_dims("time"):
+            return self.run(cube, radii[0], mask_cube=mask_cube)
+
+        grid_cells = [self._grid_cells(cube, radius) for radius in radii]
+        width_x = max([cells_x for cells_x, _ in grid_cells])
+        width_y = max([cells_y for _, cells_y in grid_cells])
+
+        working_cube = self._transpose_to_trailing_yx(cube)
+        time_dim, = working_cube.coord_dims("time")
+        # If the data is masked, the mask will be processed as well as the
+        # original_data * mask array, within a single stacked array.
+        data, mask = self._separate_data_and_mask(working_cube, mask_cube)
+        data = np.moveaxis(data, time_dim, 0)
+        if mask is None:
+            neighbourhood_total = self._neighbourhood_total_for_each_radius(
+                data, grid_cells, width_x, width_y)
         else:
-            cubes_to_sum = iris.cube.CubeList([cube])
-        return cubes_to_sum
+            neighbourhood_total = self._masked_neighbourhood_for_each_radius(
+                data, np.moveaxis(mask, time_dim, 0), grid_cells,
+                width_x, width_y)
+        neighbourhood_total = np.moveaxis(neighbourhood_total, 0, time_dim)
+
+        neighbourhood_averaged_cube = working_cube.copy(
+            data=neighbourhood_total.astype(self.dtype, copy=False))
+        return check_cube_coordinates(cube, neighbourhood_averaged_cube)
 
-    def _pad_and_calculate_neighbourhood(
-            self, cubes_to_sum, grid_cells_x, grid_cells_y):
+
+class GeneratePercentilesFromASquareNeighbourhood(
+        BaseNeighbourhoodPercentiles):
+    """
+    Methods for use in calculating percentiles from a 2D square
+    neighbourhood.
+
+    The values within the field are assigned to histogram bins and, for each
+    bin in turn, the number of points within the neighbourhood of each point
+    that lie within that bin or below is counted using a summed-area table.
+    The values at the ranks needed for the requested percentiles are then
+    found from these cumulative counts, so that the cost is proportional to
+    the number of grid points multiplied by the number of bins, and is
+    independent of the size of the neighbourhood.
+    """
+    def __init__(self, percentiles=DEFAULT_PERCENTILES,
+                 max_histogram_bins=MAX_HISTOGRAM_BINS):
         """
-        Apply neighbourhood processing consisting of the following steps:
-        1. Pad a halo around the input cube to allow vectorised
-           neighbourhooding at edgepoints.
-        2. Cumulate the array along the x and y axes.
-        3. Apply neighbourhood processing to the cumulated array.
+        Initialise class.
+
+        Keyword Args:
+            percentiles (list):
+                Percentile values at which to calculate; if not provided uses
+                DEFAULT_PERCENTILES.
+            max_histogram_bins (integer):
+                Maximum number of histogram bins. If the field has no more
+                unique values than this, the percentiles are exact.
+                Otherwise, the values are grouped into equally spaced bins
+                and the percentiles are approximate, so fewer bins are
+                faster but less accurate.
+        """
+        super(GeneratePercentilesFromASquareNeighbourhood, self).__init__(
+            percentiles=percentiles, max_histogram_bins=max_histogram_bins)
+
+    def __repr__(self):
+        """Represent the configured class instance as a string."""
+        result = ('<GeneratePercentilesFromASquareNeighbourhood: '
+                  'percentiles: {}; max_histogram_bins: {}>')
+        return result.format(self.percentiles, self.max_histogram_bins)
+
+    @staticmethod
+    def _count_within_neighbourhood(indicator, cells_x, cells_y):
+        """
+        Count the points within the square neighbourhood of each point for
+        which an indicator array is True, using a summed-area table.
 
         Args:
-            cubes_to_sum (Iris.cube.CubeList):
-                CubeList containing either the input cube, or the input cube
-                and a mask cube.
-            grid_cells_x (Float):
-                The number of grid cells along the x axis used to create a
-                square neighbourhood.
-            grid_cells_y (Float):
-                The number of grid cells along the y axis used to create a
-                square neighbourhood.
+            indicator (Numpy array):
+                2d boolean array, padded with a halo of cells_y and cells_x
+                grid cells in the y and x directions.
+            cells_x, cells_y (integer):
+                The radius of the neighbourhood in grid points, in the x and
+                y directions (excluding the central grid point).
 
         Returns:
-            neighbourhood_averaged_cubes (Iris.cube.CubeList):
-                CubeList containing the smoothed field after the square
-                neighbourhood method has been applied to either the input cube,
-                or both the input cube and a mask cube.
-        """
-        neighbourhood_averaged_cubes = iris.cube.CubeList([])
-        for cube_to_process in cubes_to_sum:
-            # Pad the iris cube. This way, the edge effects produced
-            # by the vectorisation of the 4-point method will appear outside
-            # our domain of interest. These unwanted points can be trimmed off
-            # later.
-            cube_to_process = self.pad_cube_with_halo(
-                cube_to_process, grid_cells_x, grid_cells_y)
-            summed_up_cube, nan_masks = self.cumulate_array(
-                cube_to_process)
-            neighbourhood_averaged_cubes.append(
-                self.mean_over_neighbourhood(
-                    summed_up_cube, grid_cells_x, grid_cells_y, nan_masks))
-        return neighbourhood_averaged_cubes
-
-    def _remove_padding_and_mask(
-            self, neighbourhood_averaged_cubes, pre_neighbourhood_cubes,
-            cube_name, grid_cells_x, grid_cells_y):
-        """
-        Remove the halo from the padded array and apply the mask, if required.
+            counts (Numpy array):
+                Array of the number of points within the neighbourhood of
+                each point, with the halo removed.
+        """
+        table = np.zeros(
+            (indicator.shape[0] + 1, indicator.shape[1] + 1), dtype=int)
+        np.cumsum(indicator, axis=0, out=table[1:, 1:])
+        np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+        size_y = 2*cells_y + 1
+        size_x = 2*cells_x + 1
+        return (table[size_y:, size_x:] - table[:-size_y, size_x:] -
+                table[size_y:, :-size_x] + table[:-size_y, :-size_x])
+
+    def binned_percentiles(self, data, cells_x, cells_y):
+        """
+        Calculate percentiles over the square neighbourhood of each point
+        within a two dimensional array.
+
+        The array is padded in the same way as within the
+        GeneratePercentilesFromACircularNeighbourhood.pad_and_unpad_cube
+        method and the values are assigned to histogram bins. For each bin
+        in turn, the number of points within the neighbourhood with values
+        within that bin or below is accumulated.
+        The value at each rank is the value of the first bin for which this
+        cumulative count exceeds the rank, and the values at the ranks
+        either side of each percentile are interpolated linearly, in the
+        same way as numpy.percentile.
 
         Args:
-            neighbourhood_averaged_cubes (Iris.cube.CubeList):
-                CubeList containing the smoothed field after the square
-                neighbourhood method has been applied to either the input cube,
-                or both the input cube and a mask cube.
-            pre_neighbourhood_cubes (Iris.cube.CubeList):
-                CubeList containing the fields prior to applying neighbourhood
-                processing. This is required to be able to know the original
-                mask cube.
-            cube_name (String):
-                Name of the variable that has been neighbourhooded.
-            grid_cells_x (Float):
-                The number of grid cells along the x axis used to create a
-                square neighbourhood.
-            grid_cells_y (Float):
-                The number of grid cells along the y axis used to create a
-                square neighbourhood.
+            data (Numpy array):
+                2d array with the y and x dimensions in that order.
+            cells_x, cells_y (integer):
+                The radius of the neighbourhood in grid points, in the x and
+                y directions (excluding the central grid point).
 
         Returns:
-            neighbourhood_averaged_cube (Iris.cube.Cube):
-                Cube containing the smoothed field after the square
-                neighbourhood method has been applied.
+            perc_data (Numpy array):
+                Array of percentiles, with the percentiles as the leading
+                dimension followed by the dimensions of the input array.
         """
-        # Correct neighbourhood averages for masked data, which may have been
-        # calculated using larger neighbourhood areas than are present in
-        # reality.
-        neighbourhood_averaged_cube, = neighbourhood_averaged_cubes.extract(
-            cube_name)
-        neighbourhood_averaged_cube = self.remove_halo_from_cube(
-            neighbourhood_averaged_cube, grid_cells_x, grid_cells_y)
-        if len(neighbourhood_averaged_cubes) > 1:
-            mask_cube, = neighbourhood_averaged_cubes.extract('mask_data')
-            mask_cube = self.remove_halo_from_cube(
-                mask_cube, grid_cells_x, grid_cells_y)
-            with np.errstate(invalid='ignore', divide='ignore'):
-                divided_data = np.true_divide(
-                    neighbourhood_averaged_cube.data, mask_cube.data)
-                divided_data[~np.isfinite(divided_data)] = 0
-                neighbourhood_averaged_cube.data = divided_data
-            if self.re_mask:
-                original_mask_cube, = (
-                    pre_neighbourhood_cubes.extract('mask_data'))
-                neighbourhood_averaged_cube.data = (
-                    neighbourhood_averaged_cube.data *
-                    original_mask_cube.data.squeeze())
-        return neighbourhood_averaged_cube
+        padded = np.pad(
+            data, ((cells_y, cells_y), (cells_x, cells_x)), mode='mean',
+            stat_length=max(cells_x, cells_y))
+        padded = np.asarray(padded)
+        bin_indices, bin_values = (
+            self._bin_data(padded, self.max_histogram_bins))
+        # Only bins containing values can hold the value at a rank.
+        occupied_bins = np.flatnonzero(np.bincount(bin_indices.ravel()))
+
+        # Ranks of the values required to interpolate to each percentile.
+        n_points = (2*cells_x + 1) * (2*cells_y + 1)
+        positions = np.array(self.percentiles) / 100. * (n_points - 1)
+        lower_ranks = np.floor(positions).astype(int)
+        upper_ranks = np.minimum(lower_ranks + 1, n_points - 1)
+        fractions = positions - lower_ranks
+        ranks, rank_indices = np.unique(
+            np.concatenate((lower_ranks, upper_ranks)), return_inverse=True)
+
+        # For each rank, count the occupied bins whose cumulative count
+        # does not exceed the rank, giving the index of the occupied bin
+        # containing the value at that rank.
+        cumulative = np.zeros(data.shape, dtype=int)
+        value_bins = np.zeros((len(ranks),) + data.shape, dtype=int)
+        for bin_index in occupied_bins[:-1]:
+            cumulative += self._count_within_neighbourhood(
+                bin_indices == bin_index, cells_x, cells_y)
+            value_bins += cumulative <= ranks[:, np.newaxis, np.newaxis]
+        values = bin_values[occupied_bins][value_bins]
+        values = values.astype(
+            np.result_type(bin_values.dtype, float), copy=False)
+
+        lower = values[rank_indices[:len(self.percentiles)]]
+        upper = values[rank_indices[len(self.percentiles):]]
+        return (lower + (upper - lower) *
+                fractions[:, np.newaxis, np.newaxis])
 
     def run(self, cube, radius, mask_cube=None):
         """
-        Call the methods required to apply a square neighbourhood
-        method to a cube.
+        Method to apply a square neighbourhood to the data within the input
+        cube in order to derive percentiles over the neighbourhood.
 
-        The steps undertaken are:
-        1. Set up cubes by determining, if the arrays are masked.
-        2. Pad the input array with a halo and then calculate the neighbourhood
-           of the haloed array.
-        3. Remove the halo from the neighbourhooded array and deal with a mask,
-           if required.
+        Args:
+            cube (Iris.cube.Cube):
+                Cube containing array to apply processing to.
+            radius (Float):
+                Radius in metres for use in specifying the number of
+                grid cells used to create a square neighbourhood.
+
+        Keyword Args:
+            mask_cube (Iris.cube.Cube or None):
+                Cube containing the array to be used as a mask.
+
+        Returns:
+            result (Iris.cube.Cube):
+                Cube containing the percentile fields.
+                Has percentile as an added dimension.
+
+        Raises:
+            ValueError: If a mask cube is supplied.
+
+        """
+        if mask_cube is not None:
+            msg = ("A mask cube cannot be used when generating percentiles "
+                   "from a square neighbourhood, as the ranks of the "
+                   "percentiles are calculated from the number of points "
+                   "within the full neighbourhood, which would include "
+                   "masked points.")
+            raise ValueError(msg)
+        grid_cells_x, grid_cells_y = (
+            convert_distance_into_number_of_grid_cells(
+                cube, radius, MAX_RADIUS_IN_GRID_CELLS))
+        return self._percentiles_for_each_slice(
+            cube, lambda data: self.binned_percentiles(
+                data, grid_cells_x, grid_cells_y))
+
+
+class GenerateProbabilitiesFromASquareNeighbourhood(object):
+
+    """
+    Threshold a field and apply a square neighbourhood to the truth values,
+    generating neighbourhood probabilities for all the thresholds within a
+    single plugin. The result is the same as applying BasicThreshold and
+    then the run method of SquareNeighbourhood with the "fraction" option,
+    but no thresholded cube is created.
+
+    The thresholds are processed in chunks, so that the truth values and
+    the cumulative sums are only held for a chunk of thresholds at a time,
+    rather than for all the thresholds in float64. The neighbourhood size,
+    the 4-point displacements and the padded buffer are shared by all the
+    chunks, and if the data is masked, the neighbourhood processed mask,
+    which is the same for every threshold, is only calculated once.
+    """
+
+    def __init__(self, thresholds, fuzzy_factor=None, below_thresh_ok=False,
+                 re_mask=True, dtype=np.float64):
+        """
+        Initialise class.
+
+        Args:
+            thresholds (list of floats or float):
+                The threshold points for 'significant' datapoints.
+
+        Keyword Args:
+            fuzzy_factor (float):
+                Percentage above or below threshold for fuzzy membership
+                value. If None, no fuzzy_factor is applied.
+            below_thresh_ok (boolean):
+                True to count points as significant if *below* the
+                threshold, False to count points as significant if *above*
+                the threshold.
+            re_mask (boolean):
+                If re_mask is True, the original un-neighbourhood processed
+                mask is applied to mask out the neighbourhood processed
+                probabilities, as for SquareNeighbourhood.
+            dtype (numpy dtype):
+                Data type of the truth values and of the neighbourhood
+                probabilities, e.g. np.float32 to halve the memory required.
+        """
+        self.threshold_plugin = BasicThreshold(
+            thresholds, fuzzy_factor=fuzzy_factor,
+            below_thresh_ok=below_thresh_ok, dtype=dtype)
+        self.neighbourhood_plugin = SquareNeighbourhood(
+            sum_or_fraction="fraction", re_mask=re_mask, dtype=dtype)
+        self.dtype = dtype
+
+    def __repr__(self):
+        """Represent the configured plugin instance as a string."""
+        result = ('<GenerateProbabilitiesFromASquareNeighbourhood: '
+                  'threshold_plugin: {}; neighbourhood_plugin: {}>')
+        return result.format(self.threshold_plugin,
+                             self.neighbourhood_plugin)
+
+    def _neighbourhood_probabilities(self, data, mask, thresholds,
+                                     cells_x, cells_y):
+        """
+        Calculate the neighbourhood probabilities for all the thresholds,
+        processing the thresholds in chunks.
+
+        Args:
+            data (Numpy array):
+                Data to threshold, with the y and x dimensions last. Any mask
+                is ignored.
+            mask (Numpy array or None):
+                Array of the same shape as the data, which is zero where the
+                data is masked, or None if the data is not masked.
+            thresholds (Numpy array):
+                One dimensional array of the thresholds.
+            cells_x, cells_y (integer):
+                The radius of the neighbourhood in grid points, in the x and
+                y directions.
+
+        Returns:
+            probabilities (Numpy array):
+                Array of the neighbourhood probabilities, with the thresholds
+                as the leading dimension followed by the dimensions of the
+                data.
+        """
+        nbhood = self.neighbourhood_plugin
+        grid_cells = [(cells_x, cells_y)]
+        padded_shape = (data.shape[:-2] +
+                        (data.shape[-2] + 4*cells_y,
+                         data.shape[-1] + 4*cells_x))
+        if mask is not None:
+            # The neighbourhood processed mask is the same for every
+            # threshold, so it is only calculated once.
+            padded_mask = np.empty(
+                (1,) + padded_shape,
+                dtype=np.result_type(self.dtype, mask.dtype))
+            _pad_with_halo(mask, padded_mask[0], cells_x, cells_y,
+                           cells_x, cells_y)
+            mask_total = nbhood._neighbourhood_total_from_padded(
+                padded_mask, grid_cells, cells_x, cells_y)[0]
+            del padded_mask
+            padded_dtype = np.result_type(self.dtype, mask.dtype)
+        else:
+            padded_dtype = self.dtype
+
+        probabilities = np.empty(thresholds.shape + data.shape,
+                                 dtype=self.dtype)
+        chunk_size = max(1, THRESHOLD_CHUNK_POINTS // int(
+            np.prod(padded_shape)))
+        for start in range(0, len(thresholds), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            truth_value = self.threshold_plugin.threshold_data(
+                data, thresholds[chunk])
+            if mask is not None:
+                truth_value = (truth_value * mask).astype(truth_value.dtype)
+            padded = nbhood._padded_buffer(
+                (1, len(truth_value)) + padded_shape, padded_dtype)
+            _pad_with_halo(truth_value, padded[0], cells_x, cells_y,
+                           cells_x, cells_y)
+            neighbourhood_total = nbhood._neighbourhood_total_from_padded(
+                padded, grid_cells, cells_x, cells_y)[0]
+            if mask is not None:
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    neighbourhood_total = np.true_divide(
+                        neighbourhood_total, mask_total)
+                neighbourhood_total[~np.isfinite(neighbourhood_total)] = 0
+                if nbhood.re_mask:
+                    neighbourhood_total = neighbourhood_total * mask
+            probabilities[chunk] = neighbourhood_total
+        return probabilities
+
+    def process(self, cube, radius, mask_cube=None):
+        """
+        Generate neighbourhood probabilities of being above or below each of
+        the thresholds.
 
         Args:
             cube (Iris.cube.Cube):
-                Cube containing the array to which the square neighbourhood
-                will be applied.
+                Cube containing the field to threshold.
             radius (Float):
                 Radius in metres for use in specifying the number of
                 grid cells used to create a square neighbourhood.
@@ -580,30 +957,30 @@ class SquareNeighbourhood(object):
                 Cube containing the array to be used as a mask.
 
         Returns:
-            neighbourhood_averaged_cube (Iris.cube.Cube):
-                Cube containing the smoothed field after the square
-                neighbourhood method has been applied.
+            cube (Iris.cube.Cube):
+                Cube containing the neighbourhood probabilities, with the
+                same metadata as the output of BasicThreshold.
+
+        Raises:
+            ValueError: if a np.nan value is detected within the input cube.
         """
-        # If the data is masked, the mask will be processed as well as the
-        # original_data * mask array.
-        original_attributes = cube.attributes
-        original_methods = cube.cell_methods
+        check_for_nan(cube)
         grid_cells_x, grid_cells_y = (
             convert_distance_into_number_of_grid_cells(
                 cube, radius, MAX_RADIUS_IN_GRID_CELLS))
-        cubes_to_sum = (
-            self._set_up_cubes_to_be_neighbourhooded(cube, mask_cube))
-        neighbourhood_averaged_cubes = (
-            self._pad_and_calculate_neighbourhood(
-                cubes_to_sum, grid_cells_x, grid_cells_y))
-        neighbourhood_averaged_cube = (
-            self._remove_padding_and_mask(
-                neighbourhood_averaged_cubes, cubes_to_sum, cube.name(),
-                grid_cells_x, grid_cells_y))
-
-        neighbourhood_averaged_cube.cell_methods = original_methods
-        neighbourhood_averaged_cube.attributes = original_attributes
-
-        neighbourhood_averaged_cube = check_cube_coordinates(
-            cube, neighbourhood_averaged_cube)
-        return neighbourhood_averaged_cube
+        working_cube = SquareNeighbourhood._transpose_to_trailing_yx(cube)
+        data, mask = SquareNeighbourhood._separate_data_and_mask(
+            working_cube, mask_cube)
+        thresholds = self.threshold_plugin.sorted_thresholds()
+        probabilities = self._neighbourhood_probabilities(
+            data, mask, thresholds, grid_cells_x, grid_cells_y)
+        result = self.threshold_plugin.make_threshold_cube(
+            working_cube, probabilities, thresholds)
+        if working_cube is not cube:
+            # Restore the order of the dimensions of the thresholded cube.
+            template = self.threshold_plugin.make_threshold_cube(
+                cube, np.broadcast_to(np.zeros((), dtype=self.dtype),
+                                      thresholds.shape + cube.shape),
+                thresholds)
+            result = check_cube_coordinates(template, result)
+        return result
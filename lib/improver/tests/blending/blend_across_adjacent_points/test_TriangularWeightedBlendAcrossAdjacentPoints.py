@@ -35,7 +35,7 @@ import unittest
 
 from cf_units import Unit
 
-from iris.coords import DimCoord
+from iris.coords import CellMethod, DimCoord
 from iris.cube import Cube
 from iris.tests import IrisTest
 from iris.exceptions import CoordinateNotFoundError
@@ -199,6 +199,91 @@ class Test_correct_collapsed_coordinates(IrisTest):
                                                       ['forecast_period'])
 
 
+class Test_blend_adjacent_points(IrisTest):
+    """Test the blend_adjacent_points method."""
+
+    def setUp(self):
+        """Set up a test cube with three forecast periods."""
+        data = np.ones((2, 3, 2))
+        data[:, 1, :] = 2.0
+        data[:, 2, :] = 4.0
+        cube = Cube(data, units="m",
+                    standard_name="lwe_thickness_of_precipitation_amount")
+        cube.add_dim_coord(DimCoord(np.linspace(-45.0, 45.0, 2),
+                                    'latitude', units='degrees'), 0)
+        cube.add_dim_coord(DimCoord([0, 1, 2], "forecast_period",
+                                    units="hours"), 1)
+        cube.add_dim_coord(DimCoord(np.linspace(120, 180, 2), 'longitude',
+                                    units='degrees'), 2)
+        self.cube = cube
+        self.weights = np.array([[0.5, 0.5, 0.0],
+                                 [0.25, 0.5, 0.25],
+                                 [0.0, 0.5, 0.5]])
+
+    def test_weighted_mean(self):
+        """Test that each point is blended with the adjacent points."""
+        plugin = TriangularWeightedBlendAcrossAdjacentPoints(
+            'forecast_period', 2.0, 'hours', 'weighted_mean')
+        result = plugin.blend_adjacent_points(self.cube, self.weights)
+        expected_data = np.ones((2, 3, 2))
+        expected_data[:, 0, :] = 1.5
+        expected_data[:, 1, :] = 2.25
+        expected_data[:, 2, :] = 3.0
+        self.assertArrayAlmostEqual(result.data, expected_data)
+        self.assertEqual(self.cube.coord('forecast_period'),
+                         result.coord('forecast_period'))
+        self.assertEqual(
+            result.cell_methods,
+            (CellMethod('weighted_mean', coords='forecast_period'),))
+
+    def test_weighted_maximum(self):
+        """Test that the maximum weighted value of the adjacent points is
+        found for each point."""
+        plugin = TriangularWeightedBlendAcrossAdjacentPoints(
+            'forecast_period', 2.0, 'hours', 'weighted_maximum')
+        result = plugin.blend_adjacent_points(self.cube, self.weights)
+        expected_data = np.ones((2, 3, 2))
+        expected_data[:, 0, :] = 1.0
+        expected_data[:, 1, :] = 1.0
+        expected_data[:, 2, :] = 2.0
+        self.assertArrayAlmostEqual(result.data, expected_data)
+        self.assertEqual(
+            result.cell_methods,
+            (CellMethod('weighted_maximum', coords='forecast_period'),))
+
+    def test_masked_data(self):
+        """Test that masked points are excluded from the weighted mean."""
+        self.cube.data = np.ma.masked_array(self.cube.data)
+        self.cube.data[:, 1, :] = np.ma.masked
+        plugin = TriangularWeightedBlendAcrossAdjacentPoints(
+            'forecast_period', 2.0, 'hours', 'weighted_mean')
+        result = plugin.blend_adjacent_points(self.cube, self.weights)
+        expected_data = np.ones((2, 3, 2))
+        expected_data[:, 0, :] = 1.0
+        expected_data[:, 1, :] = 2.5
+        expected_data[:, 2, :] = 4.0
+        self.assertArrayAlmostEqual(result.data, expected_data)
+
+    def test_masked_data_weighted_maximum(self):
+        """Test that masked points are excluded from the weighted maximum,
+        and that unmasked points outside the band of non-zero weights
+        contribute a weighted value of zero, as when collapsing the whole
+        cube."""
+        self.cube.data = np.ma.masked_array(self.cube.data)
+        self.cube.data[0, 1:, :] = np.ma.masked
+        plugin = TriangularWeightedBlendAcrossAdjacentPoints(
+            'forecast_period', 2.0, 'hours', 'weighted_maximum')
+        result = plugin.blend_adjacent_points(self.cube, self.weights)
+        expected_data = np.ones((2, 3, 2))
+        expected_data[0, 0, :] = 0.5
+        expected_data[0, 1, :] = 0.25
+        expected_data[0, 2, :] = 0.0
+        expected_data[1, 2, :] = 2.0
+        self.assertIsInstance(result.data, np.ma.MaskedArray)
+        self.assertFalse(np.ma.is_masked(result.data))
+        self.assertArrayAlmostEqual(result.data, expected_data)
+
+
 class Test_process(IrisTest):
     """Test the process method."""
 
@@ -268,6 +353,34 @@ class Test_process(IrisTest):
         self.assertEqual(self.cube.coord('time'), result.coord('time'))
         self.assertArrayAlmostEqual(expected_data, result.data)
 
+    def test_points_outside_triangle(self):
+        """Test that the plugin produces sensible results when some points
+           along the coordinate are outside the width of the triangle for
+           other points, so are not blended with them."""
+        data = np.ones((4, 2, 2))
+        data[1] = 2.0
+        data[3] = 2.0
+        cube = Cube(data, units="m",
+                    standard_name="lwe_thickness_of_precipitation_amount")
+        cube.add_dim_coord(DimCoord([0, 1, 4, 5], "forecast_period",
+                                    units="hours"), 0)
+        cube.add_dim_coord(DimCoord(np.linspace(-45.0, 45.0, 2),
+                                    'latitude', units='degrees'), 1)
+        cube.add_dim_coord(DimCoord(np.linspace(120, 180, 2), 'longitude',
+                                    units='degrees'), 2)
+        width = 2.0
+        plugin = TriangularWeightedBlendAcrossAdjacentPoints(
+            'forecast_period', width, 'hours', 'weighted_mean')
+        result = plugin.process(cube)
+        expected_data = np.ones((4, 2, 2))
+        expected_data[0] = 4.0 / 3.0
+        expected_data[1] = 5.0 / 3.0
+        expected_data[2] = 4.0 / 3.0
+        expected_data[3] = 5.0 / 3.0
+        self.assertArrayAlmostEqual(expected_data, result.data)
+        self.assertEqual(cube.coord('forecast_period'),
+                         result.coord('forecast_period'))
+
 
 if __name__ == '__main__':
     unittest.main()
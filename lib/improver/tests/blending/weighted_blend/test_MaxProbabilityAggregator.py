@@ -104,6 +104,73 @@ class Test_aggregate(IrisTest):
         self.assertEqual(result.shape, (2, 2))
         self.assertArrayEqual(result, expected_data)
 
+    def test_masked_data(self):
+        """Test that masked points are ignored when finding the maximum, and
+           that points masked along the whole axis remain masked."""
+        data = np.ma.masked_array([[1., 4.], [2., 1.], [3., 2.]],
+                                  mask=[[False, True],
+                                        [False, True],
+                                        [True, True]])
+        axis = 0
+        weights = np.array([0.5, 0.25, 0.25])
+        expected_data = np.ma.masked_array([0.5, 0.], mask=[False, True])
+        plugin = MaxProbabilityAggregator
+        result = plugin.aggregate(data, axis, weights)
+        self.assertIsInstance(result, np.ma.MaskedArray)
+        self.assertArrayEqual(result.mask, expected_data.mask)
+        self.assertArrayEqual(result.data[0], expected_data.data[0])
+
+    def test_matches_weighted_stack(self):
+        """Test that the result matches the maximum of the full stack of
+           weighted probabilities."""
+        data = np.random.RandomState(0).rand(3, 4, 5)
+        axis = 1
+        weights = np.array([0.1, 0.4, 0.3, 0.2])
+        expected_data = np.max(data*weights.reshape(1, 4, 1), axis=axis)
+        plugin = MaxProbabilityAggregator
+        result = plugin.aggregate(data, axis, weights)
+        self.assertArrayEqual(result, expected_data)
+
+
+class Test_accumulate(IrisTest):
+    """Test the accumulate method"""
+
+    def test_first_array(self):
+        """Test that the first array accumulated is returned as a copy."""
+        weighted_probs = np.array([0.1, 0.5])
+        result = MaxProbabilityAggregator.accumulate(None, weighted_probs)
+        self.assertArrayEqual(result, weighted_probs)
+        self.assertIsNot(result, weighted_probs)
+
+    def test_in_place(self):
+        """Test that an unmasked running maximum is updated in place."""
+        running_max = np.array([0.1, 0.5])
+        result = MaxProbabilityAggregator.accumulate(
+            running_max, np.array([0.3, 0.2]))
+        self.assertIs(result, running_max)
+        self.assertArrayEqual(result, np.array([0.3, 0.5]))
+
+    def test_type_promotion(self):
+        """Test that an integer running maximum is promoted to hold float
+           weighted probabilities."""
+        running_max = np.array([0, 1])
+        result = MaxProbabilityAggregator.accumulate(
+            running_max, np.array([0.5, 0.5]))
+        self.assertEqual(result.dtype, np.float64)
+        self.assertArrayEqual(result, np.array([0.5, 1.]))
+
+    def test_masked(self):
+        """Test that masked points are ignored, and that points remain masked
+           only if they are masked in both arrays."""
+        running_max = np.ma.masked_array([0.1, 0.5, 0.2],
+                                         mask=[False, True, True])
+        weighted_probs = np.ma.masked_array([0.3, 0.2, 0.4],
+                                            mask=[True, False, True])
+        result = MaxProbabilityAggregator.accumulate(
+            running_max, weighted_probs)
+        self.assertArrayEqual(result.mask, [False, False, True])
+        self.assertArrayEqual(result.data[:2], [0.1, 0.2])
+
 
 if __name__ == '__main__':
     unittest.main()
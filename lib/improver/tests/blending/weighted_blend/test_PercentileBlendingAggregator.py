@@ -39,6 +39,7 @@ from iris.cube import Cube
 from iris.tests import IrisTest
 import numpy as np
 
+from improver.blending import weighted_blend
 from improver.blending.weighted_blend import PercentileBlendingAggregator
 
 PERCENTILE_DATA = np.array([
@@ -215,6 +216,78 @@ class Test_aggregate(IrisTest):
         self.assertArrayAlmostEqual(result, expected_result)
         self.assertEqual(result.shape, expected_result_shape)
 
+    def test_chunked_points(self):
+        """Test that the result is the same if the points are blended in
+        several chunks."""
+        data = np.reshape(PERCENTILE_DATA, (6, 2, 2, 2))
+        percentiles = np.array([0, 20, 40, 60, 80, 100])
+        weights = np.array([0.6, 0.4])
+        expected = PercentileBlendingAggregator.aggregate(
+            data, 1, percentiles, weights, 0)
+        chunk_size = weighted_blend.PERCENTILE_BLEND_CHUNK_SIZE
+        try:
+            weighted_blend.PERCENTILE_BLEND_CHUNK_SIZE = 3
+            result = PercentileBlendingAggregator.aggregate(
+                data, 1, percentiles, weights, 0)
+        finally:
+            weighted_blend.PERCENTILE_BLEND_CHUNK_SIZE = chunk_size
+        self.assertArrayAlmostEqual(result, expected)
+
+
+class Test__interpolate_for_points(IrisTest):
+    """Test the _interpolate_for_points method"""
+    def test_matches_interp(self):
+        """Test that the result matches np.interp at each point, including
+           values outside the range of the data and repeated data values."""
+        x_values = np.array([[0.5, -1.0, 2.0],
+                             [1.0, 1.5, 5.0],
+                             [3.0, 4.0, 6.0]])
+        xp_values = np.array([[0.0, 0.0, 2.0],
+                              [1.0, 1.5, 2.0],
+                              [2.0, 1.5, 5.0],
+                              [3.0, 3.0, 6.0]])
+        fp_values = np.array([[0.0, 10.0, 0.0],
+                              [10.0, 20.0, 1.0],
+                              [20.0, 30.0, 2.0],
+                              [30.0, 40.0, 3.0]])
+        expected = np.array(
+            [np.interp(x_values[:, i], xp_values[:, i], fp_values[:, i])
+             for i in range(3)]).T
+        result = PercentileBlendingAggregator._interpolate_for_points(
+            x_values, xp_values, fp_values)
+        self.assertArrayAlmostEqual(result, expected)
+
+
+class Test_blend_percentiles_for_points(IrisTest):
+    """Test the blend_percentiles_for_points method"""
+    def test_matches_blend_percentiles(self):
+        """Test that the result matches blending each point in turn"""
+        weights = np.array([0.38872692, 0.33041788, 0.2808552])
+        percentiles = np.array([0., 10., 20., 30., 40., 50.,
+                                60., 70., 80., 90., 100.])
+        perc_values = np.stack(
+            [PERCENTILE_VALUES, PERCENTILE_VALUES[::-1],
+             np.round(PERCENTILE_VALUES)], axis=-1)
+        result = PercentileBlendingAggregator.blend_percentiles_for_points(
+            perc_values, percentiles, weights)
+        for i in range(perc_values.shape[-1]):
+            expected = PercentileBlendingAggregator.blend_percentiles(
+                perc_values[:, :, i], percentiles, weights)
+            self.assertArrayAlmostEqual(result[:, i], expected)
+
+    def test_three_percentiles_symmetric_case(self):
+        """Test that when three percentiles are provided the correct values
+           are returned for each point, not a simple average"""
+        weights = np.array([0.5, 0.5])
+        percentiles = np.array([20.0, 50.0, 80.0])
+        percentile_values = np.array(
+            [[[5.0, 5.0], [6.0, 6.0], [7.0, 7.0]],
+             [[5.0, 5.0], [6.5, 6.0], [7.0, 7.0]]])
+        result = PercentileBlendingAggregator.blend_percentiles_for_points(
+            percentile_values, percentiles, weights)
+        expected_result = np.array([[5.0, 5.0], [6.2, 6.0], [7.0, 7.0]])
+        self.assertArrayAlmostEqual(result, expected_result)
+
 
 class Test_blend_percentiles(IrisTest):
     """Test the blend_percentiles method"""
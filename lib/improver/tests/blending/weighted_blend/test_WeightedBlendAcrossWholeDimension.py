@@ -35,6 +35,7 @@
 import unittest
 import warnings
 
+import biggus
 from cf_units import Unit
 import iris
 from iris.coords import AuxCoord, DimCoord
@@ -43,7 +44,9 @@ from iris.tests import IrisTest
 from iris.exceptions import CoordinateNotFoundError
 import numpy as np
 
-from improver.blending.weighted_blend import WeightedBlendAcrossWholeDimension
+from improver.blending.weighted_blend import (
+    WeightedBlendAcrossWholeDimension, WeightedMaximumAccumulator,
+    WeightedMeanAccumulator)
 from improver.tests.blending.weighted_blend.test_PercentileBlendingAggregator \
     import (percentile_cube, BLENDED_PERCENTILE_DATA1,
             BLENDED_PERCENTILE_DATA2)
@@ -92,6 +95,30 @@ class Test__repr__(IrisTest):
         self.assertEqual(result, msg)
 
 
+class Test_accumulator(IrisTest):
+
+    """Test creating a plugin to accumulate the blend one input at a time."""
+
+    def test_weighted_mean(self):
+        """Test that a weighted mean accumulator is configured with the
+           coord, coord_adjust and weights redistribution method."""
+        plugin = WeightedBlendAcrossWholeDimension(
+            'time', 'weighted_mean', coord_adjust=example_coord_adjust)
+        result = plugin.accumulator(weights_distrib_method='proportional')
+        self.assertIsInstance(result, WeightedMeanAccumulator)
+        self.assertEqual(result.coord, 'time')
+        self.assertIs(result.coord_adjust, example_coord_adjust)
+        self.assertEqual(result.weights_distrib_method, 'proportional')
+
+    def test_weighted_maximum(self):
+        """Test that a weighted maximum accumulator is returned for the
+           weighted_maximum mode."""
+        plugin = WeightedBlendAcrossWholeDimension('time', 'weighted_maximum')
+        result = plugin.accumulator()
+        self.assertIsInstance(result, WeightedMaximumAccumulator)
+        self.assertEqual(result.coord, 'time')
+
+
 class Test_process(IrisTest):
 
     """Test the Basic Weighted Average plugin."""
@@ -264,6 +291,26 @@ class Test_process(IrisTest):
         expected_result_array = np.ones((2, 2, 2))*0.56
         self.assertArrayAlmostEqual(result.data, expected_result_array)
 
+    def tests_threshold_weighted_mean_keeps_dimension_order(self):
+        """Test weighted_mean blends all thresholds at once, keeping the
+        order of the remaining dimensions and adding a weighted_mean cell
+        method."""
+        coord = "time"
+        plugin = WeightedBlendAcrossWholeDimension(coord, 'weighted_mean')
+        weights = np.array([0.8, 0.2])
+        cube = self.cube_threshold
+        cube.data[:, 1, :, :] = 0.0
+        cube.transpose([1, 2, 0, 3])
+        result = plugin.process(cube, weights)
+        expected_result_array = np.ones((2, 2, 2))
+        expected_result_array[:, 0, :] = 0.4
+        expected_result_array[:, 1, :] = 0.64
+        self.assertArrayAlmostEqual(result.data, expected_result_array)
+        self.assertEqual(result.coord_dims('threshold'), (1,))
+        self.assertEqual(
+            result.cell_methods,
+            (iris.coords.CellMethod('weighted_mean', coords='time'),))
+
     def tests_threshold_splicing_works_with_threshold(self):
         """Test splicing works when the blending is over threshold."""
         coord = "threshold"
@@ -336,6 +383,150 @@ class Test_process(IrisTest):
         expected_result_array = np.ones((2, 2))*1.6
         self.assertArrayAlmostEqual(result.data, expected_result_array)
 
+    def test_lazy_data_weighted_mean(self):
+        """Test that blending lazy data with weighted_mean gives the same
+           result as blending realised data, without realising the data of
+           the input cube."""
+        coord = "time"
+        plugin = WeightedBlendAcrossWholeDimension(coord, 'weighted_mean')
+        weights = np.array([0.8, 0.2])
+        expected = plugin.process(self.cube_threshold, weights)
+        lazy_cube = self.cube_threshold.copy()
+        lazy_cube.lazy_data(biggus.NumpyArrayAdapter(lazy_cube.data))
+        result = plugin.process(lazy_cube, weights)
+        self.assertTrue(lazy_cube.has_lazy_data())
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertArrayAlmostEqual(result.coord(coord).points,
+                                    expected.coord(coord).points)
+        self.assertArrayAlmostEqual(result.coord(coord).bounds,
+                                    expected.coord(coord).bounds)
+        self.assertEqual(result.cell_methods, expected.cell_methods)
+
+    def test_lazy_data_weighted_max(self):
+        """Test that blending lazy data with weighted_maximum gives the same
+           result as blending realised data, without realising the data of
+           the input cube."""
+        coord = "time"
+        plugin = WeightedBlendAcrossWholeDimension(coord, 'weighted_maximum')
+        weights = np.array([0.2, 0.8])
+        lazy_cube = self.cube.copy()
+        lazy_cube.lazy_data(biggus.NumpyArrayAdapter(lazy_cube.data))
+        result = plugin.process(lazy_cube, weights)
+        expected_result_array = np.ones((2, 2))*1.6
+        self.assertTrue(lazy_cube.has_lazy_data())
+        self.assertArrayAlmostEqual(result.data, expected_result_array)
+
+    def test_lazy_data_metadata_weighted_mean(self):
+        """Test that blending lazy data with weighted_mean gives the same
+           cube as blending realised data, including the coordinates that
+           are constant along the coord and the cell methods."""
+        cube = self.cube_threshold.copy()
+        cube.add_aux_coord(AuxCoord([402190.0, 402190.0],
+                                    "forecast_reference_time",
+                                    units=cube.coord("time").units), 1)
+        cube.add_cell_method(
+            iris.coords.CellMethod("mean", coords="realization"))
+        plugin = WeightedBlendAcrossWholeDimension("time", 'weighted_mean')
+        weights = np.array([0.8, 0.2])
+        expected = plugin.process(cube, weights)
+        lazy_cube = cube.copy()
+        lazy_cube.lazy_data(biggus.NumpyArrayAdapter(lazy_cube.data))
+        result = plugin.process(lazy_cube, weights)
+        self.assertTrue(lazy_cube.has_lazy_data())
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertEqual(result.copy(data=expected.data), expected)
+
+    def test_lazy_data_metadata_weighted_max(self):
+        """Test that blending lazy data with weighted_maximum gives the same
+           cube as blending realised data, including the coordinates that
+           are constant along the coord and the cell methods."""
+        cube = self.cube_threshold.copy()
+        cube.add_aux_coord(AuxCoord([402190.0, 402190.0],
+                                    "forecast_reference_time",
+                                    units=cube.coord("time").units), 1)
+        cube.add_cell_method(
+            iris.coords.CellMethod("mean", coords="realization"))
+        plugin = WeightedBlendAcrossWholeDimension("time", 'weighted_maximum')
+        weights = np.array([0.2, 0.8])
+        expected = plugin.process(cube, weights)
+        lazy_cube = cube.copy()
+        lazy_cube.lazy_data(biggus.NumpyArrayAdapter(lazy_cube.data))
+        result = plugin.process(lazy_cube, weights)
+        self.assertTrue(lazy_cube.has_lazy_data())
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertEqual(result.copy(data=expected.data), expected)
+
+    def test_lazy_data_weights_none(self):
+        """Test that lazy data is blended with equal weights if no weights
+           are given."""
+        coord = "time"
+        plugin = WeightedBlendAcrossWholeDimension(coord, 'weighted_mean')
+        lazy_cube = self.cube.copy()
+        lazy_cube.lazy_data(biggus.NumpyArrayAdapter(lazy_cube.data))
+        result = plugin.process(lazy_cube)
+        expected_result_array = np.ones((2, 2))*1.5
+        self.assertArrayAlmostEqual(result.data, expected_result_array)
+
+    def test_lazy_data_float32(self):
+        """Test that blending lazy float32 data gives the same dtype as
+           blending realised data, with and without weights, for both
+           modes."""
+        cube = self.cube_threshold.copy(
+            data=self.cube_threshold.data.astype(np.float32))
+        for mode, weights in [
+                ('weighted_mean', None),
+                ('weighted_mean', np.array([0.8, 0.2])),
+                ('weighted_mean', np.array([0.8, 0.2], dtype=np.float32)),
+                ('weighted_maximum', None),
+                ('weighted_maximum', np.array([0.2, 0.8]))]:
+            plugin = WeightedBlendAcrossWholeDimension("time", mode)
+            expected = plugin.process(cube.copy(), weights)
+            lazy_cube = cube.copy()
+            lazy_cube.lazy_data(biggus.NumpyArrayAdapter(lazy_cube.data))
+            result = plugin.process(lazy_cube, weights)
+            self.assertTrue(lazy_cube.has_lazy_data())
+            self.assertEqual(result.dtype, expected.dtype)
+            self.assertArrayAlmostEqual(result.data, expected.data)
+
+
+class Test_weighted_mean(IrisTest):
+
+    """Test the weighted_mean method."""
+
+    def setUp(self):
+        """Create a cube with a time and a threshold dimension."""
+        data = np.zeros((2, 2, 2))
+        data[:, 0, :] = 0.5
+        data[:, 1, :] = 0.8
+        data[1] *= 0.5
+        cube = Cube(data, long_name="probability_of_precipitation_amount")
+        tunit = Unit("hours since 1970-01-01 00:00:00", "gregorian")
+        cube.add_dim_coord(DimCoord([402192.5, 402193.5],
+                                    "time", units=tunit), 0)
+        cube.add_dim_coord(DimCoord([0.4, 1.0], long_name="threshold",
+                                    units="kg m^-2 s^-1"), 1)
+        cube.add_dim_coord(DimCoord(np.linspace(120, 180, 2), 'longitude',
+                                    units='degrees'), 2)
+        self.cube = cube
+
+    def test_basic(self):
+        """Test that all thresholds are blended with the weights."""
+        plugin = WeightedBlendAcrossWholeDimension('time', 'weighted_mean')
+        result = plugin.weighted_mean(self.cube, weights=[0.6, 0.4])
+        expected_result_array = np.array([[0.4, 0.4], [0.64, 0.64]])
+        self.assertArrayAlmostEqual(result.data, expected_result_array)
+        self.assertEqual(result.coord_dims('threshold'), (0,))
+        self.assertEqual(
+            result.cell_methods,
+            (iris.coords.CellMethod('weighted_mean', coords='time'),))
+
+    def test_weights_equal_none(self):
+        """Test that equal weights are used if no weights are given."""
+        plugin = WeightedBlendAcrossWholeDimension('time', 'weighted_mean')
+        result = plugin.weighted_mean(self.cube)
+        expected_result_array = np.array([[0.375, 0.375], [0.6, 0.6]])
+        self.assertArrayAlmostEqual(result.data, expected_result_array)
+
 
 if __name__ == '__main__':
     unittest.main()
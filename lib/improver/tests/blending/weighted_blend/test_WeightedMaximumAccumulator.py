@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the weighted_blend.WeightedMaximumAccumulator plugin."""
+
+
+import unittest
+
+from cf_units import Unit
+import iris
+from iris.coords import AuxCoord, DimCoord
+from iris.cube import Cube
+from iris.tests import IrisTest
+import numpy as np
+
+from improver.blending.weighted_blend import (
+    WeightedBlendAcrossWholeDimension, WeightedMaximumAccumulator)
+
+
+def set_up_cube():
+    """Create a cube with two times and data of ones at the first time and
+       twos at the second time."""
+    data = np.zeros((2, 2, 2))
+    data[0][:][:] = 1.0
+    data[1][:][:] = 2.0
+    cube = Cube(data, long_name="probability_of_precipitation_amount")
+    cube.add_dim_coord(DimCoord(np.linspace(-45.0, 45.0, 2), 'latitude',
+                                units='degrees'), 1)
+    cube.add_dim_coord(DimCoord(np.linspace(120, 180, 2), 'longitude',
+                                units='degrees'), 2)
+    tunit = Unit("hours since 1970-01-01 00:00:00", "gregorian")
+    cube.add_dim_coord(DimCoord([402192.5, 402193.5],
+                                "time", units=tunit), 0)
+    cube.add_aux_coord(AuxCoord([1, 2], "forecast_period", units="hours"), 0)
+    cube.add_aux_coord(AuxCoord(1, long_name='dummy_scalar_coord',
+                                units='no_unit'))
+    return cube
+
+
+class Test__repr__(IrisTest):
+
+    """Test the repr method."""
+
+    def test_basic(self):
+        """Test that the __repr__ returns the expected string."""
+        plugin = WeightedMaximumAccumulator('time')
+        result = str(plugin)
+        msg = ('<WeightedMaximumAccumulator: coord = time, '
+               'coord_adjust = None, inputs = 0>')
+        self.assertEqual(result, msg)
+
+
+class Test_add(IrisTest):
+
+    """Test accumulating inputs."""
+
+    def setUp(self):
+        """Set up a cube to accumulate."""
+        self.cube = set_up_cube()
+        self.slices = list(self.cube.slices_over("time"))
+
+    def test_counts_inputs(self):
+        """Test that the number of inputs accumulated is counted."""
+        plugin = WeightedMaximumAccumulator('time')
+        for cube in self.slices:
+            plugin.add(cube, 0.5)
+        self.assertEqual(plugin.num_inputs, 2)
+
+    def test_fails_input_not_a_cube(self):
+        """Test it raises a Type Error if not supplied with a cube."""
+        plugin = WeightedMaximumAccumulator('time')
+        msg = ('The first argument must be an instance of '
+               'iris.cube.Cube')
+        with self.assertRaisesRegexp(TypeError, msg):
+            plugin.add(0.0, 0.5)
+
+    def test_fails_coord_not_in_cube(self):
+        """Test it raises a Value Error if the coord is not in the cube."""
+        plugin = WeightedMaximumAccumulator('notset')
+        msg = ('The coord for this plugin must be '
+               'an existing coordinate in the input cube.')
+        with self.assertRaisesRegexp(ValueError, msg):
+            plugin.add(self.cube, 0.5)
+
+    def test_fails_weights_shape(self):
+        """Test it raises a Value Error if the weights shape does not match
+           the coord shape."""
+        plugin = WeightedMaximumAccumulator('time')
+        msg = ('The weights array must match the shape '
+               'of the coordinate in the input cube')
+        with self.assertRaisesRegexp(ValueError, msg):
+            plugin.add(self.cube, [0.1, 0.2, 0.7])
+
+    def test_fails_mismatched_cube(self):
+        """Test it raises a Value Error if a cube does not match the cubes
+           already accumulated."""
+        plugin = WeightedMaximumAccumulator('time')
+        plugin.add(self.slices[0], 0.5)
+        msg = 'The cube does not match the cubes accumulated so far'
+        with self.assertRaisesRegexp(ValueError, msg):
+            plugin.add(self.slices[1][0], 0.5)
+
+
+class Test_result(IrisTest):
+
+    """Test creating the blended cube."""
+
+    def setUp(self):
+        """Set up a cube to accumulate."""
+        self.cube = set_up_cube()
+        self.slices = list(self.cube.slices_over("time"))
+        self.weights = np.array([0.3, 0.7])
+
+    def test_basic(self):
+        """Test that the result is a cube containing the maximum weighted
+           probability, with a weighted_maximum cell method."""
+        plugin = WeightedMaximumAccumulator('time')
+        for cube, weight in zip(self.slices, self.weights):
+            plugin.add(cube, weight)
+        result = plugin.result()
+        self.assertIsInstance(result, Cube)
+        self.assertArrayAlmostEqual(result.data, np.full((2, 2), 1.4))
+        self.assertEqual(
+            result.cell_methods,
+            (iris.coords.CellMethod('weighted_maximum', coords='time'),))
+
+    def test_matches_whole_dimension(self):
+        """Test that the data and collapsed coordinates match those from
+           WeightedBlendAcrossWholeDimension."""
+        expected = WeightedBlendAcrossWholeDimension(
+            'time', 'weighted_maximum').process(self.cube, self.weights)
+        plugin = WeightedMaximumAccumulator('time')
+        for cube, weight in zip(self.slices, self.weights):
+            plugin.add(cube, weight)
+        result = plugin.result()
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        for name in ['time', 'forecast_period']:
+            self.assertArrayAlmostEqual(result.coord(name).points,
+                                        expected.coord(name).points)
+            self.assertArrayAlmostEqual(result.coord(name).bounds,
+                                        expected.coord(name).bounds)
+
+    def test_dimension_input(self):
+        """Test that a cube with the coord as a dimension gives the same
+           result as its slices accumulated one at a time."""
+        plugin = WeightedMaximumAccumulator('time')
+        plugin.add(self.cube, self.weights)
+        result = plugin.result()
+        plugin = WeightedMaximumAccumulator('time')
+        for cube, weight in zip(self.slices, self.weights):
+            plugin.add(cube, weight)
+        expected = plugin.result()
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertArrayAlmostEqual(result.coord('time').bounds,
+                                    expected.coord('time').bounds)
+
+    def test_unchanged_scalar_coord(self):
+        """Test that scalar coordinates which are the same for all the
+           inputs are not collapsed."""
+        plugin = WeightedMaximumAccumulator('time')
+        for cube, weight in zip(self.slices, self.weights):
+            plugin.add(cube, weight)
+        result = plugin.result()
+        self.assertEqual(result.coord('dummy_scalar_coord'),
+                         self.cube.coord('dummy_scalar_coord'))
+
+    def test_coord_adjust(self):
+        """Test that the coord_adjust function is applied to the collapsed
+           coordinates."""
+        plugin = WeightedMaximumAccumulator(
+            'time', coord_adjust=lambda pnts: pnts[-1])
+        for cube, weight in zip(self.slices, self.weights):
+            plugin.add(cube, weight)
+        result = plugin.result()
+        self.assertArrayAlmostEqual(result.coord('time').points,
+                                    [402193.5])
+        self.assertArrayAlmostEqual(result.coord('forecast_period').points,
+                                    [2])
+
+    def test_masked_data(self):
+        """Test that masked points are ignored, and remain masked only if
+           masked in every input."""
+        first = self.slices[0].copy(
+            data=np.ma.masked_array(self.slices[0].data,
+                                    mask=[[True, True], [False, False]]))
+        second = self.slices[1].copy(
+            data=np.ma.masked_array(self.slices[1].data,
+                                    mask=[[True, False], [True, False]]))
+        plugin = WeightedMaximumAccumulator('time')
+        plugin.add(first, 0.3)
+        plugin.add(second, 0.7)
+        result = plugin.result()
+        self.assertIsInstance(result.data, np.ma.MaskedArray)
+        self.assertArrayEqual(result.data.mask,
+                              [[True, False], [False, False]])
+        self.assertArrayAlmostEqual(result.data.data[1, 0], 0.3)
+        self.assertArrayAlmostEqual(result.data.data[1, 1], 1.4)
+
+    def test_fails_nothing_accumulated(self):
+        """Test it raises a Value Error if no inputs have been
+           accumulated."""
+        plugin = WeightedMaximumAccumulator('time')
+        msg = 'No cubes have been accumulated'
+        with self.assertRaisesRegexp(ValueError, msg):
+            plugin.result()
+
+
+class Test_process(IrisTest):
+
+    """Test blending an iterable of cubes."""
+
+    def setUp(self):
+        """Set up a cube to accumulate."""
+        self.cube = set_up_cube()
+        self.weights = np.array([0.3, 0.7])
+
+    def test_generator(self):
+        """Test that the cubes can be provided by a generator, and that the
+           result matches that from WeightedBlendAcrossWholeDimension."""
+        expected = WeightedBlendAcrossWholeDimension(
+            'time', 'weighted_maximum').process(self.cube, self.weights)
+        cubes = (cube for cube in self.cube.slices_over("time"))
+        plugin = WeightedMaximumAccumulator('time')
+        result = plugin.process(cubes, self.weights)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertEqual(plugin.num_inputs, 2)
+
+    def test_resets(self):
+        """Test that inputs accumulated before calling process are
+           discarded."""
+        plugin = WeightedMaximumAccumulator('time')
+        plugin.add(self.cube, [1., 1.])
+        result = plugin.process(self.cube.slices_over("time"), self.weights)
+        self.assertArrayAlmostEqual(result.data, np.full((2, 2), 1.4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the weighted_blend.WeightedMeanAccumulator plugin."""
+
+
+import unittest
+
+import iris
+from iris.tests import IrisTest
+import numpy as np
+
+from improver.blending.weighted_blend import (
+    WeightedBlendAcrossWholeDimension, WeightedMeanAccumulator)
+from improver.tests.blending.weighted_blend.test_PercentileBlendingAggregator \
+    import percentile_cube
+from improver.tests.blending.weighted_blend.\
+    test_WeightedMaximumAccumulator import set_up_cube
+
+
+class Test__init__(IrisTest):
+
+    """Test the initialisation of the plugin."""
+
+    def test_basic(self):
+        """Test that the attributes are set as expected."""
+        plugin = WeightedMeanAccumulator(
+            'time', weights_distrib_method='proportional')
+        self.assertEqual(plugin.coord, 'time')
+        self.assertEqual(plugin.weights_distrib_method, 'proportional')
+        self.assertEqual(plugin.num_inputs, 0)
+
+    def test_fails_unknown_method(self):
+        """Test it raises a Value Error for an unknown weights redistribution
+           method."""
+        msg = 'Unknown weights redistribution method: unknown'
+        with self.assertRaisesRegexp(ValueError, msg):
+            WeightedMeanAccumulator('time', weights_distrib_method='unknown')
+
+
+class Test__repr__(IrisTest):
+
+    """Test the repr method."""
+
+    def test_basic(self):
+        """Test that the __repr__ returns the expected string."""
+        plugin = WeightedMeanAccumulator('time')
+        result = str(plugin)
+        msg = ('<WeightedMeanAccumulator: coord = time, '
+               'coord_adjust = None, inputs = 0>')
+        self.assertEqual(result, msg)
+
+
+class Test_add(IrisTest):
+
+    """Test accumulating inputs."""
+
+    def test_fails_percentile_data(self):
+        """Test it raises a Value Error if the cube contains percentile
+           data."""
+        cube = percentile_cube()
+        plugin = WeightedMeanAccumulator('time')
+        msg = 'Percentile data cannot be blended one input at a time'
+        with self.assertRaisesRegexp(ValueError, msg):
+            plugin.add(cube, [0.5, 0.5])
+
+
+class Test_result(IrisTest):
+
+    """Test creating the blended cube."""
+
+    def setUp(self):
+        """Set up a cube to accumulate."""
+        self.cube = set_up_cube()
+        self.slices = list(self.cube.slices_over("time"))
+        self.weights = np.array([0.3, 0.7])
+
+    def test_basic(self):
+        """Test that the result is a cube containing the weighted mean, with
+           a weighted_mean cell method."""
+        plugin = WeightedMeanAccumulator('time')
+        for cube, weight in zip(self.slices, self.weights):
+            plugin.add(cube, weight)
+        result = plugin.result()
+        self.assertIsInstance(result, iris.cube.Cube)
+        self.assertArrayAlmostEqual(result.data, np.full((2, 2), 1.7))
+        self.assertEqual(
+            result.cell_methods,
+            (iris.coords.CellMethod('weighted_mean', coords='time'),))
+
+    def test_matches_whole_dimension(self):
+        """Test that the data and collapsed coordinates match those from
+           WeightedBlendAcrossWholeDimension."""
+        expected = WeightedBlendAcrossWholeDimension(
+            'time', 'weighted_mean').process(self.cube, self.weights)
+        plugin = WeightedMeanAccumulator('time')
+        for cube, weight in zip(self.slices, self.weights):
+            plugin.add(cube, weight)
+        result = plugin.result()
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        for name in ['time', 'forecast_period']:
+            self.assertArrayAlmostEqual(result.coord(name).points,
+                                        expected.coord(name).points)
+            self.assertArrayAlmostEqual(result.coord(name).bounds,
+                                        expected.coord(name).bounds)
+
+    def test_updated_after_each_input(self):
+        """Test that an updated blend can be created after each input is
+           accumulated, with the weights of the inputs still to arrive
+           redistributed across those already present."""
+        plugin = WeightedMeanAccumulator('time')
+        plugin.add(self.slices[0], self.weights[0])
+        self.assertArrayAlmostEqual(plugin.result().data,
+                                    np.full((2, 2), 1.0))
+        plugin.add(self.slices[1], self.weights[1])
+        self.assertArrayAlmostEqual(plugin.result().data,
+                                    np.full((2, 2), 1.7))
+
+    def test_missing_input_evenly(self):
+        """Test that the weight of a missing input is redistributed evenly
+           across the inputs present."""
+        plugin = WeightedMeanAccumulator('time')
+        for cube, weight in zip(self.slices, [0.2, 0.3]):
+            plugin.add(cube, weight)
+        result = plugin.result()
+        self.assertArrayAlmostEqual(result.data, np.full((2, 2), 1.55))
+
+    def test_missing_input_proportional(self):
+        """Test that the weight of a missing input is redistributed in
+           proportion to the weights of the inputs present."""
+        plugin = WeightedMeanAccumulator(
+            'time', weights_distrib_method='proportional')
+        for cube, weight in zip(self.slices, [0.2, 0.3]):
+            plugin.add(cube, weight)
+        result = plugin.result()
+        self.assertArrayAlmostEqual(result.data, np.full((2, 2), 1.6))
+
+    def test_zero_weights_proportional(self):
+        """Test that points at which the weights of the inputs present sum
+           to zero are masked, as by WeightedBlendAcrossWholeDimension,
+           rather than raising an error."""
+        first = self.slices[0].copy(
+            data=np.ma.masked_array(self.slices[0].data,
+                                    mask=[[False, True], [False, False]]))
+        second = self.slices[1].copy(
+            data=np.ma.masked_array(self.slices[1].data,
+                                    mask=[[True, False], [True, False]]))
+        plugin = WeightedMeanAccumulator(
+            'time', weights_distrib_method='proportional')
+        plugin.add(first, 0.0)
+        plugin.add(second, 1.0)
+        result = plugin.result()
+        self.assertIsInstance(result.data, np.ma.MaskedArray)
+        self.assertArrayEqual(result.data.mask,
+                              [[True, False], [True, False]])
+        self.assertArrayAlmostEqual(result.data.data[0, 1], 2.0)
+        self.assertArrayAlmostEqual(result.data.data[1, 1], 2.0)
+
+    def test_all_weights_zero_proportional(self):
+        """Test that the result is masked everywhere, rather than raising
+           an error, if the weights of all the inputs are zero."""
+        plugin = WeightedMeanAccumulator(
+            'time', weights_distrib_method='proportional')
+        for cube in self.slices:
+            plugin.add(cube, 0.0)
+        result = plugin.result()
+        self.assertIsInstance(result.data, np.ma.MaskedArray)
+        self.assertTrue(result.data.mask.all())
+
+    def test_dimension_input(self):
+        """Test that a cube with the coord as a dimension gives the same
+           result as its slices accumulated one at a time."""
+        plugin = WeightedMeanAccumulator('time')
+        plugin.add(self.cube, self.weights)
+        self.assertArrayAlmostEqual(plugin.result().data,
+                                    np.full((2, 2), 1.7))
+        self.assertEqual(plugin.num_inputs, 1)
+
+    def test_masked_data(self):
+        """Test that masked points do not contribute to the weighted mean,
+           and remain masked only if masked in every input."""
+        first = self.slices[0].copy(
+            data=np.ma.masked_array(self.slices[0].data,
+                                    mask=[[True, True], [False, False]]))
+        second = self.slices[1].copy(
+            data=np.ma.masked_array(self.slices[1].data,
+                                    mask=[[True, False], [True, False]]))
+        plugin = WeightedMeanAccumulator(
+            'time', weights_distrib_method='proportional')
+        plugin.add(first, 0.3)
+        plugin.add(second, 0.7)
+        result = plugin.result()
+        self.assertIsInstance(result.data, np.ma.MaskedArray)
+        self.assertArrayEqual(result.data.mask,
+                              [[True, False], [False, False]])
+        self.assertArrayAlmostEqual(result.data.data[0, 1], 2.0)
+        self.assertArrayAlmostEqual(result.data.data[1, 0], 1.0)
+        self.assertArrayAlmostEqual(result.data.data[1, 1], 1.7)
+
+
+class Test_process(IrisTest):
+
+    """Test blending an iterable of cubes."""
+
+    def test_generator(self):
+        """Test that the cubes can be provided by a generator."""
+        cube = set_up_cube()
+        cubes = (cube_slice for cube_slice in cube.slices_over("time"))
+        plugin = WeightedMeanAccumulator('time')
+        result = plugin.process(cubes, [0.3, 0.7])
+        self.assertArrayAlmostEqual(result.data, np.full((2, 2), 1.7))
+        self.assertEqual(plugin.num_inputs, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
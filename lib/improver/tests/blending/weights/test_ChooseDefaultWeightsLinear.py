@@ -38,6 +38,7 @@ from iris.tests import IrisTest
 import iris
 import numpy as np
 
+from improver.blending.weights import WEIGHTS_CACHE
 from improver.blending.weights import ChooseDefaultWeightsLinear \
     as LinearWeights
 from improver.tests.blending.weights.test_WeightsUtilities import (
@@ -113,6 +114,15 @@ class Test_linear_weights(IrisTest):
         with self.assertRaisesRegexp(ValueError, msg):
             LinearWeights(y0val=0.0, slope=0.0).linear_weights(5)
 
+    def test_repeated_calls_ynval_set(self):
+        """Test that repeated calls with ynval set return the same weights,
+        as the slope is not stored on the plugin."""
+        plugin = LinearWeights(y0val=100.0, ynval=10.0)
+        expected = plugin.linear_weights(6)
+        result = plugin.linear_weights(6)
+        self.assertArrayAlmostEqual(result, expected)
+        self.assertEqual(plugin.slope, 0.0)
+
 
 class Test_process(IrisTest):
     """Test the Default Linear Weights plugin. """
@@ -122,6 +132,24 @@ class Test_process(IrisTest):
         self.coord_name = "time"
         self.coord_vals = ','.join(
             [str(x) for x in self.cube.coord("time").points])
+        WEIGHTS_CACHE.clear()
+
+    def tearDown(self):
+        """Clear the weights cache after each test."""
+        WEIGHTS_CACHE.clear()
+
+    def test_weights_cached(self):
+        """Test that repeated calls for the same coordinate reuse the cached
+        weights, and that a plugin with different parameters does not."""
+        plugin = LinearWeights(y0val=10.0, slope=-1.0)
+        expected = plugin.process(self.cube, self.coord_name, self.coord_vals)
+        result = plugin.process(self.cube, self.coord_name, self.coord_vals)
+        self.assertArrayAlmostEqual(result, expected)
+        self.assertEqual(WEIGHTS_CACHE.hits, 1)
+        other = LinearWeights(y0val=10.0, slope=-2.0)
+        result = other.process(self.cube, self.coord_name, self.coord_vals)
+        self.assertEqual(WEIGHTS_CACHE.misses, 2)
+        self.assertFalse(np.allclose(result, expected))
 
     def test_basic(self):
         """Test that the plugin returns an array of weights. """
@@ -37,6 +37,7 @@ from iris.tests import IrisTest
 import iris
 import numpy as np
 
+from improver.blending.weights import WEIGHTS_CACHE
 from improver.blending.weights import ChooseDefaultWeightsNonLinear \
     as NonLinearWeights
 from improver.tests.blending.weights.test_WeightsUtilities import (
@@ -76,6 +77,24 @@ class Test_process(IrisTest):
         self.coord_name = "time"
         self.coord_vals = ','.join(
             [str(x) for x in self.cube.coord("time").points])
+        WEIGHTS_CACHE.clear()
+
+    def tearDown(self):
+        """Clear the weights cache after each test."""
+        WEIGHTS_CACHE.clear()
+
+    def test_weights_cached(self):
+        """Test that repeated calls for the same coordinate reuse the cached
+        weights, and that a plugin with different parameters does not."""
+        plugin = NonLinearWeights(cval=0.85)
+        expected = plugin.process(self.cube, self.coord_name, self.coord_vals)
+        result = plugin.process(self.cube, self.coord_name, self.coord_vals)
+        self.assertArrayAlmostEqual(result, expected)
+        self.assertEqual(WEIGHTS_CACHE.hits, 1)
+        other = NonLinearWeights(cval=0.5)
+        result = other.process(self.cube, self.coord_name, self.coord_vals)
+        self.assertEqual(WEIGHTS_CACHE.misses, 2)
+        self.assertFalse(np.allclose(result, expected))
 
     def test_basic(self):
         """Test that the plugin returns an array of weights. """
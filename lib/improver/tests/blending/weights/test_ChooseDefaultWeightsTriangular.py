@@ -38,7 +38,8 @@ from iris.tests import IrisTest
 import numpy as np
 import cf_units
 
-from improver.blending.weights import ChooseDefaultWeightsTriangular
+from improver.blending.weights import (
+    ChooseDefaultWeightsTriangular, WEIGHTS_CACHE)
 from improver.tests.blending.weights.test_WeightsUtilities import set_up_cube
 
 
@@ -185,6 +186,33 @@ class Test_triangular_weights(IrisTest):
                                      0., 0., 0.])
         self.assertArrayAlmostEqual(weights, expected_weights)
 
+    def test_multiple_midpoints(self):
+        """Test that one set of weights is returned for each midpoint when an
+           array of midpoints is given, each matching the weights for that
+           midpoint alone."""
+        width = 3
+        TriangularWeightsClass = ChooseDefaultWeightsTriangular(width)
+        coord_vals = np.arange(15)
+        midpoints = np.array([0, 5, 14])
+        weights = TriangularWeightsClass.triangular_weights(coord_vals,
+                                                            midpoints)
+        self.assertEqual(weights.shape, (3, 15))
+        for index, midpoint in enumerate(midpoints):
+            expected_weights = TriangularWeightsClass.triangular_weights(
+                coord_vals, midpoint)
+            self.assertArrayAlmostEqual(weights[index], expected_weights)
+
+    def test_no_weights(self):
+        """Test that an error is raised if there are no points within the
+           width of the triangle."""
+        width = 3
+        TriangularWeightsClass = ChooseDefaultWeightsTriangular(width)
+        coord_vals = np.arange(15)
+        midpoint = 20
+        msg = 'Sum of weights must be > 0.0'
+        with self.assertRaisesRegexp(ValueError, msg):
+            TriangularWeightsClass.triangular_weights(coord_vals, midpoint)
+
 
 class Test___init__(IrisTest):
     """Tests for the __init__ method in ChooseDefaultWeightsTriangular class"""
@@ -221,6 +249,11 @@ class Test_process(IrisTest):
                                          units='hours'), 0)
         self.coord_name = "forecast_period"
         self.units = cf_units.Unit("hours")
+        WEIGHTS_CACHE.clear()
+
+    def tearDown(self):
+        """Clear the weights cache after each test."""
+        WEIGHTS_CACHE.clear()
 
     def test_same_units(self):
         """Test plugin produces the correct weights when the parameters for
@@ -243,6 +276,57 @@ class Test_process(IrisTest):
         expected_weights = np.array([0.33333333, 0.66666667])
         self.assertArrayAlmostEqual(weights, expected_weights)
 
+    def test_width_not_modified(self):
+        """Test that converting the width to the units of the coordinate does
+           not modify the width of the plugin, so that repeated calls give
+           the same weights."""
+        width = 7200
+        WeightsClass = ChooseDefaultWeightsTriangular(width, units="seconds")
+        midpoint = 1
+        WeightsClass.process(self.cube, self.coord_name, midpoint)
+        WEIGHTS_CACHE.clear()
+        weights = WeightsClass.process(self.cube, self.coord_name, midpoint)
+        expected_weights = np.array([0.33333333, 0.66666667])
+        self.assertEqual(WeightsClass.width, width)
+        self.assertArrayAlmostEqual(weights, expected_weights)
+
+    def test_multiple_midpoints(self):
+        """Test plugin produces one set of weights for each midpoint when an
+           array of midpoints is given."""
+        width = 2
+        WeightsClass = ChooseDefaultWeightsTriangular(width, units=self.units)
+        midpoints = np.array([0, 1])
+        weights = WeightsClass.process(self.cube, self.coord_name, midpoints)
+        expected_weights = np.array([[0.66666667, 0.33333333],
+                                     [0.33333333, 0.66666667]])
+        self.assertArrayAlmostEqual(weights, expected_weights)
+
+    def test_weights_cached(self):
+        """Test that repeated calls for the same coordinate and midpoint
+           reuse the cached weights, and that the weights returned can be
+           modified without affecting the cache."""
+        width = 2
+        WeightsClass = ChooseDefaultWeightsTriangular(width, units=self.units)
+        midpoint = 1
+        weights = WeightsClass.process(self.cube, self.coord_name, midpoint)
+        weights[:] = 0.
+        weights = WeightsClass.process(self.cube, self.coord_name, midpoint)
+        expected_weights = np.array([0.33333333, 0.66666667])
+        self.assertArrayAlmostEqual(weights, expected_weights)
+        self.assertEqual(WEIGHTS_CACHE.misses, 1)
+        self.assertEqual(WEIGHTS_CACHE.hits, 1)
+
+    def test_different_midpoints_not_shared(self):
+        """Test that weights for different midpoints are cached
+           separately."""
+        width = 2
+        WeightsClass = ChooseDefaultWeightsTriangular(width, units=self.units)
+        weights_0 = WeightsClass.process(self.cube, self.coord_name, 0)
+        weights_1 = WeightsClass.process(self.cube, self.coord_name, 1)
+        self.assertArrayAlmostEqual(weights_0, [0.66666667, 0.33333333])
+        self.assertArrayAlmostEqual(weights_1, [0.33333333, 0.66666667])
+        self.assertEqual(WEIGHTS_CACHE.misses, 2)
+
     def test_unconvertable_units(self):
         """"Test plugin produces the correct weights when the parameters for
             the triangle cannot be converted to the same units as the
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the weights.WeightsCache plugin."""
+
+import unittest
+
+from iris.coords import AuxCoord
+from iris.tests import IrisTest
+import numpy as np
+
+from improver.blending.weights import WeightsCache
+from improver.tests.blending.weights.test_WeightsUtilities import set_up_cube
+
+
+class Test__repr__(IrisTest):
+
+    """Test the repr method."""
+
+    def test_basic(self):
+        """Test that the __repr__ returns the expected string."""
+        cache = WeightsCache(max_size=3)
+        cache.lookup("a", lambda: np.ones(2))
+        cache.lookup("a", lambda: np.ones(2))
+        result = str(cache)
+        msg = '<WeightsCache: max_size: 3; size: 1; hits: 1; misses: 1>'
+        self.assertEqual(result, msg)
+
+
+class Test_lookup(IrisTest):
+
+    """Test looking up weights within the cache."""
+
+    def test_basic(self):
+        """Test that the weights created are returned as an array, and only
+        created once."""
+        cache = WeightsCache()
+        created = []
+
+        def _create():
+            """Create weights, recording that they have been created."""
+            created.append(1)
+            return [0.25, 0.75]
+
+        for _ in range(2):
+            result = cache.lookup("a", _create)
+            self.assertIsInstance(result, np.ndarray)
+            self.assertArrayAlmostEqual(result, [0.25, 0.75])
+        self.assertEqual(len(created), 1)
+
+    def test_copy_returned(self):
+        """Test that modifying the weights returned does not modify the
+        cached weights."""
+        cache = WeightsCache()
+        result = cache.lookup("a", lambda: np.array([0.25, 0.75]))
+        result[:] = 0.
+        result = cache.lookup("a", lambda: np.array([0.5, 0.5]))
+        self.assertArrayAlmostEqual(result, [0.25, 0.75])
+
+
+class Test_values_key(IrisTest):
+
+    """Test the key identifying the values expected on the coordinate."""
+
+    def test_none(self):
+        """Test that None is returned if no values are expected."""
+        self.assertIsNone(WeightsCache.values_key(None))
+
+    def test_string(self):
+        """Test that a string list of values gives a hashable key."""
+        result = WeightsCache.values_key("0, 1, 2")
+        self.assertEqual(result, ("0, 1, 2",))
+        hash(result)
+
+    def test_list_and_array(self):
+        """Test that a list or array of values gives the same hashable
+        key."""
+        result = WeightsCache.values_key([0, 1, 2])
+        self.assertEqual(result, WeightsCache.values_key(np.arange(3)))
+        self.assertEqual(result, (0, 1, 2))
+        hash(result)
+
+
+class Test_coord_key(IrisTest):
+
+    """Test the key identifying the coordinate being blended."""
+
+    def setUp(self):
+        """Set up a cube with a forecast_period coordinate."""
+        self.cube = set_up_cube()
+        self.cube.add_aux_coord(AuxCoord(np.arange(2), 'forecast_period',
+                                         units='hours'), 0)
+
+    def test_same_coordinate(self):
+        """Test that the key is the same for coordinates with the same
+        points and units."""
+        other = self.cube.copy()
+        self.assertEqual(WeightsCache.coord_key(self.cube, "forecast_period"),
+                         WeightsCache.coord_key(other, "forecast_period"))
+
+    def test_different_units(self):
+        """Test that the key differs for coordinates with different units."""
+        other = self.cube.copy()
+        other.coord("forecast_period").units = "minutes"
+        self.assertNotEqual(
+            WeightsCache.coord_key(self.cube, "forecast_period"),
+            WeightsCache.coord_key(other, "forecast_period"))
+
+    def test_different_points(self):
+        """Test that the key differs for coordinates with different
+        points."""
+        other = self.cube.copy()
+        other.coord("forecast_period").points = np.array([1, 2])
+        self.assertNotEqual(
+            WeightsCache.coord_key(self.cube, "forecast_period"),
+            WeightsCache.coord_key(other, "forecast_period"))
+
+    def test_missing_coordinate(self):
+        """Test that a key is returned for a coordinate that is not on the
+        cube."""
+        result = WeightsCache.coord_key(self.cube, "height")
+        self.assertEqual(result, ("height", None))
+
+
+if __name__ == '__main__':
+    unittest.main()
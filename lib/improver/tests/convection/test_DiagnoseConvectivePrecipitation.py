@@ -575,6 +575,16 @@ class Test_process(IrisTest):
         self.assertIsInstance(result, iris.cube.Cube)
         self.assertArrayAlmostEqual(result.data, expected)
 
+    def test_nan(self):
+        """Test that an exception is raised if the input cube contains a
+        NaN."""
+        self.cube.data[..., 1, 1] = np.nan
+        msg = "NaN detected in input cube data"
+        with self.assertRaisesRegexp(ValueError, msg):
+            DiagnoseConvectivePrecipitation(
+                self.lower_threshold, self.higher_threshold,
+                self.neighbourhood_method, self.radii).process(self.cube)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -37,7 +37,9 @@ from iris.cube import Cube
 from iris.tests import IrisTest
 import numpy as np
 
-from improver.nbhood.circular_kernel import CircularNeighbourhood
+from improver.nbhood.circular_kernel import (
+    KERNEL_CACHE, CircularNeighbourhood)
+from improver.nbhood.nbhood import RadiusTable
 from improver.tests.nbhood.nbhood.test_BaseNeighbourhoodProcessing import (
     SINGLE_POINT_RANGE_2_CENTROID_FLAT, SINGLE_POINT_RANGE_3_CENTROID,
     SINGLE_POINT_RANGE_5_CENTROID, set_up_cube)
@@ -55,6 +57,13 @@ class Test__init__(IrisTest):
         with self.assertRaisesRegexp(ValueError, msg):
             CircularNeighbourhood(sum_or_fraction=sum_or_fraction)
 
+    def test_convolution_method(self):
+        """Test that a ValueError is raised if an invalid option is passed
+        in for convolution_method."""
+        msg = "The convolution method nonsense is invalid"
+        with self.assertRaisesRegexp(ValueError, msg):
+            CircularNeighbourhood(convolution_method="nonsense")
+
 
 class Test__repr__(IrisTest):
 
@@ -203,6 +212,84 @@ class Test_apply_circular_kernel(IrisTest):
                 weighted_mode=True).apply_circular_kernel(cube, ranges))
         self.assertArrayAlmostEqual(result.data, expected)
 
+    def test_single_point_range_5_fft(self):
+        """Test behaviour for a single non-zero grid cell, when the kernel is
+        applied using fast Fourier transforms."""
+        cube = set_up_cube()
+        expected = np.ones_like(cube.data)
+        for index, slice_ in enumerate(SINGLE_POINT_RANGE_5_CENTROID):
+            expected[0][0][3 + index][3:12] = slice_
+        ranges = (5, 5)
+        result = (
+            CircularNeighbourhood(
+                weighted_mode=True, convolution_method="fft"
+                ).apply_circular_kernel(cube, ranges))
+        self.assertArrayAlmostEqual(result.data, expected)
+
+    def test_kernel_cached(self):
+        """Test that the kernel, and its transform, are cached and reused
+        when the same kernel is applied again."""
+        KERNEL_CACHE.clear()
+        plugin = CircularNeighbourhood(convolution_method="fft")
+        expected = plugin.apply_circular_kernel(set_up_cube(), (3, 3))
+        self.assertEqual(KERNEL_CACHE.hits, 0)
+        self.assertEqual(KERNEL_CACHE.misses, 3)
+        result = plugin.apply_circular_kernel(set_up_cube(), (3, 3))
+        self.assertEqual(KERNEL_CACHE.hits, 3)
+        self.assertEqual(KERNEL_CACHE.misses, 3)
+        self.assertArrayEqual(result.data, expected.data)
+
+    def test_float32(self):
+        """Test that a float32 cube is returned with the correct data, when a
+        float32 working precision is requested for float64 data."""
+        cube = set_up_cube()
+        expected = np.ones_like(cube.data)
+        expected[0, 0, 5:10, 5:10] = SINGLE_POINT_RANGE_3_CENTROID
+        result = CircularNeighbourhood(dtype=np.float32).apply_circular_kernel(
+            cube, (3, 3))
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayAlmostEqual(result.data, expected)
+
+    def test_float32_input_preserved(self):
+        """Test that the data type of float32 input is preserved, if no
+        working precision is requested."""
+        cube = set_up_cube()
+        cube.data = cube.data.astype(np.float32)
+        result = CircularNeighbourhood().apply_circular_kernel(cube, (3, 3))
+        self.assertEqual(result.dtype, np.float32)
+
+    def test_single_point_flat_spans(self):
+        """Test behaviour for a single non-zero grid cell, flat weighting,
+        when the kernel is applied as a sum of spans."""
+        cube = set_up_cube()
+        expected = np.ones_like(cube.data)
+        for index, slice_ in enumerate(SINGLE_POINT_RANGE_2_CENTROID_FLAT):
+            expected[0][0][5 + index][5:10] = slice_
+        ranges = (2, 2)
+        result = (
+            CircularNeighbourhood(
+                weighted_mode=False, convolution_method="spans"
+                ).apply_circular_kernel(cube, ranges))
+        self.assertArrayAlmostEqual(result.data, expected)
+
+    def test_fft_matches_direct_on_corner(self):
+        """Test that applying the kernel using fast Fourier transforms gives
+        the same result as applying the kernel directly, for a point on the
+        corner of the domain and an unweighted kernel."""
+        cube = set_up_cube(
+            zero_point_indices=[(0, 0, 0, 0), (0, 1, 15, 10)],
+            num_time_points=2)
+        ranges = (4, 4)
+        expected = (
+            CircularNeighbourhood(
+                weighted_mode=False, convolution_method="direct"
+                ).apply_circular_kernel(cube.copy(), ranges))
+        result = (
+            CircularNeighbourhood(
+                weighted_mode=False, convolution_method="fft"
+                ).apply_circular_kernel(cube, ranges))
+        self.assertArrayAlmostEqual(result.data, expected.data)
+
     def test_point_pair(self):
         """Test behaviour for two nearby non-zero grid cells."""
         cube = set_up_cube(
@@ -337,16 +424,132 @@ class Test_run(IrisTest):
         self.assertIsInstance(cube, Cube)
         self.assertArrayAlmostEqual(result.data, data)
 
+    def test_radius_table(self):
+        """Test that the number of grid cells is looked up in the radius
+        table, if supplied, and that the result is unchanged."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2),), num_grid_points=5)[0, 0]
+        expected = CircularNeighbourhood().run(cube, self.RADIUS)
+        table = RadiusTable(self.RADIUS)
+        plugin = CircularNeighbourhood(radius_table=table)
+        plugin.run(cube, self.RADIUS)
+        result = plugin.run(cube, self.RADIUS)
+        self.assertEqual(len(table._grid_cells), 1)
+        self.assertEqual(table._grid_cells.hits, 1)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+
     def test_mask_cube(self):
-        """Test that a NotImplementedError is raised, if a mask cube is passed
-        in when using a circular neighbourhood, as this option is not
-        supported."""
+        """Test that a cube with correct data is produced by the run method,
+        if a mask cube is passed in, so that only unmasked points contribute
+        to each neighbourhood."""
+        data = np.array([[0.9375, 0.86206897, 0.875, 0.91111111, 0.97777778],
+                         [0.86206897, 0.8627451, 0.88571429, 0.9125, 0.95],
+                         [0.875, 0.88571429, 0.90625, 0.92727273, 0.95454545],
+                         [0.91111111, 0.9125, 0.92727273, 0.944, 0.968],
+                         [0.97777778, 0.95, 0.95454545, 0.968, 0.992]])
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2),), num_grid_points=5)[0, 0]
+        mask_cube = cube.copy(data=np.ones((5, 5)))
+        mask_cube.data[:, 0] = 0.
+        mask_cube.data[0, :] = 0.
+        result = CircularNeighbourhood().run(
+            cube, self.RADIUS, mask_cube=mask_cube)
+        self.assertArrayAlmostEqual(result.data, data)
+
+    def test_mask_cube_re_mask(self):
+        """Test that the masked points are set to zero, if a mask cube is
+        passed in and re_mask is True."""
+        data = np.array([[0., 0., 0., 0., 0.],
+                         [0., 0.8627451, 0.88571429, 0.9125, 0.95],
+                         [0., 0.88571429, 0.90625, 0.92727273, 0.95454545],
+                         [0., 0.9125, 0.92727273, 0.944, 0.968],
+                         [0., 0.95, 0.95454545, 0.968, 0.992]])
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2),), num_grid_points=5)[0, 0]
+        mask_cube = cube.copy(data=np.ones((5, 5)))
+        mask_cube.data[:, 0] = 0.
+        mask_cube.data[0, :] = 0.
+        result = CircularNeighbourhood(re_mask=True).run(
+            cube, self.RADIUS, mask_cube=mask_cube)
+        self.assertArrayAlmostEqual(result.data, data)
+
+    def test_mask_cube_re_mask_near_boundary(self):
+        """Test that, if re_mask is True, points next to the boundary of a
+        partly masked domain keep their unmasked neighbourhood values and
+        masked points are set to zero, and that the input cube is not
+        modified."""
         cube = set_up_cube(
             zero_point_indices=((0, 0, 2, 2),), num_grid_points=5)[0, 0]
-        msg = ("The use of a mask cube with a circular kernel is "
-               "not yet implemented.")
-        with self.assertRaisesRegexp(NotImplementedError, msg):
-            CircularNeighbourhood().run(cube, self.RADIUS, mask_cube=cube)
+        original_data = cube.data.copy()
+        mask_cube = cube.copy(data=np.ones((5, 5)))
+        mask_cube.data[:, 3:] = 0.
+        expected = CircularNeighbourhood(re_mask=False).run(
+            cube.copy(), self.RADIUS, mask_cube=mask_cube).data
+        expected[:, 3:] = 0.
+        result = CircularNeighbourhood(re_mask=True).run(
+            cube, self.RADIUS, mask_cube=mask_cube)
+        self.assertArrayAlmostEqual(result.data[:, 2], expected[:, 2])
+        self.assertArrayAlmostEqual(result.data[:, 3], np.zeros(5))
+        self.assertArrayAlmostEqual(result.data, expected)
+        self.assertArrayEqual(cube.data, original_data)
+
+    def test_mask_cube_all_masked(self):
+        """Test that neighbourhoods which are entirely masked out are set to
+        zero."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2),), num_grid_points=5)[0, 0]
+        mask_cube = cube.copy(data=np.zeros((5, 5)))
+        result = CircularNeighbourhood().run(
+            cube, self.RADIUS, mask_cube=mask_cube)
+        self.assertArrayAlmostEqual(result.data, np.zeros((5, 5)))
+
+
+class Test_run_multiple_radii(IrisTest):
+
+    """Test the run_multiple_radii method on the CircularNeighbourhood
+    class."""
+
+    def setUp(self):
+        """Set up a cube with three times."""
+        self.cube = set_up_cube(
+            zero_point_indices=((0, 0, 7, 7), (0, 1, 7, 7), (0, 2, 2, 1)),
+            num_time_points=3)
+        self.radii = [4100, 6100, 4100]
+
+    def test_basic(self):
+        """Test that a cube with correct data is produced, when a different
+        radius is used for each time."""
+        expected = np.ones_like(self.cube.data)
+        expected[0, 1, 5:10, 5:10] = SINGLE_POINT_RANGE_3_CENTROID
+        result = CircularNeighbourhood().run_multiple_radii(
+            self.cube, self.radii)
+        self.assertIsInstance(result, Cube)
+        self.assertEqual(result.coord_dims("time"), (1,))
+        self.assertArrayAlmostEqual(result.data[0, 1], expected[0, 1])
+
+    def test_matches_run_for_each_time(self):
+        """Test that the result matches that from applying the run method to
+        each time separately, with and without a mask cube, including
+        points near the edge of the domain."""
+        mask_cube = self.cube[0, 0].copy(data=np.ones((16, 16)))
+        mask_cube.data[0:3, 4:9] = 0.
+        mask_cube.data[12, :] = 0.
+        for mask in [None, mask_cube]:
+            plugin = CircularNeighbourhood(re_mask=True)
+            result = plugin.run_multiple_radii(
+                self.cube.copy(), self.radii, mask_cube=mask)
+            for index, radius in enumerate(self.radii):
+                expected = plugin.run(
+                    self.cube[0, index].copy(), radius, mask_cube=mask)
+                self.assertArrayAlmostEqual(
+                    result.data[0, index], expected.data)
+
+    def test_radii_mismatch(self):
+        """Test that an exception is raised if the number of radii does not
+        match the number of times."""
+        msg = "The number of radii"
+        with self.assertRaisesRegexp(ValueError, msg):
+            CircularNeighbourhood().run_multiple_radii(self.cube, [6100])
 
 
 if __name__ == '__main__':
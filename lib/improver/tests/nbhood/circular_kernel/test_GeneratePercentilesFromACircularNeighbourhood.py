@@ -82,6 +82,34 @@ class Test_make_percentile_cube(IrisTest):
         self.assertDictEqual(
             cube.metadata._asdict(), result.metadata._asdict())
 
+    def test_data_provided(self):
+        """Test that provided data are used for the percentile cube without
+        being copied, and that the percentile coordinate is the leading
+        dimension."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2),), num_time_points=1,
+            num_grid_points=5)
+        plugin = GeneratePercentilesFromACircularNeighbourhood(
+            percentiles=[25, 75])
+        data = np.zeros((2,) + cube.shape)
+        result = plugin.make_percentile_cube(cube, data=data)
+        self.assertEqual(result.shape, (2,) + cube.shape)
+        self.assertEqual(
+            result.coord_dims('percentiles_over_neighbourhood'), (0,))
+        self.assertEqual(result.coord_dims('projection_x_coordinate'), (4,))
+        self.assertTrue(np.may_share_memory(result.data, data))
+
+    def test_single_percentile(self):
+        """Test that a single percentile gives a percentile dimension of
+        length one."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2),), num_time_points=1,
+            num_grid_points=5)
+        result = GeneratePercentilesFromACircularNeighbourhood(
+            percentiles=[50]).make_percentile_cube(cube)
+        self.assertEqual(result.shape, (1,) + cube.shape)
+        self.assertArrayEqual(result[0].data, cube.data)
+
 
 class Test_pad_and_unpad_cube(IrisTest):
 
@@ -280,6 +308,64 @@ class Test_pad_and_unpad_cube(IrisTest):
         self.assertArrayAlmostEqual(result.data, expected)
 
 
+class Test_sliding_window_percentiles(IrisTest):
+
+    """Test the calculation of percentiles using a sliding window."""
+
+    def setUp(self):
+        """Set up a cube."""
+        self.cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2),), num_grid_points=5)
+        self.plugin = GeneratePercentilesFromACircularNeighbourhood(
+            percentiles=np.array([10, 50, 90]), sliding_window=True)
+
+    def test_2d_slice(self):
+        """Test a 2d slice gives the same result as padding and unpadding
+        the cube."""
+        expected = np.ones((3, 5, 5))
+        expected[0, 1:4, 2] = 0.4
+        expected[0, 2, 1:4] = 0.4
+        kernel = np.array(
+            [[0., 1., 0.],
+             [1., 1., 1.],
+             [0., 1., 0.]])
+        cube = self.cube[0, 0, :, :]
+        result = self.plugin.sliding_window_percentiles(cube, kernel)
+        self.assertIsInstance(result, Cube)
+        self.assertArrayAlmostEqual(result.data, expected)
+
+    def test_irregular_kernel(self):
+        """Test a kernel that is not contiguous along each row gives the same
+        result as padding and unpadding the cube."""
+        expected = np.ones((3, 5, 5))
+        expected[0, [1, 2, 3, 3], [2, 1, 2, 3]] = 0.3
+        kernel = np.array(
+            [[0., 1., 0.],
+             [1., 0., 1.],
+             [0., 0., 1.]])
+        cube = self.cube[0, 0, :, :]
+        result = self.plugin.sliding_window_percentiles(cube, kernel)
+        self.assertArrayAlmostEqual(result.data, expected)
+
+    def test_matches_pad_and_unpad_cube(self):
+        """Test that the result matches padding and unpadding the cube for a
+        field with multiple values and a larger kernel."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2), (0, 0, 5, 3), (0, 0, 6, 7)),
+            num_grid_points=9)[0, 0, :, :]
+        cube.data[1, 1] = 0.5
+        cube.data[4, 6] = 0.25
+        kernel = np.array(
+            [[0., 0., 1., 0., 0.],
+             [0., 1., 1., 1., 0.],
+             [1., 1., 1., 1., 1.],
+             [0., 1., 1., 1., 0.],
+             [0., 0., 1., 0., 0.]])
+        expected = self.plugin.pad_and_unpad_cube(cube.copy(), kernel)
+        result = self.plugin.sliding_window_percentiles(cube, kernel)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+
+
 class Test_run(IrisTest):
 
     """Test the run method within the plugin to calculate percentile values
@@ -325,6 +411,35 @@ class Test_run(IrisTest):
                     self.cube, radius))
         self.assertArrayAlmostEqual(result.data, expected)
 
+    def test_single_point_sliding_window(self):
+        """Test behaviour for a single non-zero grid cell when the
+        percentiles are calculated using a sliding window."""
+        expected = np.ones((1, 3, 1, 5, 5))
+        expected[0, 0, 0, 1:4, 2] = 0.4
+        expected[0, 0, 0, 2, 1:4] = 0.4
+        percentiles = np.array([10, 50, 90])
+        radius = 2000.
+        result = (
+            GeneratePercentilesFromACircularNeighbourhood(
+                percentiles=percentiles, sliding_window=True).run(
+                    self.cube, radius))
+        self.assertArrayAlmostEqual(result.data, expected)
+
+    def test_coordinate_order(self):
+        """Test that the realization and percentile coordinates lead, and
+        that a scalar realization coordinate is promoted to a dimension."""
+        cube = self.cube[0]
+        percentiles = np.array([10, 50, 90])
+        radius = 2000.
+        result = (
+            GeneratePercentilesFromACircularNeighbourhood(
+                percentiles=percentiles).run(cube, radius))
+        self.assertEqual(result.shape, (1, 3, 1, 5, 5))
+        self.assertEqual(result.coord_dims('realization'), (0,))
+        self.assertEqual(
+            result.coord_dims('percentiles_over_neighbourhood'), (1,))
+        self.assertEqual(result.coord_dims('time'), (2,))
+
     def test_multi_point_multitimes(self):
         """Test behaviour for points over multiple times."""
         cube = set_up_cube(
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the nbhood.circular_kernel.KernelCache plugin."""
+
+import unittest
+
+from iris.tests import IrisTest
+import numpy as np
+
+from improver.nbhood.circular_kernel import KernelCache, circular_kernel
+
+
+class Test__repr__(IrisTest):
+
+    """Test the repr method."""
+
+    def test_basic(self):
+        """Test that the __repr__ returns the expected string."""
+        cache = KernelCache(max_size=3)
+        cache.lookup("a", lambda: 1)
+        cache.lookup("a", lambda: 1)
+        result = str(cache)
+        msg = '<KernelCache: max_size: 3; size: 1; hits: 1; misses: 1>'
+        self.assertEqual(result, msg)
+
+
+class Test_kernel(IrisTest):
+
+    """Test the caching of circular kernels."""
+
+    def test_basic(self):
+        """Test that the kernel and its sum match those from the
+        circular_kernel function, and that the kernel is read-only."""
+        cache = KernelCache()
+        expected = circular_kernel((0, 3, 3), (3, 3), True)
+        kernel, total = cache.kernel((0, 3, 3), (3, 3), True)
+        self.assertArrayAlmostEqual(kernel, expected)
+        self.assertAlmostEqual(total, np.sum(expected))
+        self.assertFalse(kernel.flags.writeable)
+
+    def test_keyed_on_ranges_and_weighting(self):
+        """Test that the same kernel is returned for the same ranges and
+        weighting, and different kernels otherwise."""
+        cache = KernelCache()
+        kernel, _ = cache.kernel((0, 2, 2), (2, 2), False)
+        self.assertIs(cache.kernel(np.array([0., 2., 2.]), (2, 2), False)[0],
+                      kernel)
+        self.assertIsNot(cache.kernel((0, 2, 2), (2, 2), True)[0], kernel)
+        self.assertIsNot(cache.kernel((2, 2), (2, 2), False)[0], kernel)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the nbhood.circular_kernel.choose_convolution_method
+function."""
+
+import unittest
+
+from iris.tests import IrisTest
+import numpy as np
+
+from improver.nbhood.circular_kernel import choose_convolution_method
+
+
+class Test_choose_convolution_method(IrisTest):
+
+    """Test the choice between direct, span-based and FFT-based
+    convolution."""
+
+    def test_small_kernel(self):
+        """Test that a small kernel is applied directly."""
+        kernel = np.ones((1, 1, 3, 3))
+        result = choose_convolution_method((1, 1, 1000, 1000), kernel)
+        self.assertEqual(result, "direct")
+
+    def test_large_kernel(self):
+        """Test that a large kernel is applied using fast Fourier
+        transforms."""
+        kernel = np.ones((1, 1, 41, 41))
+        result = choose_convolution_method((1, 1, 1000, 1000), kernel)
+        self.assertEqual(result, "fft")
+
+    def test_long_spans(self):
+        """Test that a kernel with few, long spans of equal weights is
+        applied as a sum of spans."""
+        kernel = np.ones((1, 1, 3, 41))
+        result = choose_convolution_method((1, 1, 1000, 1000), kernel)
+        self.assertEqual(result, "spans")
+
+    def test_zeros_in_kernel_ignored(self):
+        """Test that only the non-zero points within the kernel contribute
+        to the cost of direct convolution."""
+        kernel = np.zeros((1, 1, 41, 41))
+        kernel[0, 0, 20, 20] = 1.
+        result = choose_convolution_method((1, 1, 1000, 1000), kernel)
+        self.assertEqual(result, "direct")
+
+
+if __name__ == '__main__':
+    unittest.main()
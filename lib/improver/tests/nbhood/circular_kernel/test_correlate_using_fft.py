@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the nbhood.circular_kernel.correlate_using_fft function."""
+
+import unittest
+
+from iris.tests import IrisTest
+import numpy as np
+import scipy.ndimage.filters
+
+from improver.nbhood.circular_kernel import (
+    _fft_padding, circular_kernel, correlate_using_fft, kernel_transform)
+
+
+class Test_correlate_using_fft(IrisTest):
+
+    """Test the correlation of an array with a kernel using fast Fourier
+    transforms."""
+
+    def setUp(self):
+        """Set up an array with a few zero points and a weighted kernel."""
+        self.data = np.ones((2, 1, 16, 16))
+        self.data[0, 0, 7, 7] = 0.
+        self.data[1, 0, 0, 3] = 0.
+        self.data[1, 0, 10, 15] = 0.
+        self.kernel = circular_kernel((0, 0, 4, 4), (4, 4), True)
+
+    def test_basic(self):
+        """Test that the function returns a Numpy array of the same shape as
+        the input data."""
+        result = correlate_using_fft(self.data, self.kernel)
+        self.assertIsInstance(result, np.ndarray)
+        self.assertEqual(result.shape, self.data.shape)
+
+    def test_matches_direct_correlation(self):
+        """Test that the result matches scipy.ndimage correlation with the
+        'nearest' mode, including at the edges of the domain."""
+        expected = scipy.ndimage.filters.correlate(
+            self.data, self.kernel, mode='nearest')
+        result = correlate_using_fft(self.data, self.kernel)
+        self.assertArrayAlmostEqual(result, expected)
+
+    def test_unweighted_kernel(self):
+        """Test that the result matches scipy.ndimage correlation for an
+        unweighted kernel."""
+        kernel = circular_kernel((0, 0, 5, 5), (5, 5), False)
+        expected = scipy.ndimage.filters.correlate(
+            self.data, kernel, mode='nearest')
+        result = correlate_using_fft(self.data, kernel)
+        self.assertArrayAlmostEqual(result, expected)
+
+    def test_zeros_exact(self):
+        """Test that a field of zeros gives exactly zero, with no rounding
+        error from the transforms."""
+        data = np.zeros((16, 16))
+        data[0, 0] = 1.
+        kernel = circular_kernel((2, 2), (2, 2), False)
+        result = correlate_using_fft(data, kernel)
+        self.assertTrue(np.all(result[5:, 5:] == 0.))
+
+    def test_precomputed_transform(self):
+        """Test that the same result is returned when the transform of the
+        kernel is provided."""
+        _, fft_shape, axes = _fft_padding(self.data.shape, self.kernel.shape)
+        transform = kernel_transform(self.kernel, fft_shape, axes)
+        expected = correlate_using_fft(self.data, self.kernel)
+        result = correlate_using_fft(
+            self.data, self.kernel, transform=transform)
+        self.assertArrayEqual(result, expected)
+
+    def test_float32(self):
+        """Test that float32 data gives a float32 result."""
+        data = self.data.astype(np.float32)
+        result = correlate_using_fft(data, self.kernel)
+        self.assertEqual(result.dtype, np.float32)
+
+
+if __name__ == '__main__':
+    unittest.main()
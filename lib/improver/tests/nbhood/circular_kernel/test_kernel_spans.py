@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the nbhood.circular_kernel.kernel_spans function."""
+
+import unittest
+
+from iris.tests import IrisTest
+import numpy as np
+
+from improver.nbhood.circular_kernel import circular_kernel, kernel_spans
+
+
+class Test_kernel_spans(IrisTest):
+
+    """Test the decomposition of a kernel into spans."""
+
+    def test_unweighted_circle(self):
+        """Test that an unweighted circular kernel has one span per row."""
+        kernel = circular_kernel((2, 2), (2, 2), False)
+        expected = [(0, 2, 2, 1.), (1, 1, 3, 1.), (2, 0, 4, 1.),
+                    (3, 1, 3, 1.), (4, 2, 2, 1.)]
+        result = kernel_spans(kernel)
+        self.assertEqual(result, expected)
+
+    def test_multiple_spans_per_row(self):
+        """Test that rows with gaps or changes in weight are split into
+        multiple spans, and that empty rows have no spans."""
+        kernel = np.array([[0., 1., 1., 0., 2.],
+                           [3., 3., 3., 3., 3.],
+                           [0., 0., 0., 0., 0.]])
+        expected = [(0, 1, 2, 1.), (0, 4, 4, 2.), (1, 0, 4, 3.)]
+        result = kernel_spans(kernel)
+        self.assertEqual(result, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -256,6 +256,20 @@ class Test__init__(IrisTest):
             neighbourhood_method = CircularNeighbourhood()
             NBHood(neighbourhood_method, radii, lead_times=lead_times)
 
+    def test_invalid_workers(self):
+        """Test that the desired error message is raised, if fewer than one
+        worker is requested."""
+        msg = "The number of workers must be at least 1"
+        with self.assertRaisesRegexp(ValueError, msg):
+            NBHood(CircularNeighbourhood(), 10000, workers=0)
+
+    def test_invalid_tile_size(self):
+        """Test that the desired error message is raised, if a tile size of
+        less than one is requested."""
+        msg = "The tile size must be at least 1"
+        with self.assertRaisesRegexp(ValueError, msg):
+            NBHood(CircularNeighbourhood(), 10000, tile_size=0)
+
 
 class Test__repr__(IrisTest):
 
@@ -376,6 +390,77 @@ class Test__find_radii(IrisTest):
         self.assertArrayAlmostEqual(result, expected_result)
 
 
+class Test__split_into_tiles(IrisTest):
+
+    """Test the splitting of a cube into tiles."""
+
+    def setUp(self):
+        """Set up a cube."""
+        self.cube = set_up_cube(num_grid_points=10)
+
+    def test_no_tiles(self):
+        """Test that the whole cube is returned as a single tile, if no tile
+        size is set."""
+        plugin = NBHood(CircularNeighbourhood(), 4000)
+        result = plugin._split_into_tiles(self.cube, 4000)
+        self.assertEqual(len(result), 1)
+        self.assertEqual(len(result[0]), 1)
+        cube_tile, mask_tile, interior = result[0][0]
+        self.assertIs(cube_tile, self.cube)
+        self.assertIsNone(mask_tile)
+        self.assertIsNone(interior)
+
+    def test_tiles_with_halo(self):
+        """Test that the tiles cover the domain, with a halo of the
+        neighbourhood radius that is truncated at the edges of the domain,
+        and that the mask cube is split into the same tiles."""
+        cube = set_up_cube(num_grid_points=12)
+        mask_cube = cube[0, 0].copy()
+        plugin = NBHood(CircularNeighbourhood(), 4000, tile_size=4)
+        result = plugin._split_into_tiles(
+            cube, 4000, mask_cube=mask_cube)
+        self.assertEqual(len(result), 3)
+        expected_shapes = [6, 8, 6]
+        expected_interiors = [slice(0, 4), slice(2, 6), slice(2, 6)]
+        for row, y_shape, y_interior in zip(
+                result, expected_shapes, expected_interiors):
+            self.assertEqual(len(row), 3)
+            for (cube_tile, mask_tile, interior), x_shape, x_interior in zip(
+                    row, expected_shapes, expected_interiors):
+                self.assertEqual(cube_tile.shape, (1, 1, y_shape, x_shape))
+                self.assertEqual(mask_tile.shape, (y_shape, x_shape))
+                self.assertEqual(interior, (y_interior, x_interior))
+        self.assertArrayEqual(
+            result[1][2][0].coord(axis="x").points,
+            cube.coord(axis="x").points[6:])
+
+    def test_thin_edge_tile_merged(self):
+        """Test that a tile at the edge of the domain, whose interior would
+        not be wider than the halo, is merged into the previous tile."""
+        plugin = NBHood(CircularNeighbourhood(), 4000, tile_size=3)
+        result = plugin._split_into_tiles(self.cube, 4000)
+        self.assertEqual(len(result), 3)
+        expected_shapes = [5, 7, 6]
+        expected_interiors = [slice(0, 3), slice(2, 5), slice(2, 6)]
+        for row, y_shape, y_interior in zip(
+                result, expected_shapes, expected_interiors):
+            self.assertEqual(len(row), 3)
+            for (cube_tile, _, interior), x_shape, x_interior in zip(
+                    row, expected_shapes, expected_interiors):
+                self.assertEqual(cube_tile.shape, (1, 1, y_shape, x_shape))
+                self.assertEqual(interior, (y_interior, x_interior))
+
+    def test_tile_size_smaller_than_halo(self):
+        """Test that the interior of each tile is at least one grid point
+        wider than the halo, if the tile size is smaller than this."""
+        plugin = NBHood(CircularNeighbourhood(), 4000, tile_size=1)
+        result = plugin._split_into_tiles(self.cube, 4000)
+        self.assertEqual(len(result), 3)
+        interiors = [interior[1] for _, _, interior in result[0]]
+        self.assertEqual(
+            interiors, [slice(0, 3), slice(2, 5), slice(2, 6)])
+
+
 class Test_process(IrisTest):
 
     """Tests for the process method of NeighbourhoodProcessing."""
@@ -411,6 +496,13 @@ class Test_process(IrisTest):
             neighbourhood_method = CircularNeighbourhood
             NBHood(neighbourhood_method, self.RADIUS).process(self.cube)
 
+    def test_checked_for_nan(self):
+        """Test that the cube is not scanned for NaNs if the caller has
+        already checked it."""
+        self.cube.data[0][0][6][7] = np.NAN
+        NBHood(CircularNeighbourhood(), self.RADIUS).process(
+            self.cube, checked_for_nan=True)
+
     def test_realizations_and_source_realizations_fails(self):
         """Raises error if realizations and source realizations both set."""
         self.cube.attributes.update({'source_realizations': [0, 1, 2, 3]})
@@ -460,6 +552,109 @@ class Test_process(IrisTest):
             [0.91666667, 0.875, 0.91666667])
         self.assertArrayAlmostEqual(result.data, expected)
 
+    def test_multiple_realizations_with_workers(self):
+        """Test that the same result is produced, in the same order, when the
+        realizations are processed concurrently by several workers."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 7, 7), (1, 0, 2, 3), (3, 0, 12, 1)),
+            num_realization_points=4)
+        neighbourhood_method = CircularNeighbourhood()
+        expected = NBHood(neighbourhood_method, 6300).process(cube.copy())
+        result = NBHood(neighbourhood_method, 6300, workers=3).process(cube)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertEqual(result.coord("realization"),
+                         expected.coord("realization"))
+
+    def test_multiple_realizations_and_times_with_workers(self):
+        """Test that the same result is produced, in the same order, when the
+        realization and time slices are processed concurrently by several
+        workers, for a neighbourhood method that is applied separately to
+        each time."""
+
+        class CircularNeighbourhoodForEachTime(CircularNeighbourhood):
+            """Circular neighbourhood method without the ability to apply
+            multiple radii at once."""
+            run_multiple_radii = None
+
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 7, 7), (1, 1, 2, 3), (0, 2, 12, 1)),
+            num_time_points=3, num_realization_points=2)
+        iris.util.promote_aux_coord_to_dim_coord(cube, "time")
+        time_points = cube.coord("time").points
+        fp_points = [2, 3, 4]
+        cube = add_forecast_reference_time_and_forecast_period(
+            cube, time_point=time_points, fp_point=fp_points)
+        radii = [4100, 6300, 8300]
+        lead_times = [2, 3, 4]
+        neighbourhood_method = CircularNeighbourhoodForEachTime()
+        expected = NBHood(
+            neighbourhood_method, radii, lead_times=lead_times).process(
+                cube.copy())
+        result = NBHood(
+            neighbourhood_method, radii, lead_times=lead_times,
+            workers=4).process(cube)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertEqual(result.coord("time"), expected.coord("time"))
+        self.assertEqual(result.coord("forecast_period"),
+                         expected.coord("forecast_period"))
+
+    def test_tiles_square_with_mask(self):
+        """Test that the same result is produced when the domain is split
+        into tiles, for a square neighbourhood with a mask cube."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 7, 7), (0, 0, 2, 3), (0, 0, 12, 1),
+                                (0, 0, 4, 15)),
+            num_grid_points=16)
+        mask_cube = cube[0, 0].copy()
+        mask_cube.data[5:7, :] = 0.
+        mask_cube.data[:, 11] = 0.
+        neighbourhood_method = SquareNeighbourhood()
+        expected = NBHood(neighbourhood_method, 4000).process(
+            cube.copy(), mask_cube=mask_cube.copy())
+        result = NBHood(neighbourhood_method, 4000, tile_size=5).process(
+            cube, mask_cube=mask_cube)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertEqual(result.coord(axis="x"), expected.coord(axis="x"))
+        self.assertEqual(result.coord(axis="y"), expected.coord(axis="y"))
+
+    def test_tiles_not_dividing_domain(self):
+        """Test that the same result is produced when the domain size is not
+        a multiple of the tile size, so that the tiles at the edge of the
+        domain would be narrower than the neighbourhood radius."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 7, 7), (0, 0, 15, 15)),
+            num_grid_points=16)
+        neighbourhood_method = CircularNeighbourhood()
+        expected = NBHood(neighbourhood_method, 2900).process(cube.copy())
+        result = NBHood(neighbourhood_method, 2900, tile_size=5).process(cube)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertEqual(result.coord(axis="x"), expected.coord(axis="x"))
+        self.assertEqual(result.coord(axis="y"), expected.coord(axis="y"))
+
+    def test_tiles_circular_with_workers(self):
+        """Test that the same result is produced when the domain is split
+        into tiles, which are processed concurrently, for a circular
+        neighbourhood with radii that vary with lead time."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 7, 7), (1, 1, 2, 3), (0, 2, 12, 1)),
+            num_time_points=3, num_realization_points=2)
+        iris.util.promote_aux_coord_to_dim_coord(cube, "time")
+        time_points = cube.coord("time").points
+        fp_points = [2, 3, 4]
+        cube = add_forecast_reference_time_and_forecast_period(
+            cube, time_point=time_points, fp_point=fp_points)
+        radii = [4100, 6300, 8300]
+        lead_times = [2, 3, 4]
+        neighbourhood_method = CircularNeighbourhood()
+        expected = NBHood(
+            neighbourhood_method, radii, lead_times=lead_times).process(
+                cube.copy())
+        result = NBHood(
+            neighbourhood_method, radii, lead_times=lead_times,
+            workers=3, tile_size=6).process(cube)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertEqual(result.coord(axis="x"), expected.coord(axis="x"))
+
     def test_no_realizations(self):
         """Test when the array has no realization coord."""
         cube = set_up_cube_with_no_realizations()
@@ -605,6 +800,34 @@ class Test_process(IrisTest):
         result = plugin.process(cube)
         self.assertArrayAlmostEqual(result.data, expected)
 
+    def test_radii_varying_with_lead_time_square_check_data(self):
+        """
+        Test that the expected data is produced when the radius
+        varies with lead time, using a square neighbourhood, for which
+        all lead times are processed together.
+        """
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 7, 7), (0, 1, 7, 7,)),
+            num_time_points=2)
+        expected = np.ones_like(cube.data)
+        expected[0, 0, 6:9, 6:9] = 8. / 9.
+        expected[0, 1, 5:10, 5:10] = 24. / 25.
+
+        iris.util.promote_aux_coord_to_dim_coord(cube, "time")
+        time_points = cube.coord("time").points
+        fp_points = [2, 3]
+        cube = add_forecast_reference_time_and_forecast_period(
+            cube, time_point=time_points, fp_point=fp_points)
+        radii = [2000, 4000]
+        lead_times = [2, 3]
+        neighbourhood_method = SquareNeighbourhood()
+        plugin = NBHood(neighbourhood_method, radii, lead_times)
+        result = plugin.process(cube)
+        self.assertArrayAlmostEqual(result.data, expected)
+        self.assertEqual(result.coord_dims("time"), (1,))
+        self.assertArrayEqual(
+            result.coord("forecast_period").points, fp_points)
+
     def test_use_mask_cube_occurrences_not_masked(self):
         """Test that the plugin returns an iris.cube.Cube with the correct
         data array if a mask cube is used and the mask cube does not mask
@@ -35,6 +35,7 @@ import unittest
 
 from iris.cube import Cube
 from iris.tests import IrisTest
+import numpy as np
 
 from improver.nbhood.nbhood import (
     GeneratePercentilesFromANeighbourhood as NBHood)
@@ -58,6 +59,17 @@ class Test__init__(IrisTest):
                '(0, 5, 10, 20, 25, 30, 40, 50, 60, 70, 75, 80, 90, 95, 100)>')
         self.assertEqual(str(result.neighbourhood_method), msg)
 
+    def test_square_neighbourhood_method(self):
+        """
+        Test that the square neighbourhood method is created with the
+        requested maximum number of histogram bins.
+        """
+        result = NBHood('square', 10000, percentiles=(25, 50, 75),
+                        max_histogram_bins=16)
+        msg = ('<GeneratePercentilesFromASquareNeighbourhood: percentiles: '
+               '(25, 50, 75); max_histogram_bins: 16>')
+        self.assertEqual(str(result.neighbourhood_method), msg)
+
     def test_neighbourhood_method_does_not_exist(self):
         """
         Test that desired error message is raised, if the neighbourhood method
@@ -111,6 +123,29 @@ class Test_process(IrisTest):
                         percentiles=percentiles).process(self.cube)
         self.assertIsInstance(result, Cube)
 
+    def test_sliding_window(self):
+        """Test that the circular neighbourhood processing gives the same
+        result if the percentiles are calculated using a sliding window."""
+        neighbourhood_method = 'circular'
+        radii = 4000
+        expected = NBHood(neighbourhood_method, radii).process(
+            self.cube.copy())
+        result = NBHood(neighbourhood_method, radii,
+                        sliding_window=True).process(self.cube)
+        self.assertIsInstance(result, Cube)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+
+    def test_square(self):
+        """Test that the square neighbourhood processing is successful and
+        that the neighbourhood includes the corners of the square."""
+        percentiles = (0, 25, 50, 75, 100)
+        result = NBHood('square', 2000, percentiles=percentiles).process(
+            self.cube)
+        expected = np.ones((1, 5, 1, 5, 5))
+        expected[0, 0, 0, 1:4, 1:4] = 0
+        self.assertIsInstance(result, Cube)
+        self.assertArrayAlmostEqual(result.data, expected)
+
 
 if __name__ == '__main__':
     unittest.main()
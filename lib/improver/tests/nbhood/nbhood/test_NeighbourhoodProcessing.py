@@ -56,6 +56,15 @@ class Test__init__(IrisTest):
                'sum_or_fraction: fraction>')
         self.assertEqual(str(result.neighbourhood_method), msg)
 
+    def test_radius_table(self):
+        """Test that the neighbourhood processing method uses the radius
+        table of the plugin to look up the number of grid cells."""
+        for neighbourhood_method in ['circular', 'square']:
+            result = NBHood(neighbourhood_method, 10000)
+            self.assertTrue(
+                result.neighbourhood_method.radius_table is
+                result.radius_table)
+
     def test_neighbourhood_method_does_not_exist(self):
         """Test that desired error message is raised, if the neighbourhood
         method does not exist."""
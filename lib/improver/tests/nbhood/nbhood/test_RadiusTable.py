@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the nbhood.RadiusTable class."""
+
+
+import unittest
+
+from iris.tests import IrisTest
+import numpy as np
+
+from improver.nbhood.nbhood import RadiusTable
+from improver.tests.nbhood.nbhood.test_BaseNeighbourhoodProcessing import (
+    set_up_cube, set_up_cube_lat_long)
+
+
+class Test__repr__(IrisTest):
+
+    """Test the repr method."""
+
+    def test_basic(self):
+        """Test that the __repr__ returns the expected string."""
+        result = str(RadiusTable([1000., 2000.], lead_times=[2, 3],
+                                 ens_factor=0.8))
+        msg = ('<RadiusTable: radii: [1000.0, 2000.0]; lead_times: [2, 3]; '
+               'ens_factor: 0.8>')
+        self.assertEqual(result, msg)
+
+
+class Test_adjust_for_ensemble(IrisTest):
+
+    """Test adjusting neighbourhood sizes according to ensemble size."""
+
+    def test_unchanged_for_ens1(self):
+        """Test returns unchanged value when num_ens = 1.0."""
+        result = RadiusTable(20.0, ens_factor=0.8).adjust_for_ensemble(
+            1.0, 20.0)
+        self.assertAlmostEqual(result, 20.0)
+
+    def test_float(self):
+        """Test returns the correct float value."""
+        result = RadiusTable(20.0, ens_factor=0.8).adjust_for_ensemble(
+            3.0, 20.0)
+        self.assertIsInstance(result, float)
+        self.assertAlmostEqual(result, 9.2376043070399998)
+
+    def test_array(self):
+        """Test that all values of an array are adjusted at once."""
+        result = RadiusTable(20.0, ens_factor=0.8).adjust_for_ensemble(
+            4.0, np.array([10000., 20000., 30000.]))
+        self.assertArrayAlmostEqual(result, [4000., 8000., 12000.])
+
+
+class Test_find_radii(IrisTest):
+
+    """Test finding the radii for ensemble members and lead times."""
+
+    def test_float(self):
+        """Test that a float with the correct value is returned if there are
+        no lead times."""
+        result = RadiusTable(6300, ens_factor=0.8).find_radii(2.0)
+        self.assertIsInstance(result, float)
+        self.assertAlmostEqual(result, 3563.8181771801998)
+
+    def test_interpolation(self):
+        """Test that the radii are interpolated to the lead times and
+        adjusted for the ensemble size."""
+        table = RadiusTable([10000., 30000.], lead_times=[2, 4],
+                            ens_factor=0.8)
+        result = table.find_radii(4.0, cube_lead_times=np.array([2, 3, 4]))
+        self.assertIsInstance(result, np.ndarray)
+        self.assertArrayAlmostEqual(result, [4000., 8000., 12000.])
+
+    def test_reused(self):
+        """Test that the radii are calculated once for each number of
+        ensemble members and set of lead times, and that modifying the
+        returned array does not modify the table."""
+        table = RadiusTable([10000., 30000.], lead_times=[2, 4])
+        result = table.find_radii(1.0, cube_lead_times=np.array([2, 3]))
+        result[0] = 0.
+        self.assertEqual(len(table._radii), 1)
+        result = table.find_radii(1.0, cube_lead_times=np.array([2, 3]))
+        self.assertArrayAlmostEqual(result, [10000., 20000.])
+        table.find_radii(2.0, cube_lead_times=np.array([2, 3]))
+        table.find_radii(1.0, cube_lead_times=np.array([3, 4]))
+        self.assertEqual(len(table._radii), 3)
+
+
+class Test_grid_cells(IrisTest):
+
+    """Test finding the number of grid cells equivalent to a radius."""
+
+    def test_basic(self):
+        """Test the number of grid cells for a radius."""
+        result = RadiusTable(6100).grid_cells(set_up_cube(), 6100)
+        self.assertEqual(result, (3, 3))
+
+    def test_reused(self):
+        """Test that the number of grid cells is calculated once for each
+        grid and radius."""
+        table = RadiusTable(6100)
+        cube = set_up_cube()
+        table.grid_cells(cube, 6100)
+        table.grid_cells(cube.copy(), 6100)
+        self.assertEqual(len(table._grid_cells), 1)
+        table.grid_cells(cube, 4100)
+        self.assertEqual(len(table._grid_cells), 2)
+        cube.coord("projection_x_coordinate").points = (
+            cube.coord("projection_x_coordinate").points * 2)
+        result = table.grid_cells(cube, 6100)
+        self.assertEqual(result, (1, 3))
+        self.assertEqual(len(table._grid_cells), 3)
+
+    def test_bounded(self):
+        """Test that the number of grids and radii stored is bounded, with
+        the least recently used discarded first."""
+        table = RadiusTable(6100)
+        table._grid_cells.max_size = 2
+        cube = set_up_cube()
+        for radius in [2100, 4100, 6100]:
+            table.grid_cells(cube, radius)
+        self.assertEqual(len(table._grid_cells), 2)
+        table.grid_cells(cube, 6100)
+        self.assertEqual(table._grid_cells.hits, 1)
+        table.grid_cells(cube, 2100)
+        self.assertEqual(table._grid_cells.misses, 4)
+
+    def test_invalid_grid(self):
+        """Test that an error is raised, and nothing is stored, for a grid
+        without projection coordinates."""
+        table = RadiusTable(6100)
+        with self.assertRaisesRegexp(ValueError, "Invalid grid"):
+            table.grid_cells(set_up_cube_lat_long(), 6100)
+        self.assertEqual(len(table._grid_cells), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
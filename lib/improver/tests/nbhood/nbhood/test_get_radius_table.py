@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the nbhood.get_radius_table function."""
+
+
+import unittest
+
+from iris.tests import IrisTest
+
+from improver.nbhood.nbhood import (
+    NeighbourhoodProcessing, RADIUS_TABLES_CACHE_SIZE, RadiusTable,
+    _RADIUS_TABLES, get_radius_table)
+
+
+class Test_get_radius_table(IrisTest):
+
+    """Test obtaining shared radius tables."""
+
+    def test_basic(self):
+        """Test that a radius table with the requested configuration is
+        returned."""
+        result = get_radius_table([1000, 2000], lead_times=[2, 3],
+                                  ens_factor=0.8)
+        self.assertIsInstance(result, RadiusTable)
+        self.assertEqual(result.radii, [1000., 2000.])
+        self.assertEqual(result.lead_times, [2, 3])
+        self.assertEqual(result.ens_factor, 0.8)
+
+    def test_shared(self):
+        """Test that the same table is returned for equivalent
+        configurations, and shared with neighbourhood processing plugins."""
+        table = get_radius_table(3000, ens_factor=0.9)
+        self.assertTrue(get_radius_table(3000., ens_factor=0.9) is table)
+        plugin = NeighbourhoodProcessing("square", 3000, ens_factor=0.9)
+        self.assertTrue(plugin.radius_table is table)
+
+    def test_different_configuration(self):
+        """Test that different tables are returned for different
+        configurations."""
+        table = get_radius_table(3000, ens_factor=0.9)
+        self.assertFalse(get_radius_table(3000, ens_factor=1.0) is table)
+        self.assertFalse(get_radius_table(4000, ens_factor=0.9) is table)
+        self.assertFalse(
+            get_radius_table([3000], lead_times=[2], ens_factor=0.9) is
+            table)
+
+    def test_bounded(self):
+        """Test that the number of tables held is bounded, so that tables
+        for configurations that are no longer used are discarded."""
+        for radius in range(RADIUS_TABLES_CACHE_SIZE + 5):
+            get_radius_table(1000. + radius)
+        self.assertEqual(len(_RADIUS_TABLES), RADIUS_TABLES_CACHE_SIZE)
+
+
+if __name__ == '__main__':
+    unittest.main()
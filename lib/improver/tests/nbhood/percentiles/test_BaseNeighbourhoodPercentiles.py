@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the nbhood.percentiles.BaseNeighbourhoodPercentiles
+class."""
+
+
+import unittest
+
+from iris.tests import IrisTest
+import numpy as np
+
+from improver.constants import DEFAULT_PERCENTILES
+from improver.nbhood.percentiles import (
+    BaseNeighbourhoodPercentiles, MAX_HISTOGRAM_BINS)
+
+
+class Test__init__(IrisTest):
+
+    """Test the __init__ method."""
+
+    def test_default_percentiles(self):
+        """Test that the default percentiles and maximum number of bins
+        are used if none are provided."""
+        plugin = BaseNeighbourhoodPercentiles()
+        self.assertEqual(plugin.percentiles, tuple(DEFAULT_PERCENTILES))
+        self.assertEqual(plugin.max_histogram_bins, MAX_HISTOGRAM_BINS)
+
+    def test_percentiles_as_tuple(self):
+        """Test that the percentiles are stored as a tuple."""
+        plugin = BaseNeighbourhoodPercentiles(
+            percentiles=np.array([25, 50]), max_histogram_bins=8)
+        self.assertEqual(plugin.percentiles, (25, 50))
+        self.assertEqual(plugin.max_histogram_bins, 8)
+
+
+class Test__bin_data(IrisTest):
+
+    """Test the assignment of data to histogram bins."""
+
+    def test_unique_values(self):
+        """Test that each unique value has its own bin if there are no more
+        unique values than the maximum number of bins."""
+        data = np.array([[0., 0.5, 1.], [1., 0.5, 0.25]])
+        expected_indices = np.array([[0, 2, 3], [3, 2, 1]])
+        expected_values = np.array([0., 0.25, 0.5, 1.])
+        bin_indices, bin_values = (
+            BaseNeighbourhoodPercentiles._bin_data(data, 4))
+        self.assertArrayEqual(bin_indices, expected_indices)
+        self.assertArrayAlmostEqual(bin_values, expected_values)
+
+    def test_grouped_values(self):
+        """Test that values are grouped into equally spaced bins, each
+        represented by the mean of its values, if there are more unique
+        values than the maximum number of bins."""
+        data = np.array([[0., 0.1, 0.6], [1., 0.7, 0.2]])
+        expected_indices = np.array([[0, 0, 1], [1, 1, 0]])
+        expected_values = np.array([0.1, 0.76666667])
+        bin_indices, bin_values = (
+            BaseNeighbourhoodPercentiles._bin_data(data, 2))
+        self.assertArrayEqual(bin_indices, expected_indices)
+        self.assertArrayAlmostEqual(bin_values, expected_values)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the
+nbhood.square_kernel.GeneratePercentilesFromASquareNeighbourhood plugin."""
+
+
+import unittest
+
+from iris.cube import Cube
+from iris.tests import IrisTest
+import numpy as np
+
+from improver.constants import DEFAULT_PERCENTILES
+from improver.nbhood.circular_kernel import (
+    GeneratePercentilesFromACircularNeighbourhood)
+from improver.nbhood.percentiles import MAX_HISTOGRAM_BINS
+from improver.nbhood.square_kernel import (
+    GeneratePercentilesFromASquareNeighbourhood)
+from improver.tests.nbhood.nbhood.test_BaseNeighbourhoodProcessing import (
+    set_up_cube)
+
+
+class Test__init__(IrisTest):
+
+    """Test the __init__ method."""
+
+    def test_basic(self):
+        """Test that only the attributes used by the square neighbourhood
+        are set."""
+        plugin = GeneratePercentilesFromASquareNeighbourhood(
+            percentiles=[25, 75], max_histogram_bins=16)
+        self.assertEqual(plugin.percentiles, (25, 75))
+        self.assertEqual(plugin.max_histogram_bins, 16)
+        self.assertFalse(hasattr(plugin, "sliding_window"))
+
+
+class Test__repr__(IrisTest):
+
+    """Test the repr method."""
+
+    def test_basic(self):
+        """Test that the __repr__ returns the expected string."""
+        result = str(GeneratePercentilesFromASquareNeighbourhood())
+        msg = ('<GeneratePercentilesFromASquareNeighbourhood: '
+               'percentiles: {}; max_histogram_bins: {}>'.format(
+                   DEFAULT_PERCENTILES, MAX_HISTOGRAM_BINS))
+        self.assertEqual(str(result), msg)
+
+
+class Test__count_within_neighbourhood(IrisTest):
+
+    """Test the counting of points within each neighbourhood."""
+
+    def test_basic(self):
+        """Test that the points within the neighbourhood of a single True
+        point are counted, with the halo removed."""
+        indicator = np.zeros((7, 7), dtype=bool)
+        indicator[3, 3] = True
+        expected = np.zeros((5, 5), dtype=int)
+        expected[1:4, 1:4] = 1
+        result = (
+            GeneratePercentilesFromASquareNeighbourhood.
+            _count_within_neighbourhood(indicator, 1, 1))
+        self.assertArrayEqual(result, expected)
+
+    def test_rectangular_neighbourhood(self):
+        """Test counting with different numbers of grid cells in the x and
+        y directions."""
+        indicator = np.ones((5, 9), dtype=bool)
+        expected = np.full((3, 5), 15)
+        result = (
+            GeneratePercentilesFromASquareNeighbourhood.
+            _count_within_neighbourhood(indicator, 2, 1))
+        self.assertArrayEqual(result, expected)
+
+
+class Test_binned_percentiles(IrisTest):
+
+    """Test the calculation of percentiles from binned counts."""
+
+    def setUp(self):
+        """Set up a plugin."""
+        self.plugin = GeneratePercentilesFromASquareNeighbourhood(
+            percentiles=np.array([10, 50, 90]))
+
+    def test_single_point(self):
+        """Test behaviour for a single non-zero grid cell."""
+        data = np.ones((5, 5))
+        data[2, 2] = 0
+        expected = np.ones((3, 5, 5))
+        expected[0, 1:4, 1:4] = 0.8
+        result = self.plugin.binned_percentiles(data, 1, 1)
+        self.assertArrayAlmostEqual(result, expected)
+
+    def test_matches_pad_and_unpad_cube(self):
+        """Test that the result matches the circular neighbourhood plugin
+        using a square kernel, for a field with multiple values."""
+        data = np.ones((9, 9))
+        data[2, 2] = 0
+        data[5, 3] = 0
+        data[1, 1] = 0.5
+        data[4, 6] = 0.25
+        kernel = np.ones((5, 5))
+        expected = GeneratePercentilesFromACircularNeighbourhood(
+            percentiles=self.plugin.percentiles)._pad_and_unpad_data(
+                data, kernel)
+        result = self.plugin.binned_percentiles(data, 2, 2)
+        self.assertArrayAlmostEqual(result, expected)
+
+    def test_zero_radius(self):
+        """Test that a neighbourhood of a single point returns the input
+        data for every percentile."""
+        data = np.arange(20.).reshape(4, 5)
+        result = self.plugin.binned_percentiles(data, 0, 0)
+        for percentile_data in result:
+            self.assertArrayAlmostEqual(percentile_data, data)
+
+    def test_limited_bins(self):
+        """Test that the values are grouped into the requested number of
+        bins, if there are more unique values than the number of bins."""
+        data = np.arange(25.).reshape(5, 5)
+        plugin = GeneratePercentilesFromASquareNeighbourhood(
+            percentiles=[50], max_histogram_bins=2)
+        result = plugin.binned_percentiles(data, 1, 1)
+        self.assertEqual(len(np.unique(result)), 2)
+
+
+class Test_run(IrisTest):
+
+    """Test the run method within the plugin to calculate percentile values
+    from a neighbourhood."""
+
+    def setUp(self):
+        """Set up a cube."""
+        self.cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2),), num_grid_points=5)
+
+    def test_single_point(self):
+        """Test behaviour for a single non-zero grid cell."""
+        expected = np.ones((1, 3, 1, 5, 5))
+        expected[0, 0, 0, 1:4, 1:4] = 0.8
+        percentiles = np.array([10, 50, 90])
+        radius = 2000.
+        result = (
+            GeneratePercentilesFromASquareNeighbourhood(
+                percentiles=percentiles).run(self.cube, radius))
+        self.assertIsInstance(result, Cube)
+        self.assertArrayAlmostEqual(result.data, expected)
+        self.assertArrayEqual(
+            result.coord('percentiles_over_neighbourhood').points,
+            percentiles)
+
+    def test_multi_point_multitimes(self):
+        """Test behaviour for points over multiple times."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2), (0, 1, 2, 1)), num_time_points=2,
+            num_grid_points=5)
+        expected = np.ones((1, 3, 2, 5, 5))
+        expected[0, 0, 0, 1:4, 1:4] = 0.8
+        expected[0, 0, 1, 1:4, 0:3] = 0.8
+        percentiles = np.array([10, 50, 90])
+        radius = 2000.
+        result = (
+            GeneratePercentilesFromASquareNeighbourhood(
+                percentiles=percentiles).run(cube, radius))
+        self.assertArrayAlmostEqual(result.data, expected)
+
+    def test_mask_cube(self):
+        """Test that a ValueError is raised, if a mask cube is passed in
+        when generating percentiles from a square neighbourhood."""
+        radius = 2000.
+        msg = "A mask cube cannot be used when generating percentiles"
+        with self.assertRaisesRegexp(ValueError, msg):
+            GeneratePercentilesFromASquareNeighbourhood().run(
+                self.cube, radius, mask_cube=self.cube)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the
+nbhood.square_kernel.GenerateProbabilitiesFromASquareNeighbourhood plugin."""
+
+
+import unittest
+
+from iris.cube import Cube
+from iris.tests import IrisTest
+import numpy as np
+
+import improver.nbhood.square_kernel as square_kernel
+from improver.nbhood.square_kernel import (
+    GenerateProbabilitiesFromASquareNeighbourhood, SquareNeighbourhood)
+from improver.threshold import BasicThreshold
+from improver.tests.nbhood.nbhood.test_BaseNeighbourhoodProcessing import (
+    set_up_cube)
+
+
+def set_up_random_cube():
+    """Set up a cube with two realizations of a varied field."""
+    cube = set_up_cube(zero_point_indices=((0, 0, 3, 3),), num_grid_points=7,
+                       num_realization_points=2)
+    cube.data = np.random.RandomState(0).uniform(
+        0., 4., cube.shape).astype(np.float32)
+    return cube
+
+
+class Test__repr__(IrisTest):
+
+    """Test the repr method."""
+
+    def test_basic(self):
+        """Test that the __repr__ returns the expected string."""
+        plugin = GenerateProbabilitiesFromASquareNeighbourhood([1.])
+        result = str(plugin)
+        msg = ('<GenerateProbabilitiesFromASquareNeighbourhood: '
+               'threshold_plugin: {}; neighbourhood_plugin: {}>'.format(
+                   BasicThreshold([1.]), SquareNeighbourhood()))
+        self.assertEqual(result, msg)
+
+
+class Test__neighbourhood_probabilities(IrisTest):
+
+    """Test the calculation of the neighbourhood probabilities."""
+
+    def setUp(self):
+        """Set up the data and thresholds."""
+        self.data = np.random.RandomState(0).uniform(
+            0., 4., (2, 7, 9)).astype(np.float32)
+        self.thresholds = np.array([0.5, 1., 2., 3.])
+        self.chunk_points = square_kernel.THRESHOLD_CHUNK_POINTS
+
+    def tearDown(self):
+        """Restore the chunk size."""
+        square_kernel.THRESHOLD_CHUNK_POINTS = self.chunk_points
+
+    def expected(self, plugin, mask=None):
+        """Calculate the neighbourhood probabilities by thresholding all
+        the data and then neighbourhood processing the truth values."""
+        truth_value = plugin.threshold_plugin.threshold_data(
+            self.data, self.thresholds)
+        nbhood = plugin.neighbourhood_plugin
+        if mask is None:
+            result = nbhood._neighbourhood_total_for_each_radius(
+                truth_value[np.newaxis], [(2, 1)], 2, 1)
+        else:
+            mask = np.broadcast_to(mask, truth_value.shape)
+            result = nbhood._masked_neighbourhood_for_each_radius(
+                truth_value[np.newaxis], mask[np.newaxis], [(2, 1)], 2, 1)
+        return result[0].astype(plugin.dtype)
+
+    def test_basic(self):
+        """Test that the result matches thresholding followed by
+        neighbourhood processing."""
+        plugin = GenerateProbabilitiesFromASquareNeighbourhood(
+            self.thresholds)
+        result = plugin._neighbourhood_probabilities(
+            self.data, None, self.thresholds, 2, 1)
+        self.assertEqual(result.shape, (4, 2, 7, 9))
+        self.assertArrayEqual(result, self.expected(plugin))
+
+    def test_chunked(self):
+        """Test that the result is the same when each threshold is
+        processed in a separate chunk."""
+        square_kernel.THRESHOLD_CHUNK_POINTS = 1
+        plugin = GenerateProbabilitiesFromASquareNeighbourhood(
+            self.thresholds, fuzzy_factor=0.8)
+        result = plugin._neighbourhood_probabilities(
+            self.data, None, self.thresholds, 2, 1)
+        self.assertArrayEqual(result, self.expected(plugin))
+
+    def test_masked(self):
+        """Test that the result matches thresholding followed by
+        neighbourhood processing for masked data, when the mask is only
+        neighbourhood processed once for all the thresholds."""
+        mask = np.random.RandomState(1).uniform(size=(2, 7, 9)) > 0.3
+        plugin = GenerateProbabilitiesFromASquareNeighbourhood(
+            self.thresholds, below_thresh_ok=True)
+        result = plugin._neighbourhood_probabilities(
+            self.data, mask, self.thresholds, 2, 1)
+        self.assertArrayEqual(result, self.expected(plugin, mask))
+
+    def test_float32(self):
+        """Test that the probabilities are returned in the requested
+        precision."""
+        plugin = GenerateProbabilitiesFromASquareNeighbourhood(
+            self.thresholds, dtype=np.float32)
+        result = plugin._neighbourhood_probabilities(
+            self.data, None, self.thresholds, 2, 1)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayEqual(result, self.expected(plugin))
+
+
+class Test_process(IrisTest):
+
+    """Test the process method."""
+
+    RADIUS = 2500
+
+    def test_basic(self):
+        """Test that the result is a cube matching the output of
+        BasicThreshold followed by SquareNeighbourhood."""
+        cube = set_up_random_cube()
+        thresholds = [2., 0.5, 3.]
+        expected = SquareNeighbourhood().run(
+            BasicThreshold(thresholds).process(cube), self.RADIUS)
+        result = GenerateProbabilitiesFromASquareNeighbourhood(
+            thresholds).process(cube, self.RADIUS)
+        self.assertIsInstance(result, Cube)
+        self.assertEqual(result, expected)
+
+    def test_masked_fuzzy_below(self):
+        """Test that the result matches the output of BasicThreshold
+        followed by SquareNeighbourhood, for fuzzy thresholds below which
+        points are significant, applied to masked data."""
+        cube = set_up_random_cube()
+        cube.data = np.ma.masked_less(cube.data, 0.5)
+        expected = SquareNeighbourhood().run(
+            BasicThreshold([1., 2.], fuzzy_factor=0.8,
+                           below_thresh_ok=True).process(cube),
+            self.RADIUS)
+        result = GenerateProbabilitiesFromASquareNeighbourhood(
+            [1., 2.], fuzzy_factor=0.8, below_thresh_ok=True).process(
+                cube, self.RADIUS)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+        self.assertEqual(result.attributes['relative_to_threshold'], 'below')
+
+    def test_mask_cube(self):
+        """Test that the result matches the output of BasicThreshold
+        followed by SquareNeighbourhood, when a mask cube is supplied."""
+        cube = set_up_random_cube()
+        mask_cube = cube[0, 0].copy(
+            data=(cube.data[0, 0] > 1.).astype(np.int32))
+        expected = SquareNeighbourhood().run(
+            BasicThreshold([1., 2.]).process(cube), self.RADIUS,
+            mask_cube=mask_cube)
+        result = GenerateProbabilitiesFromASquareNeighbourhood(
+            [1., 2.]).process(cube, self.RADIUS, mask_cube=mask_cube)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+
+    def test_yx_not_trailing(self):
+        """Test that the dimensions are returned in the same order as the
+        output of BasicThreshold, when the y and x dimensions are not the
+        trailing dimensions of the input cube."""
+        cube = set_up_random_cube()
+        cube.transpose([2, 0, 3, 1])
+        expected = SquareNeighbourhood().run(
+            BasicThreshold([1., 2.]).process(cube), self.RADIUS)
+        result = GenerateProbabilitiesFromASquareNeighbourhood(
+            [1., 2.]).process(cube, self.RADIUS)
+        self.assertEqual(
+            [coord.name() for coord in result.dim_coords],
+            [coord.name() for coord in expected.dim_coords])
+        self.assertArrayAlmostEqual(result.data, expected.data)
+
+    def test_nan_raises(self):
+        """Test that a ValueError is raised if the data contains NaNs."""
+        cube = set_up_random_cube()
+        cube.data[0, 0, 2, 2] = np.nan
+        plugin = GenerateProbabilitiesFromASquareNeighbourhood([1.])
+        with self.assertRaisesRegexp(ValueError, "NaN"):
+            plugin.process(cube, self.RADIUS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -33,16 +33,15 @@
 
 import unittest
 
-import copy
-
-import iris
-from iris.coords import CellMethod, DimCoord
-from iris.cube import Cube, CubeList
+from iris.coords import CellMethod
+from iris.cube import Cube
 from iris.tests import IrisTest
 
 import numpy as np
 
-from improver.nbhood.square_kernel import SquareNeighbourhood
+from improver.nbhood.nbhood import RadiusTable
+from improver.nbhood.square_kernel import (
+    SquareNeighbourhood, _pad_with_halo)
 from improver.tests.nbhood.nbhood.test_NeighbourhoodProcessing import (
     set_up_cube)
 
@@ -73,370 +72,45 @@ class Test__repr__(IrisTest):
         self.assertEqual(result, msg)
 
 
-class Test_cumulate_array(IrisTest):
+class Test__padded_buffer(IrisTest):
 
-    """Test for cumulating an array in the y and x dimension."""
+    """Test the _padded_buffer method."""
 
-    def test_basic(self):
-        """
-        Test that the y-dimension and x-dimension accumulation produces the
-        intended result. A 2d cube is passed in.
-        """
-        data = np.array([[1., 2., 3., 4., 5.],
-                         [2., 4., 6., 8., 10.],
-                         [3., 6., 8., 11., 14.],
-                         [4., 8., 11., 15., 19.],
-                         [5., 10., 14., 19., 24.]])
-        cube = set_up_cube(
-            zero_point_indices=((0, 0, 2, 2),), num_time_points=1,
-            num_grid_points=5)
-        nan_mask = np.zeros(cube.data.shape, dtype=int).flatten()
-        result = SquareNeighbourhood().cumulate_array(cube)
-        self.assertIsInstance(result[0], Cube)
-        self.assertArrayAlmostEqual(result[0].data, data)
-        self.assertArrayAlmostEqual(result[1][0].data, nan_mask)
-
-    def test_for_multiple_times(self):
-        """
-        Test that the y-dimension and x-dimension accumulation produces the
-        intended result when the input cube has multiple times. The input
-        cube has an extra time dimension to ensure that a 3d cube is correctly
-        handled.
-        """
-        data = np.array([[[1., 2., 3., 4., 5.],
-                          [2., 4., 6., 8., 10.],
-                          [3., 6., 8., 11., 14.],
-                          [4., 8., 11., 15., 19.],
-                          [5., 10., 14., 19., 24.]],
-                         [[1., 2., 3., 4., 5.],
-                          [2., 4., 6., 8., 10.],
-                          [3., 6., 9., 12., 15.],
-                          [4., 8., 12., 15., 19.],
-                          [5., 10., 15., 19., 24.]],
-                         [[0., 1., 2., 3., 4.],
-                          [1., 3., 5., 7., 9.],
-                          [2., 5., 8., 11., 14.],
-                          [3., 7., 11., 15., 19.],
-                          [4., 9., 14., 19., 24.]]])
-        cube = set_up_cube(
-            zero_point_indices=((0, 0, 2, 2), (0, 1, 3, 3), (0, 2, 0, 0)),
-            num_time_points=3, num_grid_points=5)
-        nan_mask = np.zeros(cube[0, 0, :, :].data.shape, dtype=int).flatten()
-        result = SquareNeighbourhood().cumulate_array(cube)
-        self.assertIsInstance(result[0], Cube)
-        self.assertArrayAlmostEqual(result[0].data, data)
-        self.assertArrayAlmostEqual(result[1][0].data, nan_mask)
-
-    def test_for_multiple_times_nans(self):
-        """
-        Test that the y-dimension and x-dimension accumulation produces the
-        intended result when the input cube has multiple times. The input
-        cube has an extra time dimension to ensure that a 3d cube is correctly
-        handled.
-        """
-        data = np.array(
-            [[[0., 1., 2., 3., 4.],
-              [1., 3., 5., 7., 9.],
-              [2., 5., 7., 10., 13.],
-              [3., 7., 10., 14., 18.],
-              [4., 9., 13., 18., 23.]],
-             [[1., 2., 3., 4., 5.],
-              [2., 3., 5., 7., 9.],
-              [3., 5., 8., 11., 14.],
-              [4., 7., 11., 14., 18.],
-              [5., 9., 14., 18., 23.]],
-             [[0., 1., 2., 3., 4.],
-              [1., 3., 5., 7., 9.],
-              [2., 5., 8., 10., 13.],
-              [3., 7., 11., 14., 18.],
-              [4., 9., 14., 18., 23.]]])
+    def test_reused(self):
+        """Test that the same buffer is returned for the same shape and
+        dtype."""
+        plugin = SquareNeighbourhood()
+        buffer = plugin._padded_buffer((2, 9, 9), np.float32)
+        result = plugin._padded_buffer((2, 9, 9), np.float32)
+        self.assertTrue(result is buffer)
+        self.assertEqual(result.shape, (2, 9, 9))
+        self.assertEqual(result.dtype, np.float32)
 
-        cube = set_up_cube(
-            zero_point_indices=((0, 0, 2, 2), (0, 1, 3, 3), (0, 2, 0, 0)),
-            num_time_points=3, num_grid_points=5)
-        cube.data[0, 0, 0, 0] = np.nan
-        cube.data[0, 1, 1, 1] = np.nan
-        cube.data[0, 2, 2, 3] = np.nan
-        nan_mask = np.zeros(cube[0, 0, :, :].data.shape, dtype=int).flatten()
-        nan_mask_1 = copy.copy(nan_mask)
-        nan_mask_2 = copy.copy(nan_mask)
-        nan_mask_3 = copy.copy(nan_mask)
-        nan_mask_1[0] = 1
-        nan_mask_2[6] = 1
-        nan_mask_3[13] = 1
-        result = SquareNeighbourhood().cumulate_array(cube)
-        self.assertIsInstance(result[0], Cube)
-        self.assertArrayAlmostEqual(result[0].data, data)
-        self.assertArrayAlmostEqual(result[1][0].data, nan_mask_1)
-        self.assertArrayAlmostEqual(result[1][1].data, nan_mask_2)
-        self.assertArrayAlmostEqual(result[1][2].data, nan_mask_3)
-
-    def test_for_multiple_realizations_and_times(self):
-        """
-        Test that the y-dimension and x-dimension accumulation produces the
-        intended result when the input cube has multiple realizations and
-        times. The input cube has extra time and realization dimensions to
-        ensure that a 4d cube is correctly handled.
-        """
-        data = np.array([[[[1., 2., 3., 4., 5.],
-                           [2., 4., 6., 8., 10.],
-                           [3., 6., 8., 11., 14.],
-                           [4., 8., 11., 15., 19.],
-                           [5., 10., 14., 19., 24.]],
-                          [[0., 1., 2., 3., 4.],
-                           [1., 3., 5., 7., 9.],
-                           [2., 5., 8., 11., 14.],
-                           [3., 7., 11., 15., 19.],
-                           [4., 9., 14., 19., 24.]]],
-                         [[[1., 2., 3., 4., 5.],
-                           [2., 4., 6., 8., 10.],
-                           [3., 6., 9., 12., 15.],
-                           [4., 8., 12., 15., 19.],
-                           [5., 10., 15., 19., 24.]],
-                          [[1., 2., 3., 4., 5.],
-                           [2., 4., 6., 8., 10.],
-                           [3., 5., 8., 11., 14.],
-                           [4., 7., 11., 15., 19.],
-                           [5., 9., 14., 19., 24.]]]])
-        cube = set_up_cube(
-            zero_point_indices=(
-                (0, 0, 2, 2), (1, 0, 3, 3), (0, 1, 0, 0), (1, 1, 2, 1)),
-            num_time_points=2, num_grid_points=5, num_realization_points=2)
-        nan_mask = np.zeros(cube[0, 0, :, :].data.shape, dtype=int).flatten()
-        result = SquareNeighbourhood().cumulate_array(cube)
-        self.assertIsInstance(result[0], Cube)
-        self.assertArrayAlmostEqual(result[0].data, data)
-        self.assertArrayAlmostEqual(result[1][0].data, nan_mask)
-
-    def test_nan_array(self):
-        """Test correct nanmask is returned when array containing nan data
-           is input."""
-        data = np.array([[0., 1., 2., 3., 4.],
-                         [1., 3., 5., 7., 9.],
-                         [2., 5., 7., 10., 13.],
-                         [3., 7., 10., 14., 18.],
-                         [4., 9., 13., 18., 23.]])
-        nanmask = np.zeros([5, 5]).astype(bool)
-        nanmask[0, 0] = True
-        cube = set_up_cube(
-            zero_point_indices=((0, 0, 2, 2),), num_time_points=1,
-            num_grid_points=5)
-        cube.data[0, 0, 0, 0] = np.nan
-        result, nan_masks = SquareNeighbourhood().cumulate_array(cube)
-        self.assertIsInstance(result, Cube)
-        self.assertArrayAlmostEqual(result.data, data)
-        self.assertArrayAlmostEqual(nan_masks[0], nanmask)
-
-
-class Test_pad_coord(IrisTest):
-
-    """Test the padding of a coordinate."""
-
-    def setUp(self):
-        """Set up a cube."""
-        self.cube = set_up_cube(
-            zero_point_indices=((0, 0, 2, 2),), num_time_points=1,
-            num_grid_points=5)
-        coord_points_x = np.arange(10., 60., 10.)
-        x_bounds = np.array([coord_points_x - 5, coord_points_x + 5]).T
-        coord_points_y = np.arange(5., 105., 20.)
-        y_bounds = np.array([coord_points_y - 10, coord_points_y + 10]).T
-
-        self.cube.coord("projection_x_coordinate").points = coord_points_x
-        self.cube.coord("projection_x_coordinate").bounds = x_bounds
-        self.cube.coord("projection_y_coordinate").points = coord_points_y
-        self.cube.coord("projection_y_coordinate").bounds = y_bounds
-
-        self.cube_y_reorder = self.cube.copy()
-        coord_points_y_reorder = np.arange(85., -15., -20.)
-        y_bounds_reorder = np.array([coord_points_y_reorder + 10,
-                                     coord_points_y_reorder - 10]).T
-        self.cube_y_reorder.coord("projection_y_coordinate").points = (
-            coord_points_y_reorder)
-        self.cube_y_reorder.coord("projection_y_coordinate").bounds = (
-            y_bounds_reorder)
-
-    def test_add(self):
-        """Test the functionality to add padding to the chosen coordinate.
-        Includes a test that the coordinate bounds array is modified to reflect
-        the new values."""
-        expected = np.array(
-            [-10., 0., 10., 20., 30., 40., 50., 60., 70.])
-        coord = self.cube.coord("projection_x_coordinate")
-        expected_bounds = np.array([expected - 5, expected + 5]).T
-        width = 1
-        method = "add"
-        new_coord = SquareNeighbourhood.pad_coord(coord, width, method)
-        self.assertIsInstance(new_coord, DimCoord)
-        self.assertArrayAlmostEqual(new_coord.points, expected)
-        self.assertArrayEqual(new_coord.bounds, expected_bounds)
-
-    def test_add_y_reorder(self):
-        """Test the functionality to add still works if y is negative."""
-        expected = np.array(
-            [125.0, 105.0, 85.0, 65.0, 45.0, 25.0, 5.0, -15.0, -35.0])
-        y_coord = self.cube_y_reorder.coord("projection_y_coordinate")
-        expected_bounds = np.array([expected + 10, expected - 10]).T
-        width = 1
-        method = "add"
-        new_coord = SquareNeighbourhood.pad_coord(y_coord, width, method)
-        self.assertIsInstance(new_coord, DimCoord)
-        self.assertArrayAlmostEqual(new_coord.points, expected)
-        self.assertArrayEqual(new_coord.bounds, expected_bounds)
-
-    def test_exception(self):
-        """Test an exception is raised if the chosen coordinate is
-        non-uniform."""
-        coord_points = np.arange(10., 60., 10.)
-        coord_points[0] = -200.
-        self.cube.coord("projection_x_coordinate").points = coord_points
-        coord = self.cube.coord("projection_x_coordinate")
-        width = 1
-        method = "add"
-        msg = "Non-uniform increments between grid points"
-        with self.assertRaisesRegexp(ValueError, msg):
-            SquareNeighbourhood.pad_coord(coord, width, method)
-
-    def test_remove(self):
-        """Test the functionality to remove padding from the chosen
-        coordinate. Includes a test that the coordinate bounds array is
-        modified to reflect the new values."""
-        expected = np.array([30.])
-        expected_bounds = np.array([expected - 5, expected + 5]).T
-        coord = self.cube.coord("projection_x_coordinate")
-        width = 1
-        method = "remove"
-        new_coord = SquareNeighbourhood.pad_coord(coord, width, method)
-        self.assertIsInstance(new_coord, DimCoord)
-        self.assertArrayAlmostEqual(new_coord.points, expected)
-        self.assertArrayEqual(new_coord.bounds, expected_bounds)
+    def test_different_shape_or_dtype(self):
+        """Test that a new buffer is returned if the shape or dtype
+        changes."""
+        plugin = SquareNeighbourhood()
+        buffer = plugin._padded_buffer((2, 9, 9), np.float32)
+        result = plugin._padded_buffer((2, 9, 10), np.float32)
+        self.assertFalse(result is buffer)
+        self.assertEqual(result.shape, (2, 9, 10))
+        result = plugin._padded_buffer((2, 9, 10), np.float64)
+        self.assertEqual(result.dtype, np.float64)
 
 
-class Test__create_cube_with_new_data(IrisTest):
+class Test__pad_with_halo(IrisTest):
 
-    """Test creating a new cube using a template cube."""
+    """Test for padding an array with a halo."""
 
     def setUp(self):
-        """Set up a cube."""
-        self.cube = set_up_cube(
-            zero_point_indices=((0, 0, 2, 2),), num_time_points=1,
-            num_grid_points=5)
-
-    def test_yx_order(self):
-        """Test that a cube is created with the expected order for the y and x
-        coordinates within the output cube, if the input cube has dimensions
-        of projection_y_coordinate and projection_x_coordinate."""
-        for sliced_cube in self.cube.slices(
-                ["projection_y_coordinate", "projection_x_coordinate"]):
-            break
-        data = sliced_cube.data
-        coord_x = sliced_cube.coord("projection_x_coordinate")
-        coord_y = sliced_cube.coord("projection_y_coordinate")
-
-        new_cube = SquareNeighbourhood()._create_cube_with_new_data(
-            sliced_cube, data, coord_x, coord_y)
-        self.assertIsInstance(new_cube, Cube)
-        self.assertArrayAlmostEqual(new_cube.data, data)
-        self.assertEqual(new_cube.coord_dims("projection_y_coordinate")[0], 0)
-        self.assertEqual(new_cube.coord_dims("projection_x_coordinate")[0], 1)
-
-    def test_xy_order(self):
-        """Test that a cube is created with the expected order for the y and x
-        coordinates within the output cube, if the input cube has dimensions
-        of projection_x_coordinate and projection_y_coordinate."""
-        for sliced_cube in self.cube.slices(
-                ["projection_x_coordinate", "projection_y_coordinate"]):
-            break
-        data = sliced_cube.data
-        coord_x = sliced_cube.coord("projection_x_coordinate")
-        coord_y = sliced_cube.coord("projection_y_coordinate")
-
-        new_cube = SquareNeighbourhood()._create_cube_with_new_data(
-            sliced_cube, data, coord_x, coord_y)
-        self.assertIsInstance(new_cube, Cube)
-        self.assertArrayAlmostEqual(new_cube.data, data)
-        self.assertEqual(new_cube.coord_dims("projection_y_coordinate")[0], 1)
-        self.assertEqual(new_cube.coord_dims("projection_x_coordinate")[0], 0)
-
-    def test_realization(self):
-        """Test that a cube is created with the expected order for coordinates
-        within the output cube, if the input cube has dimensions of
-        realization, projection_y_coordinate and projection_x_coordinate."""
-        for sliced_cube in self.cube.slices(
-            ["realization", "projection_y_coordinate",
-             "projection_x_coordinate"]):
-            break
-        data = sliced_cube.data
-        coord_x = sliced_cube.coord("projection_x_coordinate")
-        coord_y = sliced_cube.coord("projection_y_coordinate")
-
-        new_cube = SquareNeighbourhood()._create_cube_with_new_data(
-            sliced_cube, data, coord_x, coord_y)
-        self.assertIsInstance(new_cube, Cube)
-        self.assertArrayAlmostEqual(new_cube.data, data)
-        self.assertEqual(new_cube.coord_dims("realization")[0], 0)
-        self.assertEqual(new_cube.coord_dims("projection_y_coordinate")[0], 1)
-        self.assertEqual(new_cube.coord_dims("projection_x_coordinate")[0], 2)
-
-    def test_forecast_period(self):
-        """Test that a cube is created with the expected order for coordinates
-        within the output cube, if the input cube has dimensions of
-        projection_y_coordinate and projection_x_coordinate, and where the
-        input cube also has a forecast_period coordinate."""
-        for sliced_cube in self.cube.slices(
-            ["projection_y_coordinate",
-             "projection_x_coordinate"]):
-            break
-        fp_coord = DimCoord(np.array([10]), standard_name="forecast_period")
-        sliced_cube.add_aux_coord(fp_coord)
-        data = sliced_cube.data
-        coord_x = sliced_cube.coord("projection_x_coordinate")
-        coord_y = sliced_cube.coord("projection_y_coordinate")
-
-        new_cube = SquareNeighbourhood()._create_cube_with_new_data(
-            sliced_cube, data, coord_x, coord_y)
-        self.assertIsInstance(new_cube, Cube)
-        self.assertArrayAlmostEqual(new_cube.data, data)
-        self.assertEqual(new_cube.coord("forecast_period").points, 10)
-        self.assertEqual(new_cube.coord_dims("projection_y_coordinate")[0], 0)
-        self.assertEqual(new_cube.coord_dims("projection_x_coordinate")[0], 1)
-
-    def test_no_y_dimension_coordinate(self):
-        """Test that a cube is created with the expected y and x coordinates
-        within the output cube, if the input cube only has a
-        projection_y_coordinate dimension coordinate."""
-        for sliced_cube in self.cube.slices(
-                ["projection_x_coordinate"]):
-            break
-        data = sliced_cube.data
-        coord_x = sliced_cube.coord("projection_x_coordinate")
-        coord_y = sliced_cube.coord("projection_y_coordinate")
-        new_cube = SquareNeighbourhood()._create_cube_with_new_data(
-            sliced_cube, data, coord_x, coord_y)
-        self.assertIsInstance(new_cube, Cube)
-        self.assertArrayAlmostEqual(new_cube.data, data)
-        self.assertEqual(new_cube.coord_dims("projection_x_coordinate")[0], 0)
-        self.assertTrue(
-            new_cube.coords("projection_y_coordinate", dim_coords=False))
-
-
-class Test_pad_cube_with_halo(IrisTest):
-
-    """Test for padding a cube with a halo."""
-
-    def setUp(self):
-        """Set up a cube."""
-        self.cube = set_up_cube(
+        """Set up an array."""
+        cube = set_up_cube(
             zero_point_indices=((0, 0, 2, 2),), num_time_points=1,
             num_grid_points=5)
+        self.array = cube.data[0, 0]
 
     def test_basic(self):
-        """Test that padding the data in a cube with a halo has worked as
-        intended."""
-        for sliced_cube in self.cube.slices(
-            ["projection_y_coordinate",
-             "projection_x_coordinate"]):
-            break
+        """Test that padding an array with a halo has worked as intended."""
         expected = np.array(
             [[1., 1., 1., 1., 1., 1., 1., 1., 1.],
              [1., 1., 1., 1., 1., 1., 1., 1., 1.],
@@ -448,18 +122,13 @@ class Test_pad_cube_with_halo(IrisTest):
              [1., 1., 1., 1., 1., 1., 1., 1., 1.],
              [1., 1., 1., 1., 1., 1., 1., 1., 1.]])
         width_x = width_y = 1
-        padded_cube = SquareNeighbourhood().pad_cube_with_halo(
-                          sliced_cube, width_x, width_y)
-        self.assertIsInstance(padded_cube, Cube)
-        self.assertArrayAlmostEqual(padded_cube.data, expected)
+        padded = np.full((9, 9), np.nan)
+        _pad_with_halo(self.array, padded, width_x, width_y, 1, 1)
+        self.assertArrayAlmostEqual(padded, expected)
 
     def test_different_widths(self):
-        """Test that padding the data in a cube with different widths has
-        worked as intended."""
-        for sliced_cube in self.cube.slices(
-            ["projection_y_coordinate",
-             "projection_x_coordinate"]):
-            break
+        """Test that padding an array with different widths has worked as
+        intended."""
         expected = np.array(
             [[1., 1., 1., 1., 1., 1., 1., 1., 1.],
              [1., 1., 1., 1., 1., 1., 1., 1., 1.],
@@ -476,18 +145,13 @@ class Test_pad_cube_with_halo(IrisTest):
              [1., 1., 1., 1., 1., 1., 1., 1., 1.]])
         width_x = 1
         width_y = 2
-        padded_cube = SquareNeighbourhood().pad_cube_with_halo(
-                          sliced_cube, width_x, width_y)
-        self.assertIsInstance(padded_cube, Cube)
-        self.assertArrayAlmostEqual(padded_cube.data, expected)
+        padded = np.full((13, 9), np.nan)
+        _pad_with_halo(self.array, padded, width_x, width_y, 1, 2)
+        self.assertArrayAlmostEqual(padded, expected)
 
     def test_zero_width(self):
-        """Test that padding the data in a cube with a width of zero has
-        worked as intended."""
-        for sliced_cube in self.cube.slices(
-            ["projection_y_coordinate",
-             "projection_x_coordinate"]):
-            break
+        """Test that padding an array with a width of zero has worked as
+        intended."""
         expected = np.array(
             [[1., 1., 1., 1., 1.],
              [1., 1., 1., 1., 1.],
@@ -504,449 +168,117 @@ class Test_pad_cube_with_halo(IrisTest):
              [1., 1., 1., 1., 1.]])
         width_x = 0
         width_y = 2
-        padded_cube = SquareNeighbourhood().pad_cube_with_halo(
-                          sliced_cube, width_x, width_y)
-        self.assertIsInstance(padded_cube, Cube)
-        self.assertArrayAlmostEqual(padded_cube.data, expected)
-
-
-class Test_remove_halo_from_cube(IrisTest):
-
-    """Test a halo is removed from the cube data."""
-
-    def setUp(self):
-        """Set up a cube."""
-        self.cube = set_up_cube(
-            zero_point_indices=((0, 0, 2, 2),), num_time_points=1,
-            num_grid_points=5)
-
-    def test_basic(self):
-        """Test that removing a halo of points from the data on a cube
-        has worked as intended."""
-        for sliced_cube in self.cube.slices(
-            ["projection_y_coordinate",
-             "projection_x_coordinate"]):
-            break
-        expected = np.array([[0.]])
-        width_x = width_y = 1
-        padded_cube = SquareNeighbourhood().remove_halo_from_cube(
-                          sliced_cube, width_x, width_y)
-        self.assertIsInstance(padded_cube, Cube)
-        self.assertArrayAlmostEqual(padded_cube.data, expected)
-
-    def test_different_widths(self):
-        """Test that removing a halo of points from the data on a cube
-        has worked as intended for different x and y widths."""
-        self.cube = set_up_cube(
-            zero_point_indices=((0, 0, 5, 5),), num_time_points=1,
-            num_grid_points=10)
-        for sliced_cube in self.cube.slices(
-            ["projection_y_coordinate",
-             "projection_x_coordinate"]):
-            break
-        expected = np.array(
-            [[1., 1., 1., 1., 1., 1.],
-             [1., 1., 1., 0., 1., 1.]])
-        width_x = 1
-        width_y = 2
-        padded_cube = SquareNeighbourhood().remove_halo_from_cube(
-                          sliced_cube, width_x, width_y)
-        self.assertIsInstance(padded_cube, Cube)
-        self.assertArrayAlmostEqual(padded_cube.data, expected)
-
-    def test_zero_width(self):
-        """Test that removing a halo of points from the data on a cube
-        has worked as intended, if a width of zero is specified."""
-        self.cube = set_up_cube(
-            zero_point_indices=((0, 0, 5, 5),), num_time_points=1,
-            num_grid_points=10)
-        for sliced_cube in self.cube.slices(
-            ["projection_y_coordinate",
-             "projection_x_coordinate"]):
-            break
+        padded = np.full((13, 5), np.nan)
+        _pad_with_halo(self.array, padded, width_x, width_y, 0, 2)
+        self.assertArrayAlmostEqual(padded, expected)
+
+    def test_padding_values(self):
+        """Test that the halo is filled with the mean over the neighbourhood
+        width at the edge of the data, padding along y and then along x."""
+        array = np.arange(25.).reshape(5, 5)
         expected = np.array(
-            [[1., 1., 1., 1., 1., 1., 1., 1., 1., 1.],
-             [1., 1., 1., 1., 1., 0., 1., 1., 1., 1.]])
-        width_x = 0
-        width_y = 2
-        padded_cube = SquareNeighbourhood().remove_halo_from_cube(
-                          sliced_cube, width_x, width_y)
-        self.assertIsInstance(padded_cube, Cube)
-        self.assertArrayAlmostEqual(padded_cube.data, expected)
-
-
-class Test_mean_over_neighbourhood(IrisTest):
-
-    """Test for calculating mean value in neighbourhood."""
-
-    def setUp(self):
-        """Set up cube and expected results for tests."""
-
-        # This array is the output from cumulate_array when a 5x5 array of 1's
-        # with a 0 at the centre point (2,2) is passed in.
-        # Note that edge points are not handled correctly by default as no
-        # padding is applied.
-        self.data = np.array(
-            [[1., 2., 3., 4., 5.],
-             [2., 4., 6., 8., 10.],
-             [3., 6., 8., 11., 14.],
-             [4., 8., 11., 15., 19.],
-             [5., 10., 14., 19., 24.]])
-        self.cube = Cube(self.data, long_name='test')
-        self.x_coord = DimCoord([0, 1, 2, 3, 4], standard_name='longitude')
-        self.y_coord = DimCoord([0, 1, 2, 3, 4], standard_name='latitude')
-        self.cube.add_dim_coord(self.x_coord, 0)
-        self.cube.add_dim_coord(self.y_coord, 1)
-        self.result = np.array(
-            [[0.33333333, 0.44444444, -0.55555556, -0.55555556, 0.33333333],
-             [0.33333333, 0.33333333, -0.66666667, -0.66666667, 1.],
-             [1.55555556, 2., 0.88888889, 0.88888889, -0.55555556],
-             [-0.55555556, -0.66666667, 0.88888889, 0.88888889, -1.11111111],
-             [-1.66666667, -2.11111111, -0.55555556, -0.55555556, 0.33333333]])
-        self.width = 1
-        # Set up padded dataset to simulate padding.
-        self.padded_data = np.array(
-            [[1., 2., 3., 4., 5., 6., 7., 8., 9.],
-             [2., 4., 6., 8., 10., 12., 14., 16., 18.],
-             [3., 6., 9., 12., 15., 18., 21., 24., 27.],
-             [4., 8., 12., 16., 20., 24., 28., 32., 36.],
-             [5., 10., 15., 20., 24., 29., 34., 39., 44.],
-             [6., 12., 18., 24., 29., 35., 41., 47., 53.],
-             [7., 14., 21., 28., 34., 41., 48., 55., 62.],
-             [8., 16., 24., 32., 39., 47., 55., 63., 71.],
-             [9., 18., 27., 36., 44., 53., 62., 71., 80.]])
-        self.padded_cube = Cube(self.padded_data, long_name='test')
-        self.padded_x_coord = DimCoord(range(0, 9), standard_name='longitude')
-        self.padded_y_coord = DimCoord(range(0, 9), standard_name='latitude')
-        self.padded_cube.add_dim_coord(self.padded_x_coord, 0)
-        self.padded_cube.add_dim_coord(self.padded_y_coord, 1)
-        self.padded_result = np.array(
-            [[1., 1., 1., 1., 1.],
-             [1., 0.88888889, 0.88888889, 0.88888889, 1.],
-             [1., 0.88888889, 0.88888889, 0.88888889, 1.],
-             [1., 0.88888889, 0.88888889, 0.88888889, 1.],
-             [1., 1., 1., 1., 1.]])
-
-    def test_basic_fraction(self):
-        """Test cube with correct data is produced when mean over
-           neighbourhood is calculated where the sum_or_fraction option is
-           set to "fraction"."""
-        nan_masks = [np.zeros(self.cube.data.shape, dtype=int)]
-        result = SquareNeighbourhood().mean_over_neighbourhood(
-            self.cube, self.width, self.width, nan_masks)
-        self.assertIsInstance(result, Cube)
-        self.assertArrayAlmostEqual(result.data, self.result)
-
-    def test_basic_sum(self):
-        """Test cube with correct data is produced when mean over
-           neighbourhood is calculated where the sum_or_fraction option is
-           set to "sum"."""
-        nan_masks = [np.zeros(self.cube.data.shape, dtype=int)]
-        expected = np.array(
-            [[3., 4., -5., -5., 3.],
-             [3., 3., -6., -6., 9.],
-             [14., 18., 8., 8., -5.],
-             [-5., -6., 8., 8., -10.],
-             [-15., -19., -5., -5., 3.]])
-        result = SquareNeighbourhood(
-            sum_or_fraction="sum").mean_over_neighbourhood(
-                self.cube, self.width, self.width, nan_masks)
-        self.assertIsInstance(result, Cube)
-        self.assertArrayAlmostEqual(result.data, expected)
-
-    def test_basic_padded(self):
-        """Test cube with correct data is produced when mean over
-           neighbourhood is calculated."""
-        nan_masks = [np.zeros(self.padded_cube.data.shape, dtype=int)]
-        result = SquareNeighbourhood().mean_over_neighbourhood(
-            self.padded_cube, self.width, self.width, nan_masks)
-        self.assertIsInstance(result, Cube)
-        self.assertArrayAlmostEqual(
-            result.data[2:-2, 2:-2], self.padded_result)
-
-    def test_multiple_times(self):
-        """Test mean over neighbourhood with more than two dimensions."""
-        data = np.array([self.padded_data, self.padded_data])
-        cube = Cube(data, long_name='two times test')
-        cube.add_dim_coord(self.padded_x_coord, 1)
-        cube.add_dim_coord(self.padded_y_coord, 2)
-        t_coord = DimCoord([0, 1], standard_name='time')
-        cube.add_dim_coord(t_coord, 0)
-        nan_masks = [np.zeros(cube.data[0].shape, dtype=int)] * 2
-        result = SquareNeighbourhood().mean_over_neighbourhood(
-            cube, self.width, self.width, nan_masks)
-        self.assertArrayAlmostEqual(
-            result.data[0, 2:-2, 2:-2], self.padded_result)
+            [[0., 0., 0., 1., 2., 3., 4., 4., 4.],
+             [0., 0., 0., 1., 2., 3., 4., 4., 4.],
+             [0., 0., 0., 1., 2., 3., 4., 4., 4.],
+             [5., 5., 5., 6., 7., 8., 9., 9., 9.],
+             [10., 10., 10., 11., 12., 13., 14., 14., 14.],
+             [15., 15., 15., 16., 17., 18., 19., 19., 19.],
+             [20., 20., 20., 21., 22., 23., 24., 24., 24.],
+             [20., 20., 20., 21., 22., 23., 24., 24., 24.],
+             [20., 20., 20., 21., 22., 23., 24., 24., 24.]])
+        padded = np.full((9, 9), np.nan)
+        _pad_with_halo(array, padded, 1, 1, 1, 1)
+        self.assertArrayAlmostEqual(padded, expected)
+
+    def test_mean_over_neighbourhood_width(self):
+        """Test that the padding value is the mean over the neighbourhood
+        width, rather than the halo width, at the edge of the data."""
+        array = np.arange(25.).reshape(5, 5)
+        padded = np.full((9, 9), np.nan)
+        _pad_with_halo(array, padded, 1, 1, 2, 2)
         self.assertArrayAlmostEqual(
-            result.data[1, 2:-2, 2:-2], self.padded_result)
+            padded[:2, 2:-2], [[2.5, 3.5, 4.5, 5.5, 6.5]] * 2)
+        self.assertArrayAlmostEqual(padded[:2, :2], [[3., 3.], [3., 3.]])
+        self.assertArrayAlmostEqual(padded[4, -2:], [13.5, 13.5])
 
-    def test_nan_mask(self):
-        """Test the correct result is returned when a nan must be substituted
-           into the final array. Note: this type of data should also be masked,
-           so the expected_data array looks strange because there is further
-           processing to be done on it."""
-        cube = self.padded_cube
-        nan_masks = [np.zeros([9, 9]).astype(bool)]
-        nan_masks[0][2, 2] = True
-        expected_data = self.padded_result
-        expected_data[0, 0] = np.nan
-        result = SquareNeighbourhood().mean_over_neighbourhood(
-            cube, self.width, self.width, nan_masks)
-        self.assertArrayAlmostEqual(result.data[2:-2, 2:-2], expected_data)
+    def test_leading_dimensions(self):
+        """Test that each slice along the leading dimensions of an array is
+        padded separately."""
+        array = np.array([self.array, 2. * self.array])
+        padded = np.full((2, 9, 9), np.nan)
+        _pad_with_halo(array, padded, 1, 1, 1, 1)
+        self.assertArrayAlmostEqual(padded[1], 2. * padded[0])
+        self.assertArrayAlmostEqual(padded[0, 2:-2, 2:-2], self.array)
 
+    def test_integer_array(self):
+        """Test that the padding values of an integer array are rounded, as
+        for numpy.pad with the "mean" mode."""
+        array = np.array([[0, 1], [1, 1]])
+        padded = np.zeros((6, 6), dtype=int)
+        _pad_with_halo(array, padded, 1, 1, 2, 2)
+        expected = np.pad(array, 2, mode="mean", stat_length=2)
+        self.assertArrayEqual(padded, expected)
 
-class Test__set_up_cubes_to_be_neighbourhooded(IrisTest):
 
-    """Test the set up of cubes prior to neighbourhooding."""
+class Test__masked_neighbourhood_for_each_radius(IrisTest):
 
-    def setUp(self):
-        """Set up a cube."""
-        self.cube = set_up_cube(
-            zero_point_indices=((0, 0, 2, 2),), num_time_points=1,
-            num_grid_points=5)
-
-    def test_without_masked_data(self):
-        """Test setting up cubes to be neighbourhooded when the input cube
-        does not contain masked arrays."""
-        cubes = (
-            SquareNeighbourhood._set_up_cubes_to_be_neighbourhooded(self.cube))
-        self.assertIsInstance(cubes, CubeList)
-        self.assertEqual(len(cubes), 1)
-        self.assertEqual(cubes[0], self.cube)
-
-    def test_with_masked_data(self):
-        """Test setting up cubes to be neighbourhooded when the input cube
-        contains masked arrays."""
-        cube = self.cube
-        data = cube.data
-        cube.data[0, 0, 1, 3] = 0.5
-        cube.data[0, 0, 3, 3] = 0.5
-        cube.data = np.ma.masked_equal(data, 0.5)
-        mask = np.logical_not(cube.data.mask.astype(int)).squeeze()
-        cube = iris.util.squeeze(cube)
-        data = cube.data.data * mask
-        cubes = (
-            SquareNeighbourhood._set_up_cubes_to_be_neighbourhooded(
-                cube.copy()))
-        self.assertIsInstance(cubes, CubeList)
-        self.assertEqual(len(cubes), 2)
-        self.assertArrayAlmostEqual(cubes[0].data, data)
-        self.assertArrayAlmostEqual(cubes[1].data, mask)
-
-    def test_with_separate_mask_cube(self):
-        """Test setting up cubes to be neighbourhooded for an input cube and
-        an additional mask cube."""
-        cube = iris.util.squeeze(self.cube)
-        cube.data[1, 3] = 0.5
-        cube.data[3, 3] = 0.5
-        mask_cube = iris.util.squeeze(cube).copy()
-        mask_cube.data[mask_cube.data == 0.5] = 0.0
-        mask_cube.data = mask_cube.data.astype(int)
-        expected_data = cube.data * mask_cube.data
-        cubes = (
-            SquareNeighbourhood._set_up_cubes_to_be_neighbourhooded(
-                cube.copy(), mask_cube=mask_cube))
-        self.assertIsInstance(cubes, CubeList)
-        self.assertEqual(len(cubes), 2)
-        self.assertArrayAlmostEqual(cubes[0].data, expected_data)
-
-
-class Test__pad_and_calculate_neighbourhood(IrisTest):
-
-    """Test the padding and calculation of neighbourhood processing."""
+    """Test the _masked_neighbourhood_for_each_radius method."""
 
     def setUp(self):
-        """Set up a cube."""
-        self.cube = set_up_cube(
-            zero_point_indices=((0, 0, 1, 1),), num_time_points=1,
-            num_grid_points=3)
-        for sliced_cube in self.cube.slices(
-            ["projection_y_coordinate",
-             "projection_x_coordinate"]):
-            break
-        sliced_cube.remove_coord("realization")
-        sliced_cube.remove_coord("time")
-        self.cube = sliced_cube
-
-    def test_without_masked_data(self):
-        """Test setting up cubes to be padded and then passed into
-        neighbourhood processing when the input cubes do not contain masked
-        arrays."""
+        """Set up data and mask arrays."""
+        self.data = np.array([[[1, 1, 0, 1, 1],
+                               [1, 1, 1, 0, 0],
+                               [1, 0, 1, 0, 0],
+                               [0, 0, 1, 1, 0],
+                               [0, 1, 1, 0, 1]]])
+        self.mask = np.array([[[0, 0, 1, 1, 0],
+                               [0, 1, 1, 1, 0],
+                               [0, 0, 1, 1, 1],
+                               [0, 0, 1, 1, 0],
+                               [0, 0, 1, 1, 0]]])
+
+    def test_re_mask_true(self):
+        """Test that the normalised neighbourhood is calculated from the
+        data and mask processed together, and re-masked."""
         expected = np.array(
-            [[1.66666667, 1.66666667, -1.22222222, -1.22222222, -1.22222222,
-              -1.33333333, 1.66666667],
-             [1.66666667, 1.66666667, -1.22222222, -1.22222222, -1.22222222,
-              -1.33333333, 2.44444444],
-             [3.22222222, 4., 0.88888889, 0.88888889, 0.88888889,
-              1., -1.22222222],
-             [-1.22222222, -1.22222222, 0.88888889, 0.88888889, 0.88888889,
-              1., -1.22222222],
-             [-1.22222222, -1.22222222, 0.88888889, 0.88888889, 0.88888889,
-              1., -1.22222222],
-             [-1.22222222, -1.22222222, 1., 1., 1.,
-              1., -2.11111111],
-             [-2.88888889, -3.66666667, -1.22222222, -1.22222222, -1.22222222,
-              -1.33333333,  1.66666667]])
-        grid_cells_x = grid_cells_y = 1
-        cubes = CubeList([self.cube])
-        nbcubes = (
-            SquareNeighbourhood()._pad_and_calculate_neighbourhood(
-                cubes, grid_cells_x, grid_cells_y))
-        self.assertIsInstance(nbcubes, CubeList)
-        self.assertEqual(len(nbcubes), 1)
-        self.assertArrayAlmostEqual(nbcubes[0].data, expected)
-
-    def test_with_masked_data(self):
-        """Test setting up cubes to be padded and then passed into
-        neighbourhood processing when the input cubes contain masked
-        arrays."""
-        expected_data = np.array(
-            [[1.66666667, 1.66666667, -1.22222222, -1.22222222, -1.22222222,
-              -1.33333333, 1.66666667],
-             [1.66666667, 1.66666667, -1.22222222, -1.22222222, -1.22222222,
-              -1.33333333, 2.44444444],
-             [3.22222222, 4., 0.88888889, 0.88888889, 0.88888889,
-              1., -1.22222222],
-             [-1.22222222, -1.22222222, 0.88888889, 0.88888889, 0.88888889,
-              1., -1.22222222],
-             [-1.22222222, -1.22222222, 0.88888889, 0.88888889, 0.88888889,
-              1., -1.22222222],
-             [-1.22222222, -1.22222222, 1., 1., 1.,
-              1., -2.11111111],
-             [-2.88888889, -3.66666667, -1.22222222, -1.22222222, -1.22222222,
-              -1.33333333,  1.66666667]])
-        expected_mask = np.array(
-            [[0.55555556, 0.77777778, -0.11111111, -0.44444444, -0.77777778,
-              -1., 0.44444444],
-             [0.77777778, 1.11111111, -0.11111111, -0.55555556, -1.,
-              -1.33333333, 0.55555556],
-             [1., 1.44444444, 0.11111111, 0.22222222, 0.33333333,
-              0.33333333, -0.22222222],
-             [-0.33333333, -0.44444444, 0.11111111, 0.33333333, 0.55555556,
-              0.66666667, -0.33333333],
-             [-0.55555556, -0.77777778, 0.11111111, 0.44444444, 0.77777778,
-              1., -0.44444444],
-             [-0.77777778, -1.11111111, 0., 0.33333333, 0.66666667,
-              1., -0.33333333],
-             [-0.66666667, -1., -0.11111111, -0.33333333, -0.55555556,
-              -0.66666667, 0.33333333]])
-
-        grid_cells_x = grid_cells_y = 1
-        cube = self.cube
-        mask_cube = cube.copy()
-        mask_cube.data[1, 2] = 0.5
-        mask_cube.data[2, 2] = 0.5
-        mask_cube.data = np.ma.masked_equal(mask_cube.data, 0.5)
-        mask_cube.rename('mask_data')
-        mask_cube.data = np.logical_not(mask_cube.data.astype(int))
-        cubes = CubeList([cube, mask_cube])
-        nbcubes = (
-            SquareNeighbourhood()._pad_and_calculate_neighbourhood(
-                cubes, grid_cells_x, grid_cells_y))
-        self.assertIsInstance(nbcubes, CubeList)
-        self.assertEqual(len(nbcubes), 2)
-        self.assertArrayAlmostEqual(nbcubes[0].data, expected_data)
-        self.assertArrayAlmostEqual(nbcubes[1].data, expected_mask)
-
-
-class Test__remove_padding_and_mask(IrisTest):
-
-    """Test the removal of padding and dealing with masked data."""
-
-    def setUp(self):
-        """Set up a cube."""
-        self.padded_cube = set_up_cube(
-            zero_point_indices=((0, 0, 3, 3),), num_time_points=1,
-            num_grid_points=7)
-        self.cube = set_up_cube(
-            zero_point_indices=((0, 0, 1, 1),), num_time_points=1,
-            num_grid_points=3)
+            [[[0.000000, 0.000000, 0.571429, 0.500000, 0.000000],
+              [0.000000, 0.750000, 0.571429, 0.428571, 0.000000],
+              [0.000000, 0.000000, 0.714286, 0.571429, 0.200000],
+              [0.000000, 0.000000, 0.666667, 0.571429, 0.000000],
+              [0.000000, 0.000000, 0.666667, 0.666667, 0.000000]]])
+        result = SquareNeighbourhood(
+            )._masked_neighbourhood_for_each_radius(
+                self.data, self.mask, [(1, 1)], 1, 1)
+        self.assertArrayAlmostEqual(result, expected)
 
-    def test_without_masked_data(self):
-        """Test that removing a halo of points from the data on a cube
-        has worked as intended when the input data is not masked."""
-        expected = np.array(
-            [[1., 1., 1.],
-             [1., 0., 1.],
-             [1., 1., 1.]])
-        grid_cells_x = grid_cells_y = 1
-        padded_cubes = CubeList([self.padded_cube])
-        cubes = CubeList([self.cube])
-        nbcube = (
-            SquareNeighbourhood()._remove_padding_and_mask(
-                padded_cubes, cubes, self.padded_cube.name(),
-                grid_cells_x, grid_cells_y))
-        self.assertIsInstance(nbcube, Cube)
-        self.assertArrayAlmostEqual(nbcube.data, expected)
-
-    def test_with_masked_data(self):
-        """Test that removing a halo of points from the data on a cube
-        has worked as intended when the input data has an associated mask."""
-        expected = np.array(
-            [[1., 0., 1.],
-             [1., 0., 1.],
-             [1., 1., 1.]])
-        grid_cells_x = grid_cells_y = 1
-        padded_cube = self.padded_cube
-        # Set up padded cube and associated mask.
-        mask_cube = padded_cube.copy()
-        masked_array = np.ones(mask_cube.data.shape)
-        masked_array[0, 0, 3, 3] = 0
-        masked_array[0, 0, 2, 3] = 0
-        mask_cube.rename('mask_data')
-        mask_cube.data = masked_array.astype(bool)
-        padded_cubes = CubeList([padded_cube, mask_cube])
-        # Set up cube without padding and associated mask.
-        cube = self.cube
-        mask_cube = cube.copy()
-        masked_array = np.ones(mask_cube.data.shape)
-        masked_array[0, 0, 1, 1] = 0
-        masked_array[0, 0, 0, 1] = 0
-        mask_cube.rename('mask_data')
-        mask_cube.data = masked_array.astype(bool)
-        cubes = CubeList([cube, mask_cube])
-        nbcube = (
-            SquareNeighbourhood()._remove_padding_and_mask(
-                padded_cubes, cubes, padded_cube.name(),
-                grid_cells_x, grid_cells_y))
-        self.assertIsInstance(nbcube, Cube)
-        self.assertArrayAlmostEqual(nbcube.data, expected)
-
-    def test_with_masked_data_and_remasking(self):
-        """Test that removing a halo of points from the data on a cube
-        has worked as intended when the input data has an associated mask
-        and re-masking using the original data is required."""
+    def test_re_mask_false(self):
+        """Test that the normalised neighbourhood is calculated from the
+        data and mask processed together, without re-masking."""
         expected = np.array(
-            [[1., 0., 1.],
-             [1., 0., 1.],
-             [1., 1., 0.]])
-        grid_cells_x = grid_cells_y = 1
-        padded_cube = self.padded_cube
-        # Set up padded cube and associated mask.
-        mask_cube = padded_cube.copy()
-        masked_array = np.ones(mask_cube.data.shape)
-        masked_array[0, 0, 3, 3] = 0
-        masked_array[0, 0, 2, 3] = 0
-        mask_cube.rename('mask_data')
-        mask_cube.data = masked_array.astype(bool)
-        padded_cubes = CubeList([padded_cube, mask_cube])
-        # Set up cube without padding and associated mask.
-        cube = self.cube
-        mask_cube = cube.copy()
-        masked_array = np.ones(mask_cube.data.shape)
-        masked_array[0, 0, 2, 2] = 0
-        masked_array[0, 0, 1, 1] = 0
-        masked_array[0, 0, 0, 1] = 0
-        mask_cube.rename('mask_data')
-        mask_cube.data = masked_array.astype(bool)
-        cubes = CubeList([cube, mask_cube])
-        re_mask = True
-        nbcube = (
-            SquareNeighbourhood(re_mask=re_mask)._remove_padding_and_mask(
-                padded_cubes, cubes, padded_cube.name(),
-                grid_cells_x, grid_cells_y))
-        self.assertIsInstance(nbcube, Cube)
-        self.assertArrayAlmostEqual(nbcube.data, expected)
+            [[[1.000000, 0.500000, 0.571429, 0.500000, 0.666667],
+              [1.000000, 0.750000, 0.571429, 0.428571, 0.200000],
+              [1.000000, 1.000000, 0.714286, 0.571429, 0.200000],
+              [0.000000, 1.000000, 0.666667, 0.571429, 0.200000],
+              [0.000000, 1.000000, 0.666667, 0.666667, 0.333333]]])
+        result = SquareNeighbourhood(
+            re_mask=False)._masked_neighbourhood_for_each_radius(
+                self.data, self.mask, [(1, 1)], 1, 1)
+        self.assertArrayAlmostEqual(result, expected)
+
+    def test_multiple_radii(self):
+        """Test that each index along the leading dimension is processed
+        using its own neighbourhood size, with a halo for the largest."""
+        data = np.concatenate([self.data, self.data])
+        mask = np.concatenate([self.mask, self.mask])
+        plugin = SquareNeighbourhood()
+        result = plugin._masked_neighbourhood_for_each_radius(
+            data, mask, [(1, 1), (2, 2)], 2, 2)
+        expected_1 = plugin._masked_neighbourhood_for_each_radius(
+            self.data, self.mask, [(1, 1)], 1, 1)
+        expected_2 = plugin._masked_neighbourhood_for_each_radius(
+            self.data, self.mask, [(2, 2)], 2, 2)
+        self.assertArrayAlmostEqual(result[0], expected_1[0])
+        self.assertArrayAlmostEqual(result[1], expected_2[0])
 
 
 class Test_run(IrisTest):
@@ -971,6 +303,54 @@ class Test_run(IrisTest):
         self.assertIsInstance(cube, Cube)
         self.assertArrayAlmostEqual(result.data, data)
 
+    def test_float32(self):
+        """Test that a float32 cube with correct data is produced by the run
+        method, when a float32 working precision is requested, for a masked
+        cube that is re-masked."""
+        data = np.array(
+            [[[[1., 1., 1., 1., 1.],
+               [1., 1., 1., 1., 1.],
+               [1., 1., 0., 1., 1.],
+               [1., 1., 1., 1., 1.],
+               [1., 1., 1., 1., 1.]]]])
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2),), num_time_points=1,
+            num_grid_points=5)
+        cube.data = np.ma.masked_equal(cube.data.astype(np.float32), 0.)
+        result = SquareNeighbourhood(dtype=np.float32).run(
+            cube, self.RADIUS)
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayAlmostEqual(result.data, data)
+
+    def test_repeated_calls(self):
+        """Test that the run method produces the same result when called
+        repeatedly with the same plugin, so that the padded buffer is
+        reused."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2),), num_time_points=1,
+            num_grid_points=5)
+        plugin = SquareNeighbourhood()
+        expected = plugin.run(cube, self.RADIUS).data
+        other_cube = cube.copy(data=np.zeros(cube.shape))
+        plugin.run(other_cube, self.RADIUS)
+        result = plugin.run(cube, self.RADIUS)
+        self.assertArrayAlmostEqual(result.data, expected)
+
+    def test_radius_table(self):
+        """Test that the number of grid cells is looked up in the radius
+        table, if supplied, and that the result is unchanged."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2),), num_time_points=1,
+            num_grid_points=5)
+        expected = SquareNeighbourhood().run(cube, self.RADIUS)
+        table = RadiusTable(self.RADIUS)
+        plugin = SquareNeighbourhood(radius_table=table)
+        plugin.run(cube, self.RADIUS)
+        result = plugin.run(cube, self.RADIUS)
+        self.assertEqual(len(table._grid_cells), 1)
+        self.assertEqual(table._grid_cells.hits, 1)
+        self.assertArrayAlmostEqual(result.data, expected.data)
+
     def test_negative_strides_re_mask_true(self):
         """Test that a cube still works if there are negative-strides."""
         data = np.array(
@@ -1033,6 +413,18 @@ class Test_run(IrisTest):
         result = SquareNeighbourhood().run(cube, self.RADIUS)
         self.assertArrayAlmostEqual(result.data, expected_array)
 
+    def test_masked_array_input_unchanged(self):
+        """Test that the run method does not modify the data of a cube
+        containing masked data."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2),), num_time_points=1,
+            num_grid_points=5)
+        cube.data = np.ma.masked_where(cube.data == 0, cube.data)
+        expected = cube.data.copy()
+        SquareNeighbourhood().run(cube, self.RADIUS)
+        self.assertIsInstance(cube.data, np.ma.MaskedArray)
+        self.assertArrayEqual(cube.data.mask, expected.mask)
+
     def test_masked_array_re_mask_false(self):
         """Test that the run method produces a cube with correct data when a
            cube containing masked data is passed in."""
@@ -1236,6 +628,69 @@ class Test_run(IrisTest):
         self.assertArrayAlmostEqual(result.data[0, 0], expected_1)
         self.assertArrayAlmostEqual(result.data[0, 1], expected_2)
 
+    def test_multiple_realizations_and_times_sum(self):
+        """Test that the 4-point neighbourhood sums are calculated
+        separately for each realization and time when the input cube has
+        multiple realizations and times."""
+        cube = set_up_cube(
+            zero_point_indices=(
+                (0, 0, 2, 2), (1, 0, 3, 3), (0, 1, 0, 0), (1, 1, 2, 1)),
+            num_time_points=2, num_grid_points=5, num_realization_points=2)
+        expected = np.array(
+            [[[[9., 9., 9., 9., 9.],
+               [9., 8., 8., 8., 9.],
+               [9., 8., 8., 8., 9.],
+               [9., 8., 8., 8., 9.],
+               [9., 9., 9., 9., 9.]],
+              [[5., 7., 9., 9., 9.],
+               [7., 8., 9., 9., 9.],
+               [9., 9., 9., 9., 9.],
+               [9., 9., 9., 9., 9.],
+               [9., 9., 9., 9., 9.]]],
+             [[[9., 9., 9., 9., 9.],
+               [9., 9., 9., 9., 9.],
+               [9., 9., 8., 8., 8.],
+               [9., 9., 8., 8., 8.],
+               [9., 9., 8., 8., 8.]],
+              [[9., 9., 9., 9., 9.],
+               [8., 8., 8., 9., 9.],
+               [8., 8., 8., 9., 9.],
+               [8., 8., 8., 9., 9.],
+               [9., 9., 9., 9., 9.]]]])
+        result = SquareNeighbourhood(sum_or_fraction="sum").run(
+            cube, self.RADIUS)
+        self.assertArrayAlmostEqual(result.data, expected)
+
+    def test_multiple_times_nan_sum(self):
+        """Test that the 4-point neighbourhood sums are calculated
+        separately for each time, with NaNs at different locations at each
+        time treated as zero and restored in the result."""
+        cube = set_up_cube(
+            zero_point_indices=((0, 0, 2, 2), (0, 1, 3, 3), (0, 2, 0, 0)),
+            num_time_points=3, num_grid_points=5)
+        cube.data[0, 0, 0, 0] = np.nan
+        cube.data[0, 1, 1, 1] = np.nan
+        cube.data[0, 2, 2, 3] = np.nan
+        expected = np.array(
+            [[[[np.nan, 7., 9., 9., 9.],
+               [7., 7., 8., 8., 9.],
+               [9., 8., 8., 8., 9.],
+               [9., 8., 8., 8., 9.],
+               [9., 9., 9., 9., 9.]],
+              [[8., 8., 8., 9., 9.],
+               [8., np.nan, 8., 9., 9.],
+               [8., 8., 7., 8., 8.],
+               [9., 9., 8., 8., 8.],
+               [9., 9., 8., 8., 8.]],
+              [[5., 7., 9., 9., 9.],
+               [7., 8., 8., 8., 8.],
+               [9., 9., 8., np.nan, 8.],
+               [9., 9., 8., 8., 8.],
+               [9., 9., 9., 9., 9.]]]])
+        result = SquareNeighbourhood(sum_or_fraction="sum").run(
+            cube, self.RADIUS)
+        self.assertArrayAlmostEqual(result.data, expected)
+
     def test_metadata(self):
         """Test that a cube with correct metadata is produced by the run
         method."""
@@ -1250,5 +705,179 @@ class Test_run(IrisTest):
         self.assertDictEqual(result.attributes, cube.attributes)
 
 
+class Test__neighbourhood_total_from_padded(IrisTest):
+
+    """Test for calculating the neighbourhood sum or fraction from a padded
+    array."""
+
+    def setUp(self):
+        """Set up a padded array and the expected results for tests. The
+        padded array is a 5x5 array of ones with a zero at the centre point,
+        padded with a halo of width 1."""
+        self.padded = np.ones((9, 9))
+        self.padded[4, 4] = 0.
+        self.expected_sum = np.array(
+            [[9., 9., 9., 9., 9.],
+             [9., 8., 8., 8., 9.],
+             [9., 8., 8., 8., 9.],
+             [9., 8., 8., 8., 9.],
+             [9., 9., 9., 9., 9.]])
+        self.width = 1
+
+    def test_basic_fraction(self):
+        """Test that the correct data is produced when the neighbourhood is
+        calculated where the sum_or_fraction option is set to "fraction"."""
+        result = SquareNeighbourhood()._neighbourhood_total_from_padded(
+            self.padded[np.newaxis], [(1, 1)], self.width, self.width)
+        self.assertEqual(result.shape, (1, 5, 5))
+        self.assertArrayAlmostEqual(result[0], self.expected_sum / 9.)
+
+    def test_basic_sum(self):
+        """Test that the correct data is produced when the neighbourhood is
+        calculated where the sum_or_fraction option is set to "sum"."""
+        result = SquareNeighbourhood(
+            sum_or_fraction="sum")._neighbourhood_total_from_padded(
+                self.padded[np.newaxis], [(1, 1)], self.width, self.width)
+        self.assertArrayAlmostEqual(result[0], self.expected_sum)
+
+    def test_multiple_realizations_and_times(self):
+        """Test that the neighbourhood is calculated for all slices of an
+        array with realization and time dimensions in a single call."""
+        padded = np.array([[[self.padded, self.padded]] * 3])
+        result = SquareNeighbourhood(
+            sum_or_fraction="sum")._neighbourhood_total_from_padded(
+                padded, [(1, 1)], self.width, self.width)
+        expected = np.array([[[self.expected_sum, self.expected_sum]] * 3])
+        self.assertEqual(result.shape, (1, 3, 2, 5, 5))
+        self.assertArrayAlmostEqual(result, expected)
+
+    def test_different_neighbourhood_sizes(self):
+        """Test that each index along the leading dimension uses its own
+        neighbourhood size, while the halo of the largest neighbourhood is
+        removed from all of them."""
+        padded = np.array([self.padded, self.padded])
+        result = SquareNeighbourhood(
+            sum_or_fraction="sum")._neighbourhood_total_from_padded(
+                padded, [(1, 1), (0, 0)], self.width, self.width)
+        self.assertArrayAlmostEqual(result[0], self.expected_sum)
+        self.assertArrayAlmostEqual(result[1], self.padded[2:-2, 2:-2])
+
+    def test_nan(self):
+        """Test that NaNs are treated as zero when calculating the
+        neighbourhood, and are restored at their original locations."""
+        padded = self.padded.copy()
+        padded[2, 2] = np.nan
+        expected = np.array(
+            [[np.nan, 8., 9., 9., 9.],
+             [8., 7., 8., 8., 9.],
+             [9., 8., 8., 8., 9.],
+             [9., 8., 8., 8., 9.],
+             [9., 9., 9., 9., 9.]]) / 9.
+        result = SquareNeighbourhood()._neighbourhood_total_from_padded(
+            padded[np.newaxis], [(1, 1)], self.width, self.width)
+        self.assertArrayAlmostEqual(result[0], expected)
+
+    def test_multiple_times_nan(self):
+        """Test that NaNs at different locations at different times are
+        restored at their own locations."""
+        padded = np.array([self.padded] * 2)
+        padded[0, 2, 2] = np.nan
+        padded[1, 3, 3] = np.nan
+        result = SquareNeighbourhood(
+            sum_or_fraction="sum")._neighbourhood_total_from_padded(
+                padded[np.newaxis], [(1, 1)], self.width, self.width)
+        expected = np.array(
+            [[[np.nan, 8., 9., 9., 9.],
+              [8., 7., 8., 8., 9.],
+              [9., 8., 8., 8., 9.],
+              [9., 8., 8., 8., 9.],
+              [9., 9., 9., 9., 9.]],
+             [[8., 8., 8., 9., 9.],
+              [8., np.nan, 7., 8., 9.],
+              [8., 7., 7., 8., 9.],
+              [9., 8., 8., 8., 9.],
+              [9., 9., 9., 9., 9.]]])
+        self.assertArrayAlmostEqual(result[0], expected)
+
+    def test_boolean_array(self):
+        """Test that a boolean array, such as a mask, is cumulated as
+        integers, rather than saturating at True."""
+        result = SquareNeighbourhood(
+            sum_or_fraction="sum")._neighbourhood_total_from_padded(
+                self.padded.astype(bool)[np.newaxis], [(1, 1)],
+                self.width, self.width)
+        self.assertArrayAlmostEqual(result[0], self.expected_sum)
+
+    def test_float32_accumulated_as_float64(self):
+        """Test that float32 data is accumulated using float64, so that the
+        cumulative sums are not rounded to float32 precision."""
+        padded = np.full((1, 2001, 2001), 0.1, dtype=np.float32)
+        result = SquareNeighbourhood(
+            sum_or_fraction="sum")._neighbourhood_total_from_padded(
+                padded, [(1, 1)], self.width, self.width)
+        self.assertEqual(result.dtype, np.float64)
+        self.assertArrayAlmostEqual(
+            result[0, -1, -1], 9. * np.float64(np.float32(0.1)), decimal=6)
+
+
+class Test_run_multiple_radii(IrisTest):
+
+    """Test the run_multiple_radii method on the SquareNeighbourhood
+    class."""
+
+    def setUp(self):
+        """Set up a cube with two times."""
+        self.cube = set_up_cube(
+            zero_point_indices=((0, 0, 4, 4), (0, 1, 4, 4)),
+            num_time_points=2, num_grid_points=9)
+        self.radii = [2000, 4000]
+
+    def test_basic(self):
+        """Test that a cube with correct data is produced, when a different
+        radius is used for each time."""
+        expected = np.ones_like(self.cube.data)
+        expected[0, 0, 3:6, 3:6] = 8. / 9.
+        expected[0, 1, 2:7, 2:7] = 24. / 25.
+        result = SquareNeighbourhood().run_multiple_radii(
+            self.cube, self.radii)
+        self.assertIsInstance(result, Cube)
+        self.assertEqual(result.coord_dims("time"), (1,))
+        self.assertArrayAlmostEqual(result.data, expected)
+
+    def test_matches_run_for_each_time(self):
+        """Test that the result matches that from applying the run method to
+        each time separately, when a mask cube is used."""
+        self.cube.data[0, 1, 1:3, 6] = 0.
+        mask_cube = self.cube[0, 0].copy(data=np.ones((9, 9)))
+        mask_cube.data[1, 1:5] = 0.
+        mask_cube.data[5:, 7] = 0.
+        for re_mask in [True, False]:
+            plugin = SquareNeighbourhood(re_mask=re_mask)
+            result = plugin.run_multiple_radii(
+                self.cube.copy(), self.radii, mask_cube=mask_cube.copy())
+            for index, radius in enumerate(self.radii):
+                expected = plugin.run(
+                    self.cube[0, index].copy(), radius,
+                    mask_cube=mask_cube.copy())
+                self.assertArrayAlmostEqual(
+                    result.data[0, index], expected.data)
+
+    def test_scalar_time(self):
+        """Test that a cube with a scalar time coordinate is processed using
+        the single radius provided."""
+        cube = self.cube[:, 0]
+        expected = SquareNeighbourhood().run(cube.copy(), self.radii[0])
+        result = SquareNeighbourhood().run_multiple_radii(
+            cube, self.radii[:1])
+        self.assertArrayAlmostEqual(result.data, expected.data)
+
+    def test_radii_mismatch(self):
+        """Test that an exception is raised if the number of radii does not
+        match the number of times."""
+        msg = "The number of radii"
+        with self.assertRaisesRegexp(ValueError, msg):
+            SquareNeighbourhood().run_multiple_radii(self.cube, [2000])
+
+
 if __name__ == '__main__':
     unittest.main()
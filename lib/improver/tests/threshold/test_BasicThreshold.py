@@ -35,7 +35,7 @@ import unittest
 
 import numpy as np
 from cf_units import Unit
-from iris.coords import DimCoord
+from iris.coords import AuxCoord, DimCoord
 from iris.cube import Cube
 from iris.tests import IrisTest
 
@@ -80,6 +80,71 @@ class Test__repr__(IrisTest):
         self.assertEqual(result, msg)
 
 
+class Test_threshold_data(IrisTest):
+
+    """Test calculating the truth values for all thresholds at once."""
+
+    def setUp(self):
+        """Create data and thresholds, and a function to threshold the data
+        one threshold at a time."""
+        self.data = np.linspace(0., 4., 60, dtype=np.float32).reshape(3, 20)
+        self.thresholds = [0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 3.5]
+
+        def _threshold_each(plugin):
+            """Threshold the data one threshold at a time."""
+            result = []
+            for threshold in self.thresholds:
+                if plugin.fuzzy_factor is None:
+                    truth_value = self.data > threshold
+                else:
+                    lower_threshold = threshold * plugin.fuzzy_factor
+                    truth_value = (
+                        (self.data - lower_threshold) /
+                        ((threshold * (2. - plugin.fuzzy_factor)) -
+                         lower_threshold))
+                truth_value = np.clip(
+                    truth_value, 0., 1.).astype(plugin.dtype)
+                if plugin.below_thresh_ok:
+                    truth_value = 1. - truth_value
+                result.append(truth_value)
+            return np.array(result)
+
+        self.threshold_each = _threshold_each
+
+    def test_basic(self):
+        """Test that the thresholds are the leading dimension of the truth
+        values, which match those calculated one threshold at a time."""
+        plugin = Threshold(self.thresholds)
+        result = plugin.threshold_data(self.data, np.array(self.thresholds))
+        self.assertEqual(result.shape, (7, 3, 20))
+        self.assertArrayEqual(result, self.threshold_each(plugin))
+
+    def test_fuzzy_below(self):
+        """Test that fuzzy truth values below the thresholds match those
+        calculated one threshold at a time."""
+        plugin = Threshold(self.thresholds, fuzzy_factor=0.6,
+                           below_thresh_ok=True)
+        result = plugin.threshold_data(self.data, np.array(self.thresholds))
+        self.assertArrayEqual(result, self.threshold_each(plugin))
+
+    def test_dtype(self):
+        """Test that the truth values have the dtype of the plugin."""
+        plugin = Threshold(self.thresholds, fuzzy_factor=0.6,
+                           dtype=np.float32)
+        result = plugin.threshold_data(self.data, np.array(self.thresholds))
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayEqual(result, self.threshold_each(plugin))
+
+    def test_masked_data(self):
+        """Test that masked points are masked for every threshold."""
+        self.data = np.ma.masked_less(self.data, 0.2)
+        plugin = Threshold(self.thresholds, fuzzy_factor=0.6)
+        result = plugin.threshold_data(self.data, np.array(self.thresholds))
+        self.assertIsInstance(result, np.ma.MaskedArray)
+        for truth_value in result:
+            self.assertArrayEqual(truth_value.mask, self.data.mask)
+
+
 class Test_process(IrisTest):
 
     """Test the thresholding plugin."""
@@ -177,6 +242,25 @@ class Test_process(IrisTest):
         expected_result_array[0][0][2][2] = 1.0/3.0
         self.assertArrayAlmostEqual(result.data, expected_result_array)
 
+    def test_threshold_fuzzy_float32(self):
+        """Test that the thresholded data has the requested data type, when
+        a float32 working precision is requested."""
+        plugin = Threshold(
+            0.6, fuzzy_factor=self.fuzzy_factor, below_thresh_ok=True,
+            dtype=np.float32)
+        result = plugin.process(self.cube)
+        expected_result_array = np.ones((1, 1, 5, 5))
+        expected_result_array[0][0][2][2] = 2.0/3.0
+        self.assertEqual(result.dtype, np.float32)
+        self.assertArrayAlmostEqual(result.data, expected_result_array)
+
+    def test_threshold_float64(self):
+        """Test that the thresholded data is float64 by default."""
+        plugin = Threshold(0.1)
+        result = plugin.process(self.cube.copy(
+            data=self.cube.data.astype(np.float32)))
+        self.assertEqual(result.dtype, np.float64)
+
     def test_threshold_fuzzy_miss(self):
         """Test when a point is not within the fuzzy threshold area."""
         plugin = Threshold(2.0, fuzzy_factor=self.fuzzy_factor)
@@ -237,6 +321,44 @@ class Test_process(IrisTest):
         self.assertIsInstance(result, Cube)
         self.assertArrayAlmostEqual(result.data, expected_result_array)
 
+    def test_unsorted_thresholds(self):
+        """Test that the threshold coordinate is sorted if the thresholds are
+        not given in ascending order."""
+        thresholds = [0.6, 0.2, 0.4]
+        plugin = Threshold(thresholds)
+        result = plugin.process(self.cube)
+        expected = Threshold(sorted(thresholds)).process(self.cube)
+        self.assertArrayAlmostEqual(result.coord("threshold").points,
+                                    [0.2, 0.4, 0.6])
+        self.assertArrayAlmostEqual(result.data, expected.data)
+
+    def test_coordinates_kept(self):
+        """Test that the dimension, auxiliary and scalar coordinates of the
+        input cube are kept, following the threshold dimension."""
+        self.cube.add_aux_coord(
+            AuxCoord(np.arange(5), long_name="row_index"), 1)
+        self.cube.add_aux_coord(
+            AuxCoord(1, long_name="dummy_scalar_coord"))
+        plugin = Threshold([0.2, 0.4])
+        result = plugin.process(self.cube)
+        self.assertEqual(result.coord_dims("threshold"), (0,))
+        self.assertEqual(result.coord_dims("time"), (1,))
+        self.assertEqual(result.coord_dims("row_index"), (2,))
+        self.assertEqual(result.coord("dummy_scalar_coord"),
+                         self.cube.coord("dummy_scalar_coord"))
+        self.assertEqual(result.coord("threshold").units,
+                         self.cube.units)
+
+    def test_realization_first(self):
+        """Test that a realization dimension is moved before the threshold
+        dimension."""
+        self.cube.coord("time").rename("realization")
+        self.cube.coord("realization").units = "1"
+        plugin = Threshold([0.2, 0.4])
+        result = plugin.process(self.cube)
+        self.assertEqual(result.coord_dims("realization"), (0,))
+        self.assertEqual(result.coord_dims("threshold"), (1,))
+
     def test_threshold_below_fuzzy_miss(self):
         """Test not meeting the threshold in fuzzy below-threshold-mode."""
         plugin = Threshold(
@@ -256,6 +378,12 @@ class Test_process(IrisTest):
         with self.assertRaisesRegexp(ValueError, msg):
             plugin.process(self.cube)
 
+    def test_checked_for_nan(self):
+        """Test that the input cube is not scanned for NaNs if the caller
+        has already checked it."""
+        self.cube.data[0][2][2] = np.NAN
+        Threshold(0.1).process(self.cube, checked_for_nan=True)
+
     def test_threshold_zero_with_fuzzy_factor(self):
         """Test when a threshold of zero is used with a multiplicative
         fuzzy factor (invalid)."""
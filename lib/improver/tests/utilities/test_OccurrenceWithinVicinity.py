@@ -35,7 +35,7 @@ import unittest
 from cf_units import Unit
 import iris
 from iris.coords import DimCoord
-from iris.cube import Cube, CubeList
+from iris.cube import Cube
 from iris.tests import IrisTest
 
 import numpy as np
@@ -83,31 +83,17 @@ class Test__repr__(IrisTest):
     def test_basic(self):
         """Test that the __repr__ returns the expected string."""
         result = str(OccurrenceWithinVicinity(10000))
-        msg = ('<OccurrenceWithinVicinity: distance: 10000>')
+        msg = ('<OccurrenceWithinVicinity: distance: 10000; '
+               'circular: False>')
         self.assertEqual(result, msg)
 
-
-class Test_find_slices_over_coordinate(IrisTest):
-
-    """Test the find_slices_over_coordinate."""
-
-    def setUp(self):
-        """Set up the cube."""
-        self.distance = 2000
-        self.cube = set_up_thresholded_cube()
-
-    def test_basic(self):
-        """Test that a _SliceIterator is returned for iterating."""
-        result = OccurrenceWithinVicinity(
-                     self.distance).find_slices_over_coordinate(
-                         self.cube, "realization")
-        self.assertIsInstance(result, iris.cube._SliceIterator)
-
-    def test_missing_coord(self):
-        """Test that a CubeList is returned for iterating."""
-        result = OccurrenceWithinVicinity(
-            self.distance).find_slices_over_coordinate(self.cube, "foo")
-        self.assertIsInstance(result, CubeList)
+    def test_circular(self):
+        """Test that the __repr__ returns the expected string for a
+        circular vicinity."""
+        result = str(OccurrenceWithinVicinity(10000, circular=True))
+        msg = ('<OccurrenceWithinVicinity: distance: 10000; '
+               'circular: True>')
+        self.assertEqual(result, msg)
 
 
 class Test_maximum_within_vicinity(IrisTest):
@@ -185,6 +171,51 @@ class Test_maximum_within_vicinity(IrisTest):
         self.assertIsInstance(result, Cube)
         self.assertArrayAlmostEqual(result.data, expected)
 
+    def test_circular(self):
+        """Test for binary events to determine where there is an occurrence
+        within a circular vicinity."""
+        expected = np.array(
+            [[1., 1., 1., 1., 0.],
+             [1., 1., 1., 1., 1.],
+             [0., 1., 1., 1., 1.],
+             [0., 0., 1., 1., 1.],
+             [0., 0., 0., 1., 0.]])
+        data = np.zeros((1, 1, 5, 5))
+        data[0, 0, 0, 1] = 1.0
+        data[0, 0, 2, 3] = 1.0
+        y_dimension_values = np.arange(0.0, 10000.0, 2000.0)
+        cube = set_up_cube(data, "lwe_precipitation_rate", "m s-1",
+                           y_dimension_values=y_dimension_values,
+                           x_dimension_values=y_dimension_values)
+        cube = cube[0, 0, :, :]
+        distance = 4000.0
+        result = OccurrenceWithinVicinity(
+            distance, circular=True).maximum_within_vicinity(cube)
+        self.assertIsInstance(result, Cube)
+        self.assertArrayAlmostEqual(result.data, expected)
+
+    def test_leading_dimensions(self):
+        """Test that all leading dimensions are processed at once, without
+        spreading occurrences between them."""
+        data = np.zeros((2, 2, 5, 5))
+        data[0, 1, 0, 1] = 1.0
+        data[1, 0, 2, 3] = 0.5
+        y_dimension_values = np.arange(0.0, 10000.0, 2000.0)
+        cube = set_up_cube(data, "lwe_precipitation_rate", "m s-1",
+                           realizations=np.array([0, 1]),
+                           timesteps=np.array([402192.5, 402195.5]),
+                           y_dimension_values=y_dimension_values,
+                           x_dimension_values=y_dimension_values)
+        plugin = OccurrenceWithinVicinity(self.distance)
+        result = plugin.maximum_within_vicinity(cube)
+        self.assertIsInstance(result, Cube)
+        self.assertEqual(result.shape, cube.shape)
+        self.assertArrayAlmostEqual(result.data[0, 0], np.zeros((5, 5)))
+        self.assertArrayAlmostEqual(result.data[1, 1], np.zeros((5, 5)))
+        for index in [(0, 1), (1, 0)]:
+            expected = plugin.maximum_within_vicinity(cube[index]).data
+            self.assertArrayAlmostEqual(result.data[index], expected)
+
 
 class Test_process(IrisTest):
 
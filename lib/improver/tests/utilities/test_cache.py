@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Unit tests for the utilities.cache.LRUCache class."""
+
+import unittest
+
+from iris.tests import IrisTest
+
+from improver.utilities.cache import LRUCache
+
+
+class Test__repr__(IrisTest):
+
+    """Test the repr method."""
+
+    def test_basic(self):
+        """Test that the __repr__ returns the expected string."""
+        cache = LRUCache(3)
+        cache.lookup("a", lambda: 1)
+        cache.lookup("a", lambda: 1)
+        result = str(cache)
+        msg = '<LRUCache: max_size: 3; size: 1; hits: 1; misses: 1>'
+        self.assertEqual(result, msg)
+
+
+class Test_lookup(IrisTest):
+
+    """Test looking up entries within the cache."""
+
+    def test_hits_and_misses(self):
+        """Test that entries are only created on a miss, and that the hits
+        and misses are counted."""
+        cache = LRUCache(3)
+        created = []
+
+        def _create():
+            """Create an entry, recording that it has been created."""
+            created.append(1)
+            return len(created)
+
+        results = [cache.lookup("a", _create) for _ in range(3)]
+        self.assertEqual(results, [1, 1, 1])
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 1)
+
+    def test_error_not_cached(self):
+        """Test that an error raised whilst creating an entry is propagated,
+        and that nothing is cached."""
+        cache = LRUCache(3)
+
+        def _create():
+            """Fail to create an entry."""
+            raise ValueError("Failed")
+
+        with self.assertRaisesRegexp(ValueError, "Failed"):
+            cache.lookup("a", _create)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.lookup("a", lambda: 1), 1)
+        self.assertEqual(cache.misses, 2)
+
+    def test_least_recently_used_discarded(self):
+        """Test that the least recently used entry is discarded once the
+        maximum size is exceeded."""
+        cache = LRUCache(2)
+        cache.lookup("a", lambda: 1)
+        cache.lookup("b", lambda: 2)
+        cache.lookup("a", lambda: 1)
+        cache.lookup("c", lambda: 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.lookup("a", lambda: 10), 1)
+        self.assertEqual(cache.lookup("b", lambda: 20), 20)
+        self.assertEqual(cache.misses, 4)
+
+
+class Test_clear(IrisTest):
+
+    """Test clearing the cache."""
+
+    def test_basic(self):
+        """Test that clearing the cache removes the entries and resets the
+        counters."""
+        cache = LRUCache(3)
+        cache.lookup("a", lambda: 1)
+        cache.lookup("a", lambda: 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.misses, 0)
+        self.assertEqual(cache.lookup("a", lambda: 2), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -39,7 +39,7 @@ from iris.tests import IrisTest
 from iris.exceptions import CoordinateNotFoundError
 
 from improver.utilities.cube_checker import (
-    check_for_x_and_y_axes, check_cube_coordinates,
+    check_for_x_and_y_axes, check_cube_coordinates, check_for_nan,
     find_dimension_coordinate_mismatch,
     find_percentile_coordinate)
 from improver.tests.nbhood.nbhood.test_NeighbourhoodProcessing import (
@@ -172,6 +172,61 @@ class Test_check_cube_coordinates(IrisTest):
             check_cube_coordinates(cube, new_cube)
 
 
+class Test_check_for_nan(IrisTest):
+
+    """Test whether a cube contains NaNs."""
+
+    def setUp(self):
+        """Set up a cube."""
+        self.cube = set_up_cube()
+
+    def test_no_nan(self):
+        """Test that no exception is raised if there are no NaNs, and that
+        the cube is not modified."""
+        check_for_nan(self.cube)
+        self.assertFalse(hasattr(self.cube, "_checked_for_nan"))
+
+    def test_nan(self):
+        """Test that an exception is raised if there is a NaN."""
+        self.cube.data[0, 0, 15, 15] = np.nan
+        msg = "NaN detected in input cube data"
+        with self.assertRaisesRegexp(ValueError, msg):
+            check_for_nan(self.cube)
+
+    def test_nan_in_later_chunk(self):
+        """Test that a NaN is found when the data is checked in chunks."""
+        self.cube.data[0, 0, 15, 15] = np.nan
+        msg = "NaN detected in input cube data"
+        with self.assertRaisesRegexp(ValueError, msg):
+            check_for_nan(self.cube, chunk_size=7)
+
+    def test_masked_nan(self):
+        """Test that masked NaNs are ignored."""
+        self.cube.data[0, 0, 15, 15] = np.nan
+        self.cube.data = np.ma.masked_invalid(self.cube.data)
+        check_for_nan(self.cube, chunk_size=7)
+
+    def test_integer_data(self):
+        """Test that no exception is raised for integer data."""
+        self.cube.data = self.cube.data.astype(np.int32)
+        check_for_nan(self.cube)
+
+    def test_nan_written_after_check(self):
+        """Test that a NaN written into the data in place after a previous
+        check is detected."""
+        check_for_nan(self.cube)
+        self.cube.data[0, 0, 15, 15] = np.nan
+        msg = "NaN detected in input cube data"
+        with self.assertRaisesRegexp(ValueError, msg):
+            check_for_nan(self.cube)
+
+    def test_checked(self):
+        """Test that the data is not scanned if the caller has already
+        checked it."""
+        self.cube.data[0, 0, 15, 15] = np.nan
+        check_for_nan(self.cube, checked=True)
+
+
 class Test_find_dimension_coordinate_mismatch(IrisTest):
 
     """Test if two cubes have the dimension coordinates."""
@@ -56,6 +56,7 @@ from improver.utilities.cube_manipulation import (
     compare_attributes,
     compare_coords,
     build_coordinate,
+    cube_with_added_dimension,
     add_renamed_cell_method)
 
 from improver.tests.ensemble_calibration.ensemble_calibration.\
@@ -1238,6 +1239,60 @@ class Test_build_coordinate(IrisTest):
         self.assertArrayAlmostEqual(result.points, np.array([0.5]))
 
 
+class Test_cube_with_added_dimension(IrisTest):
+    """Class to test the cube_with_added_dimension function"""
+
+    def setUp(self):
+        """Set up input cube and new coordinate for tests"""
+        self.cube = set_up_temperature_cube()
+        self.cube.add_aux_coord(
+            AuxCoord(np.arange(3), long_name="level"),
+            self.cube.coord_dims("realization"))
+        self.new_coord = DimCoord([10., 20.], long_name="threshold",
+                                  units="K")
+
+    def test_leading_dimension(self):
+        """Test that by default the new coordinate is the leading dimension,
+        that the coordinates and metadata of the input cube are kept, and
+        that the data is not copied."""
+        data = np.zeros((2,) + self.cube.shape)
+        result = cube_with_added_dimension(self.cube, data, self.new_coord)
+        self.assertIs(result.data, data)
+        self.assertEqual(result.coord_dims("threshold"), (0,))
+        self.assertEqual(result.metadata, self.cube.metadata)
+        for coord in self.cube.coords():
+            self.assertEqual(result.coord(coord.name()), coord)
+            self.assertEqual(
+                result.coord_dims(coord.name()),
+                tuple(dim + 1 for dim in self.cube.coord_dims(coord)))
+
+    def test_given_dims(self):
+        """Test that the dimensions of the input cube are placed as
+        requested, with the new coordinate in the remaining dimension."""
+        dims = [0, 2, 3, 4]
+        shape = list(self.cube.shape)
+        shape.insert(1, 2)
+        data = np.zeros(shape)
+        result = cube_with_added_dimension(
+            self.cube, data, self.new_coord, dims=dims)
+        self.assertEqual(result.coord_dims("threshold"), (1,))
+        self.assertEqual(result.coord_dims("realization"), (0,))
+        self.assertEqual(result.coord_dims("level"), (0,))
+        self.assertEqual(
+            result.coord_dims(self.cube.coord(axis="x").name()), (4,))
+
+    def test_metadata_not_shared(self):
+        """Test that modifying the metadata of the new cube does not modify
+        the input cube."""
+        data = np.zeros((2,) + self.cube.shape)
+        result = cube_with_added_dimension(self.cube, data, self.new_coord)
+        result.attributes["new"] = "value"
+        result.coord("realization").points = [5, 6, 7]
+        self.assertNotIn("new", self.cube.attributes)
+        self.assertArrayEqual(self.cube.coord("realization").points,
+                              [0, 1, 2])
+
+
 class Test_add_renamed_cell_method(IrisTest):
     """Class to test the add_renamed_cell_method function"""
 
@@ -33,13 +33,15 @@
 
 import unittest
 import numpy as np
+import scipy.ndimage
 
 from iris.tests import IrisTest
 
 from improver.tests.nbhood.nbhood.test_BaseNeighbourhoodProcessing import (
     set_up_cube, set_up_cube_lat_long)
 from improver.utilities.spatial import (
-    check_if_grid_is_equal_area, convert_distance_into_number_of_grid_cells)
+    check_if_grid_is_equal_area, convert_distance_into_number_of_grid_cells,
+    maximum_within_circle, running_maximum)
 
 
 class Test_convert_distance_into_number_of_grid_cells(IrisTest):
@@ -161,5 +163,80 @@ class Test_check_if_grid_is_equal_area(IrisTest):
             check_if_grid_is_equal_area(cube)
 
 
+class Test_running_maximum(IrisTest):
+
+    """Test the running maximum along an axis."""
+
+    def test_basic(self):
+        """Test the running maximum along a 1d array, including windows
+        truncated at the edges."""
+        data = np.array([0., 3., 1., 0., 0., 2., 0.])
+        expected = np.array([3., 3., 3., 1., 2., 2., 2.])
+        result = running_maximum(data, 1)
+        self.assertArrayAlmostEqual(result, expected)
+
+    def test_zero_half_width(self):
+        """Test that a half width of zero returns a copy of the input."""
+        data = np.array([0., 3., 1.])
+        result = running_maximum(data, 0)
+        self.assertArrayAlmostEqual(result, data)
+        self.assertFalse(result is data)
+
+    def test_matches_maximum_filter(self):
+        """Test that the result matches a one dimensional maximum filter
+        along the requested axis for all leading dimensions at once."""
+        data = np.random.RandomState(0).rand(3, 11, 13)
+        for half_width in [1, 2, 5, 12]:
+            for axis in [1, 2]:
+                size = [1, 1, 1]
+                size[axis] = 2 * half_width + 1
+                expected = scipy.ndimage.filters.maximum_filter(
+                    data, size=size)
+                result = running_maximum(data, half_width, axis=axis)
+                self.assertArrayAlmostEqual(result, expected)
+
+    def test_integer_data(self):
+        """Test that integer data keeps its dtype and negative values are
+        not replaced by the padding."""
+        data = np.array([-5, -3, -7, -9, -8], dtype=np.int32)
+        expected = np.array([-3, -3, -3, -7, -8], dtype=np.int32)
+        result = running_maximum(data, 1)
+        self.assertEqual(result.dtype, np.int32)
+        self.assertArrayEqual(result, expected)
+
+
+class Test_maximum_within_circle(IrisTest):
+
+    """Test the maximum within a circle."""
+
+    def test_basic(self):
+        """Test that a single occurrence is spread over a circle."""
+        data = np.zeros((7, 7))
+        data[3, 3] = 1.
+        expected = np.array(
+            [[0., 0., 0., 1., 0., 0., 0.],
+             [0., 1., 1., 1., 1., 1., 0.],
+             [0., 1., 1., 1., 1., 1., 0.],
+             [1., 1., 1., 1., 1., 1., 1.],
+             [0., 1., 1., 1., 1., 1., 0.],
+             [0., 1., 1., 1., 1., 1., 0.],
+             [0., 0., 0., 1., 0., 0., 0.]])
+        result = maximum_within_circle(data, 3)
+        self.assertArrayAlmostEqual(result, expected)
+
+    def test_matches_maximum_filter(self):
+        """Test that the result matches a maximum filter with a circular
+        footprint for all leading dimensions at once."""
+        data = np.random.RandomState(0).rand(2, 9, 12)
+        for radius in [1, 2, 4, 10]:
+            y_offsets, x_offsets = np.ogrid[-radius:radius + 1,
+                                            -radius:radius + 1]
+            footprint = x_offsets**2 + y_offsets**2 <= radius**2
+            expected = scipy.ndimage.filters.maximum_filter(
+                data, footprint=footprint[np.newaxis])
+            result = maximum_within_circle(data, radius)
+            self.assertArrayAlmostEqual(result, expected)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -35,6 +35,8 @@ import numpy as np
 import iris
 from cf_units import Unit
 from improver.spotdata.extract_data import ExtractData
+from improver.utilities.cube_checker import check_for_nan
+from improver.utilities.cube_manipulation import cube_with_added_dimension
 
 
 class BasicThreshold(object):
@@ -50,7 +52,7 @@ class BasicThreshold(object):
     """
 
     def __init__(self, thresholds, fuzzy_factor=None,
-                 below_thresh_ok=False):
+                 below_thresh_ok=False, dtype=np.float64):
         """Set up for processing an in-or-out of threshold binary field.
 
         Args:
@@ -62,6 +64,9 @@ class BasicThreshold(object):
             below_thresh_ok : boolean
                 True to count points as significant if *below* the threshold,
                 False to count points as significant if *above* the threshold.
+            dtype : numpy dtype
+                Data type of the thresholded data, e.g. np.float32 to halve
+                the memory required. Defaults to np.float64.
 
         Raises:
             ValueError: If a threshold of 0.0 is requested when using a fuzzy
@@ -87,6 +92,7 @@ class BasicThreshold(object):
 
         self.fuzzy_factor = fuzzy_factor
         self.below_thresh_ok = below_thresh_ok
+        self.dtype = dtype
 
     def __repr__(self):
         """Represent the configured plugin instance as a string."""
@@ -95,7 +101,111 @@ class BasicThreshold(object):
             'below_thresh_ok: {}>'
         ).format(self.thresholds, self.fuzzy_factor, self.below_thresh_ok)
 
-    def process(self, input_cube):
+    def sorted_thresholds(self):
+        """Return the thresholds in ascending order, as they would be by
+        concatenating a cube for each threshold.
+
+        Returns:
+            thresholds : numpy.ndarray
+                One dimensional array of the thresholds.
+        """
+        return np.array(sorted(self.thresholds))
+
+    def threshold_data(self, data, thresholds):
+        """Calculate the truth values for all the thresholds at once, by
+        broadcasting the data against the thresholds into a single output
+        array. The truth values may or may not be fuzzy depending upon if a
+        fuzzy_factor is supplied.
+
+        Args:
+            data : numpy.ndarray
+                Data to threshold.
+            thresholds : numpy.ndarray
+                One dimensional array of the thresholds.
+
+        Returns:
+            truth_value : numpy.ndarray
+                Array of the truth values, with the thresholds as the leading
+                dimension followed by the dimensions of the data, and with
+                the dtype of the plugin. Masked data gives a masked array,
+                with each point masked for all the thresholds.
+        """
+        mask = None
+        if isinstance(data, np.ma.MaskedArray):
+            mask = np.ma.getmaskarray(data)
+            data = data.data
+        # The thresholds are converted to the precision in which each
+        # threshold would be applied to the data as a scalar.
+        if np.issubdtype(data.dtype, np.floating):
+            work_dtype = data.dtype
+        else:
+            work_dtype = np.float64
+        shape = (len(thresholds),) + (1,)*data.ndim
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+
+        if self.fuzzy_factor is None:
+            truth_value = np.empty(shape[:1] + data.shape, dtype=self.dtype)
+            np.greater(data, thresholds.astype(work_dtype).reshape(shape),
+                       out=truth_value)
+        else:
+            lower_threshold = thresholds * self.fuzzy_factor
+            denominator = (
+                (thresholds * (2. - self.fuzzy_factor)) - lower_threshold)
+            lower_threshold = lower_threshold.astype(work_dtype)
+            denominator = denominator.astype(work_dtype)
+            truth_value = np.empty(shape[:1] + data.shape, dtype=work_dtype)
+            np.subtract(data, lower_threshold.reshape(shape), out=truth_value)
+            np.divide(truth_value, denominator.reshape(shape),
+                      out=truth_value)
+            np.clip(truth_value, 0., 1., out=truth_value)
+            truth_value = truth_value.astype(self.dtype, copy=False)
+        if self.below_thresh_ok:
+            np.subtract(1., truth_value, out=truth_value)
+
+        if mask is not None:
+            truth_value = np.ma.masked_array(
+                truth_value,
+                mask=np.zeros(truth_value.shape, dtype=bool) | mask)
+        return truth_value
+
+    def make_threshold_cube(self, input_cube, data, thresholds):
+        """Create the thresholded cube from the truth values, with the
+        metadata of the input cube adjusted to describe the probabilities of
+        being above or below the thresholds.
+
+        Args:
+            input_cube : iris.cube.Cube
+                Cube which has been thresholded.
+            data : numpy.ndarray
+                Truth values, with the thresholds as the leading dimension
+                followed by the dimensions of the input cube. The array is
+                used without being copied.
+            thresholds : numpy.ndarray
+                Points of the threshold coordinate.
+
+        Returns:
+            cube : iris.cube.Cube
+                Cube containing the truth values, with a leading threshold
+                dimension, unless a realization dimension is moved before
+                it.
+        """
+        cube = cube_with_added_dimension(
+            input_cube, data,
+            iris.coords.DimCoord(thresholds, long_name="threshold",
+                                 units=input_cube.units))
+
+        # TODO: Correct when formal cf-standards exists
+        # Force the metadata to temporary conventions
+        if self.below_thresh_ok:
+            cube.attributes.update({'relative_to_threshold': 'below'})
+        else:
+            cube.attributes.update({'relative_to_threshold': 'above'})
+        cube.rename("probability_of_{}".format(cube.name()))
+        cube.units = Unit(1)
+
+        return ExtractData.make_stat_coordinate_first(cube)
+
+    def process(self, input_cube, checked_for_nan=False):
         """Convert each point to a truth value based on provided threshold
         values. The truth value may or may not be fuzzy depending upon if a
         fuzzy_factor is supplied.
@@ -103,6 +213,10 @@ class BasicThreshold(object):
         Args:
             input_cube : iris.cube.Cube
                 Cube to threshold. The code is dimension-agnostic.
+            checked_for_nan : boolean
+                If True, the input cube is known not to contain NaNs, e.g.
+                because it has already been checked by the caller, and is
+                not scanned again.
 
         Returns:
             cube : iris.cube.Cube
@@ -119,43 +233,9 @@ class BasicThreshold(object):
             ValueError: if a np.nan value is detected within the input cube.
 
         """
-        thresholded_cubes = iris.cube.CubeList()
-        if np.isnan(input_cube.data).any():
-            raise ValueError("Error: NaN detected in input cube data")
-
-        for threshold in self.thresholds:
-            cube = input_cube.copy()
-            if self.fuzzy_factor is None:
-                truth_value = cube.data > threshold
-            else:
-                lower_threshold = threshold * self.fuzzy_factor
-                truth_value = (
-                    (cube.data - lower_threshold) /
-                    ((threshold * (2. - self.fuzzy_factor)) - lower_threshold)
-                )
-            truth_value = np.clip(truth_value, 0., 1.).astype(np.float64)
-            if self.below_thresh_ok:
-                truth_value = 1. - truth_value
-            cube.data = truth_value
-
-            coord = iris.coords.DimCoord(threshold,
-                                         long_name="threshold",
-                                         units=cube.units)
-            cube.add_aux_coord(coord)
-            cube = iris.util.new_axis(cube, 'threshold')
-            thresholded_cubes.append(cube)
-
-        cube, = thresholded_cubes.concatenate()
-
-        # TODO: Correct when formal cf-standards exists
-        # Force the metadata to temporary conventions
-        if self.below_thresh_ok:
-            cube.attributes.update({'relative_to_threshold': 'below'})
-        else:
-            cube.attributes.update({'relative_to_threshold': 'above'})
-        cube.rename("probability_of_{}".format(cube.name()))
-        cube.units = Unit(1)
-
-        cube = ExtractData.make_stat_coordinate_first(cube)
+        check_for_nan(input_cube, checked=checked_for_nan)
 
+        thresholds = self.sorted_thresholds()
+        truth_value = self.threshold_data(input_cube.data, thresholds)
+        cube = self.make_threshold_cube(input_cube, truth_value, thresholds)
         return cube
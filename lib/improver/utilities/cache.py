@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# (C) British Crown Copyright 2017 Met Office.
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE
+# LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR
+# CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF
+# SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS
+# INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN
+# CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE)
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+"""Provides a bounded cache for reusing expensive calculations."""
+
+from collections import OrderedDict
+import threading
+
+
+class LRUCache(object):
+    """
+    Bounded, least recently used cache. Entries are created on demand by a
+    function supplied when they are looked up, and the least recently used
+    entries are discarded once the cache exceeds its maximum size.
+
+    The numbers of hits and misses are counted, to allow the effectiveness
+    of the cache to be profiled. The cache may be shared between threads.
+    """
+
+    def __init__(self, max_size):
+        """
+        Initialise the cache.
+
+        Args:
+            max_size (integer):
+                Maximum number of entries held within the cache. The least
+                recently used entries are discarded once this is exceeded.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        """Represent the configured cache as a string."""
+        result = '<{}: max_size: {}; size: {}; hits: {}; misses: {}>'
+        return result.format(
+            type(self).__name__, self.max_size, len(self._entries),
+            self.hits, self.misses)
+
+    def __len__(self):
+        """Return the number of entries held within the cache."""
+        return len(self._entries)
+
+    def clear(self):
+        """Remove all entries from the cache and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def lookup(self, key, create):
+        """
+        Return the cached entry for a key, creating and caching the entry
+        if it is not already cached.
+
+        Args:
+            key (tuple):
+                Hashable key identifying the entry.
+            create (callable):
+                Function, taking no arguments, that creates the entry.
+                Any exception raised is propagated, and nothing is cached.
+
+        Returns:
+            entry:
+                The cached entry, which is shared with other callers and
+                should not be modified.
+        """
+        with self._lock:
+            if key in self._entries:
+                entry = self._entries.pop(key)
+                self._entries[key] = entry
+                self.hits += 1
+                return entry
+            self.misses += 1
+        entry = create()
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
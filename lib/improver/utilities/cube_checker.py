@@ -34,6 +34,9 @@ import iris
 from iris.exceptions import CoordinateNotFoundError, InvalidCubeError
 import numpy as np
 
+# Number of values checked for NaNs at a time.
+NAN_CHECK_CHUNK_SIZE = 2**20
+
 
 def check_for_x_and_y_axes(cube):
     """
@@ -56,6 +59,64 @@ def check_for_x_and_y_axes(cube):
             raise ValueError(msg)
 
 
+def _contains_nan(data, chunk_size=NAN_CHECK_CHUNK_SIZE):
+    """
+    Check whether an array contains any NaNs, ignoring masked points. The
+    array is checked in chunks, so that only a chunk sized boolean array is
+    created, and the check stops at the first chunk containing a NaN.
+
+    Args:
+        data : numpy.ndarray or numpy.ma.MaskedArray
+            Array to be checked.
+        chunk_size : integer
+            Number of values checked at a time.
+
+    Returns:
+        contains_nan : boolean
+            True if any unmasked values are NaN.
+    """
+    if not np.issubdtype(data.dtype, np.floating):
+        return False
+    values = np.ma.getdata(data).ravel()
+    mask = None
+    if np.ma.is_masked(data):
+        mask = np.ma.getmaskarray(data).ravel()
+    for start in range(0, values.size, chunk_size):
+        nan_chunk = np.isnan(values[start:start + chunk_size])
+        if mask is not None:
+            nan_chunk &= ~mask[start:start + chunk_size]
+        if nan_chunk.any():
+            return True
+    return False
+
+
+def check_for_nan(cube, checked=False, chunk_size=NAN_CHECK_CHUNK_SIZE):
+    """
+    Check that the data of a cube does not contain NaNs, otherwise raise an
+    error. The data is scanned in chunks, stopping at the first NaN. Callers
+    that know the data cannot contain NaNs, e.g. because it has been
+    produced by thresholding data that has already been checked, can set
+    checked to True, so that the data only needs to be scanned once within
+    a sequence of plugins.
+
+    Args:
+        cube : Iris.cube.Cube
+            Cube to be checked for NaNs.
+        checked : boolean
+            If True, the data is known not to contain NaNs and is not
+            scanned.
+        chunk_size : integer
+            Number of values checked at a time.
+
+    Raises:
+        ValueError : Raise an error if a NaN is detected in the cube data.
+    """
+    if checked:
+        return
+    if _contains_nan(cube.data, chunk_size=chunk_size):
+        raise ValueError("Error: NaN detected in input cube data")
+
+
 def check_cube_coordinates(cube, new_cube, exception_coordinates=None):
     """Find and promote to dimension coordinates any scalar coordinates in
     new_cube that were originally dimension coordinates in the progenitor
@@ -30,6 +30,7 @@
 # POSSIBILITY OF SUCH DAMAGE.
 """ Provides support utilities for cube manipulation."""
 
+import copy
 import warnings
 import numpy as np
 
@@ -585,6 +586,51 @@ def build_coordinate(data, long_name=None,
     return crd_out
 
 
+def cube_with_added_dimension(cube, data, new_coord, dims=None):
+    """
+    Create a cube with the metadata and coordinates of the input cube and
+    an additional dimension described by a new dimension coordinate. The
+    data is used without being copied.
+
+    Args:
+        cube : iris.cube.Cube
+            Cube to copy the metadata and coordinates from.
+        data : numpy.ndarray
+            Data for the new cube, with one more dimension than the input
+            cube.
+        new_coord : iris.coords.DimCoord
+            Dimension coordinate describing the additional dimension.
+        dims : list (optional)
+            Dimension of the new cube corresponding to each dimension of the
+            input cube. The remaining dimension of the new cube is the
+            additional dimension. If None, the additional dimension is the
+            leading dimension, followed by the dimensions of the input cube.
+
+    Returns:
+        new_cube : iris.cube.Cube
+            Cube containing the data, with the additional coordinate.
+    """
+    if dims is None:
+        dims = list(range(1, cube.ndim + 1))
+    new_dim, = set(range(data.ndim)) - set(dims)
+    new_cube = iris.cube.Cube(
+        data, **copy.deepcopy(cube.metadata)._asdict())
+    new_cube.add_dim_coord(new_coord, new_dim)
+    coord_mapping = {}
+    for coord in cube.dim_coords:
+        new_dim_coord = coord.copy()
+        new_cube.add_dim_coord(new_dim_coord, dims[cube.coord_dims(coord)[0]])
+        coord_mapping[id(coord)] = new_dim_coord
+    for coord in cube.aux_coords:
+        new_aux_coord = coord.copy()
+        new_cube.add_aux_coord(
+            new_aux_coord, [dims[dim] for dim in cube.coord_dims(coord)])
+        coord_mapping[id(coord)] = new_aux_coord
+    for factory in cube.aux_factories:
+        new_cube.add_aux_factory(factory.updated(coord_mapping))
+    return new_cube
+
+
 def add_renamed_cell_method(cube, orig_cell_method, new_cell_method_name):
     """A function that modifies the input cube by adding a new cell method,
        which is a renamed version of the input cell_method.
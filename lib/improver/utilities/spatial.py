@@ -32,10 +32,9 @@
 
 import copy
 from iris.coords import CellMethod, DimCoord
-from iris.cube import Cube, CubeList
+from iris.cube import Cube
 from iris.exceptions import CoordinateNotFoundError
 import numpy as np
-import scipy.ndimage
 
 # Maximum radius of the neighbourhood width in grid cells.
 MAX_DISTANCE_IN_GRID_CELLS = 500
@@ -259,11 +258,111 @@ class DifferenceBetweenAdjacentGridSquares(object):
         return diff_along_x_cube, diff_along_y_cube
 
 
+def _lowest_value(dtype):
+    """Return the smallest value representable by the given dtype, for use
+    as padding that can never be selected by a maximum."""
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'f':
+        return -np.inf
+    if dtype.kind == 'b':
+        return False
+    return np.iinfo(dtype).min
+
+
+def running_maximum(data, half_width, axis=-1):
+    """
+    Calculate the maximum within a window of 2 * half_width + 1 points
+    centred on each point along the requested axis, using the van Herk /
+    Gil-Werman algorithm. The array is split into blocks of the window
+    width and the maximum of each window is the maximum of a suffix maximum
+    of one block and a prefix maximum of the next, so that the cost per
+    point is independent of the window width. All other dimensions are
+    processed at the same time. Windows are truncated at the edges of the
+    array, which for a maximum matches the reflective boundary used by
+    scipy.ndimage.filters.maximum_filter.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        Array to be filtered.
+    half_width : integer
+        Number of points either side of the central point included within
+        the window.
+    axis : integer
+        Axis along which to calculate the running maximum.
+
+    Returns
+    -------
+    result : numpy.ndarray
+        Array of the same shape and dtype as the input, containing the
+        maximum within the window centred on each point.
+
+    """
+    if half_width == 0:
+        return data.copy()
+    width = 2 * half_width + 1
+    data = np.moveaxis(data, axis, -1)
+    n_points = data.shape[-1]
+    n_blocks = -(-(n_points + 2 * half_width) // width)
+    padded = np.full(data.shape[:-1] + (n_blocks * width,),
+                     _lowest_value(data.dtype), dtype=data.dtype)
+    padded[..., half_width:half_width + n_points] = data
+    blocks = padded.reshape(data.shape[:-1] + (n_blocks, width))
+    prefix_max = np.maximum.accumulate(blocks, axis=-1).reshape(padded.shape)
+    suffix_max = np.maximum.accumulate(
+        blocks[..., ::-1], axis=-1)[..., ::-1].reshape(padded.shape)
+    result = np.maximum(suffix_max[..., :n_points],
+                        prefix_max[..., width - 1:width - 1 + n_points])
+    return np.moveaxis(result, -1, axis)
+
+
+def maximum_within_circle(data, radius):
+    """
+    Calculate the maximum within a circle of the given radius in grid cells
+    centred on each point of the trailing two (y, x) dimensions of an array.
+    The circle includes points for which x**2 + y**2 <= radius**2. It is
+    built from one running maximum along x for each distinct row half-width
+    within the circle, which are then shifted along y and combined, so the
+    cost per point grows linearly with the radius. Points beyond the edges
+    of the array are ignored.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        Array to be filtered, with y and x as the trailing dimensions.
+    radius : integer
+        Radius of the circle in grid cells.
+
+    Returns
+    -------
+    result : numpy.ndarray
+        Array of the same shape and dtype as the input, containing the
+        maximum within the circle centred on each point.
+
+    """
+    row_maxima = {}
+    result = None
+    for y_offset in range(min(radius + 1, data.shape[-2])):
+        half_width = int(np.sqrt(radius * radius - y_offset * y_offset))
+        if half_width not in row_maxima:
+            row_maxima[half_width] = running_maximum(
+                data, half_width, axis=-1)
+        row_max = row_maxima[half_width]
+        if result is None:
+            result = row_max.copy()
+            continue
+        np.maximum(result[..., y_offset:, :], row_max[..., :-y_offset, :],
+                   out=result[..., y_offset:, :])
+        np.maximum(result[..., :-y_offset, :], row_max[..., y_offset:, :],
+                   out=result[..., :-y_offset, :])
+    return result
+
+
 class OccurrenceWithinVicinity(object):
 
     """Calculate whether a phenomenon occurs within the specified distance."""
 
-    def __init__(self, distance):
+    def __init__(self, distance, circular=False):
         """
         Initialise the class.
 
@@ -272,37 +371,20 @@ class OccurrenceWithinVicinity(object):
                 Distance in metres used to define the vicinity within which to
                 search for an occurrence.
 
+        Keyword Args:
+            circular : boolean
+                If True, the vicinity is a circle of radius distance around
+                each grid point. If False, the vicinity is a square with sides
+                of 2 * distance centred on each grid point.
+
         """
         self.distance = distance
+        self.circular = circular
 
     def __repr__(self):
         """Represent the configured plugin instance as a string."""
-        result = ('<OccurrenceWithinVicinity: distance: {}>')
-        return result.format(self.distance)
-
-    @staticmethod
-    def find_slices_over_coordinate(cube, coord_name):
-        """
-        Try slicing over the given coordinate. If the requested coordinate is
-        not a dimension coordinate then still return an iterable.
-
-        Args:
-            cube : iris.cube.Cube
-                Cube to be sliced.
-            coord_name : String
-                Name of the coordinate to be used for slicing.
-
-        Returns:
-            slices_over_coord : iris.cube._SliceIterator or iris.cube.CubeList
-                Iterable returned to slice over the requested coordinate, or
-                a CubeList.
-        """
-        try:
-            cube.coord(coord_name, dim_coords=True)
-            slices_over_coord = cube.slices_over(coord_name)
-        except CoordinateNotFoundError:
-            slices_over_coord = CubeList([cube])
-        return slices_over_coord
+        result = ('<OccurrenceWithinVicinity: distance: {}; circular: {}>')
+        return result.format(self.distance, self.circular)
 
     def maximum_within_vicinity(self, cube):
         """
@@ -314,7 +396,8 @@ class OccurrenceWithinVicinity(object):
 
         Args:
             cube : Iris.cube.Cube
-                Thresholded cube.
+                Thresholded cube. All dimensions other than the x and y
+                dimensions are processed together.
 
         Returns:
             cube : Iris.cube.Cube
@@ -329,21 +412,28 @@ class OccurrenceWithinVicinity(object):
             convert_distance_into_number_of_grid_cells(
                 cube, self.distance, MAX_DISTANCE_IN_GRID_CELLS))
 
-        # Convert the number of grid points (e.g. grid_cell_y) represented
-        # by self.distance, e.g. where grid_cell_y=1 is an increment to
-        # a central point, into grid_cells which is the total number of points
-        # within the defined vicinity along the y axis e.g grid_cells=3.
-        grid_cells = (2 * grid_cell_y) + 1
-
-        max_cube = cube.copy()
-        max_cube.data = (
-            scipy.ndimage.filters.maximum_filter(cube.data, size=grid_cells))
+        # Move the y and x dimensions to the end, so that all other
+        # dimensions are processed together in a single call.
+        y_dim, = cube.coord_dims(cube.coord(axis="y"))
+        x_dim, = cube.coord_dims(cube.coord(axis="x"))
+        data = np.moveaxis(cube.data, [y_dim, x_dim], [-2, -1])
+        if self.circular:
+            data = maximum_within_circle(data, grid_cell_y)
+        else:
+            # A square vicinity is separable, so filter along y then x.
+            data = running_maximum(data, grid_cell_y, axis=-2)
+            data = running_maximum(data, grid_cell_y, axis=-1)
+
+        max_cube = cube.copy(
+            data=np.moveaxis(data, [-2, -1], [y_dim, x_dim]))
         return max_cube
 
     def process(self, cube):
         """
-        Ensure that the cube passed to the maximum_within_vicinity method is
-        2d and subsequently merged back together.
+        Calculate the occurrences within a vicinity for all xy 2d slices of
+        the cube at once. Realization and time dimensions of length one are
+        demoted to scalar coordinates. The order of the remaining dimensions
+        is preserved.
 
         Args:
             cube : Iris.cube.Cube
@@ -352,16 +442,11 @@ class OccurrenceWithinVicinity(object):
         Returns:
             Iris.cube.Cube
                 Cube containing the occurrences within a vicinity for each
-                xy 2d slice, which have been merged back together.
+                xy 2d slice.
 
         """
-        slices_over_realization = (
-            self.find_slices_over_coordinate(cube, "realization"))
-
-        max_cubes = CubeList([])
-        for realization_slice in slices_over_realization:
-            slices_over_time = (
-                self.find_slices_over_coordinate(realization_slice, "time"))
-            for time_slice in slices_over_time:
-                max_cubes.append(self.maximum_within_vicinity(time_slice))
-        return max_cubes.merge_cube()
+        for coord_name in ["realization", "time"]:
+            if (cube.coords(coord_name, dim_coords=True) and
+                    len(cube.coord(coord_name).points) == 1):
+                cube = next(cube.slices_over(coord_name))
+        return self.maximum_within_vicinity(cube)
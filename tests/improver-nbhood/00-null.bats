@@ -38,6 +38,9 @@ usage: improver-nbhood [-h]
                        [--ens_factor ENS_FACTOR] [--weighted_mode]
                        [--sum_or_fraction {sum,fraction}] [--re_mask]
                        [--percentiles PERCENTILES [PERCENTILES ...]]
+                       [--sliding_window]
+                       [--max_histogram_bins MAX_HISTOGRAM_BINS]
+                       [--workers WORKERS] [--tile_size TILE_SIZE]
                        [--input_mask_filepath INPUT_MASK_FILE]
                        NEIGHBOURHOOD_OUTPUT NEIGHBOURHOOD_SHAPE INPUT_FILE
                        OUTPUT_FILE
@@ -38,6 +38,9 @@ usage: improver-nbhood [-h]
                        [--ens_factor ENS_FACTOR] [--weighted_mode]
                        [--sum_or_fraction {sum,fraction}] [--re_mask]
                        [--percentiles PERCENTILES [PERCENTILES ...]]
+                       [--sliding_window]
+                       [--max_histogram_bins MAX_HISTOGRAM_BINS]
+                       [--workers WORKERS] [--tile_size TILE_SIZE]
                        [--input_mask_filepath INPUT_MASK_FILE]
                        NEIGHBOURHOOD_OUTPUT NEIGHBOURHOOD_SHAPE INPUT_FILE
                        OUTPUT_FILE
@@ -50,14 +53,13 @@ positional arguments:
                         processing. If "probabilities" is selected, the mean
                         probability within a neighbourhood is calculated. If
                         "percentiles" is selected, then the percentiles are
-                        calculated within a neighbourhood. Calculating
-                        percentiles from a neighbourhood is only supported for
-                        a circular neighbourhood. Options: "probabilities",
-                        "percentiles".
+                        calculated within a neighbourhood. Options:
+                        "probabilities", "percentiles".
   NEIGHBOURHOOD_SHAPE   The shape of the neighbourhood to apply in
-                        neighbourhood processing. Only a "circular"
-                        neighbourhood shape is applicable for calculating
-                        "percentiles" output. Options: "circular", "square".
+                        neighbourhood processing. "percentiles" output from a
+                        "square" neighbourhood is calculated from histograms
+                        of the neighbourhood, at a cost that is independent of
+                        the radius. Options: "circular", "square".
   INPUT_FILE            A path to an input NetCDF file to be processed.
   OUTPUT_FILE           The output path for the processed NetCDF.
 
@@ -102,10 +104,31 @@ optional arguments:
   --percentiles PERCENTILES [PERCENTILES ...]
                         Calculate values at the specified percentiles from the
                         neighbourhood surrounding each grid point.
+  --sliding_window      Calculate "percentiles" output using a histogram of
+                        the neighbourhood that is updated as the neighbourhood
+                        slides across the field. The memory required is then
+                        independent of the neighbourhood radius. Only
+                        applicable for a "circular" neighbourhood shape.
+  --max_histogram_bins MAX_HISTOGRAM_BINS
+                        The maximum number of histogram bins used when
+                        calculating "percentiles" output from histograms, i.e.
+                        for a "square" neighbourhood or with --sliding_window.
+                        Fields with more unique values than this give
+                        approximate percentiles; fewer bins are faster but
+                        less accurate. Optional, defaults to 256.
+  --workers WORKERS     The number of worker threads used to process the
+                        realizations and times of the input cube concurrently.
+                        Optional, defaults to 1.
+  --tile_size TILE_SIZE
+                        If set, the domain is split into tiles of at most this
+                        number of grid points along each axis, which are
+                        processed independently with a halo of the
+                        neighbourhood radius, so that the memory required is
+                        bounded by the tile size.
   --input_mask_filepath INPUT_MASK_FILE
                         A path to an input mask NetCDF file to be used to mask
                         the input file. This is currently only supported for
-                        square neighbourhoods.
+                        "probabilities" output.
 __HELP__
   [[ "$output" == "$expected" ]]
 }